@@ -0,0 +1 @@
+# SlabStak Backend Benchmarks
@@ -0,0 +1,82 @@
+"""
+Benchmark: CompBatch vs per-comp CompData models
+
+Measures CPU time and allocated memory to ingest N comps, compute the
+floor/average/ceiling and build the top-20 response comps.
+
+Run with: python -m benchmarks.bench_comp_batch [num_comps]
+"""
+
+import sys
+import time
+import random
+import tracemalloc
+from datetime import datetime, timezone
+
+from services.comp_batch import CompBatch
+from services.market_data import CompData, comps_from_batch
+
+
+def make_raw_items(count: int):
+    """Parsed-eBay-like tuples (title, price, end_time, condition, url)"""
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    return [
+        (
+            f"2011 Topps Update Mike Trout #US175 PSA {rng.choice([8, 9, 10])} Rookie",
+            round(rng.uniform(80, 400), 2),
+            datetime.fromtimestamp(base + rng.randint(0, 90 * 86400), tz=timezone.utc).isoformat(),
+            "Graded",
+            f"https://www.ebay.com/itm/{100000000 + i}",
+        )
+        for i in range(count)
+    ]
+
+
+def run_models(items):
+    comps = [
+        CompData(title=t, price=p, sold_date=datetime.fromisoformat(d), condition=c,
+                 grade="PSA 10", url=u, source="ebay")
+        for t, p, d, c, u in items
+    ]
+    prices = sorted(c.price for c in comps if c.price > 0)
+    stats = (prices[int(len(prices) * 0.1)], sum(prices) / len(prices), prices[int(len(prices) * 0.9)])
+    return stats, comps[:20]
+
+
+def run_batch(items):
+    batch = CompBatch(utc=True)
+    for t, p, d, c, u in items:
+        batch.append(t, p, datetime.fromisoformat(d).timestamp(), condition=c,
+                     grade="PSA 10", url=u, source="ebay")
+    stats = batch.price_stats()
+    return stats, comps_from_batch(batch, limit=20)
+
+
+def measure(label, fn, items, repeats=5):
+    cpu_times = []
+    for _ in range(repeats):
+        start = time.process_time()
+        fn(items)
+        cpu_times.append(time.process_time() - start)
+
+    tracemalloc.start()
+    result = fn(items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"{label:<20} cpu {min(cpu_times) * 1000:8.1f} ms   peak mem {peak / 1024 / 1024:7.2f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    items = make_raw_items(count)
+
+    print(f"Ingest + price stats + top-20 response for {count:,} comps")
+    measure("CompData models", run_models, items)
+    measure("CompBatch", run_batch, items)
+
+
+if __name__ == "__main__":
+    main()
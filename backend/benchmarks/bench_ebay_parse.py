@@ -0,0 +1,64 @@
+"""
+Benchmark: streaming findCompletedItems parser vs response.json() + walk
+
+Parses a generated 100-item page delivered in network-sized chunks and
+reports parse time and peak allocated memory for both approaches.
+
+Run with: python -m benchmarks.bench_ebay_parse [items] [chunk_bytes]
+"""
+
+import sys
+import json
+import time
+import tracemalloc
+
+from benchmarks.ebay_fixtures import make_finding_item, make_finding_response
+from services.ebay_stream import FindingItemParser, extract_item
+
+
+def parse_full(chunks):
+    """The previous path: buffer the whole body, json.loads, walk the lists"""
+    data = json.loads(b"".join(chunks))
+    search_result = data.get("findCompletedItemsResponse", [{}])[0]
+    items = search_result.get("searchResult", [{}])[0].get("item", [])
+    return [extract_item(item) for item in items]
+
+
+def parse_streaming(chunks):
+    parser = FindingItemParser()
+    records = []
+    for chunk in chunks:
+        records.extend(parser.feed(chunk))
+    records.extend(parser.close())
+    return records
+
+
+def measure(label, fn, chunks, repeats=20):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(chunks)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<22} parse {min(timings) * 1000:7.2f} ms   peak mem {peak / 1024:8.1f} KiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 16 * 1024
+
+    body = json.dumps(make_finding_response([make_finding_item(i) for i in range(count)])).encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    print(f"{count} items, {len(body) / 1024:.0f} KiB body, {len(chunks)} chunks of {chunk_size} bytes")
+    measure("json() + walk", parse_full, chunks)
+    measure("streaming parser", parse_streaming, chunks)
+
+
+if __name__ == "__main__":
+    main()
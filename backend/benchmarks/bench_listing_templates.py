@@ -0,0 +1,60 @@
+"""
+Benchmark: template listing engine throughput
+
+Renders listings for a synthetic inventory on every platform with
+ListingRequest.mode = "template" (no API calls) and reports listings/second.
+
+Run with: python -m benchmarks.bench_listing_templates [cards]
+"""
+
+import sys
+import time
+import random
+
+from services.listing_generator import ListingGenerator, ListingRequest
+
+PLAYERS = ["Mike Trout", "Shohei Ohtani", "Giannis Antetokounmpo", "Patrick Mahomes", "Victor Wembanyama"]
+SETS = ["2011 Topps Update", "2018 Topps Chrome", "2013-14 Panini Prizm Basketball", "2017 Panini National Treasures"]
+GRADES = ["PSA 10", "PSA 9", "BGS 9.5", "SGC 10", None]
+PARALLELS = [None, None, "Gold Refractor", "Silver Prizm", "Rookie Patch Autograph"]
+
+
+def make_inventory(count: int):
+    rng = random.Random(0)
+    return [
+        ListingRequest(
+            player=rng.choice(PLAYERS),
+            set_name=rng.choice(SETS),
+            year=rng.choice([None, 2011, 2018, 2023]),
+            grade=rng.choice(GRADES),
+            parallel=rng.choice(PARALLELS),
+            serial_number=rng.choice([None, None, f"{rng.randint(1, 25)}/25"]),
+            platform=platform,
+            tone=rng.choice(["professional", "casual", "enthusiastic"]),
+            estimated_value=round(rng.uniform(20, 2000), 2),
+            mode="template",
+        )
+        for platform in ListingGenerator.PLATFORM_SPECS
+        for _ in range(count // len(ListingGenerator.PLATFORM_SPECS))
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    generator = ListingGenerator()
+    inventory = make_inventory(count)
+
+    start = time.perf_counter()
+    listings = [generator.render_template_listing(card) for card in inventory]
+    elapsed = time.perf_counter() - start
+
+    over_limit = sum(
+        1 for listing in listings
+        if listing.character_counts["title"] > listing.character_counts["title_max"]
+    )
+    print(f"{len(listings)} template listings in {elapsed * 1000:.0f} ms "
+          f"({len(listings) / elapsed:,.0f} listings/s, {over_limit} titles over limit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: /market throughput and tail latency under increasing concurrency
+
+Drives POST /market on a running backend with a fixed number of in-flight
+requests per level and reports throughput, p50/p95/p99 latency and errors.
+Point the backend at benchmarks/ebay_stub_server.py to exercise the eBay
+provider (token, streaming parse, pricing) without touching eBay.
+
+Each request asks for a different card by default so the snapshot cache
+does not hide the provider; pass --cards N to cycle through N cards instead.
+
+Run with: python -m benchmarks.bench_market_path --url http://127.0.0.1:8000 --levels 1,8,32,128
+"""
+
+import time
+import asyncio
+import argparse
+from typing import List
+
+import httpx
+import numpy as np
+
+
+def card_payload(index: int, cards: int) -> dict:
+    card = index % cards if cards else index
+    return {
+        "player": f"Bench Player {card}",
+        "set_name": "2011 Topps Update",
+        "year": 2011,
+        "grade_estimate": "PSA 10",
+        "provider": "auto",
+    }
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, total: int, offset: int, cards: int):
+    latencies: List[float] = []
+    errors = 0
+    sources = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            index = offset + next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=card_payload(index, cards))
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                source = response.json().get("source", "?")
+                sources[source] = sources.get(source, 0) + 1
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    timings = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    source_mix = ", ".join(f"{name}={count}" for name, count in sorted(sources.items()))
+    print(
+        f"{concurrency:>6} {total / elapsed:10.1f} {p50:9.1f} {p95:9.1f} {p99:9.1f} {errors:7d}   {source_mix}"
+    )
+
+
+async def run(args):
+    url = args.url.rstrip("/") + "/market"
+    levels = [int(level) for level in args.levels.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        # Warm up: token fetch, connection pool, imports
+        await client.post(url, json=card_payload(-1, 0))
+
+        print(f"{args.requests} requests per level against {url}")
+        print(f"{'conc':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}   sources")
+        offset = 0
+        for concurrency in levels:
+            await run_level(client, url, concurrency, args.requests, offset, args.cards)
+            offset += args.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /market at increasing concurrency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--levels", default="1,8,32,128", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per level")
+    parser.add_argument("--cards", type=int, default=0, help="Distinct cards to cycle (0 = all distinct)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
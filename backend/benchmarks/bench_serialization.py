@@ -0,0 +1,101 @@
+"""
+Benchmark: /market response serialization cost
+
+Compares the previous path (hand-built dict with isoformat() per comp, then
+FastAPI's jsonable_encoder + JSONResponse) against the fast path
+(market_snapshot_payload + orjson to raw bytes), with optional gzip.
+
+Run with: python -m benchmarks.bench_serialization [comps_per_response]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.market_data import CompData, MarketSnapshot
+from services.serialization import dumps, json_response, market_snapshot_payload
+
+
+def make_snapshot(num_comps: int) -> MarketSnapshot:
+    now = datetime.now(timezone.utc)
+    return MarketSnapshot(
+        source="ebay",
+        floor=90.0,
+        average=120.5,
+        ceiling=180.0,
+        listings_count=num_comps,
+        comps=[
+            CompData(
+                title=f"2011 Topps Update Mike Trout #US175 PSA 10 Rookie RC {i}",
+                price=100.0 + i,
+                sold_date=now - timedelta(hours=i),
+                condition="Graded",
+                grade="PSA 10",
+                url=f"https://www.ebay.com/itm/{110000000000 + i}",
+                source="ebay",
+            )
+            for i in range(num_comps)
+        ],
+        last_updated=now,
+        confidence="high",
+    )
+
+
+def legacy(snapshot, limit):
+    content = {
+        "source": snapshot.source,
+        "currency": snapshot.currency,
+        "floor": snapshot.floor,
+        "average": snapshot.average,
+        "ceiling": snapshot.ceiling,
+        "listings_count": snapshot.listings_count,
+        "confidence": snapshot.confidence,
+        "last_updated": snapshot.last_updated.isoformat(),
+        "comps": [
+            {
+                "title": c.title,
+                "price": c.price,
+                "sold_date": c.sold_date.isoformat(),
+                "condition": c.condition,
+                "grade": c.grade,
+                "url": c.url,
+                "source": c.source,
+            }
+            for c in snapshot.comps[:limit]
+        ],
+    }
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast(snapshot, limit):
+    return json_response(dumps(market_snapshot_payload(snapshot, comps_limit=limit))).body
+
+
+def fast_gzip(snapshot, limit):
+    body = dumps(market_snapshot_payload(snapshot, comps_limit=limit))
+    return json_response(body, accept_encoding="gzip", min_compress_bytes=0).body
+
+
+def measure(label, fn, snapshot, limit, iterations=2000):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = fn(snapshot, limit)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:8.1f} us/response   {len(body):6d} bytes")
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    snapshot = make_snapshot(max(limit, 20))
+
+    print(f"Serializing /market responses with {limit} comps")
+    measure("jsonable_encoder + json", legacy, snapshot, limit)
+    measure("orjson raw bytes", fast, snapshot, limit)
+    measure("orjson raw bytes + gzip", fast_gzip, snapshot, limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Generated eBay Finding API fixtures
+
+Builds findCompletedItems responses in eBay's JSON shape (every scalar
+wrapped in a single-element list) for benchmarks and the local stub server.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+
+def make_finding_item(
+    index: int,
+    keywords: str = "Mike Trout 2011 Topps Update",
+    rng: Optional[random.Random] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """One completed item, including the fields the market path ignores"""
+    rng = rng or random.Random(index)
+    now = now or datetime(2024, 6, 1, tzinfo=timezone.utc)
+    grade = rng.choice(["PSA 8", "PSA 9", "PSA 10"])
+    price = round(rng.uniform(60, 400), 2)
+    end_time = now - timedelta(minutes=rng.randint(10, 90 * 24 * 60))
+    item_id = str(110000000000 + index)
+
+    return {
+        "itemId": [item_id],
+        "title": [f"{keywords} #US175 {grade} Rookie RC"],
+        "globalId": ["EBAY-US"],
+        "primaryCategory": [{"categoryId": ["261328"], "categoryName": ["Sports Trading Cards"]}],
+        "galleryURL": [f"https://thumbs.ebaystatic.com/images/g/{item_id}/s-l140.jpg"],
+        "viewItemURL": [f"https://www.ebay.com/itm/{item_id}"],
+        "autoPay": ["true"],
+        "postalCode": ["100**"],
+        "location": ["New York,NY,USA"],
+        "country": ["US"],
+        "shippingInfo": [{
+            "shippingServiceCost": [{"@currencyId": "USD", "__value__": "4.99"}],
+            "shippingType": ["Flat"],
+            "shipToLocations": ["Worldwide"],
+        }],
+        "sellingStatus": [{
+            "currentPrice": [{"@currencyId": "USD", "__value__": f"{price:.2f}"}],
+            "convertedCurrentPrice": [{"@currencyId": "USD", "__value__": f"{price:.2f}"}],
+            "sellingState": ["EndedWithSales"],
+        }],
+        "listingInfo": [{
+            "bestOfferEnabled": ["false"],
+            "buyItNowAvailable": ["false"],
+            "startTime": [(end_time - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%S.000Z")],
+            "endTime": [end_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")],
+            "listingType": ["FixedPrice"],
+            "gift": ["false"],
+        }],
+        "returnsAccepted": ["false"],
+        "condition": [{"conditionId": ["2750"], "conditionDisplayName": ["Graded"]}],
+        "isMultiVariationListing": ["false"],
+        "topRatedListing": ["false"],
+    }
+
+
+def make_finding_response(
+    items: List[Dict[str, Any]],
+    page: int = 1,
+    entries_per_page: int = 100,
+    total_entries: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Wrap items in a findCompletedItemsResponse envelope"""
+    total_entries = len(items) if total_entries is None else total_entries
+    total_pages = max(1, -(-total_entries // entries_per_page))
+
+    return {
+        "findCompletedItemsResponse": [{
+            "ack": ["Success"],
+            "version": ["1.13.0"],
+            "timestamp": [datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")],
+            "searchResult": [{"@count": str(len(items)), "item": items}],
+            "paginationOutput": [{
+                "pageNumber": [str(page)],
+                "entriesPerPage": [str(entries_per_page)],
+                "totalPages": [str(total_pages)],
+                "totalEntries": [str(total_entries)],
+            }],
+            "itemSearchURL": ["https://www.ebay.com/sch/i.html"],
+        }]
+    }
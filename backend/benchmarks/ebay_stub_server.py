@@ -0,0 +1,154 @@
+"""
+Local eBay Finding/OAuth stand-in server
+
+Speaks just enough of eBay's API for EbayMarketProvider to run offline:
+- GET  /services/search/FindingService/v1 (findCompletedItems, JSON, paginated)
+- POST /identity/v1/oauth2/token (client credentials grant)
+- GET  /stats (request counters, for benchmarks)
+
+Items are generated deterministically per keywords (benchmarks.ebay_fixtures)
+or served from a recorded findCompletedItems response. Latency, page depth and
+failure rate are configurable.
+
+Run with: python -m benchmarks.ebay_stub_server --port 8081 --latency-ms 150
+
+Then start the backend against it:
+    EBAY_APP_ID=stub EBAY_CERT_ID=stub \\
+    EBAY_FINDING_URL=http://127.0.0.1:8081/services/search/FindingService/v1 \\
+    EBAY_AUTH_URL=http://127.0.0.1:8081/identity/v1/oauth2/token \\
+    uvicorn main:app --port 8000
+"""
+
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.ebay_fixtures import make_finding_item, make_finding_response
+
+FINDING_PATH = "/services/search/FindingService/v1"
+TOKEN_PATH = "/identity/v1/oauth2/token"
+
+
+def load_recorded_items(path: str) -> List[Dict[str, Any]]:
+    """Items from a recorded findCompletedItems JSON response"""
+    with open(path) as f:
+        data = json.load(f)
+    search_result = data["findCompletedItemsResponse"][0]
+    return search_result.get("searchResult", [{}])[0].get("item", [])
+
+
+def create_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    failure_rate: float = 0.0,
+    total_entries: int = 250,
+    recorded_items: Optional[List[Dict[str, Any]]] = None,
+    token_ttl: int = 7200,
+    seed: int = 0,
+) -> FastAPI:
+    """
+    Build the stub app
+
+    Args:
+        latency_ms: Base latency added to every Finding call
+        jitter_ms: Extra uniformly distributed latency (0..jitter_ms)
+        failure_rate: Fraction of Finding calls answered with HTTP 500
+        total_entries: Sold items available per keywords (generated mode)
+        recorded_items: Serve these items for every query instead of generating
+        token_ttl: expires_in of issued OAuth tokens (seconds)
+        seed: Seed for generated items and injected latency/failures
+    """
+    app = FastAPI(title="eBay stub")
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    stats = {"finding_calls": 0, "token_calls": 0, "failures": 0, "items_served": 0}
+    app.state.stats = stats
+
+    def page_items(keywords: str, start: int, stop: int) -> List[Dict[str, Any]]:
+        if recorded_items is not None:
+            return recorded_items[start:stop]
+        # Each item is seeded on its own so pages are stable across requests
+        return [
+            make_finding_item(i, keywords, rng=random.Random(f"{seed}:{keywords}:{i}"), now=now)
+            for i in range(start, stop)
+        ]
+
+    @app.get(FINDING_PATH)
+    async def find_completed_items(request: Request):
+        stats["finding_calls"] += 1
+        params = request.query_params
+
+        delay = latency_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if failure_rate and rng.random() < failure_rate:
+            stats["failures"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"errorMessage": [{"error": [{"errorId": ["10001"], "message": ["Stub failure"]}]}]},
+            )
+
+        keywords = params.get("keywords", "")
+        entries_per_page = max(1, min(int(params.get("paginationInput.entriesPerPage", 100)), 100))
+        page = max(1, int(params.get("paginationInput.pageNumber", 1)))
+        available = len(recorded_items) if recorded_items is not None else total_entries
+
+        start = min((page - 1) * entries_per_page, available)
+        stop = min(start + entries_per_page, available)
+        items = page_items(keywords, start, stop)
+        stats["items_served"] += len(items)
+
+        return make_finding_response(items, page=page, entries_per_page=entries_per_page, total_entries=available)
+
+    @app.post(TOKEN_PATH)
+    async def issue_token():
+        stats["token_calls"] += 1
+        return {
+            "access_token": f"stub-token-{stats['token_calls']}",
+            "expires_in": token_ttl,
+            "token_type": "Application Access Token",
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local eBay Finding/OAuth stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--total-entries", type=int, default=250)
+    parser.add_argument("--fixture", help="Recorded findCompletedItems JSON to serve")
+    parser.add_argument("--token-ttl", type=int, default=7200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        total_entries=args.total_entries,
+        recorded_items=load_recorded_items(args.fixture) if args.fixture else None,
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
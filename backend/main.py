@@ -1,10 +1,14 @@
 import os
+import asyncio
 import json
+import time
+import hashlib
 import logging
 from io import BytesIO
 from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from PIL import Image
 import pytesseract
@@ -14,6 +18,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+from services.serialization import dumps, etag_matches, json_response, market_snapshot_payload, sse_event
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -93,39 +99,12 @@ async def health():
         "status": "ok",
         "environment": ENVIRONMENT,
         "tesseract_configured": bool(TESSERACT_CMD),
-        "openai_configured": bool(OPENAI_API_KEY)
+        "openai_configured": bool(OPENAI_API_KEY),
+        "market_providers": market_service.get_provider_health(),
     }
 
-@app.post("/scan", response_model=ScanResponse)
-async def scan_card(file: UploadFile = File(...)):
-    """
-    Scan a card image using OCR and AI identification.
-
-    - Accepts image file (JPG, PNG, WEBP)
-    - Returns card details and valuation
-    """
-    logger.info(f"Processing scan for file: {file.filename}")
-
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
-
-    try:
-        contents = await file.read()
-        image = Image.open(BytesIO(contents)).convert("RGB")
-    except Exception as e:
-        logger.error(f"Failed to process image: {e}")
-        raise HTTPException(status_code=400, detail="Invalid or corrupted image file")
-
-    # Extract text via OCR
-    try:
-        raw_ocr = pytesseract.image_to_string(image)
-        logger.info(f"OCR extracted {len(raw_ocr)} characters")
-    except Exception as e:
-        logger.error(f"OCR failed: {e}")
-        raise HTTPException(status_code=500, detail="OCR processing failed")
-
-    instructions = '''
+# Output schema of /scan answers (the assistant's and a canary model's)
+SCAN_INSTRUCTIONS = '''
 You are a professional sports card grader and card market analyst.
 
 Input: OCR text from the front of a trading card or slab.
@@ -142,8 +121,87 @@ Task: Return STRICT JSON with keys:
 No commentary, no markdown, no extra keys. JSON only.
 '''
 
+
+def _record_scan_routing(raw_ocr: str, data: dict, latency_ms: float, usage, shadow: bool = True) -> None:
+    """Record the assistant's latency and tokens, and shadow a rollout candidate if sampled
+
+    Runs after the response is built; nothing here can fail or slow the scan.
+    """
+    try:
+        from ml.model_routing import model_router
+
+        model_router.record(
+            "card_identification",
+            f"assistant:{ASSISTANT_ID}",
+            "primary",
+            latency_ms=round(latency_ms, 2),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+        if shadow and model_router.registry.current()["models"]["card_identification"].get("rollout"):
+            from ml_routes import get_model_manager
+
+            get_model_manager().shadow_card_identification(
+                raw_ocr,
+                {
+                    "player": data.get("player"),
+                    "set_name": data.get("set_name"),
+                    "year": data.get("year"),
+                    "grade": data.get("grade_estimate"),
+                },
+            )
+    except Exception as e:
+        logger.warning(f"Scan routing metrics skipped: {e}")
+
+
+def _scan_route(routing_key: str) -> Optional[dict]:
+    """Canary/primary routing decision for a scan (None if routing is unavailable)"""
+    try:
+        from ml.model_routing import model_router
+
+        return model_router.choose("card_identification", routing_key=routing_key)
+    except Exception as e:
+        logger.warning(f"Scan routing skipped: {e}")
+        return None
+
+
+async def _identify_with_canary(raw_ocr: str, routing_key: str, route: dict) -> Optional[dict]:
+    """Answer a canary scan with the rollout candidate
+
+    The candidate gets the assistant's output schema. Returns the scan
+    fields, or None if the candidate failed or answered without a price
+    range or recommendation (recorded as a candidate error; the assistant
+    answers instead).
+    """
+    try:
+        from ml_routes import get_model_manager
+        from ml.model_manager import card_scan_fields
+
+        result = await asyncio.to_thread(
+            get_model_manager().identify_card_finetuned,
+            raw_ocr,
+            routing_key=routing_key,
+            route=route,
+            instructions=SCAN_INSTRUCTIONS,
+            validate=card_scan_fields,
+        )
+        logger.info(f"Canary scan answered by {route['model']}")
+        return card_scan_fields(result)
+    except Exception as e:
+        logger.warning(f"Canary scan failed, falling back to the assistant: {e}")
+        return None
+
+
+def _identify_with_assistant(raw_ocr: str):
+    """Identify a card with the OpenAI Assistant
+
+    Returns:
+        (parsed JSON answer, latency in ms, run usage)
+    """
+
     # Call OpenAI Assistant
     try:
+        started = time.perf_counter()
         thread = client.beta.threads.create(
             messages=[
                 {
@@ -158,7 +216,7 @@ No commentary, no markdown, no extra keys. JSON only.
         run = client.beta.threads.runs.create_and_poll(
             thread_id=thread.id,
             assistant_id=ASSISTANT_ID,
-            instructions=instructions
+            instructions=SCAN_INSTRUCTIONS
         )
 
         logger.info(f"Run completed with status: {run.status}")
@@ -175,6 +233,7 @@ No commentary, no markdown, no extra keys. JSON only.
 
         # Parse JSON response
         data = json.loads(content)
+        latency_ms = (time.perf_counter() - started) * 1000
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse AI response: {e}")
@@ -184,6 +243,49 @@ No commentary, no markdown, no extra keys. JSON only.
         logger.error(f"AI processing error: {e}")
         raise HTTPException(status_code=500, detail=f"AI processing failed: {str(e)}")
 
+    return data, latency_ms, getattr(run, "usage", None)
+
+
+@app.post("/scan", response_model=ScanResponse)
+async def scan_card(request: Request, file: UploadFile = File(...)):
+    """
+    Scan a card image using OCR and AI identification.
+
+    - Accepts image file (JPG, PNG, WEBP)
+    - Returns card details and valuation
+    - Scans in a model rollout's canary share are answered by the candidate
+      (keyed by image, so re-scanning the same image gets the same model)
+    """
+    logger.info(f"Processing scan for file: {file.filename}")
+
+    # Validate file type
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    try:
+        contents = await file.read()
+        image = Image.open(BytesIO(contents)).convert("RGB")
+    except Exception as e:
+        logger.error(f"Failed to process image: {e}")
+        raise HTTPException(status_code=400, detail="Invalid or corrupted image file")
+
+    # Extract text via OCR
+    try:
+        raw_ocr = pytesseract.image_to_string(image)
+        logger.info(f"OCR extracted {len(raw_ocr)} characters")
+    except Exception as e:
+        logger.error(f"OCR failed: {e}")
+        raise HTTPException(status_code=500, detail="OCR processing failed")
+
+    routing_key = hashlib.blake2b(contents, digest_size=8).hexdigest()
+    route = _scan_route(routing_key)
+    canary = route is not None and route["arm"] == "canary"
+
+    data = await _identify_with_canary(raw_ocr, routing_key, route) if canary else None
+    served_by_assistant = data is None
+    if served_by_assistant:
+        data, latency_ms, usage = _identify_with_assistant(raw_ocr)
+
     # Build response
     response = ScanResponse(
         player=data.get("player", "Unknown").strip(),
@@ -196,8 +298,15 @@ No commentary, no markdown, no extra keys. JSON only.
         raw_ocr=raw_ocr,
     )
 
+    if served_by_assistant:
+        # A request that fell back from the canary is not shadowed again
+        _record_scan_routing(raw_ocr, data, latency_ms, usage, shadow=not canary)
+
     logger.info(f"Successfully processed card: {response.player}")
-    return response
+    return json_response(
+        dumps(response.model_dump()),
+        accept_encoding=request.headers.get("accept-encoding"),
+    )
 
 
 
@@ -210,17 +319,14 @@ class MarketRequest(BaseModel):
 
 
 # Import market data service
-from services.market_data import market_service, MarketSnapshot as MarketSnapshotModel
+from services.market_data import market_service, snapshot_etag, MarketSnapshot as MarketSnapshotModel
 
+MARKET_COMPS_LIMIT = 10  # Return top 10 comps
+MARKET_CLIENT_MAX_AGE = int(os.getenv("MARKET_CLIENT_MAX_AGE", "60"))
 
-@app.post("/market")
-async def get_market_snapshot(req: MarketRequest):
-    """
-    Get real market data for a card.
 
-    Uses multiple providers (eBay, etc.) with automatic fallback.
-    Returns comparable sales and pricing statistics.
-    """
+async def _market_response(req: MarketRequest, request: Request, conditional: bool):
+    """Fetch a snapshot and answer with its ETag, or 304 if the client has it"""
     logger.info(f"Market data request: {req.player} - {req.set_name}")
 
     try:
@@ -232,40 +338,103 @@ async def get_market_snapshot(req: MarketRequest):
             provider=req.provider or "auto"
         )
 
-        # Convert to response format
-        response = {
-            "source": snapshot.source,
-            "currency": snapshot.currency,
-            "floor": snapshot.floor,
-            "average": snapshot.average,
-            "ceiling": snapshot.ceiling,
-            "listings_count": snapshot.listings_count,
-            "confidence": snapshot.confidence,
-            "last_updated": snapshot.last_updated.isoformat(),
-            "comps": [
-                {
-                    "title": comp.title,
-                    "price": comp.price,
-                    "sold_date": comp.sold_date.isoformat(),
-                    "condition": comp.condition,
-                    "grade": comp.grade,
-                    "url": comp.url,
-                    "source": comp.source
-                }
-                for comp in snapshot.comps[:10]  # Return top 10 comps
-            ]
+        etag = snapshot_etag(snapshot, comps_limit=MARKET_COMPS_LIMIT)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={MARKET_CLIENT_MAX_AGE}",
         }
 
+        if conditional and etag_matches(request.headers.get("if-none-match"), etag):
+            logger.info(f"Market data not modified: {etag}")
+            return Response(status_code=304, headers=headers)
+
+        # Encode once from the validated snapshot; skips jsonable_encoder
+        body = dumps(market_snapshot_payload(snapshot, comps_limit=MARKET_COMPS_LIMIT))
+
         logger.info(f"Market data returned: {snapshot.listings_count} listings from {snapshot.source}")
-        return response
+        return json_response(body, accept_encoding=request.headers.get("accept-encoding"), headers=headers)
 
     except Exception as e:
         logger.error(f"Market data request failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch market data: {str(e)}")
 
 
+@app.post("/market")
+async def get_market_snapshot(req: MarketRequest, request: Request):
+    """
+    Get real market data for a card.
+
+    Uses multiple providers (eBay, etc.) with automatic fallback.
+    Returns comparable sales and pricing statistics.
+    """
+    return await _market_response(req, request, conditional=False)
+
+
+@app.get("/market")
+async def get_market_snapshot_cacheable(
+    request: Request,
+    player: str,
+    set_name: str,
+    year: Optional[int] = None,
+    grade_estimate: Optional[str] = None,
+    provider: str = "auto"
+):
+    """
+    Cacheable form of POST /market.
+
+    Responses carry an ETag derived from the comp set and pricing results;
+    send it back in If-None-Match to get 304 Not Modified for unchanged cards.
+    """
+    req = MarketRequest(
+        player=player,
+        set_name=set_name,
+        year=year,
+        grade_estimate=grade_estimate,
+        provider=provider
+    )
+    return await _market_response(req, request, conditional=True)
+
+
+@app.on_event("shutdown")
+async def shutdown_market_service():
+    """Stop provider background tasks (e.g. eBay token renewal)"""
+    await market_service.close()
+
+
+# Training samples and production logs are written behind requests
+from ml.record_sink import record_sink
+
+
+@app.on_event("shutdown")
+async def stop_shadow_calls():
+    """Let in-flight shadow calls finish so their records reach the sink"""
+    try:
+        from ml.model_routing import model_router
+    except Exception:
+        return
+    await asyncio.to_thread(model_router.shutdown)
+
+
+@app.on_event("startup")
+async def start_record_sink():
+    """Start batching training data and production log writes"""
+    await record_sink.start()
+
+
+@app.on_event("shutdown")
+async def flush_record_sink():
+    """Flush queued training data and production logs"""
+    await record_sink.stop()
+
+
+@app.get("/market/metrics")
+async def get_market_metrics():
+    """Circuit breaker state, health score and rolling latency per market provider"""
+    return {"providers": market_service.get_provider_health()}
+
+
 # Import listing generator
-from services.listing_generator import listing_generator, ListingRequest as ListingGenRequest
+from services.listing_generator import listing_generator, ListingRequest as ListingGenRequest, MultiPlatformListingRequest
 
 
 @app.post("/generate-listing")
@@ -295,3 +464,99 @@ async def generate_listing(req: ListingGenRequest):
     except Exception as e:
         logger.error(f"Listing generation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate listing: {str(e)}")
+
+
+@app.post("/generate-listing/stream")
+async def generate_listing_stream(req: ListingGenRequest):
+    """
+    Stream a generated listing as server-sent events.
+
+    Emits `title` once the title is complete, `description` events carrying
+    text deltas, then `done` with the full listing (same shape as
+    POST /generate-listing). Failures after the stream starts arrive as an
+    `error` event.
+    """
+    logger.info(f"Streaming {req.platform} listing for {req.player}")
+
+    async def events():
+        try:
+            async for item in listing_generator.stream_listing(req):
+                yield sse_event(item["event"], item["data"])
+        except Exception as e:
+            logger.error(f"Listing stream failed: {e}")
+            yield sse_event("error", {"detail": f"Failed to generate listing: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/generate-listing/metrics")
+async def get_listing_metrics():
+    """Listing cache hit rate and occupancy, plus comp keyword index size"""
+    return {"cache": listing_generator.cache.stats(), "keyword_index": listing_generator.keyword_index.stats()}
+
+
+@app.post("/generate-listing/multi")
+async def generate_listing_multi(req: MultiPlatformListingRequest):
+    """
+    Generate listings for several platforms in one AI call.
+
+    Cross-listing on eBay, PWCC, WhatNot and COMC costs one round trip;
+    each title is validated against its own platform's limit.
+    """
+    try:
+        listings = await listing_generator.generate_multi_platform(req)
+        return {"listings": {platform: listing.model_dump() for platform, listing in listings.items()}}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Multi-platform listing generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate listings: {str(e)}")
+
+from services.bulk_listing import bulk_listing_service, BulkListingRequest
+
+
+def _bulk_job_response(job) -> dict:
+    """Bulk job state without the echoed card requests"""
+    response = job.model_dump(exclude={"cards"})
+    response["summary"] = job.summary()
+    return response
+
+
+@app.post("/generate-listing/bulk")
+async def generate_listing_bulk(req: BulkListingRequest):
+    """
+    Generate listings for many cards.
+
+    Small sets (up to BULK_SYNC_MAX_CARDS, mode "packed" or "auto") are
+    generated several cards per prompt and returned completed. Large sets
+    (mode "batch", or "auto" above that) are submitted as an OpenAI Batch job; poll
+    GET /generate-listing/bulk/{job_id} for per-card results.
+    """
+    logger.info(f"Bulk listing request for {len(req.cards)} cards ({req.mode})")
+
+    try:
+        job = await bulk_listing_service.create_job(req)
+        return _bulk_job_response(job)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Bulk listing generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate listings: {str(e)}")
+
+
+@app.get("/generate-listing/bulk/{job_id}")
+async def get_listing_bulk_job(job_id: str):
+    """Status and per-card results of a bulk listing job"""
+    try:
+        job = await bulk_listing_service.get_job(job_id)
+    except Exception as e:
+        logger.error(f"Bulk listing status check failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Failed to check batch status: {str(e)}")
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk listing job not found")
+    return _bulk_job_response(job)
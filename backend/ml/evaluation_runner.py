@@ -0,0 +1,318 @@
+"""
+Offline Evaluation Runner
+
+Runs candidate models over a held-out card identification set (e.g. the
+validation file from TrainingDataCollector.export_dataset) and scores them
+with ModelEvaluator.evaluate_card_identification:
+- All models and samples run concurrently, bounded by a concurrency limit
+  and a requests-per-minute token bucket
+- Responses are cached on disk by (model, messages, temperature), so
+  re-running an evaluation replays recorded answers instead of paying again
+- Accuracy is reported next to latency percentiles, token usage and
+  estimated inference cost per model
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ml.model_evaluator import ModelEvaluator
+
+# Inference pricing in USD per 1M tokens: (input, output)
+INFERENCE_PRICING = {
+    "ft:gpt-4o-mini": (0.30, 1.20),
+    "ft:gpt-3.5-turbo": (3.00, 6.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def inference_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of a completion (longest matching pricing prefix)"""
+    for prefix in sorted(INFERENCE_PRICING, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = INFERENCE_PRICING[prefix]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def load_eval_cases(path: str, limit: Optional[int] = None) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """Read (prompt messages, ground truth) pairs from a fine-tuning JSONL file
+
+    The final assistant message of each conversation is the ground truth;
+    the messages before it are sent to the candidate models.
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    cases = []
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            messages = json.loads(line)["messages"]
+            if not messages or messages[-1]["role"] != "assistant":
+                continue
+            cases.append((messages[:-1], json.loads(messages[-1]["content"])))
+            if limit is not None and len(cases) >= limit:
+                break
+    return cases
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class RateLimiter:
+    """Async token bucket allowing `rate_per_minute` acquisitions per minute"""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self.sleep((1 - self._tokens) / self.rate)
+
+
+class ResponseCache:
+    """On-disk cache of model responses, one JSON file per request"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, Any]], temperature: float) -> str:
+        canonical = json.dumps([model, messages, temperature], sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(response, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+class EvaluationRunner:
+    """Concurrent, rate-limited, cached evaluation of card identification models"""
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        cache_dir: str = "ml/evaluation_results/response_cache",
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        evaluator: Optional[ModelEvaluator] = None,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        """Initialize the evaluation runner
+
+        Args:
+            client: AsyncOpenAI-compatible client (created on first uncached call)
+            cache_dir: Directory of recorded responses
+            max_concurrency: Requests in flight at once
+            requests_per_minute: Request rate limit across all models
+            evaluator: ModelEvaluator used for scoring
+            clock: Time source for latency measurement
+        """
+        self._client = client
+        self.cache = ResponseCache(cache_dir)
+        self.max_concurrency = max_concurrency or int(os.getenv("EVAL_MAX_CONCURRENCY", "8"))
+        self.requests_per_minute = requests_per_minute or float(os.getenv("EVAL_REQUESTS_PER_MINUTE", "300"))
+        self._evaluator = evaluator
+        self.clock = clock
+
+    @property
+    def evaluator(self) -> ModelEvaluator:
+        if self._evaluator is None:
+            self._evaluator = ModelEvaluator()
+        return self._evaluator
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OpenAI API key is required")
+            self._client = AsyncOpenAI(api_key=api_key)
+        return self._client
+
+    async def _predict(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        replay_only: bool,
+        semaphore: asyncio.Semaphore,
+        limiter: RateLimiter
+    ) -> Dict[str, Any]:
+        """One model answer: {content, prompt_tokens, completion_tokens, latency_ms, cached, error, recorded}"""
+        key = self.cache.key(model, messages, temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, "cached": True, "error": None}
+        if replay_only:
+            # A gap in the recording, not a model failure
+            return {"content": None, "cached": False, "error": None, "recorded": False}
+
+        async with semaphore:
+            await limiter.acquire()
+            started = self.clock()
+            try:
+                response = await self._get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    response_format={"type": "json_object"}
+                )
+            except Exception as e:
+                return {"content": None, "cached": False, "error": str(e)}
+            latency_ms = (self.clock() - started) * 1000
+
+        usage = getattr(response, "usage", None)
+        record = {
+            "content": response.choices[0].message.content,
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "latency_ms": round(latency_ms, 2),
+        }
+        self.cache.put(key, record)
+        return {**record, "cached": False, "error": None}
+
+    async def run(
+        self,
+        cases: List[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+        models: List[str],
+        temperature: float = 0.0,
+        replay_only: bool = False
+    ) -> Dict[str, Any]:
+        """Evaluate every model on every case
+
+        Args:
+            cases: (prompt messages, ground truth) pairs from load_eval_cases
+            models: Model IDs to evaluate; with two, the second is A/B tested against the first
+            temperature: Sampling temperature (part of the cache key)
+            replay_only: Only use recorded responses (no API calls)
+
+        Returns:
+            Per-model accuracy metrics, latency, tokens, cost, cache hits,
+            errors and (with replay_only) answers missing from the recording
+        """
+        if not cases:
+            raise ValueError("No evaluation cases")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = RateLimiter(self.requests_per_minute)
+        answers = await asyncio.gather(*(
+            self._predict(model, messages, temperature, replay_only, semaphore, limiter)
+            for model in models
+            for messages, _ in cases
+        ))
+
+        ground_truth = [truth for _, truth in cases]
+        predictions: Dict[str, List[Dict[str, Any]]] = {}
+        report: Dict[str, Any] = {"samples": len(cases), "models": {}}
+        for index, model in enumerate(models):
+            model_answers = answers[index * len(cases):(index + 1) * len(cases)]
+            parsed, errors = [], 0
+            for answer in model_answers:
+                try:
+                    prediction = json.loads(answer["content"]) if answer["content"] else {}
+                except json.JSONDecodeError:
+                    prediction = None
+                # Valid JSON that is not an object (a list, a string) is a wrong answer too
+                if not isinstance(prediction, dict):
+                    parsed.append({})
+                    errors += 1
+                    continue
+                parsed.append(prediction)
+                errors += 1 if answer["error"] else 0
+            predictions[model] = parsed
+
+            latencies = [answer["latency_ms"] for answer in model_answers if answer.get("latency_ms") is not None]
+            prompt_tokens = sum(answer.get("prompt_tokens", 0) for answer in model_answers)
+            completion_tokens = sum(answer.get("completion_tokens", 0) for answer in model_answers)
+            report["models"][model] = {
+                "metrics": self.evaluator.evaluate_card_identification(parsed, ground_truth),
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 2),
+                    "p95": round(percentile(latencies, 95), 2),
+                },
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "estimated_cost_usd": round(inference_cost(model, prompt_tokens, completion_tokens), 6),
+                "cache_hits": sum(1 for answer in model_answers if answer["cached"]),
+                "errors": errors,
+                "not_recorded": sum(1 for answer in model_answers if answer.get("recorded") is False),
+            }
+
+        if len(models) == 2:
+            report["comparison"] = self.evaluator.ab_test(
+                predictions[models[0]], predictions[models[1]], ground_truth,
+                model_a_name=models[0], model_b_name=models[1]
+            )
+        return report
+
+
+def main():
+    """CLI: python -m ml.evaluation_runner <eval_file> <model> [model ...] [--limit N] [--replay]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate card identification models on a held-out set")
+    parser.add_argument("eval_file", help="Fine-tuning JSONL (e.g. a *_validation.jsonl export)")
+    parser.add_argument("models", nargs="+", help="Model IDs to evaluate")
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate only the first N samples")
+    parser.add_argument("--replay", action="store_true", help="Use recorded responses only")
+    args = parser.parse_args()
+
+    runner = EvaluationRunner()
+    report = asyncio.run(runner.run(load_eval_cases(args.eval_file, args.limit), args.models, replay_only=args.replay))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Streaming Fine-Tuning Export
+
+Writes stored samples to OpenAI fine-tuning JSONL in a single pass:
+- Duplicate conversations (same messages, e.g. a user correcting the same
+  card repeatedly) are dropped by content hash; only 8-byte digests are
+  kept in memory, never the samples themselves
+- Samples are split into train / validation deterministically by the same
+  hash, so re-exporting a grown corpus never moves a sample between sets
+- Output can be gzip-compressed
+- Sample and token counts are reported per split, tokenized with the
+  model's tokenizer and cached per written line, so estimating the
+  exported file afterwards is answered from the cache (see token_counter)
+"""
+
+import gzip
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+from ml.token_counter import DEFAULT_MODEL, get_token_counter, sample_key, sample_line
+
+# Hash buckets used for the train / validation split
+SPLIT_BUCKETS = 10_000
+
+
+def message_hash(messages: List[Dict[str, Any]]) -> bytes:
+    """Content hash of a conversation (key order and whitespace insensitive)"""
+    canonical = json.dumps(messages, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+
+
+def estimate_tokens(
+    messages: List[Dict[str, Any]],
+    line: Optional[str] = None,
+    model: str = DEFAULT_MODEL
+) -> int:
+    """Token count of a conversation, cached under its JSONL line's key
+
+    Args:
+        messages: Chat messages
+        line: The sample's JSONL line if already serialized
+        model: Model whose tokenizer is used
+    """
+    return get_token_counter(model).count(messages, sample_key(line or sample_line(messages)))
+
+
+def is_validation(digest: bytes, validation_split: float) -> bool:
+    """Deterministic split: the same conversation always lands in the same set"""
+    return int.from_bytes(digest[:4], "big") % SPLIT_BUCKETS < validation_split * SPLIT_BUCKETS
+
+
+def validation_path(output_file: Path) -> Path:
+    """Validation file written next to the training file"""
+    name = output_file.name
+    for suffix in (".jsonl.gz", ".jsonl", ".gz"):
+        if name.endswith(suffix):
+            return output_file.with_name(name[:-len(suffix)] + "_validation" + suffix)
+    return output_file.with_name(name + "_validation")
+
+
+class _SplitWriter:
+    """Lazily opened output file with running sample and token counts"""
+
+    def __init__(self, path: Path, compress: bool):
+        self.path = path
+        self.compress = compress
+        self.samples = 0
+        self.tokens = 0
+        self._file: Optional[IO[str]] = None
+
+    def write(self, line: str, tokens: int) -> None:
+        if self._file is None:
+            self._file = gzip.open(self.path, "wt", encoding="utf-8") if self.compress else open(self.path, "w")
+        self._file.write(line)
+        self.samples += 1
+        self.tokens += tokens
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        if not self.samples:
+            return None
+        return {"file_path": str(self.path), "sample_count": self.samples, "tokens": self.tokens}
+
+
+def export_samples(
+    samples: Iterable[Dict[str, Any]],
+    output_file: Path,
+    validation_split: float = 0.0,
+    dedupe: bool = True,
+    compress: bool = False
+) -> Dict[str, Any]:
+    """Stream samples into train (and optional validation) JSONL files
+
+    Args:
+        samples: Stored samples with a "messages" list (metadata is dropped)
+        output_file: Training file path; the validation file gets a
+            "_validation" suffix and ".gz" is appended when compressing
+        validation_split: Fraction of samples (0-1) held out for validation
+        dedupe: Drop conversations whose messages were already exported
+        compress: gzip the output files
+
+    Returns:
+        {"train", "validation", "duplicates_skipped"}; each split reports
+        file_path, sample_count and tokens (validation is None if empty)
+    """
+    if not 0.0 <= validation_split < 1.0:
+        raise ValueError("validation_split must be in [0, 1)")
+
+    output_file = Path(output_file)
+    if compress and output_file.suffix != ".gz":
+        output_file = output_file.with_name(output_file.name + ".gz")
+
+    train = _SplitWriter(output_file, compress)
+    validation = _SplitWriter(validation_path(output_file), compress)
+    seen = set()
+    duplicates = 0
+
+    try:
+        for sample in samples:
+            messages = sample["messages"]
+            digest = message_hash(messages)
+            if dedupe:
+                if digest in seen:
+                    duplicates += 1
+                    continue
+                seen.add(digest)
+
+            writer = validation if validation_split and is_validation(digest, validation_split) else train
+            line = sample_line(messages)
+            writer.write(line + "\n", estimate_tokens(messages, line))
+    finally:
+        train.close()
+        validation.close()
+
+    if not train.samples:
+        # Keep an (empty) training file so callers always get a path back
+        (gzip.open(output_file, "wt") if compress else open(output_file, "w")).close()
+
+    return {
+        "train": {"file_path": str(output_file), "sample_count": train.samples, "tokens": train.tokens},
+        "validation": validation.summary(),
+        "duplicates_skipped": duplicates,
+    }
@@ -9,12 +9,15 @@ Manages the complete fine-tuning lifecycle:
 """
 
 import os
+import gzip
 import json
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from openai import OpenAI
 
+from ml.token_counter import get_token_counter
+
 
 class FineTuningManager:
     """Manages OpenAI fine-tuning jobs and models"""
@@ -47,11 +50,19 @@ class FineTuningManager:
         """
         print(f"Uploading training file: {file_path}")
 
-        with open(file_path, 'rb') as f:
-            response = self.client.files.create(
-                file=f,
-                purpose=purpose
-            )
+        if file_path.endswith(".gz"):
+            # OpenAI expects plain JSONL; compressed exports are expanded on upload
+            with gzip.open(file_path, 'rb') as f:
+                response = self.client.files.create(
+                    file=(os.path.basename(file_path)[:-3], f.read()),
+                    purpose=purpose
+                )
+        else:
+            with open(file_path, 'rb') as f:
+                response = self.client.files.create(
+                    file=f,
+                    purpose=purpose
+                )
 
         file_id = response.id
         print(f"File uploaded successfully: {file_id}")
@@ -270,7 +281,7 @@ class FineTuningManager:
             limit: Maximum number of events to return
 
         Returns:
-            List of job events
+            List of job events, newest first
         """
         events = self.client.fine_tuning.jobs.list_events(
             fine_tuning_job_id=job_id,
@@ -279,6 +290,7 @@ class FineTuningManager:
 
         return [
             {
+                "id": event.id,
                 "created_at": event.created_at,
                 "level": event.level,
                 "message": event.message
@@ -286,29 +298,30 @@ class FineTuningManager:
             for event in events.data
         ]
 
+    @staticmethod
     def estimate_cost(
-        self,
         training_file_path: str,
         model: str = "gpt-4o-mini-2024-07-18",
         epochs: int = 3
     ) -> Dict[str, Any]:
-        """Estimate the cost of fine-tuning
+        """Estimate the cost of fine-tuning from exact token counts
+
+        Samples are tokenized with the base model's tokenizer (in parallel
+        for large files, cached per sample), so the estimate can be checked
+        before uploading. Counting is local, so this needs no API key:
+        call it on the class without constructing a manager.
 
         Args:
-            training_file_path: Path to training file
+            training_file_path: Path to training file (.jsonl or .jsonl.gz)
             model: Base model to fine-tune
             epochs: Number of training epochs
 
         Returns:
-            Cost estimation details
+            Cost estimation details, with the per-sample token distribution
+            and the samples exceeding the model's context limit
         """
-        # Count tokens in training file (rough estimate)
-        total_tokens = 0
-        with open(training_file_path, 'r') as f:
-            for line in f:
-                # Rough estimate: 1 token ≈ 4 characters
-                total_tokens += len(line) // 4
-
+        counts = get_token_counter(model).count_file(training_file_path)
+        total_tokens = counts["total_tokens"]
         training_tokens = total_tokens * epochs
 
         # Pricing (as of Dec 2024)
@@ -328,7 +341,15 @@ class FineTuningManager:
             "estimated_tokens": training_tokens,
             "epochs": epochs,
             "cost_per_1m_tokens": cost_per_1m,
-            "estimated_cost_usd": round(estimated_cost, 2)
+            "estimated_cost_usd": round(estimated_cost, 2),
+            "tokens_per_epoch": total_tokens,
+            "tokenizer": counts["tokenizer"],
+            "samples": counts["samples"],
+            "token_distribution": counts["distribution"],
+            "context_limit": counts["context_limit"],
+            "over_context_limit": counts["over_context_limit"],
+            "over_context_limit_samples": counts["over_context_limit_samples"],
+            "invalid_samples": counts["invalid_samples"]
         }
 
 
@@ -348,9 +369,16 @@ def main():
         print("  python finetuning_manager.py estimate <file_path>")
         return
 
-    manager = FineTuningManager()
     command = sys.argv[1]
 
+    if command == "estimate":
+        # Local token count; no API key needed
+        estimate = FineTuningManager.estimate_cost(sys.argv[2])
+        print(json.dumps(estimate, indent=2))
+        return
+
+    manager = FineTuningManager()
+
     if command == "upload":
         file_path = sys.argv[2]
         file_id = manager.upload_training_file(file_path)
@@ -386,11 +414,6 @@ def main():
         models = manager.list_models()
         print(json.dumps(models, indent=2))
 
-    elif command == "estimate":
-        file_path = sys.argv[2]
-        estimate = manager.estimate_cost(file_path)
-        print(json.dumps(estimate, indent=2))
-
     else:
         print(f"Unknown command: {command}")
 
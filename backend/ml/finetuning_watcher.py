@@ -0,0 +1,306 @@
+"""
+Fine-Tuning Job Watcher
+
+Background task that keeps a local copy of fine-tuning job state so the
+admin UI never has to call OpenAI per page view:
+- Active jobs are polled with adaptive intervals: a job that just changed
+  is checked again soon, a quiet job backs off up to a maximum interval,
+  and finished jobs are no longer polled
+- Job status and training events are cached in memory; the job list from
+  OpenAI is refreshed only occasionally to pick up jobs created elsewhere
+- Changes are pushed to subscribers (the /ml/finetuning/stream SSE route)
+- Coroutines can await a job reaching a terminal state without blocking
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+# Events kept per job
+MAX_EVENTS_PER_JOB = 200
+
+
+class _WatchedJob:
+    """Cached state and polling schedule for one job"""
+
+    __slots__ = ("job", "events", "event_ids", "interval", "next_poll", "done")
+
+    def __init__(self, job: Dict[str, Any], interval: float, next_poll: float):
+        self.job = job
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=MAX_EVENTS_PER_JOB)
+        self.event_ids: Set[str] = set()
+        self.interval = interval
+        self.next_poll = next_poll
+        self.done = asyncio.Event()
+
+
+class FineTuningWatcher:
+    """Adaptive poller and event hub for fine-tuning jobs"""
+
+    def __init__(
+        self,
+        manager_factory: Callable[[], Any],
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        list_refresh_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the watcher (call start() from the event loop)
+
+        Args:
+            manager_factory: Returns the FineTuningManager used for API calls
+            min_interval: Seconds between polls of a job that just changed
+            max_interval: Longest back-off for a job with no news
+            list_refresh_interval: Seconds between job list refreshes
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.manager_factory = manager_factory
+        self.min_interval = min_interval or float(os.getenv("FINETUNE_POLL_MIN_SECONDS", "15"))
+        self.max_interval = max_interval or float(os.getenv("FINETUNE_POLL_MAX_SECONDS", "300"))
+        self.list_refresh_interval = list_refresh_interval or float(
+            os.getenv("FINETUNE_LIST_REFRESH_SECONDS", "600")
+        )
+        self.clock = clock
+
+        self._jobs: Dict[str, _WatchedJob] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._next_list_refresh = 0.0
+        self._loaded = asyncio.Event()
+        self._list_attempted = asyncio.Event()
+        self.last_error: Optional[str] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.api_calls = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        """Run a (synchronous) FineTuningManager method off the event loop"""
+        self.api_calls += 1
+        manager = self.manager_factory()
+        return await asyncio.to_thread(getattr(manager, method), *args, **kwargs)
+
+    # Cached views
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Cached jobs, newest first"""
+        return sorted(
+            (watched.job for watched in self._jobs.values()),
+            key=lambda job: job.get("created_at") or 0,
+            reverse=True,
+        )
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        watched = self._jobs.get(job_id)
+        return watched.job if watched else None
+
+    def events(self, job_id: str) -> List[Dict[str, Any]]:
+        """Cached training events for a job, oldest first"""
+        watched = self._jobs.get(job_id)
+        return list(watched.events) if watched else []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    async def wait_loaded(self, timeout: float = 30) -> bool:
+        """Wait for the first attempt to list jobs
+
+        Returns:
+            True if the job list is cached, False if listing failed so far
+            (see last_error; it is retried every min_interval until it works)
+
+        Raises:
+            asyncio.TimeoutError: If no attempt finished within the timeout
+        """
+        await asyncio.wait_for(self._list_attempted.wait(), timeout)
+        return self.loaded
+
+    # Tracking
+
+    def track(self, job: Dict[str, Any]) -> None:
+        """Start watching a job (e.g. one just created) and poll it soon"""
+        job_id = job["job_id"]
+        watched = self._jobs.get(job_id)
+        if watched is None:
+            watched = self._jobs[job_id] = _WatchedJob(job, self.min_interval, self.clock())
+        else:
+            watched.job = {**watched.job, **job}
+            watched.interval = self.min_interval
+            watched.next_poll = self.clock()
+        if job.get("status") in TERMINAL_STATUSES:
+            watched.done.set()
+        self._publish("job", watched.job)
+        self._wake.set()
+
+    async def wait_for_completion(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Await a job reaching succeeded, failed or cancelled
+
+        Raises:
+            KeyError: If the job is not being watched
+            asyncio.TimeoutError: If the timeout elapses first
+        """
+        watched = self._jobs.get(job_id)
+        if watched is None:
+            raise KeyError(job_id)
+        await asyncio.wait_for(watched.done.wait(), timeout)
+        return watched.job
+
+    # Polling
+
+    async def refresh_list(self) -> None:
+        """Reload the recent job list from OpenAI"""
+        jobs = await self._call("list_jobs", limit=20)
+        now = self.clock()
+        for job in jobs:
+            watched = self._jobs.get(job["job_id"])
+            if watched is None:
+                watched = self._jobs[job["job_id"]] = _WatchedJob(job, self.min_interval, now)
+                if job["status"] in TERMINAL_STATUSES:
+                    watched.done.set()
+                self._publish("job", job)
+            elif job["status"] != watched.job.get("status"):
+                # Status moved outside our polling; poll for details and events now
+                watched.job = {**watched.job, **job}
+                watched.next_poll = now
+                self._publish("job", watched.job)
+        self._next_list_refresh = now + self.list_refresh_interval
+        self._loaded.set()
+
+    async def _poll_job(self, watched: _WatchedJob) -> None:
+        job_id = watched.job["job_id"]
+        status = await self._call("get_job_status", job_id)
+        events = await self._call("get_job_events", job_id, limit=50)
+
+        changed = status != {key: watched.job.get(key) for key in status}
+        if changed:
+            watched.job = {**watched.job, **status}
+            self._publish("job", watched.job)
+
+        # The API lists newest first; only events not seen before are kept
+        new_events = [event for event in reversed(events) if event["id"] not in watched.event_ids]
+        for event in new_events:
+            if len(watched.events) == MAX_EVENTS_PER_JOB:
+                watched.event_ids.discard(watched.events[0]["id"])
+            watched.events.append(event)
+            watched.event_ids.add(event["id"])
+            self._publish("job_event", {"job_id": job_id, **event})
+
+        if watched.job["status"] in TERMINAL_STATUSES:
+            watched.done.set()
+        elif changed or new_events:
+            watched.interval = self.min_interval
+        else:
+            watched.interval = min(watched.interval * 2, self.max_interval)
+        watched.next_poll = self.clock() + watched.interval
+
+    async def poll_once(self) -> float:
+        """Poll whatever is due
+
+        Returns:
+            Seconds until the next poll is due
+        """
+        now = self.clock()
+        if now >= self._next_list_refresh:
+            try:
+                await self.refresh_list()
+                self.last_error = None
+            except Exception as e:
+                print(f"Error listing fine-tuning jobs: {e}")
+                self.last_error = str(e) or type(e).__name__
+                # Until the first list succeeds, callers are waiting on it: retry soon
+                retry = self.min_interval if not self.loaded else self.max_interval
+                self._next_list_refresh = self.clock() + retry
+            finally:
+                self._list_attempted.set()
+
+        due = [
+            watched for watched in self._jobs.values()
+            if watched.job.get("status") not in TERMINAL_STATUSES and watched.next_poll <= now
+        ]
+        for watched in due:
+            try:
+                await self._poll_job(watched)
+            except Exception as e:
+                print(f"Error polling fine-tuning job {watched.job['job_id']}: {e}")
+                watched.next_poll = self.clock() + self.max_interval
+
+        next_due = [self._next_list_refresh] + [
+            watched.next_poll for watched in self._jobs.values()
+            if watched.job.get("status") not in TERMINAL_STATUSES
+        ]
+        return max(0.0, min(next_due) - self.clock())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self.poll_once()
+            except Exception as e:
+                print(f"Fine-tuning watcher error: {e}")
+                delay = self.max_interval if self.loaded else self.min_interval
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # Subscribers
+
+    def _publish(self, event: str, data: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A stalled client is dropped rather than buffering without bound
+                self._subscribers.discard(queue)
+
+    async def subscribe(self, heartbeat: float = 15.0) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ("snapshot", {"jobs"}), then "job" / "job_event" updates
+
+        A "heartbeat" is yielded after `heartbeat` idle seconds so proxies
+        keep the connection open.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        self._subscribers.add(queue)
+        try:
+            yield "snapshot", {"jobs": self.jobs()}
+            while queue in self._subscribers:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield "heartbeat", {}
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "jobs": len(self._jobs),
+            "active_jobs": sum(
+                1 for watched in self._jobs.values() if watched.job.get("status") not in TERMINAL_STATUSES
+            ),
+            "subscribers": len(self._subscribers),
+            "api_calls": self.api_calls,
+            "loaded": self.loaded,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,334 @@
+"""
+Log Rotation and Compaction for ML Data Files
+
+Keeps the JSONL files written by the ML pipeline from growing without bound:
+- The active monthly production log is rotated to a numbered segment
+  (production_log_YYYYMM.NNN.jsonl) once it exceeds LOG_SEGMENT_MAX_MB, once
+  its first entry is older than LOG_SEGMENT_MAX_HOURS, or when its month ends.
+  Writers append under the same file lock, so a batch is never split
+- Rotated segments idle for LOG_COMPACT_GRACE_SECONDS are converted to
+  compressed columnar archives (see columnar_archive) under archive/; the
+  JSONL is removed only after the archive reads back identical to it
+- Legacy training data files already fully imported into the training
+  store are archived the same way, and the store's import position moves
+  to the archive
+- Only the newest EXPORT_KEEP fine-tuning exports per model type are kept
+- Archives older than LOG_ARCHIVE_RETENTION_DAYS are deleted (0 keeps them)
+
+production_log_segments() lists live segments and archives together, and
+iter_segment() reads either, so readers do not care what was compacted.
+A non-blocking lock file ensures one worker compacts at a time.
+
+Run once with: python -m ml.log_compaction
+"""
+
+import os
+import re
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ml.columnar_archive import ARCHIVE_SUFFIX, ColumnarArchive, iter_segment, write_archive
+from ml.training_data_store import TrainingDataStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is skipped, archives still work
+    fcntl = None
+
+ARCHIVE_DIR = "archive"
+
+# production_log_YYYYMM.jsonl (active) or production_log_YYYYMM.NNN.jsonl (rotated)
+_LOG_NAME = re.compile(r"^production_log_(\d{6})(?:\.(\d{3}))?\.jsonl$")
+_ARCHIVE_NAME = re.compile(r"^production_log_(\d{6})\.(\d{3})" + re.escape(ARCHIVE_SUFFIX) + "$")
+_EXPORT_NAME = re.compile(r"^(.+)_export_(\d{8}_\d{6})(?:_validation)?\.jsonl(?:\.gz)?$")
+
+
+def production_log_segments(results_dir: Path, month: Optional[str] = None) -> List[Path]:
+    """Production log segments (live JSONL and archives) in write order
+
+    Args:
+        results_dir: Directory holding the production logs
+        month: Only segments of this YYYYMM month
+    """
+    results_dir = Path(results_dir)
+    segments = []
+    for path in results_dir.glob("production_log_*.jsonl"):
+        match = _LOG_NAME.match(path.name)
+        if match and (month is None or match.group(1) == month):
+            # The active file holds the newest entries of its month
+            segments.append(((match.group(1), int(match.group(2) or 1000)), path))
+    for path in (results_dir / ARCHIVE_DIR).glob(f"production_log_*{ARCHIVE_SUFFIX}"):
+        match = _ARCHIVE_NAME.match(path.name)
+        if match and (month is None or match.group(1) == month):
+            segments.append(((match.group(1), int(match.group(2))), path))
+    return [path for _, path in sorted(segments)]
+
+
+def iter_production_log(
+    results_dir: Path,
+    month: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Production log entries across live segments and archives"""
+    for path in production_log_segments(results_dir, month):
+        yield from iter_segment(path, columns)
+
+
+class LogCompactor:
+    """Rotates, archives and prunes the ML pipeline's JSONL files"""
+
+    def __init__(
+        self,
+        results_dir: str = "ml/evaluation_results",
+        training_dir: str = "ml/training_data",
+        training_store: Optional[TrainingDataStore] = None,
+        max_bytes: Optional[int] = None,
+        max_age_hours: Optional[float] = None,
+        grace_seconds: Optional[float] = None,
+        keep_exports: Optional[int] = None,
+        retention_days: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Initialize the compactor
+
+        Args:
+            results_dir: Directory holding the production logs
+            training_dir: Directory holding training data and exports
+            training_store: Store the legacy training files were imported into
+                (legacy files are only archived when one is given)
+            max_bytes: Rotate the active log beyond this size
+            max_age_hours: Rotate the active log once its first entry is this old
+            grace_seconds: Idle time before a rotated segment is archived
+            keep_exports: Exports kept per model type
+            retention_days: Delete archives older than this (0 keeps them)
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.results_dir = Path(results_dir)
+        self.training_dir = Path(training_dir)
+        self.training_store = training_store
+        self.max_bytes = max_bytes or int(float(os.getenv("LOG_SEGMENT_MAX_MB", "64")) * 1024 * 1024)
+        self.max_age_hours = max_age_hours or float(os.getenv("LOG_SEGMENT_MAX_HOURS", "24"))
+        self.grace_seconds = grace_seconds if grace_seconds is not None else float(
+            os.getenv("LOG_COMPACT_GRACE_SECONDS", "60")
+        )
+        self.keep_exports = keep_exports or int(os.getenv("EXPORT_KEEP", "5"))
+        self.retention_days = retention_days if retention_days is not None else float(
+            os.getenv("LOG_ARCHIVE_RETENTION_DAYS", "0")
+        )
+        self.clock = clock
+
+    def run(self) -> Dict[str, Any]:
+        """Run one rotation/compaction pass
+
+        Returns:
+            What was done, or {"skipped": True} if another worker is compacting
+        """
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        lock_fd = os.open(self.results_dir / ".compaction.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return {"skipped": True}
+
+            report: Dict[str, Any] = {
+                "rotated": self.rotate_production_logs(),
+                "archived": self.archive_production_logs(),
+                "training_archived": self.archive_training_files(),
+                "exports_removed": self.prune_exports(),
+                "archives_expired": self.expire_archives(),
+            }
+            report["bytes_saved"] = sum(entry["bytes_saved"] for entry in report["archived"] + report["training_archived"])
+            return report
+        finally:
+            # Closing the descriptor also releases the lock
+            os.close(lock_fd)
+
+    def _next_segment(self, month: str) -> Path:
+        numbers = [0]
+        for path in self.results_dir.glob(f"production_log_{month}.*.jsonl"):
+            match = _LOG_NAME.match(path.name)
+            if match and match.group(2):
+                numbers.append(int(match.group(2)))
+        for path in (self.results_dir / ARCHIVE_DIR).glob(f"production_log_{month}.*{ARCHIVE_SUFFIX}"):
+            match = _ARCHIVE_NAME.match(path.name)
+            if match:
+                numbers.append(int(match.group(2)))
+        return self.results_dir / f"production_log_{month}.{max(numbers) + 1:03d}.jsonl"
+
+    def _first_timestamp(self, path: Path) -> Optional[datetime]:
+        try:
+            with open(path, "r") as f:
+                return datetime.fromisoformat(json.loads(f.readline())["timestamp"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _should_rotate(self, path: Path, month: str) -> bool:
+        now = datetime.utcfromtimestamp(self.clock())
+        if month != now.strftime("%Y%m"):
+            return True
+        if path.stat().st_size >= self.max_bytes:
+            return True
+        first = self._first_timestamp(path)
+        return first is not None and now - first >= timedelta(hours=self.max_age_hours)
+
+    def rotate_production_logs(self) -> List[str]:
+        """Rotate active monthly logs that are too large, too old or closed
+
+        Returns:
+            Names of the rotated segments
+        """
+        if fcntl is None:
+            return []
+
+        rotated = []
+        for path in sorted(self.results_dir.glob("production_log_*.jsonl")):
+            match = _LOG_NAME.match(path.name)
+            if not match or match.group(2) or path.stat().st_size == 0:
+                continue
+            month = match.group(1)
+            if not self._should_rotate(path, month):
+                continue
+
+            # Hold the writers' lock so no batch lands half before, half after
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                target = self._next_segment(month)
+                os.rename(path, target)
+            finally:
+                os.close(fd)
+            rotated.append(target.name)
+        return rotated
+
+    def _archive(self, source: Path, target: Path) -> Dict[str, Any]:
+        """Write source to an archive verified against it; returns its summary"""
+        records = list(iter_segment(source))
+        write_archive(records, target)
+        # Read every column back and compare with the source before it is deleted
+        # (missing keys read back as None)
+        with ColumnarArchive(target) as archive:
+            columns = archive.columns
+            stored = list(archive.records())
+        expected = [{name: record.get(name) for name in columns} for record in records]
+        source_columns = {name for record in records for name in record}
+        if len(stored) != len(records) or set(columns) != source_columns or stored != expected:
+            target.unlink()
+            raise ValueError(f"Archive of {source.name} does not match its source")
+        size = source.stat().st_size
+        return {
+            "source": source.name,
+            "archive": target.name,
+            "rows": len(records),
+            "bytes_saved": size - target.stat().st_size,
+        }
+
+    def archive_production_logs(self) -> List[Dict[str, Any]]:
+        """Archive rotated segments nobody has written to for the grace period"""
+        archived = []
+        now = self.clock()
+        for path in sorted(self.results_dir.glob("production_log_*.*.jsonl")):
+            match = _LOG_NAME.match(path.name)
+            if not match or not match.group(2):
+                continue
+            if now - path.stat().st_mtime < self.grace_seconds:
+                continue  # A writer that opened the file before rotation may still append
+            target = self.results_dir / ARCHIVE_DIR / (path.name[:-len(".jsonl")] + ARCHIVE_SUFFIX)
+            try:
+                archived.append(self._archive(path, target))
+            except (OSError, ValueError) as e:
+                print(f"Error archiving {path.name}: {e}")
+                continue
+            path.unlink()
+        return archived
+
+    def archive_training_files(self) -> List[Dict[str, Any]]:
+        """Archive legacy training files whose contents are fully imported"""
+        from ml.training_data_collector import DATASET_FILES
+
+        if self.training_store is None:
+            return []
+
+        archived = []
+        stamp = datetime.utcfromtimestamp(self.clock()).strftime("%Y%m%d_%H%M%S")
+        for dataset, filename in DATASET_FILES.items():
+            path = self.training_dir / filename
+            if not path.exists() or path.stat().st_size == 0:
+                continue
+            if self.training_store.import_offset(path) < path.stat().st_size:
+                continue  # Not imported yet; the collector picks it up first
+
+            target = self.training_dir / ARCHIVE_DIR / f"{dataset}.{stamp}{ARCHIVE_SUFFIX}"
+            try:
+                entry = self._archive(path, target)
+            except (OSError, ValueError) as e:
+                print(f"Error archiving {filename}: {e}")
+                continue
+            # Already imported: the store must not import the archive again
+            self.training_store.move_import(path, target, entry["rows"])
+            path.unlink()
+            archived.append(entry)
+        return archived
+
+    def prune_exports(self) -> List[str]:
+        """Delete all but the newest keep_exports exports of each model type"""
+        exports: Dict[str, Dict[str, List[Path]]] = {}
+        for path in self.training_dir.glob("*_export_*.jsonl*"):
+            match = _EXPORT_NAME.match(path.name)
+            if match:
+                model_type, timestamp = match.groups()
+                exports.setdefault(model_type, {}).setdefault(timestamp, []).append(path)
+
+        removed = []
+        for by_timestamp in exports.values():
+            for timestamp in sorted(by_timestamp, reverse=True)[self.keep_exports:]:
+                for path in by_timestamp[timestamp]:
+                    path.unlink()
+                    removed.append(path.name)
+        return sorted(removed)
+
+    def expire_archives(self) -> List[str]:
+        """Delete production log archives past the retention period
+
+        The daily rollups keep their aggregates, so metrics are unaffected.
+        """
+        if not self.retention_days:
+            return []
+        cutoff = datetime.utcfromtimestamp(self.clock()) - timedelta(days=self.retention_days)
+
+        expired = []
+        for path in production_log_segments(self.results_dir):
+            match = _ARCHIVE_NAME.match(path.name)
+            if not match:
+                continue
+            start = datetime.strptime(match.group(1), "%Y%m")
+            month_end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+            if month_end <= cutoff:
+                path.unlink()
+                expired.append(path.name)
+        return expired
+
+
+def main():
+    """CLI: python -m ml.log_compaction [--results-dir DIR] [--training-dir DIR]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rotate, archive and prune ML JSONL data files")
+    parser.add_argument("--results-dir", default="ml/evaluation_results")
+    parser.add_argument("--training-dir", default="ml/training_data")
+    args = parser.parse_args()
+
+    store = TrainingDataStore(str(Path(args.training_dir) / "training_data.db"))
+    try:
+        report = LogCompactor(args.results_dir, args.training_dir, training_store=store).run()
+    finally:
+        store.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
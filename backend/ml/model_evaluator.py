@@ -2,28 +2,43 @@
 Model Evaluator for Fine-Tuned Models
 
 Provides tools for evaluating and monitoring fine-tuned model performance,
-including accuracy metrics, A/B testing, and quality assessment.
+including accuracy metrics, A/B testing, and quality assessment. Card
+identification is scored by the vectorized ColumnarEvaluator (normalized
+and fuzzy field matching), and A/B deltas carry bootstrap confidence
+intervals.
 """
 
 import json
 import os
 from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 import statistics
 
+from ml.columnar_evaluator import ColumnarEvaluator, bootstrap_delta
+from ml.log_compaction import production_log_segments
+from ml.production_metrics import ProductionMetricsStore, month_range
+from ml.record_sink import RecordSink, record_sink
+
 
 class ModelEvaluator:
     """Evaluates fine-tuned model performance"""
 
-    def __init__(self, results_dir: str = "ml/evaluation_results"):
+    def __init__(self, results_dir: str = "ml/evaluation_results", sink: Optional[RecordSink] = None):
         """Initialize the model evaluator
 
         Args:
             results_dir: Directory to store evaluation results
+            sink: Write-behind sink for production logs (defaults to the shared one)
         """
         self.results_dir = Path(results_dir)
         self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.sink = sink or record_sink
+        self.columnar = ColumnarEvaluator()
+
+        # Daily rollups of the production logs, backfilled once from existing segments
+        self.metrics = ProductionMetricsStore(str(self.results_dir / "production_metrics.db"))
+        self.metrics.backfill(production_log_segments(self.results_dir))
 
     def evaluate_card_identification(
         self,
@@ -32,6 +47,10 @@ class ModelEvaluator:
     ) -> Dict[str, Any]:
         """Evaluate card identification model accuracy
 
+        Fields are normalized before comparison ("1986" matches "1986-87",
+        "BGS 9.5" matches "9.5"); an exact match means every card field
+        matches. Fuzzy accuracy also accepts near-miss spellings.
+
         Args:
             predictions: List of model predictions
             ground_truth: List of correct answers
@@ -39,54 +58,8 @@ class ModelEvaluator:
         Returns:
             Evaluation metrics
         """
-        if len(predictions) != len(ground_truth):
-            raise ValueError("Predictions and ground truth must have same length")
-
-        # Track accuracy by field
-        field_accuracy = {
-            "player": [],
-            "year": [],
-            "brand": [],
-            "set_name": [],
-            "card_number": [],
-            "variation": [],
-            "grade": [],
-            "grading_company": []
-        }
-
-        exact_matches = 0
-        total = len(predictions)
-
-        for pred, truth in zip(predictions, ground_truth):
-            # Check exact match
-            if self._dicts_match(pred, truth):
-                exact_matches += 1
-
-            # Check field-by-field accuracy
-            for field in field_accuracy.keys():
-                pred_value = str(pred.get(field, "")).lower().strip()
-                truth_value = str(truth.get(field, "")).lower().strip()
-
-                if pred_value == truth_value:
-                    field_accuracy[field].append(1)
-                else:
-                    field_accuracy[field].append(0)
-
-        # Calculate metrics
-        metrics = {
-            "total_samples": total,
-            "exact_match_accuracy": exact_matches / total if total > 0 else 0,
-            "field_accuracy": {
-                field: sum(scores) / len(scores) if scores else 0
-                for field, scores in field_accuracy.items()
-            },
-            "average_field_accuracy": statistics.mean([
-                sum(scores) / len(scores) if scores else 0
-                for scores in field_accuracy.values()
-            ]),
-            "evaluated_at": datetime.utcnow().isoformat()
-        }
-
+        metrics = self.columnar.metrics(predictions, ground_truth)
+        metrics["evaluated_at"] = datetime.utcnow().isoformat()
         return metrics
 
     def evaluate_listing_quality(
@@ -203,8 +176,16 @@ class ModelEvaluator:
             Comparison results
         """
         # Evaluate both models
-        metrics_a = self.evaluate_card_identification(model_a_results, ground_truth)
-        metrics_b = self.evaluate_card_identification(model_b_results, ground_truth)
+        scores_a = self.columnar.score(model_a_results, ground_truth)
+        scores_b = self.columnar.score(model_b_results, ground_truth)
+        metrics_a = {**self.columnar.summarize(scores_a), "evaluated_at": datetime.utcnow().isoformat()}
+        metrics_b = {**self.columnar.summarize(scores_b), "evaluated_at": datetime.utcnow().isoformat()}
+
+        # Paired bootstrap intervals for the deltas the recommendation relies on
+        confidence_intervals = {
+            "exact_match": bootstrap_delta(scores_a["exact"].all(axis=1), scores_b["exact"].all(axis=1)),
+            "average_field": bootstrap_delta(scores_a["exact"].mean(axis=1), scores_b["exact"].mean(axis=1)),
+        }
 
         # Calculate improvement
         improvement = {
@@ -240,8 +221,9 @@ class ModelEvaluator:
                 "metrics": metrics_b
             },
             "improvement": improvement,
+            "confidence_intervals": confidence_intervals,
             "winner": winner,
-            "recommendation": self._get_recommendation(improvement),
+            "recommendation": self._get_recommendation(improvement, confidence_intervals),
             "tested_at": datetime.utcnow().isoformat()
         }
 
@@ -279,12 +261,11 @@ class ModelEvaluator:
                 if model_prediction.get(field) != value:
                     log_entry["corrected_fields"].append(field)
 
-        # Log to file
+        # Queue for the monthly log file (batched, whole-line appends)
         log_file = self.results_dir / f"production_log_{datetime.utcnow().strftime('%Y%m')}.jsonl"
         try:
-            with open(log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + "\n")
-            return True
+            logged = self.sink.submit(self.sink.jsonl(log_file), log_entry)
+            return self.sink.submit(self.metrics, log_entry) and logged
         except Exception as e:
             print(f"Error logging production performance: {e}")
             return False
@@ -292,61 +273,51 @@ class ModelEvaluator:
     def analyze_production_logs(
         self,
         month: Optional[str] = None,
-        model_id: Optional[str] = None
+        model_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
     ) -> Dict[str, Any]:
-        """Analyze production performance logs
+        """Analyze production performance from the daily rollups
 
         Args:
             month: Month to analyze (YYYYMM format, defaults to current)
             model_id: Optional filter by model ID
+            start_date: Start of an inclusive date range (overrides month)
+            end_date: End of the date range (defaults to today)
 
         Returns:
             Analysis results
         """
-        if month is None:
-            month = datetime.utcnow().strftime('%Y%m')
-
-        log_file = self.results_dir / f"production_log_{month}.jsonl"
-
-        if not log_file.exists():
-            return {"error": f"No logs found for {month}"}
-
-        # Load and filter logs
-        logs = []
-        with open(log_file, 'r') as f:
-            for line in f:
-                log = json.loads(line)
-                if model_id is None or log.get("model_id") == model_id:
-                    logs.append(log)
-
-        if not logs:
-            return {"error": "No matching logs found"}
+        if start_date is not None or end_date is not None:
+            start, end = start_date, end_date or datetime.utcnow().date()
+            period = f"{start.isoformat() if start else 'start'}..{end.isoformat()}"
+        else:
+            if month is None:
+                month = datetime.utcnow().strftime('%Y%m')
+            start, end = month_range(month)
+            period = month
 
-        # Analyze
-        total = len(logs)
-        corrected_count = sum(1 for log in logs if log["was_corrected"])
-        correction_rate = corrected_count / total if total > 0 else 0
+        rollup = self.metrics.query(start, end, model_id)
+        total = rollup["total_predictions"]
 
-        # Field-level accuracy
-        field_corrections = {}
-        for log in logs:
-            for field in log.get("corrected_fields", []):
-                field_corrections[field] = field_corrections.get(field, 0) + 1
+        if not total:
+            return {"error": f"No logs found for {period}"}
 
-        # User ratings
-        ratings = [log["user_rating"] for log in logs if log.get("user_rating")]
-        avg_rating = statistics.mean(ratings) if ratings else None
+        corrected_count = rollup["corrections"]
+        correction_rate = corrected_count / total
+        ratings = rollup["total_ratings"]
 
         return {
-            "month": month,
+            "month": period,
             "model_id": model_id or "all",
             "total_predictions": total,
             "corrections": corrected_count,
             "correction_rate": correction_rate,
             "accuracy_rate": 1 - correction_rate,
-            "field_corrections": field_corrections,
-            "average_user_rating": avg_rating,
-            "total_ratings": len(ratings),
+            "field_corrections": rollup["field_corrections"],
+            "average_user_rating": rollup["rating_sum"] / ratings if ratings else None,
+            "total_ratings": ratings,
+            "daily": rollup["daily"],
             "analyzed_at": datetime.utcnow().isoformat()
         }
 
@@ -378,23 +349,29 @@ class ModelEvaluator:
         print(f"Evaluation saved to: {filepath}")
         return str(filepath)
 
-    def _dicts_match(self, dict1: Dict[str, Any], dict2: Dict[str, Any]) -> bool:
-        """Check if two dictionaries match (ignoring case and whitespace)"""
-        if set(dict1.keys()) != set(dict2.keys()):
-            return False
-
-        for key in dict1.keys():
-            val1 = str(dict1[key]).lower().strip()
-            val2 = str(dict2[key]).lower().strip()
-            if val1 != val2:
-                return False
-
-        return True
+    def _get_recommendation(
+        self,
+        improvement: Dict[str, float],
+        confidence_intervals: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> str:
+        """Get recommendation based on improvement metrics
 
-    def _get_recommendation(self, improvement: Dict[str, float]) -> str:
-        """Get recommendation based on improvement metrics"""
+        With confidence intervals, a change only counts when the 95% interval
+        of the exact-match delta excludes zero.
+        """
         exact_match_improvement = improvement["exact_match"]
 
+        if confidence_intervals:
+            interval = confidence_intervals["exact_match"]
+            ci = f"95% CI {interval['ci_low']:+.1%} to {interval['ci_high']:+.1%}"
+            if interval["ci_low"] > 0 and exact_match_improvement > 0.05:
+                return f"✅ Fine-tuned model shows significant improvement ({ci}). Recommend deploying to production."
+            if interval["ci_low"] > 0:
+                return f"⚠️ Fine-tuned model is reliably but only slightly better ({ci}). Consider collecting more training data."
+            if interval["ci_high"] < 0:
+                return f"❌ Fine-tuned model performs worse ({ci}). Do not deploy. Review training data quality."
+            return f"⚠️ No statistically significant difference ({ci}). Evaluate on more samples before deploying."
+
         if exact_match_improvement > 0.05:  # 5% improvement
             return "✅ Fine-tuned model shows significant improvement. Recommend deploying to production."
         elif exact_match_improvement > 0:
@@ -3,43 +3,51 @@ Model Manager for Fine-Tuned Models
 
 Integrates fine-tuned models into the SlabStak application,
 allowing seamless switching between base models and fine-tuned versions.
+Which model serves each type comes from the runtime model registry, so a
+switch applies to the next request without a restart.
 """
 
 import os
 import json
-from typing import Dict, List, Optional, Any
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from openai import OpenAI
 from datetime import datetime
 
+from ml.model_registry import ModelRegistry, model_registry
+from ml.model_routing import ModelRouter, model_router
+
 
 class ModelManager:
     """Manages fine-tuned model deployment and usage"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        registry: Optional[ModelRegistry] = None,
+        router: Optional[ModelRouter] = None
+    ):
         """Initialize the model manager
 
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
+            registry: Model registry (defaults to the shared instance)
+            router: Canary/shadow router (defaults to the shared instance)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
 
         self.client = OpenAI(api_key=self.api_key)
+        self.registry = registry or model_registry
+        if router is None:
+            router = model_router if registry is None else ModelRouter(registry=self.registry)
+        self.router = router
 
-        # Model configuration
-        self.models = {
-            "card_identification": {
-                "base": "gpt-4o-mini-2024-07-18",
-                "finetuned": os.getenv("FINETUNED_CARD_ID_MODEL"),
-                "active": os.getenv("USE_FINETUNED_CARD_ID", "false").lower() == "true"
-            },
-            "listing_generation": {
-                "base": "gpt-4o-mini-2024-07-18",
-                "finetuned": os.getenv("FINETUNED_LISTING_MODEL"),
-                "active": os.getenv("USE_FINETUNED_LISTING", "false").lower() == "true"
-            }
-        }
+    @property
+    def models(self) -> Dict[str, Dict[str, Any]]:
+        """Model configuration of the current registry version (read-only)"""
+        return self.registry.current()["models"]
 
     def get_active_model(self, model_type: str) -> str:
         """Get the currently active model for a given type
@@ -50,38 +58,136 @@ class ModelManager:
         Returns:
             Model ID to use
         """
-        if model_type not in self.models:
-            raise ValueError(f"Unknown model type: {model_type}")
-
-        config = self.models[model_type]
-
-        # Use fine-tuned if available and active
-        if config["active"] and config["finetuned"]:
-            return config["finetuned"]
-
-        # Fallback to base model
-        return config["base"]
+        return self.registry.active_model(model_type)
 
     def identify_card_finetuned(
         self,
         ocr_text: str,
         image_description: Optional[str] = None,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        model: Optional[str] = None,
+        routing_key: Optional[str] = None,
+        route: Optional[Dict[str, Any]] = None,
+        instructions: Optional[str] = None,
+        validate: Optional[Callable[[Dict[str, Any]], Any]] = None
     ) -> Dict[str, Any]:
         """Identify a card using the fine-tuned (or base) model
 
+        Without an explicit model, the request is routed by the registry's
+        rollout: canary requests are served by the candidate (falling back to
+        the primary if it errors), and sampled primary requests are shadowed
+        by the candidate in the background.
+
         Args:
             ocr_text: OCR extracted text
             image_description: Optional image description
             temperature: Sampling temperature (lower = more deterministic)
+            model: Model ID overriding the registry (e.g. for comparisons; not routed)
+            routing_key: Stable key for canary assignment (e.g. user ID)
+            route: Routing decision already made by the caller (router.choose());
+                a failing canary is then raised so the caller can serve its own
+                primary (e.g. /scan's assistant)
+            instructions: System prompt replacing the identification prompt, for
+                callers with their own output schema (e.g. /scan)
+            validate: Check of a routed answer, raising ValueError if it is
+                unusable; a failed check is recorded as that model's error
 
         Returns:
             Parsed card data
         """
-        model = self.get_active_model("card_identification")
+        # One registry version for the whole request
+        version = self.registry.current()
+        messages = self._card_id_messages(ocr_text, image_description, instructions)
+
+        def answer(model: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            result, usage = self._complete_json(model, messages, temperature)
+            if validate is not None:
+                validate(result)
+            return result, usage
+
+        if model is not None:
+            result, _ = answer(model)
+            arm = None
+        else:
+            caller_routed = route is not None
+            route = route or self.router.choose("card_identification", routing_key, version)
+            model, arm = route["model"], route["arm"]
+            try:
+                result, usage = answer(model)
+                self.router.record("card_identification", model, arm, **usage)
+            except Exception:
+                self.router.record("card_identification", model, arm, error=True)
+                if arm != "canary" or caller_routed:
+                    raise
+                # A failing candidate never fails the user's request
+                model, arm = route["primary"], "primary"
+                result, usage = answer(model)
+                self.router.record("card_identification", model, arm, **usage)
+
+            if route["shadow_model"]:
+                shadow_model = route["shadow_model"]
+                self.router.shadow(
+                    "card_identification",
+                    shadow_model,
+                    lambda: self._complete_json(shadow_model, messages, temperature),
+                    result
+                )
 
-        # Build messages
-        messages = [
+        # Add metadata
+        result["_metadata"] = {
+            "model_used": model,
+            "is_finetuned": model != version["models"]["card_identification"]["base"],
+            "config_version": version["version"],
+            "routing_arm": arm,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+        return result
+
+    def shadow_card_identification(
+        self,
+        ocr_text: str,
+        reference: Dict[str, Any],
+        image_description: Optional[str] = None
+    ) -> Optional[str]:
+        """Shadow a card identification served elsewhere (e.g. /scan) with the rollout candidate
+
+        Args:
+            ocr_text: OCR extracted text the reference answer was based on
+            reference: The answer the user received (card identification fields)
+            image_description: Optional image description
+
+        Returns:
+            The shadowed candidate, or None if this request was not sampled
+        """
+        candidate = self.router.shadow_candidate("card_identification")
+        if candidate is None:
+            return None
+        messages = self._card_id_messages(ocr_text, image_description)
+        started = self.router.shadow(
+            "card_identification",
+            candidate,
+            lambda: self._complete_json(candidate, messages, 0.1),
+            reference
+        )
+        return candidate if started else None
+
+    def _card_id_messages(
+        self,
+        ocr_text: str,
+        image_description: Optional[str],
+        instructions: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Chat messages for card identification (or the caller's own instructions)"""
+        if instructions is not None:
+            content = f"OCR text from card:\n{ocr_text}"
+            if image_description:
+                content += f"\nImage description:\n{image_description}"
+            return [
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": content + "\nReturn JSON only."}
+            ]
+        return [
             {
                 "role": "system",
                 "content": (
@@ -95,32 +201,40 @@ class ModelManager:
             }
         ]
 
-        # Call the model
+    def _complete_json(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Call a model in JSON mode
+
+        Returns:
+            (parsed result, usage with latency_ms, prompt_tokens and completion_tokens)
+        """
+        started = time.perf_counter()
         response = self.client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
             response_format={"type": "json_object"}
         )
+        latency_ms = (time.perf_counter() - started) * 1000
 
-        # Parse response
-        result = json.loads(response.choices[0].message.content)
-
-        # Add metadata
-        result["_metadata"] = {
-            "model_used": model,
-            "is_finetuned": model != self.models["card_identification"]["base"],
-            "timestamp": datetime.utcnow().isoformat()
+        usage = getattr(response, "usage", None)
+        return json.loads(response.choices[0].message.content), {
+            "latency_ms": round(latency_ms, 2),
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
         }
 
-        return result
-
     def generate_listing_finetuned(
         self,
         card_data: Dict[str, Any],
         platform: str,
         tone: str,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        model: Optional[str] = None
     ) -> Dict[str, str]:
         """Generate a listing using the fine-tuned (or base) model
 
@@ -129,11 +243,13 @@ class ModelManager:
             platform: Target platform (ebay, pwcc, whatnot, comc)
             tone: Tone style (professional, casual, hype)
             temperature: Sampling temperature
+            model: Model ID overriding the registry (e.g. for comparisons)
 
         Returns:
             Generated listing content
         """
-        model = self.get_active_model("listing_generation")
+        version = self.registry.current()
+        model = model or self.registry.active_model("listing_generation", version)
 
         # Build messages
         messages = [
@@ -161,7 +277,8 @@ class ModelManager:
         # Add metadata
         result["_metadata"] = {
             "model_used": model,
-            "is_finetuned": model != self.models["listing_generation"]["base"],
+            "is_finetuned": model != version["models"]["listing_generation"]["base"],
+            "config_version": version["version"],
             "platform": platform,
             "tone": tone,
             "timestamp": datetime.utcnow().isoformat()
@@ -174,21 +291,37 @@ class ModelManager:
         model_type: str,
         model_id: Optional[str] = None,
         use_finetuned: bool = True
-    ) -> None:
-        """Set the active model for a given type
+    ) -> Dict[str, Any]:
+        """Set the active model for a given type (publishes a new registry version)
 
         Args:
             model_type: Type of model to configure
             model_id: Specific model ID to use (optional)
             use_finetuned: Whether to use fine-tuned model
-        """
-        if model_type not in self.models:
-            raise ValueError(f"Unknown model type: {model_type}")
 
+        Returns:
+            The new registry version
+        """
+        changes: Dict[str, Any] = {"active": use_finetuned}
         if model_id:
-            self.models[model_type]["finetuned"] = model_id
+            changes["finetuned"] = model_id
+        return self.registry.update({model_type: changes})
+
+    def warm_model(self, model_id: str) -> float:
+        """Send a one-token request so a model is loaded before it takes traffic
 
-        self.models[model_type]["active"] = use_finetuned
+        Also fails fast (openai.NotFoundError) on a mistyped or deleted model.
+
+        Returns:
+            Latency of the warm-up request in milliseconds
+        """
+        started = time.perf_counter()
+        self.client.chat.completions.create(
+            model=model_id,
+            messages=[{"role": "user", "content": "ping"}],
+            max_tokens=1
+        )
+        return round((time.perf_counter() - started) * 1000, 2)
 
     def get_model_config(self) -> Dict[str, Any]:
         """Get current model configuration
@@ -196,9 +329,10 @@ class ModelManager:
         Returns:
             Complete model configuration
         """
+        version = self.registry.current()
         config = {}
-        for model_type, settings in self.models.items():
-            active_model = self.get_active_model(model_type)
+        for model_type, settings in version["models"].items():
+            active_model = self.registry.active_model(model_type, version)
             config[model_type] = {
                 "base_model": settings["base"],
                 "finetuned_model": settings["finetuned"],
@@ -215,6 +349,9 @@ class ModelManager:
     ) -> Dict[str, Any]:
         """Compare base model vs fine-tuned model performance
 
+        Runs a single input for a quick manual check; ml.evaluation_runner
+        scores models over a held-out set concurrently.
+
         Args:
             model_type: Type of model to compare
             test_input: Test input data
@@ -232,41 +369,27 @@ class ModelManager:
             "comparison": {}
         }
 
-        # Save original settings
-        original_active = self.models[model_type]["active"]
+        # Models are passed explicitly; the shared configuration is never touched
+        settings = self.models[model_type]
+        run = self.identify_card_finetuned if model_type == "card_identification" else self.generate_listing_finetuned
+
+        # Test base model
+        for i in range(num_runs):
+            results["base_model"].append(run(**test_input, model=settings["base"]))
 
-        try:
-            # Test base model
-            self.models[model_type]["active"] = False
+        # Test fine-tuned model (if available)
+        if settings["finetuned"]:
             for i in range(num_runs):
-                if model_type == "card_identification":
-                    result = self.identify_card_finetuned(**test_input)
-                else:
-                    result = self.generate_listing_finetuned(**test_input)
-                results["base_model"].append(result)
-
-            # Test fine-tuned model (if available)
-            if self.models[model_type]["finetuned"]:
-                self.models[model_type]["active"] = True
-                for i in range(num_runs):
-                    if model_type == "card_identification":
-                        result = self.identify_card_finetuned(**test_input)
-                    else:
-                        result = self.generate_listing_finetuned(**test_input)
-                    results["finetuned_model"].append(result)
-
-                # Basic comparison
-                results["comparison"] = {
-                    "base_runs": len(results["base_model"]),
-                    "finetuned_runs": len(results["finetuned_model"]),
-                    "note": "Review outputs manually to assess quality improvement"
-                }
-            else:
-                results["comparison"]["error"] = "No fine-tuned model available"
-
-        finally:
-            # Restore original settings
-            self.models[model_type]["active"] = original_active
+                results["finetuned_model"].append(run(**test_input, model=settings["finetuned"]))
+
+            # Basic comparison
+            results["comparison"] = {
+                "base_runs": len(results["base_model"]),
+                "finetuned_runs": len(results["finetuned_model"]),
+                "note": "Review outputs manually to assess quality improvement"
+            }
+        else:
+            results["comparison"]["error"] = "No fine-tuned model available"
 
         return results
 
@@ -301,6 +424,42 @@ class ModelManager:
         )
 
 
+# Recommendations /scan answers may carry
+SCAN_RECOMMENDATIONS = ("flip", "hold", "grade", "bundle")
+
+
+def card_scan_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate an answer in /scan's output schema into the scan response fields
+
+    Raises:
+        ValueError: The answer has no price range or recommendation (a canary
+            answer like this is recorded as an error and the assistant answers)
+    """
+    try:
+        low = float(result.get("estimated_low") or 0)
+        high = float(result.get("estimated_high") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Answer has an invalid price range")
+    if high <= 0 or not 0 <= low <= high:
+        raise ValueError("Answer has no price range")
+    if result.get("recommendation") not in SCAN_RECOMMENDATIONS:
+        raise ValueError(f"Answer has no valid recommendation: {result.get('recommendation')!r}")
+
+    year = result.get("year")
+    if isinstance(year, str):
+        year = int(year[:4]) if year[:4].isdigit() else None
+    grade = result.get("grade_estimate")
+    return {
+        "player": str(result.get("player") or "Unknown"),
+        "set_name": str(result.get("set_name") or "Unknown"),
+        "year": year if isinstance(year, int) else None,
+        "grade_estimate": str(grade) if grade is not None else None,
+        "estimated_low": low,
+        "estimated_high": high,
+        "recommendation": result["recommendation"],
+    }
+
+
 # Environment variable configuration helper
 def generate_env_template() -> str:
     """Generate .env template for fine-tuned models"""
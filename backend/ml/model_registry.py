@@ -0,0 +1,269 @@
+"""
+Runtime Model Registry
+
+Versioned configuration of which model serves each model type, changed
+without restarting the backend:
+- Every change produces a new immutable version that replaces the current
+  one in a single assignment; requests already running keep the version
+  they started with, new requests see the new one
+- Versions are persisted to a JSON config file written atomically (temp
+  file + rename) under an exclusive lock, so concurrent updates from
+  several workers are serialized and never lost
+- Each worker notices a newer file by its modification time (checked at
+  most every MODEL_REGISTRY_CHECK_SECONDS) and swaps it in
+- Previous versions are kept for rollback
+- Until the first update, the FINETUNED_* / USE_FINETUNED_* environment
+  variables provide version 0
+"""
+
+import os
+import copy
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates from one process are still serialized
+    fcntl = None
+
+BASE_MODEL = "gpt-4o-mini-2024-07-18"
+
+# Previous versions kept in the config file
+MAX_HISTORY = 20
+
+# Settings of a model type; "rollout" holds canary/shadow routing
+# ({"candidate", "canary_percent", "shadow_percent"}, see model_routing.py)
+MODEL_SETTINGS = {"base", "finetuned", "active", "rollout"}
+
+
+def env_models() -> Dict[str, Dict[str, Any]]:
+    """Model settings from environment variables (the pre-registry configuration)"""
+    return {
+        "card_identification": {
+            "base": BASE_MODEL,
+            "finetuned": os.getenv("FINETUNED_CARD_ID_MODEL"),
+            "active": os.getenv("USE_FINETUNED_CARD_ID", "false").lower() == "true"
+        },
+        "listing_generation": {
+            "base": BASE_MODEL,
+            "finetuned": os.getenv("FINETUNED_LISTING_MODEL"),
+            "active": os.getenv("USE_FINETUNED_LISTING", "false").lower() == "true"
+        }
+    }
+
+
+class VersionConflict(ValueError):
+    """Raised when an update was based on a version that is no longer current"""
+
+
+class ModelRegistry:
+    """Versioned, file-backed model configuration shared by all workers"""
+
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        check_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the registry, loading the config file if it exists
+
+        Args:
+            config_path: JSON file holding the current version and history
+            check_interval: Seconds between checks for a newer config file
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.config_path = Path(config_path or os.getenv("MODEL_REGISTRY_PATH", "ml/model_registry.json"))
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv("MODEL_REGISTRY_CHECK_SECONDS", "2")
+        )
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._file_stamp = None
+        self._next_check = 0.0
+        self._current: Dict[str, Any] = {
+            "version": 0,
+            "updated_at": None,
+            "updated_by": "environment",
+            "models": env_models(),
+        }
+        self._history: List[Dict[str, Any]] = []
+        self.reloads = 0
+        self._reload()
+
+    def _stamp(self):
+        try:
+            stat = self.config_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.config_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _reload(self) -> bool:
+        """Swap in the config file if it changed; returns True if it did"""
+        stamp = self._stamp()
+        if stamp is None or stamp == self._file_stamp:
+            return False
+        data = self._read()
+        if data is None:
+            return False
+        self._file_stamp = stamp
+        if data["current"]["version"] != self._current["version"]:
+            self._current = data["current"]
+            self._history = data.get("history", [])
+            return True
+        self._history = data.get("history", [])
+        return False
+
+    def current(self) -> Dict[str, Any]:
+        """The current version: {"version", "updated_at", "updated_by", "models"}
+
+        Callers should read it once per request and not modify it.
+        """
+        now = self.clock()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                if self._reload():
+                    self.reloads += 1
+            except (OSError, ValueError, KeyError) as e:
+                # A bad file never takes down serving; keep the last good version
+                print(f"Model registry reload failed, keeping version {self._current['version']}: {e}")
+        return self._current
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Previous versions, newest first"""
+        self.current()
+        return list(reversed(self._history))
+
+    def active_model(self, model_type: str, version: Optional[Dict[str, Any]] = None) -> str:
+        """Model ID serving a model type in the given (default: current) version"""
+        models = (version or self.current())["models"]
+        if model_type not in models:
+            raise ValueError(f"Unknown model type: {model_type}")
+        config = models[model_type]
+        if config["active"] and config["finetuned"]:
+            return config["finetuned"]
+        return config["base"]
+
+    def _commit(
+        self,
+        build: Callable[[Dict[str, Any], List[Dict[str, Any]]], Dict[str, Any]],
+        updated_by: str
+    ) -> Dict[str, Any]:
+        """Create a new version from the latest on-disk one, under the file lock
+
+        Args:
+            build: Returns the new models from (latest version, history)
+            updated_by: Recorded with the version
+        """
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            lock_fd = os.open(f"{self.config_path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+                # Another worker may have written a newer version
+                data = self._read() or {"current": self._current, "history": self._history}
+                latest, history = data["current"], data.get("history", [])
+                new_version = {
+                    "version": latest["version"] + 1,
+                    "updated_at": datetime.utcnow().isoformat(),
+                    "updated_by": updated_by,
+                    "models": build(latest, history),
+                }
+                history = (history + [latest])[-MAX_HISTORY:]
+
+                fd, tmp_path = tempfile.mkstemp(dir=self.config_path.parent, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump({"current": new_version, "history": history}, f, indent=2)
+                    os.replace(tmp_path, self.config_path)
+                except Exception:
+                    os.unlink(tmp_path)
+                    raise
+
+                self._current = new_version
+                self._history = history
+                self._file_stamp = self._stamp()
+            finally:
+                # Closing the descriptor also releases the lock
+                os.close(lock_fd)
+        return new_version
+
+    def update(
+        self,
+        changes: Dict[str, Dict[str, Any]],
+        expected_version: Optional[int] = None,
+        updated_by: str = "admin"
+    ) -> Dict[str, Any]:
+        """Publish a new version with some model settings changed
+
+        Args:
+            changes: {model_type: {"finetuned"?, "active"?, "base"?, "rollout"?}}
+            expected_version: Reject the update if the current version differs
+                (optimistic concurrency for the admin UI)
+            updated_by: Recorded with the version
+
+        Returns:
+            The new version
+
+        Raises:
+            ValueError: For an unknown model type or setting
+            VersionConflict: If expected_version is stale
+        """
+        def build(latest: Dict[str, Any], history: List[Dict[str, Any]]) -> Dict[str, Any]:
+            if expected_version is not None and expected_version != latest["version"]:
+                raise VersionConflict(
+                    f"Configuration changed (now version {latest['version']}), reload and try again"
+                )
+            models = copy.deepcopy(latest["models"])
+            for model_type, settings in changes.items():
+                if model_type not in models:
+                    raise ValueError(f"Unknown model type: {model_type}")
+                unknown = set(settings) - MODEL_SETTINGS
+                if unknown:
+                    raise ValueError(f"Unknown model settings: {', '.join(sorted(unknown))}")
+                models[model_type].update(settings)
+            return models
+
+        return self._commit(build, updated_by)
+
+    def rollback(self, version: int, updated_by: str = "admin") -> Dict[str, Any]:
+        """Publish a new version with the models of an earlier version
+
+        Raises:
+            ValueError: If the version is not in the history
+        """
+        def build(latest: Dict[str, Any], history: List[Dict[str, Any]]) -> Dict[str, Any]:
+            for previous in history:
+                if previous["version"] == version:
+                    return copy.deepcopy(previous["models"])
+            raise ValueError(f"Version {version} is not in the registry history")
+
+        return self._commit(build, f"{updated_by} (rollback to {version})")
+
+    def stats(self) -> Dict[str, Any]:
+        current = self.current()
+        return {
+            "version": current["version"],
+            "updated_at": current["updated_at"],
+            "config_path": str(self.config_path),
+            "reloads": self.reloads,
+        }
+
+
+# Global instance
+model_registry = ModelRegistry()
@@ -0,0 +1,343 @@
+"""
+Canary and Shadow Model Routing
+
+Splits live card identification traffic between the primary model and a
+candidate (e.g. a new fine-tuned version) configured in the model registry
+as a "rollout":
+- canary_percent of requests are served by the candidate, chosen by a
+  stable hash of a routing key so a user or card sees consistent results
+- shadow_percent of the remaining requests also call the candidate on a
+  small background pool once the primary has answered; the user never waits
+  for it, and shadow calls are dropped rather than queued when the pool is busy
+- Every call records latency and token usage per (model, arm); shadow calls
+  also record field-level agreement with the primary's answer
+- Records go through the write-behind sink into daily SQLite rollups, so the
+  rollout can be judged on production evidence before promotion
+"""
+
+import os
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ml.columnar_evaluator import ColumnarEvaluator
+from ml.model_registry import ModelRegistry, model_registry
+from ml.record_sink import RecordSink, record_sink
+from ml.sqlite_util import open_wal, transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_routing (
+    day TEXT NOT NULL,
+    model_type TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    arm TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    latency_ms_sum REAL NOT NULL,
+    latency_ms_max REAL NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    compared INTEGER NOT NULL,
+    agreed INTEGER NOT NULL,
+    field_agreement_sum REAL NOT NULL,
+    PRIMARY KEY (day, model_type, model_id, arm)
+);
+"""
+
+def routing_bucket(key: str) -> float:
+    """Stable position of a routing key in [0, 100)"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % 10_000 / 100
+
+
+class RoutingMetricsStore:
+    """SQLite (WAL) daily rollups of routed model calls"""
+
+    def __init__(self, db_path: str):
+        """Initialize the rollup store, creating the database if needed
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_wal(self.db_path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """RecordSink target interface: fold call records into the daily rollups"""
+        totals: Dict[Tuple[str, str, str, str], List[float]] = {}
+        for record in records:
+            key = (record["timestamp"][:10], record["model_type"], record["model_id"], record["arm"])
+            row = totals.setdefault(key, [0, 0, 0.0, 0.0, 0, 0, 0, 0, 0.0])
+            row[0] += 1
+            row[1] += 1 if record.get("error") else 0
+            row[2] += record.get("latency_ms") or 0.0
+            row[3] = max(row[3], record.get("latency_ms") or 0.0)
+            row[4] += record.get("prompt_tokens") or 0
+            row[5] += record.get("completion_tokens") or 0
+            if record.get("field_agreement") is not None:
+                row[6] += 1
+                row[7] += 1 if record["agreed"] else 0
+                row[8] += record["field_agreement"]
+
+        with transaction(self._conn, self._lock):
+            self._conn.executemany(
+                "INSERT INTO daily_routing (day, model_type, model_id, arm, requests, errors, "
+                "latency_ms_sum, latency_ms_max, prompt_tokens, completion_tokens, compared, agreed, "
+                "field_agreement_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, model_type, model_id, arm) DO UPDATE SET "
+                "requests = requests + excluded.requests, "
+                "errors = errors + excluded.errors, "
+                "latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum, "
+                "latency_ms_max = MAX(latency_ms_max, excluded.latency_ms_max), "
+                "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                "completion_tokens = completion_tokens + excluded.completion_tokens, "
+                "compared = compared + excluded.compared, "
+                "agreed = agreed + excluded.agreed, "
+                "field_agreement_sum = field_agreement_sum + excluded.field_agreement_sum",
+                [(*key, *row) for key, row in totals.items()],
+            )
+
+    def query(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        model_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Per (model_type, model, arm) totals over an inclusive date range"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(end.isoformat())
+        if model_type is not None:
+            clauses.append("model_type = ?")
+            params.append(model_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model_type, model_id, arm, SUM(requests), SUM(errors), SUM(latency_ms_sum), "
+                "MAX(latency_ms_max), SUM(prompt_tokens), SUM(completion_tokens), SUM(compared), "
+                "SUM(agreed), SUM(field_agreement_sum) "
+                f"FROM daily_routing {where} GROUP BY model_type, model_id, arm ORDER BY model_type, model_id, arm",
+                params,
+            ).fetchall()
+
+        results = []
+        for (model_type, model_id, arm, requests, errors, latency_sum, latency_max,
+             prompt_tokens, completion_tokens, compared, agreed, field_agreement_sum) in rows:
+            succeeded = requests - errors
+            results.append({
+                "model_type": model_type,
+                "model_id": model_id,
+                "arm": arm,
+                "requests": requests,
+                "error_rate": round(errors / requests, 4) if requests else 0.0,
+                "avg_latency_ms": round(latency_sum / succeeded, 2) if succeeded else None,
+                "max_latency_ms": round(latency_max, 2),
+                "avg_prompt_tokens": round(prompt_tokens / succeeded, 1) if succeeded else None,
+                "avg_completion_tokens": round(completion_tokens / succeeded, 1) if succeeded else None,
+                "compared": compared,
+                "agreement_rate": round(agreed / compared, 4) if compared else None,
+                "field_agreement": round(field_agreement_sum / compared, 4) if compared else None,
+            })
+        return results
+
+
+class ModelRouter:
+    """Chooses the serving model per request and runs shadow comparisons"""
+
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        store: Optional[RoutingMetricsStore] = None,
+        sink: Optional[RecordSink] = None,
+        shadow_workers: Optional[int] = None,
+        max_pending_shadows: Optional[int] = None
+    ):
+        """Initialize the router
+
+        Args:
+            registry: Model registry holding the rollout settings
+            store: Rollup store for call records (created on first use)
+            sink: Write-behind sink for call records (defaults to the shared one)
+            shadow_workers: Threads running shadow calls
+            max_pending_shadows: Shadow calls queued or running before new ones are dropped
+        """
+        self.registry = registry or model_registry
+        self._store = store
+        self.sink = sink or record_sink
+        self.shadow_workers = shadow_workers or int(os.getenv("SHADOW_MAX_WORKERS", "2"))
+        self.max_pending_shadows = max_pending_shadows or int(os.getenv("SHADOW_MAX_PENDING", "32"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._evaluator = ColumnarEvaluator()
+
+        self.shadows_started = 0
+        self.shadows_dropped = 0
+
+    @property
+    def store(self) -> RoutingMetricsStore:
+        if self._store is None:
+            self._store = RoutingMetricsStore(
+                os.getenv("ROUTING_METRICS_DB", "ml/evaluation_results/routing_metrics.db")
+            )
+        return self._store
+
+    def choose(
+        self,
+        model_type: str,
+        routing_key: Optional[str] = None,
+        version: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Pick the serving model for one request
+
+        Args:
+            model_type: Registry model type
+            routing_key: Stable key (user ID, image hash); random if omitted
+            version: Registry version read for this request
+
+        Returns:
+            {"model", "arm", "primary", "shadow_model"}; shadow_model is the
+            candidate to shadow-call after the primary answers, or None
+        """
+        version = version or self.registry.current()
+        primary = self.registry.active_model(model_type, version)
+        rollout = version["models"][model_type].get("rollout") or {}
+        candidate = rollout.get("candidate")
+        if not candidate or candidate == primary:
+            return {"model": primary, "arm": "primary", "primary": primary, "shadow_model": None}
+
+        bucket = routing_bucket(routing_key) if routing_key else random.random() * 100
+        if bucket < float(rollout.get("canary_percent") or 0):
+            return {"model": candidate, "arm": "canary", "primary": primary, "shadow_model": None}
+
+        shadow = random.random() * 100 < float(rollout.get("shadow_percent") or 0)
+        return {
+            "model": primary,
+            "arm": "primary",
+            "primary": primary,
+            "shadow_model": candidate if shadow else None,
+        }
+
+    def shadow_candidate(self, model_type: str, version: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Candidate to shadow for a request served outside choose() (e.g. /scan), or None
+
+        shadow_percent applies to every request here, since none are canaried.
+        """
+        version = version or self.registry.current()
+        rollout = version["models"][model_type].get("rollout") or {}
+        if rollout.get("candidate") and random.random() * 100 < float(rollout.get("shadow_percent") or 0):
+            return rollout["candidate"]
+        return None
+
+    def record(
+        self,
+        model_type: str,
+        model_id: str,
+        arm: str,
+        latency_ms: Optional[float] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False,
+        agreement: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Queue one call record for the rollups"""
+        record = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "model_type": model_type,
+            "model_id": model_id,
+            "arm": arm,
+            "latency_ms": latency_ms,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "error": error,
+        }
+        if agreement is not None:
+            record.update(agreement)
+        self.sink.submit(self.store, record)
+
+    def agreement(self, result: Dict[str, Any], reference: Dict[str, Any]) -> Dict[str, Any]:
+        """Field agreement of a result with the primary's, over the fields the primary returned
+
+        A field the candidate leaves empty counts as a disagreement, so a
+        candidate cannot score well by dropping fields.
+        """
+        fields = tuple(field for field in self._evaluator.fields if reference.get(field) not in (None, ""))
+        if not fields:
+            return {"agreed": False, "field_agreement": 0.0}
+        scores = ColumnarEvaluator(fields=fields).score([result], [reference])
+        exact = scores["exact"][0]
+        return {"agreed": bool(exact.all()), "field_agreement": float(exact.mean())}
+
+    def shadow(
+        self,
+        model_type: str,
+        model_id: str,
+        call: Callable[[], Tuple[Dict[str, Any], Dict[str, Any]]],
+        primary_result: Dict[str, Any]
+    ) -> bool:
+        """Run a candidate call in the background and record its agreement with the primary
+
+        Args:
+            model_type: Registry model type
+            model_id: Candidate model being shadowed
+            call: Makes the candidate call; returns (result, usage) where usage
+                has latency_ms, prompt_tokens and completion_tokens
+            primary_result: The answer the user received
+
+        Returns:
+            False if the call was dropped because the shadow pool is busy
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending_shadows:
+                self.shadows_dropped += 1
+                return False
+            self._pending += 1
+            self.shadows_started += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.shadow_workers, thread_name_prefix="shadow")
+
+        def run():
+            try:
+                result, usage = call()
+                self.record(model_type, model_id, "shadow", agreement=self.agreement(result, primary_result), **usage)
+            except Exception as e:
+                print(f"Shadow call to {model_id} failed: {e}")
+                self.record(model_type, model_id, "shadow", error=True)
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+
+        self._executor.submit(run)
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Finish (or abandon) pending shadow calls"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shadows_started": self.shadows_started,
+            "shadows_dropped": self.shadows_dropped,
+            "shadows_pending": self._pending,
+        }
+
+
+# Global instance
+model_router = ModelRouter()
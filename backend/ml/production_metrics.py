@@ -0,0 +1,201 @@
+"""
+Production Metrics Rollups
+
+Daily aggregates of production predictions, maintained as log entries are
+written so /ml/metrics never re-reads the monthly JSONL logs. Each
+(day, model) row holds prediction, correction and rating totals, and a
+companion table counts corrections per field. A query over any date range
+and model sums a handful of rows per day, however many predictions were
+logged. Logs written before the rollups existed (live segments or
+columnar archives) are backfilled once, when the rollup database is created.
+"""
+
+import threading
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ml.columnar_archive import iter_segment
+from ml.sqlite_util import open_wal, transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    predictions INTEGER NOT NULL,
+    corrections INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    rating_count INTEGER NOT NULL,
+    PRIMARY KEY (day, model_id)
+);
+CREATE TABLE IF NOT EXISTS daily_fields (
+    day TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    corrections INTEGER NOT NULL,
+    PRIMARY KEY (day, model_id, field)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# Log entry fields the rollups read (archives decompress only these columns)
+ROLLUP_FIELDS = ["timestamp", "model_id", "was_corrected", "user_rating", "corrected_fields"]
+
+
+def month_range(month: str) -> Tuple[date, date]:
+    """First and last day of a YYYYMM month"""
+    start = datetime.strptime(month, "%Y%m").date()
+    next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, date.fromordinal(next_month.toordinal() - 1)
+
+
+class ProductionMetricsStore:
+    """SQLite (WAL) daily rollups of production prediction logs"""
+
+    def __init__(self, db_path: str):
+        """Initialize the rollup store, creating the database if needed
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_wal(self.db_path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _aggregate(
+        entries: Iterable[Dict[str, Any]],
+        totals: Optional[Dict[Tuple[str, str], List[int]]] = None,
+        fields: Optional[Counter] = None
+    ) -> Tuple[Dict[Tuple[str, str], List[int]], Counter]:
+        """Fold entries into per-(day, model) totals and per-field correction counts"""
+        totals = {} if totals is None else totals
+        fields = Counter() if fields is None else fields
+        for entry in entries:
+            key = (entry["timestamp"][:10], entry.get("model_id") or "unknown")
+            row = totals.setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += 1 if entry.get("was_corrected") else 0
+            if entry.get("user_rating"):
+                row[2] += entry["user_rating"]
+                row[3] += 1
+            for field in entry.get("corrected_fields") or []:
+                fields[(*key, field)] += 1
+        return totals, fields
+
+    def _apply(self, totals: Dict[Tuple[str, str], List[int]], fields: Counter) -> None:
+        """Add aggregated counts to the rollup tables (caller holds a transaction)"""
+        self._conn.executemany(
+            "INSERT INTO daily (day, model_id, predictions, corrections, rating_sum, rating_count) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, model_id) DO UPDATE SET "
+            "predictions = predictions + excluded.predictions, "
+            "corrections = corrections + excluded.corrections, "
+            "rating_sum = rating_sum + excluded.rating_sum, "
+            "rating_count = rating_count + excluded.rating_count",
+            [(*key, *row) for key, row in totals.items()],
+        )
+        self._conn.executemany(
+            "INSERT INTO daily_fields (day, model_id, field, corrections) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (day, model_id, field) DO UPDATE SET "
+            "corrections = corrections + excluded.corrections",
+            [(*key, count) for key, count in fields.items()],
+        )
+
+    def add_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Fold production log entries into the daily rollups in one transaction
+
+        Args:
+            entries: Entries as written by ModelEvaluator.track_production_performance
+        """
+        totals, fields = self._aggregate(entries)
+        with transaction(self._conn, self._lock):
+            self._apply(totals, fields)
+
+    def write_batch(self, entries: List[Dict[str, Any]]) -> None:
+        """RecordSink target interface: roll up queued log entries"""
+        self.add_entries(entries)
+
+    def query(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        model_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Aggregate metrics for an inclusive date range and optional model
+
+        Returns:
+            Totals plus per-field correction counts and a per-day series
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(end.isoformat())
+        if model_id is not None:
+            clauses.append("model_id = ?")
+            params.append(model_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            days = self._conn.execute(
+                "SELECT day, SUM(predictions), SUM(corrections), SUM(rating_sum), SUM(rating_count) "
+                f"FROM daily {where} GROUP BY day ORDER BY day",
+                params,
+            ).fetchall()
+            fields = self._conn.execute(
+                f"SELECT field, SUM(corrections) FROM daily_fields {where} GROUP BY field ORDER BY field",
+                params,
+            ).fetchall()
+
+        predictions = sum(row[1] for row in days)
+        corrections = sum(row[2] for row in days)
+        rating_sum = sum(row[3] for row in days)
+        rating_count = sum(row[4] for row in days)
+        return {
+            "total_predictions": predictions,
+            "corrections": corrections,
+            "rating_sum": rating_sum,
+            "total_ratings": rating_count,
+            "field_corrections": dict(fields),
+            "daily": [
+                {"day": day, "predictions": p, "corrections": c}
+                for day, p, c, _, _ in days
+            ],
+        }
+
+    def backfill(self, log_files: Iterable[Path]) -> int:
+        """Roll up pre-existing log segments once, when the rollups are new
+
+        Runs in a single write transaction that also marks the backfill done,
+        so concurrent workers starting together cannot count a log twice.
+        Entries logged afterwards are rolled up as they are written.
+
+        Returns:
+            Number of entries rolled up (0 if the backfill already ran)
+        """
+        with transaction(self._conn, self._lock):
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'backfilled_at'").fetchone()
+            if done:
+                return 0
+
+            totals: Dict[Tuple[str, str], List[int]] = {}
+            fields: Counter = Counter()
+            for path in log_files:
+                self._aggregate(iter_segment(path, ROLLUP_FIELDS), totals, fields)
+            self._apply(totals, fields)
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('backfilled_at', ?)", (datetime.utcnow().isoformat(),)
+            )
+        return sum(row[0] for row in totals.values())
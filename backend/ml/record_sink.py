@@ -0,0 +1,221 @@
+"""
+Write-Behind Record Sink
+
+Training samples and production logs are handed to a shared sink instead of
+being written inline by request handlers. Records are queued, grouped per
+target and flushed in batches (when a batch fills or a flush interval
+elapses) on a worker thread, so collecting a record costs a queue put.
+JSONL targets append each batch with a single O_APPEND write under an
+exclusive file lock, so lines from several uvicorn workers never
+interleave. The queue is drained on shutdown; when the sink is not running
+(scripts, tests) records are written synchronously.
+"""
+
+import os
+import json
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND still keeps single writes whole
+    fcntl = None
+
+_STOP = object()
+
+
+class JsonlFile:
+    """JSONL file target appended to atomically, one batch per write"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def write_batch(self, records: List[Any]) -> None:
+        """Append records as JSON lines with one locked O_APPEND write"""
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            # Closing the descriptor also releases the lock
+            os.close(fd)
+
+
+class RecordSink:
+    """Async write-behind queue flushing record batches to their targets"""
+
+    def __init__(
+        self,
+        max_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        """Initialize the sink (call start() from the event loop to enable batching)
+
+        Args:
+            max_batch: Records flushed at once
+            flush_interval: Seconds a partial batch may wait before it is flushed
+            max_queue: Queued records before submit() falls back to a direct write
+        """
+        self.max_batch = max_batch or int(os.getenv("RECORD_SINK_BATCH", "256"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("RECORD_SINK_FLUSH_SECONDS", "0.5")
+        )
+        self.max_queue = max_queue or int(os.getenv("RECORD_SINK_MAX_QUEUE", "10000"))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._jsonl_files: Dict[Path, JsonlFile] = {}
+
+        self.submitted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.direct_writes = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def jsonl(self, path: Path) -> JsonlFile:
+        """Shared JsonlFile target for a path (records for one file batch together)"""
+        path = Path(path)
+        target = self._jsonl_files.get(path)
+        if target is None:
+            target = self._jsonl_files[path] = JsonlFile(path)
+        return target
+
+    async def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything queued and stop the flusher"""
+        if not self.running:
+            return
+        await self._queue.put((_STOP, None))
+        await self._task
+        self._task = None
+
+        # Records queued behind the stop marker (e.g. handed over from worker
+        # threads during shutdown); anything submitted from now on is written directly
+        leftovers: List[Tuple[Any, Any]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item[0] is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            await asyncio.to_thread(self._write_groups, self._group(leftovers))
+
+    def submit(self, target: Any, record: Any) -> bool:
+        """Queue a record for a target with a write_batch(records) method
+
+        Returns:
+            False only if a direct (unbatched) write failed
+        """
+        self.submitted += 1
+        if not self.running:
+            return self._write_direct(target, record)
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:
+            # Called from a worker thread: hand the record to the loop
+            self._loop.call_soon_threadsafe(self._enqueue, target, record)
+            return True
+        return self._enqueue(target, record)
+
+    def _enqueue(self, target: Any, record: Any) -> bool:
+        if not self.running:
+            # Handed over from a thread after stop() drained the queue
+            return self._write_direct(target, record)
+        try:
+            self._queue.put_nowait((target, record))
+            return True
+        except asyncio.QueueFull:
+            # Back-pressure: the caller pays for its own write rather than losing it
+            return self._write_direct(target, record)
+
+    def _write_direct(self, target: Any, record: Any) -> bool:
+        self.direct_writes += 1
+        return self._write_groups([(target, [record])])
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[Any, Any]] = []
+            item = await self._queue.get()
+            if item[0] is _STOP:
+                return
+            batch.append(item)
+
+            deadline = self._loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await asyncio.to_thread(self._write_groups, self._group(batch))
+
+    @staticmethod
+    def _group(batch: List[Tuple[Any, Any]]) -> List[Tuple[Any, List[Any]]]:
+        """Records per target, keeping each target's submission order"""
+        groups: Dict[int, Tuple[Any, List[Any]]] = {}
+        for target, record in batch:
+            groups.setdefault(id(target), (target, []))[1].append(record)
+        return list(groups.values())
+
+    def _write_groups(self, groups: List[Tuple[Any, List[Any]]]) -> bool:
+        ok = True
+        for target, records in groups:
+            try:
+                target.write_batch(records)
+                self.flushed += len(records)
+                self.batches += 1
+            except Exception as e:
+                self.errors += 1
+                ok = False
+                print(f"Error flushing {len(records)} records to {target}: {e}")
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "direct_writes": self.direct_writes,
+            "errors": self.errors,
+        }
+
+
+# Global instance
+record_sink = RecordSink()
@@ -0,0 +1,40 @@
+"""
+SQLite Helpers for the ML Stores
+
+The training data, production metrics and routing metrics stores share one
+setup: a WAL-mode database in autocommit mode, usable from the sink's
+worker thread and request threads alike, with writes in explicit
+BEGIN IMMEDIATE transactions so concurrent workers serialize on the
+database lock instead of failing mid-transaction.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+
+def open_wal(db_path: Union[str, Path]) -> sqlite3.Connection:
+    """Open (creating if needed) a WAL-mode database in autocommit mode"""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Autocommit mode; transactions are opened explicitly with transaction()
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection, lock: threading.Lock) -> Iterator[sqlite3.Connection]:
+    """Write transaction under the store's lock, rolled back on any error"""
+    with lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
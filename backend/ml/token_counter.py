@@ -0,0 +1,318 @@
+"""
+Token Counting for Fine-Tuning Files
+
+Counts the tokens of chat fine-tuning samples with the model's own
+tokenizer (tiktoken) before a file is uploaded:
+- Each message is counted like the chat format bills it: content, role and
+  name tokens plus per-message and reply-priming overhead
+- Counts are cached per sample (by an 8-byte hash of its JSONL line, the
+  key the export also uses), so re-estimating a grown corpus or a freshly
+  exported file only tokenizes the new samples
+- Large files are tokenized in line chunks on a process pool, one worker
+  per core; small files are counted inline
+- Reports include the per-sample distribution and the samples exceeding the
+  model's training context limit (OpenAI truncates those)
+
+tiktoken is optional: without it (or without its encoding files, which are
+downloaded on first use) counts fall back to the 4-characters-per-token
+approximation and reports say so.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:  # Counts fall back to the character approximation
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-4o-mini-2024-07-18"
+
+# Tokens added per message (role markers, separators) and to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_OVERHEAD_TOKENS = 3
+
+APPROXIMATE = "approximate"
+
+# Longest training example per base model, in tokens
+TRAINING_CONTEXT_LIMITS = {
+    "gpt-4o-mini": 65_536,
+    "gpt-4o": 65_536,
+    "gpt-3.5-turbo": 16_385,
+}
+
+# Over-limit sample numbers included in a report
+MAX_REPORTED_SAMPLES = 20
+
+# Encoding name -> (token count function, exact)
+_encoders: Dict[str, Tuple[Callable[[str], int], bool]] = {}
+
+
+def encoding_for_model(model: str) -> str:
+    """tiktoken encoding used by a (base or fine-tuned) model"""
+    return "o200k_base" if "gpt-4o" in model or "gpt-4.1" in model else "cl100k_base"
+
+
+def context_limit_for_model(model: str) -> int:
+    for prefix, limit in TRAINING_CONTEXT_LIMITS.items():
+        if prefix in model:
+            return limit
+    return TRAINING_CONTEXT_LIMITS["gpt-4o-mini"]
+
+
+def _encoder(encoding_name: str) -> Callable[[str], int]:
+    """Token count function for an encoding, loaded once per process"""
+    if encoding_name not in _encoders:
+        _encoders[encoding_name] = (lambda text: len(text) // 4, False)
+        if tiktoken is not None and encoding_name != APPROXIMATE:
+            try:
+                encoding = tiktoken.get_encoding(encoding_name)
+                _encoders[encoding_name] = (lambda text: len(encoding.encode(text, disallowed_special=())), True)
+            except Exception as e:  # Encoding files unavailable (e.g. offline)
+                print(f"tiktoken encoding {encoding_name} unavailable, approximating token counts: {e}")
+    return _encoders[encoding_name][0]
+
+
+def is_exact(encoding_name: str) -> bool:
+    """Whether counts for this encoding come from the real tokenizer"""
+    _encoder(encoding_name)
+    return _encoders[encoding_name][1]
+
+
+def _text(value: Any) -> str:
+    """Text of a message field (content parts or tool calls are flattened)"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list) and all(isinstance(part, dict) and part.get("type") == "text" for part in value):
+        return "".join(part.get("text", "") for part in value)
+    return json.dumps(value, separators=(",", ":"))
+
+
+def count_messages(messages: List[Dict[str, Any]], encoding_name: str) -> int:
+    """Tokens of one conversation in the chat format"""
+    count = _encoder(encoding_name)
+    total = REPLY_OVERHEAD_TOKENS
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS
+        for key, value in message.items():
+            if value is None or key == "weight":
+                continue
+            total += count(_text(value))
+            if key == "name":
+                total += 1
+    return total
+
+
+def sample_line(messages: List[Dict[str, Any]]) -> str:
+    """JSONL line of a chat sample, exactly as the fine-tuning export writes it"""
+    return json.dumps({"messages": messages})
+
+
+def sample_key(line: Union[str, bytes]) -> bytes:
+    """Cache key of a JSONL sample line (surrounding whitespace ignored)"""
+    if isinstance(line, str):
+        line = line.encode("utf-8")
+    return hashlib.blake2b(line.strip(), digest_size=8).digest()
+
+
+def _count_lines(encoding_name: str, lines: List[bytes]) -> List[Optional[int]]:
+    """Pool task: tokens per JSONL line (None for a malformed line)"""
+    counts: List[Optional[int]] = []
+    for line in lines:
+        try:
+            counts.append(count_messages(json.loads(line)["messages"], encoding_name))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            counts.append(None)
+    return counts
+
+
+def token_distribution(tokens: np.ndarray) -> Dict[str, Any]:
+    """Summary statistics of per-sample token counts"""
+    if not len(tokens):
+        return {"min": 0, "max": 0, "mean": 0.0, "p50": 0, "p90": 0, "p99": 0}
+    p50, p90, p99 = np.percentile(tokens, [50, 90, 99])
+    return {
+        "min": int(tokens.min()),
+        "max": int(tokens.max()),
+        "mean": round(float(tokens.mean()), 1),
+        "p50": int(p50),
+        "p90": int(p90),
+        "p99": int(p99),
+    }
+
+
+class TokenCounter:
+    """Cached, optionally parallel token counter for one model's tokenizer"""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        cache_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        chunk_lines: Optional[int] = None,
+        parallel_min_bytes: Optional[int] = None
+    ):
+        """Initialize the counter
+
+        Args:
+            model: Model whose tokenizer and context limit are used
+            cache_size: Per-sample counts kept in memory
+            workers: Processes used for large files (1 counts inline)
+            chunk_lines: Lines per pool task
+            parallel_min_bytes: Files smaller than this are counted inline
+        """
+        self.model = model
+        self.encoding_name = encoding_for_model(model)
+        self.context_limit = context_limit_for_model(model)
+        self.cache_size = cache_size or int(os.getenv("TOKEN_CACHE_SIZE", "200000"))
+        self.workers = workers or int(os.getenv("TOKEN_COUNT_WORKERS") or 0) or os.cpu_count() or 1
+        self.chunk_lines = chunk_lines or int(os.getenv("TOKEN_COUNT_CHUNK_LINES", "1000"))
+        self.parallel_min_bytes = parallel_min_bytes if parallel_min_bytes is not None else int(
+            float(os.getenv("TOKEN_COUNT_PARALLEL_MIN_MB", "4")) * 1024 * 1024
+        )
+
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        # Exports and estimates run on worker threads and share this cache
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def tokenizer(self) -> str:
+        """Encoding name, or "approximate" when tiktoken is unavailable"""
+        return self.encoding_name if is_exact(self.encoding_name) else APPROXIMATE
+
+    def _cached(self, key: bytes) -> Optional[int]:
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return tokens
+
+    def _remember(self, key: bytes, tokens: int) -> None:
+        with self._lock:
+            self.cache_misses += 1
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def count(self, messages: List[Dict[str, Any]], key: Optional[bytes] = None) -> int:
+        """Tokens of one conversation
+
+        Args:
+            messages: Chat messages
+            key: sample_key() of the conversation's line (counts are cached under it)
+        """
+        tokens = self._cached(key) if key is not None else None
+        if tokens is None:
+            tokens = count_messages(messages, self.encoding_name)
+            if key is not None:
+                self._remember(key, tokens)
+        return tokens
+
+    def count_file(self, path: str) -> Dict[str, Any]:
+        """Count every sample of a fine-tuning JSONL (or .jsonl.gz) file
+
+        Returns:
+            Sample and token totals, the per-sample distribution, the samples
+            over the context limit and malformed samples (1-based sample
+            numbers, blank lines not counted)
+        """
+        path = Path(path)
+        parallel = self.workers > 1 and path.stat().st_size >= self.parallel_min_bytes
+        opener = gzip.open if path.suffix == ".gz" else open
+
+        counts: List[Optional[int]] = []
+        # Pending batches: (line indexes, cache keys, future or inline result)
+        pending: Deque[Tuple[List[int], List[bytes], Any]] = deque()
+        pool = None
+        if parallel:
+            pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        def collect(batch: Tuple[List[int], List[bytes], Any]) -> None:
+            indexes, keys, result = batch
+            for index, key, tokens in zip(indexes, keys, result.result() if isinstance(result, Future) else result):
+                counts[index] = tokens
+                if tokens is not None:
+                    self._remember(key, tokens)
+
+        def submit(indexes: List[int], keys: List[bytes], lines: List[bytes]) -> None:
+            if pool is None:
+                pending.append((indexes, keys, _count_lines(self.encoding_name, lines)))
+            else:
+                pending.append((indexes, keys, pool.submit(_count_lines, self.encoding_name, lines)))
+            # Bound the lines held in memory while workers catch up
+            while len(pending) > self.workers * 2:
+                collect(pending.popleft())
+
+        try:
+            indexes: List[int] = []
+            keys: List[bytes] = []
+            lines: List[bytes] = []
+            with opener(path, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    key = sample_key(line)
+                    counts.append(self._cached(key))
+                    if counts[-1] is not None:
+                        continue
+                    indexes.append(len(counts) - 1)
+                    keys.append(key)
+                    lines.append(line)
+                    if len(lines) >= self.chunk_lines:
+                        submit(indexes, keys, lines)
+                        indexes, keys, lines = [], [], []
+            if lines:
+                submit(indexes, keys, lines)
+            while pending:
+                collect(pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        tokens = np.array([count for count in counts if count is not None], dtype=np.int64)
+        over_limit = [index + 1 for index, count in enumerate(counts) if count is not None and count > self.context_limit]
+        return {
+            "model": self.model,
+            "tokenizer": self.tokenizer,
+            "samples": len(tokens),
+            "total_tokens": int(tokens.sum()),
+            "distribution": token_distribution(tokens),
+            "context_limit": self.context_limit,
+            "over_context_limit": len(over_limit),
+            "over_context_limit_samples": over_limit[:MAX_REPORTED_SAMPLES],
+            "invalid_samples": [index + 1 for index, count in enumerate(counts) if count is None],
+            "parallel": parallel,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokenizer": self.tokenizer,
+            "cached_samples": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(model: str = DEFAULT_MODEL) -> TokenCounter:
+    """Shared counter (and sample cache) for a model's tokenizer"""
+    encoding_name = encoding_for_model(model)
+    key = f"{encoding_name}:{context_limit_for_model(model)}"
+    if key not in _counters:
+        _counters[key] = TokenCounter(model)
+    return _counters[key]
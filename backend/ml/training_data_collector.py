@@ -3,6 +3,9 @@ Training Data Collector for Fine-Tuning Card Identification Models
 
 This module collects and formats user corrections and validated scans
 to build high-quality training datasets for fine-tuning OpenAI models.
+Samples are kept in an indexed SQLite store (see training_data_store), so
+statistics and filtered exports do not rescan the whole corpus, and are
+written through the shared write-behind record sink.
 """
 
 import json
@@ -11,23 +14,47 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from ml.columnar_archive import ARCHIVE_SUFFIX
+from ml.finetuning_export import export_samples
+from ml.log_compaction import ARCHIVE_DIR
+from ml.record_sink import RecordSink, record_sink
+from ml.training_data_store import TrainingDataStore, sample_row
+
+# Dataset name -> legacy JSONL file imported into the store (and later archived)
+DATASET_FILES = {
+    "card_identification": "card_identification.jsonl",
+    "listing_generation": "listing_generation.jsonl",
+    "user_corrections": "user_corrections.jsonl",
+}
+
 
 class TrainingDataCollector:
     """Collects and manages training data for fine-tuning"""
 
-    def __init__(self, data_dir: str = "ml/training_data"):
+    def __init__(self, data_dir: str = "ml/training_data", sink: Optional[RecordSink] = None):
         """Initialize the training data collector
 
         Args:
             data_dir: Directory to store training data files
+            sink: Write-behind sink for new samples (defaults to the shared one)
         """
         self.data_dir = Path(data_dir)
+        self.sink = sink or record_sink
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # Separate files for different model types
-        self.card_id_file = self.data_dir / "card_identification.jsonl"
-        self.listing_gen_file = self.data_dir / "listing_generation.jsonl"
-        self.corrections_file = self.data_dir / "user_corrections.jsonl"
+        # Legacy per-dataset JSONL files (imported into the store on startup)
+        self.card_id_file = self.data_dir / DATASET_FILES["card_identification"]
+        self.listing_gen_file = self.data_dir / DATASET_FILES["listing_generation"]
+        self.corrections_file = self.data_dir / DATASET_FILES["user_corrections"]
+
+        self.store = TrainingDataStore(str(self.data_dir / "training_data.db"))
+        for dataset, filename in DATASET_FILES.items():
+            imported = self.store.import_jsonl(dataset, self.data_dir / filename)
+            # Legacy files already compacted (only new to a fresh store)
+            for archive in sorted((self.data_dir / ARCHIVE_DIR).glob(f"{dataset}.*{ARCHIVE_SUFFIX}")):
+                imported += self.store.import_archive(dataset, archive)
+            if imported:
+                print(f"Imported {imported} {dataset} samples from {filename}")
 
     def collect_card_identification_sample(
         self,
@@ -78,7 +105,7 @@ class TrainingDataCollector:
             }
         }
 
-        return self._append_to_file(self.card_id_file, training_sample)
+        return self._store_sample("card_identification", training_sample)
 
     def collect_user_correction(
         self,
@@ -116,7 +143,7 @@ class TrainingDataCollector:
                 user_id=user_id
             )
 
-        return self._append_to_file(self.corrections_file, correction_sample)
+        return self._store_sample("user_corrections", correction_sample)
 
     def collect_listing_generation_sample(
         self,
@@ -167,40 +194,42 @@ class TrainingDataCollector:
             }
         }
 
-        return self._append_to_file(self.listing_gen_file, training_sample)
+        return self._store_sample("listing_generation", training_sample)
 
     def get_dataset_stats(self) -> Dict[str, Any]:
         """Get statistics about collected training data
 
         Returns:
-            Dictionary with stats for each dataset
+            Dictionary with stats for each dataset, plus per-source and
+            per-confidence breakdowns
         """
-        stats = {
-            "card_identification": self._count_samples(self.card_id_file),
-            "listing_generation": self._count_samples(self.listing_gen_file),
-            "user_corrections": self._count_samples(self.corrections_file),
-            "total_samples": 0,
-            "last_updated": None
+        store_stats = self.store.stats()
+        stats: Dict[str, Any] = {
+            dataset: store_stats.get(dataset, {}).get("count", 0)
+            for dataset in DATASET_FILES
         }
+        stats["total_samples"] = stats["card_identification"] + stats["listing_generation"]
 
-        stats["total_samples"] = (
-            stats["card_identification"] +
-            stats["listing_generation"]
-        )
-
-        # Get last modified time
-        files = [self.card_id_file, self.listing_gen_file, self.corrections_file]
-        mod_times = [f.stat().st_mtime for f in files if f.exists()]
-        if mod_times:
-            stats["last_updated"] = datetime.fromtimestamp(max(mod_times)).isoformat()
+        last_updated = [entry["last_at"] for entry in store_stats.values() if entry["last_at"]]
+        stats["last_updated"] = max(last_updated) if last_updated else None
 
+        stats["breakdown"] = {
+            dataset: {
+                "by_source": entry["by_source"],
+                "by_confidence": entry["by_confidence"],
+            }
+            for dataset, entry in store_stats.items()
+        }
         return stats
 
     def export_for_finetuning(
         self,
         model_type: str = "card_identification",
         min_confidence: float = 0.8,
-        output_file: Optional[str] = None
+        output_file: Optional[str] = None,
+        validation_split: float = 0.0,
+        dedupe: bool = True,
+        compress: bool = False
     ) -> str:
         """Export training data in OpenAI fine-tuning format
 
@@ -208,19 +237,45 @@ class TrainingDataCollector:
             model_type: Type of model ('card_identification' or 'listing_generation')
             min_confidence: Minimum confidence score to include
             output_file: Optional output file path
+            validation_split: Fraction of samples held out for validation
+            dedupe: Drop duplicate conversations
+            compress: gzip the output
 
         Returns:
-            Path to the exported file
+            Path to the exported training file
         """
-        if model_type == "card_identification":
-            source_file = self.card_id_file
-        elif model_type == "listing_generation":
-            source_file = self.listing_gen_file
-        else:
+        return self.export_dataset(
+            model_type, min_confidence, output_file, validation_split, dedupe, compress
+        )["file_path"]
+
+    def export_dataset(
+        self,
+        model_type: str = "card_identification",
+        min_confidence: float = 0.8,
+        output_file: Optional[str] = None,
+        validation_split: float = 0.0,
+        dedupe: bool = True,
+        compress: bool = False
+    ) -> Dict[str, Any]:
+        """Export training data in one streaming pass and report what was written
+
+        Args:
+            model_type: Type of model ('card_identification' or 'listing_generation')
+            min_confidence: Minimum confidence score to include
+            output_file: Optional output file path
+            validation_split: Fraction of samples held out for validation (by content hash)
+            dedupe: Drop conversations with identical messages
+            compress: gzip the output
+
+        Returns:
+            {"file_path", "sample_count", "tokens"} for the training file, plus
+            "validation" (same keys, or None) and "duplicates_skipped"
+        """
+        if model_type not in ("card_identification", "listing_generation"):
             raise ValueError(f"Unknown model type: {model_type}")
 
-        if not source_file.exists():
-            raise FileNotFoundError(f"No training data found at {source_file}")
+        if self.store.count(model_type) == 0:
+            raise FileNotFoundError(f"No training data found for {model_type}")
 
         # Output file
         if output_file is None:
@@ -229,21 +284,27 @@ class TrainingDataCollector:
         else:
             output_file = Path(output_file)
 
-        # Filter by confidence and export
-        exported_count = 0
-        with open(source_file, 'r') as infile, open(output_file, 'w') as outfile:
-            for line in infile:
-                sample = json.loads(line)
-
-                # Check confidence score
-                confidence = sample.get("metadata", {}).get("confidence_score", 1.0)
-                if confidence >= min_confidence:
-                    # Write in OpenAI format (just messages, no metadata)
-                    outfile.write(json.dumps({"messages": sample["messages"]}) + "\n")
-                    exported_count += 1
+        # Confidence filtering walks the (dataset, confidence) index
+        result = export_samples(
+            self.store.iter_samples(model_type, min_confidence=min_confidence),
+            output_file,
+            validation_split=validation_split,
+            dedupe=dedupe,
+            compress=compress
+        )
 
-        print(f"Exported {exported_count} samples to {output_file}")
-        return str(output_file)
+        train = result["train"]
+        validation = result["validation"]
+        print(
+            f"Exported {train['sample_count']} samples to {train['file_path']}"
+            + (f" and {validation['sample_count']} to {validation['file_path']}" if validation else "")
+            + f" ({result['duplicates_skipped']} duplicates skipped)"
+        )
+        return {
+            **train,
+            "validation": validation,
+            "duplicates_skipped": result["duplicates_skipped"],
+        }
 
     def _build_identification_prompt(
         self,
@@ -275,27 +336,14 @@ class TrainingDataCollector:
             f"and tags/keywords optimized for {platform}."
         )
 
-    def _append_to_file(self, file_path: Path, data: Dict[str, Any]) -> bool:
-        """Append a JSON line to a file"""
+    def _store_sample(self, dataset: str, data: Dict[str, Any]) -> bool:
+        """Queue a sample for the indexed store"""
         try:
-            with open(file_path, 'a') as f:
-                f.write(json.dumps(data) + "\n")
-            return True
+            return self.sink.submit(self.store, sample_row(dataset, data))
         except Exception as e:
-            print(f"Error writing to {file_path}: {e}")
+            print(f"Error storing {dataset} sample: {e}")
             return False
 
-    def _count_samples(self, file_path: Path) -> int:
-        """Count the number of samples in a JSONL file"""
-        if not file_path.exists():
-            return 0
-
-        count = 0
-        with open(file_path, 'r') as f:
-            for _ in f:
-                count += 1
-        return count
-
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,310 @@
+"""
+Indexed Training Data Store
+
+SQLite-backed storage for fine-tuning samples. Samples are indexed by
+dataset, source and confidence, and per-dataset counters are maintained in
+the same transaction as each insert, so dataset statistics are a read of a
+small counter table and filtered exports walk an index instead of scanning
+every JSONL line. Legacy JSONL files are imported incrementally (by byte
+offset) so existing corpora carry over; once compacted into columnar
+archives (see log_compaction) they are imported from the archive instead.
+"""
+
+import json
+import threading
+from itertools import islice
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ml.columnar_archive import iter_segment
+from ml.sqlite_util import open_wal, transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    source TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    platform TEXT,
+    collected_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_dataset_confidence ON samples (dataset, confidence);
+CREATE INDEX IF NOT EXISTS idx_samples_dataset_source ON samples (dataset, source, confidence);
+CREATE TABLE IF NOT EXISTS counters (
+    dataset TEXT NOT NULL,
+    source TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (dataset, source, bucket)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# (dataset, source, confidence, platform, collected_at, payload json)
+SampleRow = Tuple[str, str, float, Optional[str], str, str]
+
+
+def confidence_bucket(confidence: float) -> int:
+    """Tenth-of-a-point bucket (0-10) used for the confidence histogram"""
+    return max(0, min(10, int(round(confidence * 100)) // 10))
+
+
+def sample_row(dataset: str, sample: Dict[str, Any]) -> SampleRow:
+    """Extract the indexed columns from a training sample or correction record"""
+    metadata = sample.get("metadata") or {}
+    confidence = metadata.get("confidence_score")
+    collected_at = metadata.get("collected_at") or sample.get("corrected_at") or datetime.utcnow().isoformat()
+    return (
+        dataset,
+        metadata.get("source") or ("user_correction" if "corrected" in sample else "unknown"),
+        float(confidence) if confidence is not None else 1.0,
+        metadata.get("platform"),
+        collected_at,
+        json.dumps(sample),
+    )
+
+
+class TrainingDataStore:
+    """SQLite (WAL) store of training samples with maintained counters"""
+
+    def __init__(self, db_path: str):
+        """Initialize the store, creating the database if needed
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_wal(self.db_path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, dataset: str, sample: Dict[str, Any]) -> int:
+        """Store one sample
+
+        Returns:
+            Row id of the stored sample
+        """
+        return self.add_rows([sample_row(dataset, sample)])[0]
+
+    def add_many(self, dataset: str, samples: Sequence[Dict[str, Any]]) -> List[int]:
+        """Store several samples of one dataset in a single transaction"""
+        return self.add_rows([sample_row(dataset, sample) for sample in samples])
+
+    def add_rows(self, rows: Sequence[SampleRow]) -> List[int]:
+        """Insert prepared rows and update the counters atomically
+
+        Args:
+            rows: Rows built with sample_row()
+
+        Returns:
+            Row ids in insertion order
+        """
+        with transaction(self._conn, self._lock):
+            return self._insert(rows)
+
+    def _insert(self, rows: Sequence[SampleRow]) -> List[int]:
+        """Insert rows and counter increments (inside an open transaction)"""
+        increments: Dict[Tuple[str, str, int], Tuple[int, str]] = {}
+        for dataset, source, confidence, _, collected_at, _ in rows:
+            key = (dataset, source, confidence_bucket(confidence))
+            count, last_at = increments.get(key, (0, collected_at))
+            increments[key] = (count + 1, max(last_at, collected_at))
+
+        ids = []
+        for row in rows:
+            cursor = self._conn.execute(
+                "INSERT INTO samples (dataset, source, confidence, platform, collected_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            ids.append(cursor.lastrowid)
+        self._conn.executemany(
+            "INSERT INTO counters (dataset, source, bucket, count, last_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (dataset, source, bucket) DO UPDATE SET "
+            "count = count + excluded.count, last_at = max(last_at, excluded.last_at)",
+            [(*key, count, last_at) for key, (count, last_at) in increments.items()],
+        )
+        return ids
+
+    def _import_batch(self, rows: Sequence[SampleRow], path: Path, start: int, end: int) -> bool:
+        """Insert one import batch and advance the file's offset from start to end
+
+        The stored offset is checked in the same transaction as the insert:
+        if another worker (e.g. a second uvicorn process importing on
+        startup) has already moved it, nothing is inserted.
+
+        Returns:
+            Whether the batch was imported
+        """
+        offset_key = f"import_offset:{Path(path).resolve()}"
+        with transaction(self._conn, self._lock):
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (offset_key,)).fetchone()
+            if (int(row[0]) if row else 0) != start:
+                return False
+            self._insert(rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (offset_key, str(end)))
+        return True
+
+    def write_batch(self, rows: List[SampleRow]) -> None:
+        """RecordSink target interface: insert queued rows in one transaction"""
+        self.add_rows(rows)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-dataset totals, source counts and confidence histogram
+
+        Reads only the counter table, so the cost does not grow with the corpus.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT dataset, source, bucket, count, last_at FROM counters").fetchall()
+
+        stats: Dict[str, Dict[str, Any]] = {}
+        for dataset, source, bucket, count, last_at in rows:
+            entry = stats.setdefault(dataset, {"count": 0, "by_source": {}, "by_confidence": {}, "last_at": None})
+            entry["count"] += count
+            entry["by_source"][source] = entry["by_source"].get(source, 0) + count
+            label = f"{bucket / 10:.1f}"
+            entry["by_confidence"][label] = entry["by_confidence"].get(label, 0) + count
+            if entry["last_at"] is None or last_at > entry["last_at"]:
+                entry["last_at"] = last_at
+        return stats
+
+    def count(self, dataset: str, min_confidence: Optional[float] = None, source: Optional[str] = None) -> int:
+        """Number of samples matching the filters (answered from the indexes)"""
+        if min_confidence is None and source is None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT COALESCE(SUM(count), 0) FROM counters WHERE dataset = ?", (dataset,)
+                ).fetchone()
+            return row[0]
+        query, params = self._filter(dataset, min_confidence, source)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM samples WHERE {query}", params).fetchone()[0]
+
+    def iter_samples(
+        self,
+        dataset: str,
+        min_confidence: Optional[float] = None,
+        source: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream matching samples in insertion order, batch_size rows at a time"""
+        query, params = self._filter(dataset, min_confidence, source)
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, payload FROM samples WHERE {query} AND id > ? ORDER BY id LIMIT ?",
+                    (*params, last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row_id, payload in rows:
+                yield json.loads(payload)
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _filter(dataset: str, min_confidence: Optional[float], source: Optional[str]) -> Tuple[str, Tuple]:
+        clauses, params = ["dataset = ?"], [dataset]
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        return " AND ".join(clauses), tuple(params)
+
+    def import_jsonl(self, dataset: str, path: Path, batch_size: int = 1000) -> int:
+        """Import lines appended to a legacy JSONL file since the last import
+
+        The byte offset reached is stored with each batch, so re-running the
+        import (e.g. on every startup) only picks up new lines, and workers
+        importing the same file concurrently never import a line twice.
+
+        Returns:
+            Number of samples imported
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+
+        offset = self.import_offset(path)
+        if path.stat().st_size <= offset:
+            return 0
+
+        imported = 0
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                end = offset
+                rows: List[SampleRow] = []
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partially written line; picked up next time
+                    end += len(line)
+                    if line.strip():
+                        try:
+                            rows.append(sample_row(dataset, json.loads(line)))
+                        except json.JSONDecodeError:
+                            print(f"Skipping malformed line in {path}")
+                    if len(rows) >= batch_size:
+                        break
+                if end == offset:
+                    return imported
+                if self._import_batch(rows, path, offset, end):
+                    imported += len(rows)
+                    offset = end
+                else:
+                    # Imported by another worker; continue from where it got to
+                    offset = self.import_offset(path)
+
+    def import_offset(self, path: Path) -> int:
+        """Bytes (JSONL) or rows (archive) of a file already imported"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (f"import_offset:{Path(path).resolve()}",)
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def import_archive(self, dataset: str, path: Path, batch_size: int = 1000) -> int:
+        """Import the rows of a columnar archive not imported yet
+
+        Archives are immutable, so the offset stored is a row count; like
+        import_jsonl it is checked and advanced in each batch's transaction.
+
+        Returns:
+            Number of samples imported
+        """
+        path = Path(path)
+        offset = self.import_offset(path)
+        samples = islice(iter_segment(path), offset, None)
+
+        imported = 0
+        while True:
+            rows = [sample_row(dataset, sample) for sample in islice(samples, batch_size)]
+            if not rows:
+                return imported
+            if self._import_batch(rows, path, offset, offset + len(rows)):
+                imported += len(rows)
+                offset += len(rows)
+            else:
+                offset = self.import_offset(path)
+                samples = islice(iter_segment(path), offset, None)
+
+    def move_import(self, old_path: Path, new_path: Path, offset: int) -> None:
+        """Carry an import over to the file that replaced old_path (e.g. its archive)"""
+        with transaction(self._conn, self._lock):
+            self._conn.execute("DELETE FROM meta WHERE key = ?", (f"import_offset:{Path(old_path).resolve()}",))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"import_offset:{Path(new_path).resolve()}", str(offset)),
+            )
@@ -5,22 +5,33 @@ These routes provide an API interface for the ML admin dashboard.
 """
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
+from datetime import date
+import asyncio
 import os
 
 from ml.training_data_collector import TrainingDataCollector
 from ml.finetuning_manager import FineTuningManager
+from ml.finetuning_watcher import FineTuningWatcher
 from ml.model_manager import ModelManager
+from ml.model_registry import VersionConflict, model_registry
+from ml.model_routing import model_router
 from ml.model_evaluator import ModelEvaluator
+from ml.log_compaction import LogCompactor
+from services.serialization import sse_event
 
 router = APIRouter(prefix="/ml", tags=["ML Administration"])
 
 # Initialize services
 collector = TrainingDataCollector()
 finetuning_manager = None  # Lazy init (needs API key)
+finetuning_watcher = None  # Lazy init (started on first use)
 model_manager = None  # Lazy init
 evaluator = ModelEvaluator()
+compactor = LogCompactor(str(evaluator.results_dir), str(collector.data_dir), training_store=collector.store)
+compaction_task = None
 
 
 def get_finetuning_manager():
@@ -31,6 +42,53 @@ def get_finetuning_manager():
     return finetuning_manager
 
 
+async def get_finetuning_watcher():
+    """Lazy initialize and start the fine-tuning job watcher"""
+    global finetuning_watcher
+    if finetuning_watcher is None:
+        finetuning_watcher = FineTuningWatcher(get_finetuning_manager)
+    await finetuning_watcher.start()
+    return finetuning_watcher
+
+
+@router.on_event("shutdown")
+async def stop_finetuning_watcher():
+    """Stop polling fine-tuning jobs"""
+    if finetuning_watcher is not None:
+        await finetuning_watcher.stop()
+
+
+async def _compact_periodically(interval: float):
+    """Rotate and archive ML data files every interval seconds"""
+    while True:
+        try:
+            report = await asyncio.to_thread(compactor.run)
+            if report.get("archived") or report.get("training_archived"):
+                print(f"Log compaction archived {len(report['archived']) + len(report['training_archived'])} "
+                      f"segments ({report['bytes_saved']} bytes saved)")
+        except Exception as e:
+            print(f"Log compaction failed: {e}")
+        await asyncio.sleep(interval)
+
+
+@router.on_event("startup")
+async def start_log_compaction():
+    """Start the periodic log rotation and compaction job"""
+    global compaction_task
+    interval = float(os.getenv("LOG_COMPACTION_INTERVAL_SECONDS", "3600"))
+    if interval > 0 and compaction_task is None:
+        compaction_task = asyncio.create_task(_compact_periodically(interval))
+
+
+@router.on_event("shutdown")
+async def stop_log_compaction():
+    """Cancel the log compaction job"""
+    global compaction_task
+    if compaction_task is not None:
+        compaction_task.cancel()
+        compaction_task = None
+
+
 def get_model_manager():
     """Lazy initialize model manager"""
     global model_manager
@@ -43,6 +101,14 @@ def get_model_manager():
 class ExportRequest(BaseModel):
     model_type: str
     min_confidence: float = 0.8
+    validation_split: float = 0.0
+    dedupe: bool = True
+    compress: bool = False
+
+
+class EstimateRequest(ExportRequest):
+    model: str = "gpt-4o-mini-2024-07-18"
+    epochs: int = Field(3, ge=1)
 
 
 class CreateJobRequest(BaseModel):
@@ -50,6 +116,7 @@ class CreateJobRequest(BaseModel):
     model: str = "gpt-4o-mini-2024-07-18"
     suffix: Optional[str] = None
     model_type: str = "card_identification"
+    validation_file_id: Optional[str] = None
 
 
 class ModelConfigUpdate(BaseModel):
@@ -60,6 +127,17 @@ class ModelConfigUpdate(BaseModel):
 class UpdateConfigRequest(BaseModel):
     card_identification: ModelConfigUpdate
     listing_generation: ModelConfigUpdate
+    expected_version: Optional[int] = None
+    warm: bool = True
+
+
+class RolloutRequest(BaseModel):
+    model_type: str = "card_identification"
+    candidate: Optional[str] = None  # None ends the rollout
+    canary_percent: float = Field(0.0, ge=0, le=100)
+    shadow_percent: float = Field(0.0, ge=0, le=100)
+    expected_version: Optional[int] = None
+    warm: bool = True
 
 
 # Training Data Routes
@@ -77,20 +155,21 @@ async def get_training_data_stats():
 async def export_training_data(request: ExportRequest):
     """Export training data for fine-tuning"""
     try:
-        file_path = collector.export_for_finetuning(
+        export = await asyncio.to_thread(
+            collector.export_dataset,
             model_type=request.model_type,
-            min_confidence=request.min_confidence
+            min_confidence=request.min_confidence,
+            validation_split=request.validation_split,
+            dedupe=request.dedupe,
+            compress=request.compress
         )
 
-        # Count samples in export
-        sample_count = 0
-        with open(file_path, 'r') as f:
-            for _ in f:
-                sample_count += 1
-
         return {
-            "file_path": file_path,
-            "sample_count": sample_count,
+            "file_path": export["file_path"],
+            "sample_count": export["sample_count"],
+            "tokens": export["tokens"],
+            "validation": export["validation"],
+            "duplicates_skipped": export["duplicates_skipped"],
             "model_type": request.model_type,
             "min_confidence": request.min_confidence
         }
@@ -105,11 +184,26 @@ async def export_training_data(request: ExportRequest):
 # Fine-Tuning Routes
 @router.get("/finetuning/jobs")
 async def list_finetuning_jobs():
-    """List recent fine-tuning jobs"""
+    """List recent fine-tuning jobs (served from the watcher's cache)"""
     try:
-        manager = get_finetuning_manager()
-        jobs = manager.list_jobs(limit=20)
-        return {"jobs": jobs}
+        get_finetuning_manager()  # Surface a missing API key as a 400
+        watcher = await get_finetuning_watcher()
+        try:
+            loaded = await watcher.wait_loaded(timeout=10)
+        except asyncio.TimeoutError:
+            loaded = False
+        if not loaded:
+            if not watcher.jobs():
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Fine-tuning jobs unavailable: {watcher.last_error or 'still loading from OpenAI'}",
+                    headers={"Retry-After": str(int(watcher.min_interval))}
+                )
+            # Jobs tracked so far (e.g. just created), until the list loads
+            return {"jobs": watcher.jobs(), "partial": True, "error": watcher.last_error}
+        return {"jobs": watcher.jobs()}
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -121,24 +215,60 @@ async def upload_training_file(request: ExportRequest):
     """Upload training file to OpenAI"""
     try:
         # First export the data
-        file_path = collector.export_for_finetuning(
+        export = await asyncio.to_thread(
+            collector.export_dataset,
             model_type=request.model_type,
-            min_confidence=request.min_confidence
+            min_confidence=request.min_confidence,
+            validation_split=request.validation_split,
+            dedupe=request.dedupe,
+            compress=request.compress
         )
 
-        # Upload to OpenAI
+        # Token counts and cost, reported before the file leaves the server
         manager = get_finetuning_manager()
-        file_id = manager.upload_training_file(file_path)
+        estimate = await asyncio.to_thread(manager.estimate_cost, export["file_path"])
+
+        # Upload to OpenAI (the validation split too, when there is one)
+        file_id = manager.upload_training_file(export["file_path"])
+        validation_file_id = None
+        if export["validation"]:
+            validation_file_id = manager.upload_training_file(export["validation"]["file_path"])
 
         return {
             "file_id": file_id,
-            "file_path": file_path,
-            "model_type": request.model_type
+            "file_path": export["file_path"],
+            "validation_file_id": validation_file_id,
+            "model_type": request.model_type,
+            "estimate": estimate
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/finetuning/estimate")
+async def estimate_finetuning_cost(request: EstimateRequest):
+    """Export training data and report token counts and cost without uploading"""
+    try:
+        export = await asyncio.to_thread(
+            collector.export_dataset,
+            model_type=request.model_type,
+            min_confidence=request.min_confidence,
+            validation_split=request.validation_split,
+            dedupe=request.dedupe,
+            compress=request.compress
+        )
+        estimate = await asyncio.to_thread(
+            FineTuningManager.estimate_cost, export["file_path"], request.model, request.epochs
+        )
+        return {"file_path": export["file_path"], "model_type": request.model_type, **estimate}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/finetuning/create")
 async def create_finetuning_job(request: CreateJobRequest):
     """Create a new fine-tuning job"""
@@ -147,8 +277,10 @@ async def create_finetuning_job(request: CreateJobRequest):
         job = manager.create_finetuning_job(
             training_file_id=request.training_file_id,
             model=request.model,
-            suffix=request.suffix
+            suffix=request.suffix,
+            validation_file_id=request.validation_file_id
         )
+        (await get_finetuning_watcher()).track(job)
         return job
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -160,13 +292,46 @@ async def create_finetuning_job(request: CreateJobRequest):
 async def get_job_status(job_id: str):
     """Get status of a fine-tuning job"""
     try:
-        manager = get_finetuning_manager()
-        status = manager.get_job_status(job_id)
-        return status
+        watcher = await get_finetuning_watcher()
+        job = watcher.job(job_id)
+        if job is None:
+            # Not watched yet (e.g. older than the cached list); fetch and watch it
+            job = get_finetuning_manager().get_job_status(job_id)
+            watcher.track(job)
+        return job
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/finetuning/job/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Cached training events of a fine-tuning job, oldest first"""
+    watcher = await get_finetuning_watcher()
+    if watcher.job(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} is not being watched")
+    return {"job_id": job_id, "events": watcher.events(job_id)}
+
+
+@router.get("/finetuning/stream")
+async def stream_finetuning_jobs():
+    """Server-sent events: a job snapshot, then job and job_event updates"""
+    try:
+        get_finetuning_manager()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    watcher = await get_finetuning_watcher()
+
+    async def events():
+        async for event, data in watcher.subscribe():
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Model Configuration Routes
 @router.get("/models/config")
 async def get_model_config():
@@ -174,82 +339,167 @@ async def get_model_config():
     try:
         manager = get_model_manager()
         config = manager.get_model_config()
-        return config
+        version = model_registry.current()
+        return {**config, "version": version["version"], "updated_at": version["updated_at"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/models/config")
 async def update_model_config(request: UpdateConfigRequest):
-    """Update model configuration in .env file"""
+    """Switch models at runtime by publishing a new model registry version"""
     try:
-        # Build .env updates
-        env_updates = []
-
-        if request.card_identification.model_id:
-            env_updates.append(
-                f"FINETUNED_CARD_ID_MODEL={request.card_identification.model_id}"
-            )
-        env_updates.append(
-            f"USE_FINETUNED_CARD_ID={'true' if request.card_identification.enabled else 'false'}"
-        )
+        current = model_registry.current()
+        changes = {}
+        to_warm = []
+        for model_type in ("card_identification", "listing_generation"):
+            update = getattr(request, model_type)
+            changes[model_type] = {"active": update.enabled}
+            if update.model_id:
+                changes[model_type]["finetuned"] = update.model_id
+            model_id = update.model_id or current["models"][model_type]["finetuned"]
+            if update.enabled and model_id and model_id != model_registry.active_model(model_type, current):
+                to_warm.append(model_id)
+
+        # Load new models before they take traffic (also rejects unknown model IDs)
+        warmup_ms = {}
+        if request.warm:
+            manager = get_model_manager()
+            for model_id in to_warm:
+                try:
+                    warmup_ms[model_id] = await asyncio.to_thread(manager.warm_model, model_id)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Model {model_id} failed warm-up: {e}")
+
+        version = model_registry.update(changes, expected_version=request.expected_version)
+        return {
+            "success": True,
+            "message": f"Configuration applied (version {version['version']})",
+            "version": version["version"],
+            "warmup_ms": warmup_ms
+        }
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if request.listing_generation.model_id:
-            env_updates.append(
-                f"FINETUNED_LISTING_MODEL={request.listing_generation.model_id}"
-            )
-        env_updates.append(
-            f"USE_FINETUNED_LISTING={'true' if request.listing_generation.enabled else 'false'}"
-        )
 
-        # Write to .env file
-        env_file = os.path.join(os.path.dirname(__file__), ".env")
-
-        # Read existing .env
-        env_lines = []
-        if os.path.exists(env_file):
-            with open(env_file, 'r') as f:
-                env_lines = f.readlines()
-
-        # Update or add ML config lines
-        ml_keys = {
-            "FINETUNED_CARD_ID_MODEL",
-            "USE_FINETUNED_CARD_ID",
-            "FINETUNED_LISTING_MODEL",
-            "USE_FINETUNED_LISTING"
+@router.get("/models/config/history")
+async def get_model_config_history():
+    """Previous model registry versions, newest first"""
+    return {"current": model_registry.current(), "history": model_registry.history()}
+
+
+@router.post("/models/config/rollback/{version}")
+async def rollback_model_config(version: int):
+    """Restore the models of an earlier registry version (as a new version)"""
+    try:
+        restored = model_registry.rollback(version)
+        return {
+            "success": True,
+            "message": f"Rolled back to version {version} (now version {restored['version']})",
+            "version": restored["version"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 
-        # Remove existing ML config
-        env_lines = [line for line in env_lines if not any(line.startswith(key) for key in ml_keys)]
+# Canary / Shadow Rollout Routes
+@router.post("/models/rollout")
+async def update_rollout(request: RolloutRequest):
+    """Route a share of traffic to (canary) or alongside (shadow) a candidate model"""
+    try:
+        rollout = None
+        if request.candidate:
+            if request.warm and request.canary_percent > 0:
+                manager = get_model_manager()
+                try:
+                    await asyncio.to_thread(manager.warm_model, request.candidate)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Model {request.candidate} failed warm-up: {e}")
+            rollout = {
+                "candidate": request.candidate,
+                "canary_percent": request.canary_percent,
+                "shadow_percent": request.shadow_percent
+            }
 
-        # Add new config
-        env_lines.append("\n# Fine-Tuned Model Configuration (Updated via Admin UI)\n")
-        for update in env_updates:
-            env_lines.append(f"{update}\n")
+        version = model_registry.update(
+            {request.model_type: {"rollout": rollout}},
+            expected_version=request.expected_version
+        )
+        return {"success": True, "version": version["version"], "rollout": rollout}
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # Write back
-        with open(env_file, 'w') as f:
-            f.writelines(env_lines)
 
+@router.post("/models/rollout/{model_type}/promote")
+async def promote_rollout(model_type: str):
+    """Make the rollout candidate the fine-tuned model in use and end the rollout"""
+    try:
+        settings = model_registry.current()["models"].get(model_type)
+        if settings is None:
+            raise ValueError(f"Unknown model type: {model_type}")
+        rollout = settings.get("rollout")
+        if not rollout:
+            raise ValueError(f"No rollout in progress for {model_type}")
+
+        version = model_registry.update({
+            model_type: {"finetuned": rollout["candidate"], "active": True, "rollout": None}
+        })
         return {
             "success": True,
-            "message": "Configuration saved. Restart backend to apply changes."
+            "message": f"{rollout['candidate']} promoted (version {version['version']})",
+            "version": version["version"]
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/models/rollout/metrics")
+async def get_rollout_metrics(
+    model_type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Latency, tokens and agreement with the primary per model and arm"""
+    version = model_registry.current()
+    return {
+        "rollouts": {
+            name: settings.get("rollout")
+            for name, settings in version["models"].items()
+            if settings.get("rollout")
+        },
+        "models": model_router.store.query(start_date, end_date, model_type),
+        "shadow": model_router.stats()
+    }
 
 
 # Production Metrics Routes
 @router.get("/metrics")
-async def get_production_metrics(month: Optional[str] = None, model_id: Optional[str] = None):
-    """Get production performance metrics"""
+async def get_production_metrics(
+    month: Optional[str] = None,
+    model_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Get production performance metrics for a month or date range"""
     try:
         if model_id == "all":
             model_id = None
 
         analysis = evaluator.analyze_production_logs(
             month=month,
-            model_id=model_id
+            model_id=model_id,
+            start_date=start_date,
+            end_date=end_date
         )
 
         if "error" in analysis:
@@ -266,6 +516,8 @@ async def get_production_metrics(month: Optional[str] = None, model_id: Optional
             }
 
         return analysis
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,455 @@
+"""
+Bulk Listing Generation Service
+
+Generates listings for a whole inventory without one GPT-4 round trip per card:
+- Small sets: cards sharing a platform and tone are packed several per prompt
+  and the JSON result is split back per card
+- Large sets: submitted as one OpenAI Batch job (JSONL, 24h window, half the
+  per-token price) and collected when the batch completes
+- Job state lives in one JSON file per job, so status survives restarts and
+  is visible to every worker
+- Results are written back per card; one bad card never fails the whole set
+- Packed sets reuse the listing cache, so repeated copies of a card are
+  generated at most once per cached variant
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Literal, Tuple
+from pydantic import BaseModel
+
+from services.listing_cache import listing_cache_key
+from services.listing_generator import (
+    ListingGenerator,
+    ListingRequest,
+    ListingResponse,
+    get_openai_client,
+    listing_generator,
+)
+
+logger = logging.getLogger(__name__)
+
+# Output budget per card in a packed prompt (single listings use up to 1500)
+TOKENS_PER_CARD = 600
+MAX_COMPLETION_TOKENS = 4096
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_ACTIVE_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
+
+
+class BulkListingRequest(BaseModel):
+    """Request for generating listings for many cards"""
+    cards: List[ListingRequest]
+    mode: Literal["auto", "packed", "batch"] = "auto"
+
+
+class BulkCardResult(BaseModel):
+    """Outcome for one card of a bulk job"""
+    index: int
+    status: str = "pending"  # pending, ok, error
+    listing: Optional[ListingResponse] = None
+    error: Optional[str] = None
+
+
+class BulkJob(BaseModel):
+    """Persisted state of a bulk listing job"""
+    job_id: str
+    mode: str
+    status: str
+    card_count: int
+    created_at: str
+    updated_at: str
+    batch_id: Optional[str] = None
+    input_file_id: Optional[str] = None
+    output_file_id: Optional[str] = None
+    cards: List[ListingRequest]
+    results: List[BulkCardResult]
+
+    def summary(self) -> Dict[str, int]:
+        counts = {"ok": 0, "error": 0, "pending": 0}
+        for result in self.results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+
+class BulkListingService:
+    """Packs small card sets into shared prompts and sends large sets to the Batch API"""
+
+    def __init__(
+        self,
+        generator: Optional[ListingGenerator] = None,
+        jobs_dir: Optional[str] = None,
+        cards_per_prompt: Optional[int] = None,
+        sync_max_cards: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Args:
+            generator: Listing generator whose prompts and validation are reused
+            jobs_dir: Directory holding one JSON state file per job
+            cards_per_prompt: Cards packed into one completion (packed mode)
+            sync_max_cards: Largest set generated inline (auto mode switches to
+                batch above it; larger packed requests are rejected)
+            max_concurrency: Packed completions in flight at once
+        """
+        self.generator = generator or listing_generator
+        self.jobs_dir = Path(jobs_dir or os.getenv("BULK_LISTING_JOBS_DIR", "bulk_jobs"))
+        self.cards_per_prompt = cards_per_prompt or int(os.getenv("BULK_CARDS_PER_PROMPT", "5"))
+        self.sync_max_cards = sync_max_cards or int(os.getenv("BULK_SYNC_MAX_CARDS", "25"))
+        self.max_concurrency = max_concurrency or int(os.getenv("BULK_MAX_CONCURRENCY", "4"))
+
+    def choose_mode(self, card_count: int, requested: str = "auto") -> str:
+        """Resolve "auto" to packed (small sets) or batch (large sets)"""
+        if requested in ("packed", "batch"):
+            return requested
+        return "packed" if card_count <= self.sync_max_cards else "batch"
+
+    async def create_job(self, req: BulkListingRequest) -> BulkJob:
+        """
+        Start a bulk job
+
+        Packed jobs are generated before returning; batch jobs return as soon
+        as the batch is submitted and are completed by get_job().
+        """
+        if not req.cards:
+            raise ValueError("No cards supplied")
+
+        mode = self.choose_mode(len(req.cards), req.mode)
+        if mode == "packed" and len(req.cards) > self.sync_max_cards:
+            raise ValueError(
+                f"Packed mode generates inline and takes at most {self.sync_max_cards} cards; "
+                f"use batch mode for {len(req.cards)} cards"
+            )
+        now = datetime.utcnow().isoformat()
+        job = BulkJob(
+            job_id=uuid.uuid4().hex,
+            mode=mode,
+            status="in_progress",
+            card_count=len(req.cards),
+            created_at=now,
+            updated_at=now,
+            cards=req.cards,
+            results=[BulkCardResult(index=i) for i in range(len(req.cards))],
+        )
+        logger.info(f"Bulk listing job {job.job_id}: {job.card_count} cards, {mode} mode")
+
+        if mode == "packed":
+            job.results = await self.generate_packed(req.cards)
+            job.status = "completed"
+        else:
+            # Template cards need no completion; only the rest go to the batch
+            for index, card in enumerate(req.cards):
+                if card.mode == "template":
+                    job.results[index].listing = self.generator.render_template_listing(card)
+                    job.results[index].status = "ok"
+            if any(result.status == "pending" for result in job.results):
+                await self._submit_batch(job)
+            else:
+                job.status = "completed"
+
+        self._save_job(job)
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[BulkJob]:
+        """Load a job, collecting batch results if the batch has finished"""
+        job = self._load_job(job_id)
+        if job is None or job.mode != "batch" or job.status not in BATCH_ACTIVE_STATUSES:
+            return job
+
+        client = get_openai_client()
+        batch = await client.batches.retrieve(job.batch_id)
+        if batch.status in BATCH_ACTIVE_STATUSES:
+            if batch.status != job.status:
+                job.status = batch.status
+                self._save_job(job)
+            return job
+
+        if batch.output_file_id:
+            job.output_file_id = batch.output_file_id
+            output = await client.files.content(batch.output_file_id)
+            self._apply_batch_output(job, output.text)
+        if batch.error_file_id:
+            errors = await client.files.content(batch.error_file_id)
+            self._apply_batch_output(job, errors.text)
+
+        for result in job.results:
+            if result.status == "pending":
+                result.status = "error"
+                result.error = f"Batch {batch.status} without a result for this card"
+
+        job.status = batch.status
+        self._save_job(job)
+        logger.info(f"Bulk listing job {job.job_id} {batch.status}: {job.summary()}")
+        return job
+
+    # ------------------------------------------------------------------
+    # Packed prompts
+    # ------------------------------------------------------------------
+
+    async def generate_packed(self, cards: List[ListingRequest]) -> List[BulkCardResult]:
+        """Generate listings several cards per completion"""
+        results = [BulkCardResult(index=i) for i in range(len(cards))]
+        cache = self.generator.cache
+
+        # Template and cached cards are served directly; repeated copies of one card are
+        # generated at most `variants` times and share those listings
+        to_generate: List[Tuple[int, ListingRequest]] = []
+        duplicates: List[Tuple[int, str]] = []
+        generated_per_key: Dict[str, List[int]] = {}
+        for index, card in enumerate(cards):
+            cached = self.generator.render_template_listing(card) if card.mode == "template" else cache.get(card)
+            if cached is not None:
+                results[index].listing = cached
+                results[index].status = "ok"
+                continue
+            key = listing_cache_key(card)
+            generated = generated_per_key.setdefault(key, [])
+            if len(generated) < cache.variants:
+                generated.append(index)
+                to_generate.append((index, card))
+            else:
+                duplicates.append((index, key))
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(
+            self._generate_group(group, results, semaphore)
+            for group in self._pack_groups(to_generate)
+        ))
+
+        for position, (index, key) in enumerate(duplicates):
+            sources = [results[i] for i in generated_per_key[key] if results[i].status == "ok"]
+            if sources:
+                results[index].listing = sources[position % len(sources)].listing
+                results[index].status = "ok"
+            else:
+                results[index].status = "error"
+                results[index].error = "Generation failed for every copy of this card"
+        return results
+
+    def _pack_groups(self, cards: List[Tuple[int, ListingRequest]]) -> List[List[Tuple[int, ListingRequest]]]:
+        """Split (index, card) pairs into prompt-sized groups that share a platform and tone"""
+        by_prompt: Dict[Tuple[str, str], List[Tuple[int, ListingRequest]]] = {}
+        for index, card in cards:
+            by_prompt.setdefault((card.platform, card.tone), []).append((index, card))
+
+        groups = []
+        for members in by_prompt.values():
+            for start in range(0, len(members), self.cards_per_prompt):
+                groups.append(members[start:start + self.cards_per_prompt])
+        return groups
+
+    def _build_packed_prompt(self, cards: List[ListingRequest]) -> str:
+        """User prompt asking for one listing per numbered card"""
+        platform = cards[0].platform
+        platform_spec = self.generator.PLATFORM_SPECS.get(platform, self.generator.PLATFORM_SPECS["ebay"])
+
+        card_blocks = [
+            f"Card {number}:\n" + "\n".join(self.generator._card_details(card))
+            for number, card in enumerate(cards)
+        ]
+
+        return f"""Create an optimized {platform.upper()} listing for each of these {len(cards)} cards:
+
+{(chr(10) * 2).join(card_blocks)}
+
+For every card generate:
+1. TITLE: Compelling, keyword-rich title (max {platform_spec['title_max']} characters)
+2. DESCRIPTION: Detailed, persuasive description ({platform_spec['description_format']} format)
+3. KEYWORDS: 10-15 relevant search keywords
+
+Format your response as JSON with exactly one entry per card, using the card numbers above:
+{{
+  "listings": [
+    {{"card": 0, "title": "...", "description": "...", "keywords": ["keyword1", "keyword2", ...]}}
+  ]
+}}
+"""
+
+    async def _generate_group(
+        self,
+        group: List[Tuple[int, ListingRequest]],
+        results: List[BulkCardResult],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Run one packed completion and write each card's result back"""
+        cards = [card for _, card in group]
+        platform, tone = cards[0].platform, cards[0].tone
+
+        async with semaphore:
+            try:
+                client = get_openai_client()
+                response = await client.chat.completions.create(
+                    model=self.generator.MODEL,
+                    messages=[
+                        {"role": "system", "content": self.generator._build_system_prompt(platform, tone)},
+                        {"role": "user", "content": self._build_packed_prompt(cards)},
+                    ],
+                    temperature=0.7,
+                    max_tokens=min(TOKENS_PER_CARD * len(cards) + 200, MAX_COMPLETION_TOKENS),
+                    response_format={"type": "json_object"},
+                )
+                entries = self._split_packed(response.choices[0].message.content, len(cards))
+            except Exception as e:
+                logger.error(f"Packed listing generation failed for {len(cards)} cards: {e}")
+                entries = {}
+
+        missing = []
+        for number, (index, card) in enumerate(group):
+            entry = entries.get(number)
+            if entry is None:
+                missing.append((index, card))
+                continue
+            try:
+                listing = self.generator._finalize_listing(card.platform, entry)
+            except (TypeError, ValueError, AttributeError) as e:
+                logger.error(f"Packed listing for card {index} is malformed: {e}")
+                missing.append((index, card))
+                continue
+            results[index].listing = listing
+            results[index].status = "ok"
+            self.generator.cache.put(card, listing)
+
+        # Cards the packed answer dropped or mangled fall back to single calls
+        for index, card in missing:
+            try:
+                results[index].listing = await self.generator.generate_listing(card)
+                results[index].status = "ok"
+            except Exception as e:
+                results[index].status = "error"
+                results[index].error = str(e)
+
+    def _split_packed(self, content: str, card_count: int) -> Dict[int, Dict[str, Any]]:
+        """Map card number -> listing fields from a packed JSON answer"""
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse packed AI response: {e}")
+            return {}
+
+        entries = {}
+        for position, entry in enumerate(data.get("listings", [])):
+            if not isinstance(entry, dict) or not entry.get("title"):
+                continue
+            number = entry.get("card", position)
+            if isinstance(number, int) and 0 <= number < card_count and number not in entries:
+                entries[number] = entry
+        return entries
+
+    # ------------------------------------------------------------------
+    # Batch jobs
+    # ------------------------------------------------------------------
+
+    def _batch_jsonl(self, job: BulkJob) -> bytes:
+        """One Batch API request line per card, keyed by job and card index"""
+        lines = [
+            json.dumps({
+                "custom_id": f"{job.job_id}-{index}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": self.generator._completion_kwargs(card),
+            })
+            for index, card in enumerate(job.cards)
+            if job.results[index].status == "pending"
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def _submit_batch(self, job: BulkJob) -> None:
+        client = get_openai_client()
+        input_file = await client.files.create(
+            file=(f"bulk_listing_{job.job_id}.jsonl", self._batch_jsonl(job)),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"bulk_listing_job": job.job_id},
+        )
+        job.input_file_id = input_file.id
+        job.batch_id = batch.id
+        job.status = batch.status
+
+    def _apply_batch_output(self, job: BulkJob, text: str) -> None:
+        """Write Batch API output (or error) lines back to their cards
+
+        A malformed line or answer marks only its own card as failed (or is
+        skipped if it names no card), so the job still completes.
+        """
+        prefix = f"{job.job_id}-"
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                custom_id = record.get("custom_id") or ""
+                if not custom_id.startswith(prefix):
+                    continue
+                index = int(custom_id[len(prefix):])
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error(f"Skipping unreadable batch output line for job {job.job_id}: {e}")
+                continue
+            if not 0 <= index < job.card_count:
+                continue
+
+            result = job.results[index]
+            try:
+                self._apply_batch_record(job, index, record)
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+                # ValueError covers invalid JSON and pydantic validation errors
+                result.status = "error"
+                result.listing = None
+                result.error = f"AI returned invalid format: {e}"
+
+    def _apply_batch_record(self, job: BulkJob, index: int, record: Dict[str, Any]) -> None:
+        """Write one Batch API output record back to its card"""
+        result = job.results[index]
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or response.get("body", {}).get("error") or {}
+            result.status = "error"
+            result.error = error.get("message", f"Request failed ({response.get('status_code')})")
+            return
+
+        content = response["body"]["choices"][0]["message"]["content"]
+        card = job.cards[index]
+        data = self.generator._fill_keywords(card, json.loads(content))
+        result.listing = self.generator._finalize_listing(card.platform, data)
+        result.status = "ok"
+        result.error = None
+
+    # ------------------------------------------------------------------
+    # Job state files
+    # ------------------------------------------------------------------
+
+    def _job_path(self, job_id: str) -> Path:
+        if not job_id.isalnum():
+            raise ValueError(f"Invalid job id: {job_id}")
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _save_job(self, job: BulkJob) -> None:
+        """Atomically replace the job's state file"""
+        job.updated_at = datetime.utcnow().isoformat()
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.jobs_dir), prefix=".bulk_job_")
+        with os.fdopen(fd, "w") as f:
+            f.write(job.model_dump_json())
+        os.replace(tmp_path, self._job_path(job.job_id))
+
+    def _load_job(self, job_id: str) -> Optional[BulkJob]:
+        try:
+            path = self._job_path(job_id)
+        except ValueError:
+            return None
+        if not path.exists():
+            return None
+        return BulkJob.model_validate_json(path.read_text())
+
+
+# Global instance
+bulk_listing_service = BulkListingService()
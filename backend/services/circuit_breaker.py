@@ -0,0 +1,203 @@
+"""
+Circuit Breaker - Per-provider failure isolation for market data
+
+Each MarketDataProvider gets its own breaker:
+- closed: requests flow normally, outcomes are recorded in a rolling window
+- open: requests are rejected instantly until the cool-down elapses
+- half_open: a limited number of trial requests decide whether to close again
+
+Calls count against a provider when they raise or when they are slower than
+the slow-call threshold, so a degraded provider is skipped even before it
+starts returning hard errors.
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker driven by error rate and latency"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        window_size: int = 20,
+        minimum_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            name: Provider name (used in logs and stats)
+            failure_rate_threshold: Fraction of bad calls in the window that trips the breaker
+            slow_call_seconds: Calls slower than this count as bad
+            window_size: Number of recent calls kept in the rolling window
+            minimum_calls: Calls required in the window before the breaker can trip
+            open_seconds: How long the breaker stays open before a trial request
+            half_open_max_calls: Concurrent trial requests allowed while half-open
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        # (failed, latency_seconds) for the most recent calls
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self.state = self.CLOSED
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+
+        # Lifetime counters
+        self.total_calls = 0
+        self.total_failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the provider right now"""
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.open_seconds:
+                self.short_circuited += 1
+                return False
+            self._transition(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                self.short_circuited += 1
+                return False
+            self._half_open_in_flight += 1
+
+        return True
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed call (slow calls still count as bad)"""
+        self._record(failed=False, latency=latency)
+
+    def record_failure(self, latency: float) -> None:
+        """Record a call that raised or returned an error"""
+        self._record(failed=True, latency=latency)
+
+    def release(self) -> None:
+        """Give back a trial slot for a call abandoned without an outcome (e.g. cancelled)
+
+        The call counts neither way; the next request may run the trial instead.
+        """
+        if self.state == self.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _record(self, failed: bool, latency: float) -> None:
+        self.total_calls += 1
+        if failed:
+            self.total_failures += 1
+
+        bad = failed or latency >= self.slow_call_seconds
+        self._window.append((failed, latency))
+
+        if self.state == self.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if bad:
+                self._transition(self.OPEN)
+            else:
+                self._transition(self.CLOSED)
+            return
+
+        if self.state == self.CLOSED and len(self._window) >= self.minimum_calls:
+            if self._bad_rate() >= self.failure_rate_threshold:
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+
+        logger.warning(f"Circuit breaker '{self.name}': {self.state} -> {state}")
+        self.state = state
+
+        if state == self.OPEN:
+            self._opened_at = self._clock()
+            self._half_open_in_flight = 0
+            self.times_opened += 1
+        elif state == self.HALF_OPEN:
+            self._half_open_in_flight = 0
+        elif state == self.CLOSED:
+            self._opened_at = None
+            self._window.clear()
+
+    def _bad_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        bad = sum(
+            1 for failed, latency in self._window
+            if failed or latency >= self.slow_call_seconds
+        )
+        return bad / len(self._window)
+
+    def _latency_percentile(self, pct: float) -> Optional[float]:
+        if not self._window:
+            return None
+        latencies = sorted(latency for _, latency in self._window)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct))]
+
+    def health_score(self) -> float:
+        """
+        Health between 0.0 (unusable) and 1.0 (healthy).
+
+        Combines the rolling error rate with how far p95 latency sits above
+        the slow-call threshold. An open breaker always scores 0.
+        """
+        if self.state == self.OPEN:
+            return 0.0
+        if not self._window:
+            return 1.0
+
+        failures = sum(1 for failed, _ in self._window if failed)
+        success_rate = 1 - failures / len(self._window)
+
+        p95 = self._latency_percentile(0.95) or 0.0
+        latency_factor = 1.0 if p95 <= self.slow_call_seconds else self.slow_call_seconds / p95
+
+        return round(success_rate * latency_factor, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and rolling metrics for health/metrics endpoints"""
+        latencies = [latency for _, latency in self._window]
+        failures = sum(1 for failed, _ in self._window if failed)
+
+        def to_ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(0.0, self.open_seconds - (self._clock() - self._opened_at)), 1)
+
+        return {
+            "state": self.state,
+            "health_score": self.health_score(),
+            "window_calls": len(self._window),
+            "error_rate": round(failures / len(self._window), 3) if self._window else 0.0,
+            "bad_call_rate": round(self._bad_rate(), 3),
+            "latency_ms": {
+                "avg": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+                "p50": to_ms(self._latency_percentile(0.5)),
+                "p95": to_ms(self._latency_percentile(0.95)),
+            },
+            "retry_in_seconds": retry_in,
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "short_circuited": self.short_circuited,
+            "times_opened": self.times_opened,
+        }
@@ -0,0 +1,212 @@
+"""
+CompBatch - Columnar storage for comparable sales
+
+Providers and the pricing math work on parallel arrays instead of one
+Pydantic model per comp:
+- prices and sold timestamps as packed doubles
+- grade, source and condition as small integer codes into per-batch tables
+- titles as one text buffer addressed by offsets
+
+CompData models are only built at the API boundary for the handful of comps
+actually returned to clients.
+"""
+
+import hashlib
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Codes are stored as unsigned shorts ("H")
+MAX_CODES = 0xFFFF
+
+
+class _StringTable:
+    """Interns repeated strings as small integer codes (0 = None)"""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code > MAX_CODES:
+                raise ValueError(f"More than {MAX_CODES} distinct values in one batch")
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class CompBatch:
+    """Array-backed batch of comparable sales"""
+
+    __slots__ = (
+        "prices", "timestamps", "grade_codes", "source_codes", "condition_codes",
+        "title_offsets", "title_lengths", "urls", "grades", "sources", "conditions",
+        "utc", "_title_chunks", "_title_buffer", "_text_length",
+    )
+
+    def __init__(self, utc: bool = False):
+        """
+        Args:
+            utc: Whether sold dates are UTC-aware (eBay) or naive local time
+        """
+        self.prices = array("d")
+        self.timestamps = array("d")  # epoch seconds
+        self.grade_codes = array("H")
+        self.source_codes = array("H")
+        self.condition_codes = array("H")
+        # Title i is text[title_offsets[i]:title_offsets[i] + title_lengths[i]]
+        self.title_offsets = array("I")
+        self.title_lengths = array("I")
+        self.urls: List[Optional[str]] = []
+
+        self.grades = _StringTable()
+        self.sources = _StringTable()
+        self.conditions = _StringTable()
+        self.utc = utc
+
+        self._title_chunks: List[str] = []
+        self._title_buffer = ""
+        self._text_length = 0
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def append(
+        self,
+        title: str,
+        price: float,
+        sold_at: float,
+        condition: Optional[str] = None,
+        grade: Optional[str] = None,
+        url: Optional[str] = None,
+        source: str = "unknown",
+    ) -> None:
+        """Add one comp (sold_at is epoch seconds)"""
+        self.prices.append(price)
+        self.timestamps.append(sold_at)
+        self.grade_codes.append(self.grades.code(grade))
+        self.source_codes.append(self.sources.code(source))
+        self.condition_codes.append(self.conditions.code(condition))
+        self.title_offsets.append(self._store_text(title))
+        self.title_lengths.append(len(title))
+        self.urls.append(url)
+
+    def extend_uniform(
+        self,
+        title: str,
+        prices: Iterable[float],
+        timestamps: Iterable[float],
+        condition: Optional[str] = None,
+        grade: Optional[str] = None,
+        source: str = "unknown",
+    ) -> None:
+        """Bulk-add comps that share title, grade, source and condition"""
+        prices = prices if isinstance(prices, array) else array("d", prices)
+        timestamps = timestamps if isinstance(timestamps, array) else array("d", timestamps)
+        if len(prices) != len(timestamps):
+            raise ValueError("prices and timestamps must have the same length")
+
+        count = len(prices)
+        self.prices.extend(prices)
+        self.timestamps.extend(timestamps)
+
+        self.grade_codes.extend([self.grades.code(grade)] * count)
+        self.source_codes.extend([self.sources.code(source)] * count)
+        self.condition_codes.extend([self.conditions.code(condition)] * count)
+        self.urls.extend([None] * count)
+
+        # Every comp points at the single stored copy of the title
+        offset = self._store_text(title)
+        self.title_offsets.extend([offset] * count)
+        self.title_lengths.extend([len(title)] * count)
+
+    def _store_text(self, text: str) -> int:
+        """Append text to the title buffer and return its offset"""
+        offset = self._text_length
+        self._title_chunks.append(text)
+        self._text_length += len(text)
+        return offset
+
+    def _text(self) -> str:
+        if self._title_chunks:
+            self._title_buffer += "".join(self._title_chunks)
+            self._title_chunks = []
+        return self._title_buffer
+
+    def title(self, index: int) -> str:
+        start = self.title_offsets[index]
+        return self._text()[start:start + self.title_lengths[index]]
+
+    def sold_date(self, index: int) -> datetime:
+        if self.utc:
+            return datetime.fromtimestamp(self.timestamps[index], tz=timezone.utc)
+        return datetime.fromtimestamp(self.timestamps[index])
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Row view of one comp with the same fields as CompData"""
+        return {
+            "title": self.title(index),
+            "price": self.prices[index],
+            "sold_date": self.sold_date(index),
+            "condition": self.conditions.values[self.condition_codes[index]],
+            "grade": self.grades.values[self.grade_codes[index]],
+            "url": self.urls[index],
+            "source": self.sources.values[self.source_codes[index]],
+        }
+
+    def iter_records(self, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        count = len(self) if limit is None else min(limit, len(self))
+        for i in range(count):
+            yield self.record(i)
+
+    @classmethod
+    def from_comps(cls, comps: Iterable[Any]) -> "CompBatch":
+        """Build a batch from CompData-like objects"""
+        batch = None
+        for comp in comps:
+            if batch is None:
+                batch = cls(utc=comp.sold_date.tzinfo is not None)
+            batch.append(
+                title=comp.title,
+                price=comp.price,
+                sold_at=comp.sold_date.timestamp(),
+                condition=comp.condition,
+                grade=comp.grade,
+                url=comp.url,
+                source=comp.source,
+            )
+        return batch if batch is not None else cls()
+
+    def digest(self) -> str:
+        """Content hash of the comp set, used for snapshot versioning"""
+        h = hashlib.blake2b(digest_size=16)
+        for column in (self.prices, self.timestamps, self.title_offsets, self.title_lengths,
+                       self.grade_codes, self.source_codes, self.condition_codes):
+            h.update(column.tobytes())
+        for table in (self.grades, self.sources, self.conditions):
+            h.update("\x1f".join(v or "" for v in table.values).encode("utf-8"))
+        h.update("\x1f".join(u or "" for u in self.urls).encode("utf-8"))
+        h.update(self._text().encode("utf-8"))
+        return h.hexdigest()
+
+    def price_stats(self) -> Optional[Tuple[float, float, float, int]]:
+        """
+        Floor (10th percentile), average and ceiling (90th percentile)
+        over positive prices, plus how many prices were used.
+
+        Returns None when there are no positive prices.
+        """
+        prices = sorted(p for p in self.prices if p > 0)
+        if not prices:
+            return None
+
+        n = len(prices)
+        return prices[int(n * 0.1)], sum(prices) / n, prices[int(n * 0.9)], n
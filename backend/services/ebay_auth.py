@@ -0,0 +1,238 @@
+"""
+eBay OAuth Token Manager
+
+Keeps a single application access token for all eBay provider calls:
+- Singleflight refresh: concurrent callers wait on one refresh instead of
+  each firing their own token POST
+- Proactive renewal: a background task renews the token before it expires,
+  so request paths never pay for a refresh
+- Cross-worker sharing: the token is cached in a file guarded by an
+  advisory lock, so uvicorn workers reuse one token instead of each
+  refreshing on their own
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCOPE = "https://api.ebay.com/oauth/api_scope"
+DEFAULT_CACHE_FILE = os.path.join(tempfile.gettempdir(), "slabstak_ebay_token.json")
+
+
+class EbayTokenManager:
+    """Shared, self-renewing eBay client-credentials token"""
+
+    def __init__(
+        self,
+        app_id: str,
+        cert_id: str,
+        auth_url: str,
+        scope: str = DEFAULT_SCOPE,
+        refresh_margin: float = 300.0,
+        min_validity: float = 30.0,
+        cache_file: Optional[str] = DEFAULT_CACHE_FILE,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            app_id: eBay client ID
+            cert_id: eBay client secret
+            auth_url: OAuth token endpoint
+            scope: OAuth scope to request
+            refresh_margin: Seconds before expiry to renew in the background
+            min_validity: Tokens closer than this to expiry are not handed out
+            cache_file: Shared token file for cross-worker reuse (None disables)
+            timeout: HTTP timeout for the token request
+        """
+        self.app_id = app_id
+        self.cert_id = cert_id
+        self.auth_url = auth_url
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.timeout = timeout
+
+        self.access_token: Optional[str] = None
+        self.expires_at: Optional[float] = None  # epoch seconds
+        self.refresh_count = 0
+
+        self._lock: Optional[asyncio.Lock] = None
+        self._renewal_task: Optional[asyncio.Task] = None
+
+    def _is_valid(self) -> bool:
+        return (
+            self.access_token is not None
+            and self.expires_at is not None
+            and time.time() < self.expires_at - self.min_validity
+        )
+
+    async def get_token(self) -> str:
+        """Return a valid access token, refreshing at most once concurrently"""
+        if self._is_valid():
+            return self.access_token
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited
+            if self._is_valid():
+                return self.access_token
+
+            if self._load_shared_token():
+                self._schedule_renewal()
+                return self.access_token
+
+            await self._refresh()
+            return self.access_token
+
+    async def _refresh(self) -> None:
+        """Refresh the token, coordinating with other workers via the cache file"""
+        lock_file = await self._acquire_process_lock()
+        try:
+            # Another worker may have refreshed while we waited for the lock
+            if not self._load_shared_token(require_fresh=True):
+                data = await self._request_token()
+                self.access_token = data["access_token"]
+                self.expires_at = time.time() + float(data.get("expires_in", 7200))
+                self.refresh_count += 1
+                self._store_shared_token()
+                logger.info("eBay access token refreshed")
+        finally:
+            self._release_process_lock(lock_file)
+
+        self._schedule_renewal()
+
+    async def _request_token(self) -> Dict[str, Any]:
+        """POST the client-credentials grant to eBay"""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.post(
+                self.auth_url,
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                },
+                auth=(self.app_id, self.cert_id),
+                data={
+                    "grant_type": "client_credentials",
+                    "scope": self.scope
+                }
+            )
+
+        if response.status_code != 200:
+            logger.error(f"eBay auth failed: {response.text}")
+            raise Exception("Failed to authenticate with eBay")
+
+        return response.json()
+
+    def _schedule_renewal(self) -> None:
+        """Start (or restart) the background task that renews before expiry"""
+        task = self._renewal_task
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+
+        # Renew refresh_margin before expiry, but never spin on short-lived tokens
+        lifetime = max(0.0, self.expires_at - time.time())
+        delay = max(lifetime - self.refresh_margin, lifetime / 2)
+        self._renewal_task = asyncio.get_running_loop().create_task(self._renew_after(delay))
+
+    async def _renew_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            async with self._lock:
+                await self._refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Request paths will retry the refresh on demand
+            logger.error(f"Proactive eBay token renewal failed: {e}")
+
+    async def close(self) -> None:
+        """Stop background renewal"""
+        if self._renewal_task and not self._renewal_task.done():
+            self._renewal_task.cancel()
+            try:
+                await self._renewal_task
+            except asyncio.CancelledError:
+                pass
+
+    # Cross-worker sharing
+
+    def _load_shared_token(self, require_fresh: bool = False) -> bool:
+        """
+        Adopt a token written by another worker.
+
+        With require_fresh, only tokens that would not need proactive
+        renewal yet are accepted (used right before refreshing).
+        """
+        if not self.cache_file or not self.cache_file.exists():
+            return False
+
+        try:
+            cached = json.loads(self.cache_file.read_text())
+            token = cached["access_token"]
+            expires_at = float(cached["expires_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable eBay token cache: {e}")
+            return False
+
+        margin = self.refresh_margin if require_fresh else self.min_validity
+        if time.time() >= expires_at - margin:
+            return False
+
+        self.access_token = token
+        self.expires_at = expires_at
+        return True
+
+    def _store_shared_token(self) -> None:
+        """Atomically publish the token for other workers"""
+        if not self.cache_file:
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_file.parent), prefix=".ebay_token_")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": self.access_token, "expires_at": self.expires_at}, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write eBay token cache: {e}")
+
+    async def _acquire_process_lock(self, poll_interval: float = 0.05):
+        """Take the cross-process refresh lock without blocking the event loop"""
+        if not self.cache_file or fcntl is None:
+            return None
+
+        try:
+            lock_file = open(f"{self.cache_file}.lock", "a")
+        except OSError as e:
+            logger.warning(f"eBay token lock unavailable, refreshing without it: {e}")
+            return None
+
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                await asyncio.sleep(poll_interval)
+
+    @staticmethod
+    def _release_process_lock(lock_file) -> None:
+        if lock_file is None:
+            return
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
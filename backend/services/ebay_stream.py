@@ -0,0 +1,167 @@
+"""
+Streaming parser for eBay Finding API findCompletedItems responses
+
+Instead of loading the whole JSON payload and walking its single-element
+lists afterwards, the response body is decoded as it arrives: each entry of
+searchResult[0].item is decoded as soon as its closing brace is received
+and reduced to a compact FindingItem record. Only one item is ever held as
+a dict at a time, and records are available before the download finishes.
+"""
+
+import json
+import codecs
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FindingItem(NamedTuple):
+    """The fields of a completed item that the market path uses"""
+    item_id: Optional[str]
+    title: str
+    price: float
+    end_time: Optional[float]  # epoch seconds, None if missing
+    url: Optional[str]
+    condition: Optional[str]
+
+
+def _first(value, default=None):
+    """eBay wraps every scalar in a single-element list"""
+    if isinstance(value, list):
+        return value[0] if value else default
+    return value if value is not None else default
+
+
+def extract_item(item: dict) -> FindingItem:
+    """Reduce one raw findCompletedItems item to a FindingItem"""
+    selling_status = _first(item.get("sellingStatus"), {})
+    price = float(_first(selling_status.get("convertedCurrentPrice"), {}).get("__value__", 0))
+
+    end_time = _first(_first(item.get("listingInfo"), {}).get("endTime"))
+    sold_at = datetime.fromisoformat(end_time.replace("Z", "+00:00")).timestamp() if end_time else None
+
+    return FindingItem(
+        item_id=_first(item.get("itemId")),
+        title=_first(item.get("title")) or "Unknown",
+        price=price,
+        end_time=sold_at,
+        url=_first(item.get("viewItemURL")),
+        condition=_first(_first(item.get("condition"), {}).get("conditionDisplayName")),
+    )
+
+
+class FindingItemParser:
+    """Incremental extractor for the item array of a findCompletedItems body"""
+
+    _SEEK_RESULT = 0
+    _SEEK_ITEMS = 1
+    _ITEMS = 2
+    _DONE = 3
+
+    _RESULT_KEY = '"searchResult"'
+    _ITEM_KEY = '"item"'
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._state = self._SEEK_RESULT
+        self.items_seen = 0
+        self.items_skipped = 0
+
+    def feed(self, chunk: bytes) -> List[FindingItem]:
+        """Consume a chunk of the body and return any newly completed items"""
+        if self._state == self._DONE:
+            return []
+        self._buffer += self._decoder.decode(chunk)
+        return self._drain()
+
+    def close(self) -> List[FindingItem]:
+        """Flush the decoder at end of body"""
+        if self._state == self._DONE:
+            return []
+        self._buffer += self._decoder.decode(b"", final=True)
+        records = self._drain()
+        if self._state == self._ITEMS:
+            raise ValueError("eBay response ended inside the item array")
+        return records
+
+    @property
+    def done(self) -> bool:
+        return self._state == self._DONE
+
+    def _seek(self, marker: str) -> bool:
+        """Advance the buffer past marker, keeping a tail in case it is split"""
+        index = self._buffer.find(marker)
+        if index < 0:
+            self._buffer = self._buffer[-len(marker):]
+            return False
+        self._buffer = self._buffer[index + len(marker):]
+        return True
+
+    def _drain(self) -> List[FindingItem]:
+        records: List[FindingItem] = []
+
+        if self._state == self._SEEK_RESULT and self._seek(self._RESULT_KEY):
+            self._state = self._SEEK_ITEMS
+
+        if self._state == self._SEEK_ITEMS:
+            if not self._seek(self._ITEM_KEY):
+                return records
+            self._state = self._ITEMS
+            self._buffer = self._buffer.lstrip()
+
+        if self._state != self._ITEMS:
+            return records
+
+        pos = 0
+        buffer = self._buffer
+        while True:
+            # Skip separators up to the next item (or the end of the array)
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,:[":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._state = self._DONE
+                buffer = ""
+                pos = 0
+                break
+
+            try:
+                item, end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item not fully received yet
+                break
+
+            pos = end
+            self.items_seen += 1
+            try:
+                records.append(extract_item(item))
+            except (AttributeError, KeyError, ValueError, IndexError, TypeError) as e:
+                self.items_skipped += 1
+                logger.warning(f"Failed to parse eBay item: {e}")
+
+        self._buffer = buffer[pos:]
+        return records
+
+
+async def iter_finding_items(
+    chunks: AsyncIterator[bytes],
+    parser: Optional[FindingItemParser] = None
+) -> AsyncIterator[FindingItem]:
+    """Yield FindingItems from a streamed findCompletedItems body
+
+    Pass a parser to read its items_seen / items_skipped counts afterwards.
+    """
+    parser = parser or FindingItemParser()
+    async for chunk in chunks:
+        for record in parser.feed(chunk):
+            yield record
+        if parser.done:
+            break
+
+    for record in parser.close():
+        yield record
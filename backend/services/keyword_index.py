@@ -0,0 +1,260 @@
+"""
+Comp Keyword Index
+
+Ranks the search terms that actually appear in sold-comp titles so listings
+can use proven SEO keywords without asking the model to invent them:
+- Document frequency of unigrams and bigrams per player, player + set and
+  player + set + grade, updated incrementally as comps arrive
+- Unigram co-occurrence counts for related-term lookups
+- Each comp is counted once per scope (fingerprinted by URL or title), so
+  refetching the same sold listings, with or without a grade, does not
+  inflate counts
+- Rankings are memoized per scope version, so repeat lookups are a dict hit
+"""
+
+import os
+import re
+import hashlib
+from collections import Counter, OrderedDict
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.listing_cache import normalize_grade, normalize_text
+
+_TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9/#.+'-]*")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "the", "of", "for", "with", "in", "on", "to", "at", "by", "from",
+    "card", "cards", "lot", "new", "look", "l@@k", "wow", "nice", "read", "see", "pics",
+    "photos", "free", "shipping", "ship", "ships", "sale", "invest", "hot", "must",
+})
+
+# Scope kinds and their weight when blending rankings (most specific first)
+SCOPE_WEIGHTS = (("player_set_grade", 1.0), ("player_set", 0.6), ("player", 0.3))
+
+
+def tokenize_title(title: str) -> List[Tuple[str, str]]:
+    """(normalized, display) tokens of a comp title, stopwords removed"""
+    tokens = []
+    for match in _TOKEN.finditer(title):
+        display = match.group(0).rstrip(".-'")
+        term = display.lower()
+        if term and term not in STOPWORDS and len(term) > 1:
+            tokens.append((term, display))
+    return tokens
+
+
+class _Scope:
+    """Term statistics for one player / set / grade combination"""
+
+    __slots__ = ("titles", "df", "pairs", "display", "version")
+
+    def __init__(self):
+        self.titles = 0
+        self.df: Counter = Counter()
+        self.pairs: Counter = Counter()
+        # Normalized term -> first display form seen (dropped with the scope)
+        self.display: Dict[str, str] = {}
+        self.version = 0
+
+
+class CompKeywordIndex:
+    """Incremental term-frequency and co-occurrence index over sold-comp titles"""
+
+    def __init__(
+        self,
+        max_scopes: Optional[int] = None,
+        max_terms_per_scope: int = 2000,
+        max_fingerprints: int = 200_000,
+        max_unigrams_per_title: int = 16,
+    ):
+        """
+        Args:
+            max_scopes: Scopes kept before the least recently updated is dropped
+            max_terms_per_scope: Term/pair counters are pruned above this size
+            max_fingerprints: (Scope, comp) pairs remembered for de-duplication
+            max_unigrams_per_title: Unigrams per title used for co-occurrence
+        """
+        self.max_scopes = max_scopes or int(os.getenv("KEYWORD_INDEX_MAX_SCOPES", "5000"))
+        self.max_terms_per_scope = max_terms_per_scope
+        self.max_fingerprints = max_fingerprints
+        self.max_unigrams_per_title = max_unigrams_per_title
+
+        self._scopes: "OrderedDict[Tuple[str, ...], _Scope]" = OrderedDict()
+        self._seen: "OrderedDict[Tuple[Tuple[str, ...], bytes], None]" = OrderedDict()
+        self._ranked: Dict[Tuple, Tuple[Tuple[int, ...], List[str]]] = {}
+        self.comps_indexed = 0
+
+    @staticmethod
+    def _scope_keys(player: str, set_name: Optional[str], grade: Optional[str]) -> List[Tuple[str, Tuple[str, ...]]]:
+        player_key = normalize_text(player)
+        keys = [("player", ("player", player_key))]
+        if set_name:
+            set_key = normalize_text(set_name)
+            keys.insert(0, ("player_set", ("player_set", player_key, set_key)))
+            if grade:
+                keys.insert(0, ("player_set_grade", ("player_set_grade", player_key, set_key, normalize_grade(grade))))
+        return keys
+
+    def add_title(
+        self,
+        player: str,
+        set_name: Optional[str],
+        grade: Optional[str],
+        title: str,
+        fingerprint: Optional[str] = None,
+    ) -> bool:
+        """
+        Count one comp title in every scope it belongs to
+
+        Args:
+            fingerprint: Stable comp identity (e.g. listing URL); defaults to the title
+
+        Returns:
+            False if this comp was already counted in every scope
+        """
+        if not title:
+            return False
+
+        # De-duplicated per scope: a comp fetched with and without a grade is
+        # counted once in the shared player and player + set scopes
+        digest = hashlib.blake2b((fingerprint or title).encode("utf-8"), digest_size=12).digest()
+        new_keys = []
+        for _, key in self._scope_keys(player, set_name, grade):
+            if (key, digest) not in self._seen:
+                self._seen[(key, digest)] = None
+                new_keys.append(key)
+        if not new_keys:
+            return False
+        while len(self._seen) > self.max_fingerprints:
+            self._seen.popitem(last=False)
+        self.comps_indexed += 1
+
+        tokens = tokenize_title(title)
+        unigrams = {term for term, _ in tokens}
+        bigrams = set()
+        displays = {}
+        for (first, first_display), (second, second_display) in zip(tokens, tokens[1:]):
+            bigram = f"{first} {second}"
+            bigrams.add(bigram)
+            displays.setdefault(bigram, f"{first_display} {second_display}")
+        for term, display in tokens:
+            displays.setdefault(term, display)
+        pairs = list(combinations(sorted(unigrams)[:self.max_unigrams_per_title], 2))
+
+        for key in new_keys:
+            scope = self._scopes.get(key)
+            if scope is None:
+                scope = self._scopes[key] = _Scope()
+            self._scopes.move_to_end(key)
+            scope.titles += 1
+            scope.df.update(unigrams)
+            scope.df.update(bigrams)
+            scope.pairs.update(pairs)
+            for term, display in displays.items():
+                scope.display.setdefault(term, display)
+            scope.version += 1
+            if len(scope.df) > self.max_terms_per_scope:
+                scope.df = Counter(dict(scope.df.most_common(self.max_terms_per_scope // 2)))
+                scope.display = {term: display for term, display in scope.display.items() if term in scope.df}
+            if len(scope.pairs) > self.max_terms_per_scope * 4:
+                scope.pairs = Counter(dict(scope.pairs.most_common(self.max_terms_per_scope * 2)))
+
+        while len(self._scopes) > self.max_scopes:
+            self._scopes.popitem(last=False)
+        return True
+
+    def add_comps(self, player: str, set_name: Optional[str], grade: Optional[str], comps: Iterable[Any]) -> int:
+        """Index CompData-like objects (title, url); returns how many were new"""
+        added = 0
+        for comp in comps:
+            if self.add_title(player, set_name, grade, comp.title, fingerprint=comp.url):
+                added += 1
+        return added
+
+    def _query_terms(self, player: str, set_name: Optional[str], grade: Optional[str], year: Optional[int]) -> set:
+        words = " ".join(filter(None, (player, set_name, grade, normalize_grade(grade), str(year) if year else None)))
+        return {term for term, _ in tokenize_title(words)}
+
+    def top_keywords(
+        self,
+        player: str,
+        set_name: Optional[str] = None,
+        grade: Optional[str] = None,
+        year: Optional[int] = None,
+        limit: int = 15,
+        min_count: int = 2,
+    ) -> List[str]:
+        """
+        Terms ranked by how often they appear in sold titles for this card
+
+        Scores blend the grade, set and player scopes (more specific scopes
+        weigh more). Terms containing the query's own words are skipped,
+        so the result is the extra vocabulary buyers see on sold listings.
+        """
+        scope_keys = self._scope_keys(player, set_name, grade)
+        scopes = [(kind, self._scopes.get(key)) for kind, key in scope_keys]
+        versions = tuple(scope.version if scope else -1 for _, scope in scopes)
+        memo_key = (tuple(key for _, key in scope_keys), year, limit, min_count)
+        memo = self._ranked.get(memo_key)
+        if memo is not None and memo[0] == versions:
+            return memo[1]
+
+        weights = dict(SCOPE_WEIGHTS)
+        query_terms = self._query_terms(player, set_name, grade, year)
+        scores: Counter = Counter()
+        for kind, scope in scopes:
+            if not scope or not scope.titles:
+                continue
+            weight = weights[kind] / scope.titles
+            for term, count in scope.df.items():
+                if count >= min_count:
+                    scores[term] += weight * count
+
+        ranked = []
+        for term, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+            if any(part in query_terms for part in term.split(" ")):
+                continue
+            ranked.append(next((scope.display[term] for _, scope in scopes if scope and term in scope.display), term))
+            if len(ranked) >= limit:
+                break
+
+        if len(self._ranked) > self.max_scopes:
+            self._ranked.clear()
+        self._ranked[memo_key] = (versions, ranked)
+        return ranked
+
+    def related_terms(
+        self,
+        term: str,
+        player: str,
+        set_name: Optional[str] = None,
+        grade: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[str]:
+        """Unigrams that most often appear alongside `term` in the most specific known scope"""
+        term = term.lower()
+        for _, key in self._scope_keys(player, set_name, grade):
+            scope = self._scopes.get(key)
+            if scope is None:
+                continue
+            related = Counter()
+            for (first, second), count in scope.pairs.items():
+                if first == term:
+                    related[second] += count
+                elif second == term:
+                    related[first] += count
+            if related:
+                return [scope.display.get(other, other) for other, _ in related.most_common(limit)]
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scopes": len(self._scopes),
+            "comps_indexed": self.comps_indexed,
+            "terms": sum(len(scope.display) for scope in self._scopes.values()),
+        }
+
+
+# Global instance
+keyword_index = CompKeywordIndex()
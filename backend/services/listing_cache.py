@@ -0,0 +1,156 @@
+"""
+Listing Result Cache
+
+Generated listings are reused for identical requests instead of calling GPT-4:
+- Keys are built from normalized card attributes, platform and tone, so
+  "PSA10" / "psa 10" or stray whitespace and punctuation share an entry
+- Each key holds a pool of up to N variants; once the pool is full, repeat
+  requests rotate among the cached variants
+- Entries expire after a TTL and the least recently used key is evicted
+  once the cache is full
+- Hit/miss/eviction counters for monitoring
+"""
+
+import os
+import re
+import time
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_SEPARATORS = re.compile(r"[^\w./]+")
+_LETTER_DIGIT = re.compile(r"(?<=[a-z])(?=\d)")
+
+
+def normalize_text(value: Optional[Any]) -> str:
+    """Case-fold, strip punctuation and collapse whitespace"""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    tokens = (token.strip("./") for token in _SEPARATORS.sub(" ", text).split())
+    return " ".join(token for token in tokens if token)
+
+
+def normalize_grade(grade: Optional[str]) -> str:
+    """Normalize a grade so "PSA10", "psa-10" and "PSA 10" match"""
+    return _LETTER_DIGIT.sub(" ", normalize_text(grade))
+
+
+def listing_cache_key(req: Any) -> str:
+    """Stable key for a ListingRequest (card attributes, platform, tone)"""
+    fields = (
+        normalize_text(req.player),
+        normalize_text(req.set_name),
+        str(req.year or ""),
+        normalize_grade(req.grade),
+        normalize_text(req.condition),
+        normalize_text(req.serial_number),
+        normalize_text(req.parallel),
+        normalize_text(req.platform),
+        normalize_text(req.tone),
+        # The price only appears in the listing when it is included
+        f"{req.estimated_value:.2f}" if req.include_price and req.estimated_value else "",
+    )
+    return hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ListingCache:
+    """TTL + LRU cache of generated listings with rotating variant pools"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        variants: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_entries: Keys kept before the least recently used is evicted
+            ttl_seconds: Lifetime of a key's variant pool (0 disables caching)
+            variants: Listings generated per key before requests rotate among them
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("LISTING_CACHE_SIZE", "2048"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("LISTING_CACHE_TTL_SECONDS", "86400"))
+        self.variants = max(1, variants if variants is not None else int(os.getenv("LISTING_CACHE_VARIANTS", "3")))
+        self.clock = clock
+
+        # key -> (expires_at, variants, next variant to serve)
+        self._entries: "OrderedDict[str, Tuple[float, List[Any], int]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, req: Any) -> Optional[Any]:
+        """
+        Return a cached listing for the request, or None to generate one
+
+        Misses are also reported while a key's variant pool is still filling.
+        """
+        if not self.enabled:
+            return None
+
+        key = listing_cache_key(req)
+        entry = self._entries.get(key)
+        if entry is not None and self.clock() >= entry[0]:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+
+        if entry is None or len(entry[1]) < self.variants:
+            self.misses += 1
+            return None
+
+        expires_at, pool, position = entry
+        self._entries[key] = (expires_at, pool, (position + 1) % len(pool))
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pool[position]
+
+    def put(self, req: Any, listing: Any) -> None:
+        """Add a freshly generated listing to the request's variant pool"""
+        if not self.enabled:
+            return
+
+        key = listing_cache_key(req)
+        entry = self._entries.get(key)
+        if entry is None or self.clock() >= entry[0]:
+            # The TTL runs from the first variant, so a pool refreshes as a whole
+            entry = (self.clock() + self.ttl_seconds, [], 0)
+
+        expires_at, pool, position = entry
+        if len(pool) < self.variants:
+            pool.append(listing)
+        self._entries[key] = (expires_at, pool, position)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "variants_per_key": self.variants,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
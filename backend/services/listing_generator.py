@@ -3,27 +3,41 @@ AI Listing Generator Service
 
 Generates optimized marketplace listings for trading cards using OpenAI GPT-4.
 Supports multiple platforms with customizable tones.
+- Calls go through the async client so generation never blocks the event loop
+- stream_listing() yields the title once complete, then description deltas
+- Identical requests are served from a ListingCache of generated variants
+- mode="template" renders deterministic listings with no API call
+- Keywords mined from sold-comp titles (CompKeywordIndex) guide titles and
+  replace model-generated keywords once enough are known
 """
 
 import os
+import json
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from services.keyword_index import CompKeywordIndex, keyword_index as default_keyword_index
+from services.listing_cache import ListingCache
+from services.listing_templates import ListingTemplateEngine
 
 logger = logging.getLogger(__name__)
 
+# With at least this many mined keywords the model is not asked to invent any
+INDEX_KEYWORDS_MIN = int(os.getenv("LISTING_INDEX_KEYWORDS_MIN", "10"))
+
 # Lazy client initialization to avoid errors during import
 _client = None
 
-def get_openai_client():
-    """Lazily initialize OpenAI client"""
+def get_openai_client() -> AsyncOpenAI:
+    """Lazily initialize the async OpenAI client"""
     global _client
     if _client is None:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
-        _client = OpenAI(api_key=api_key)
+        _client = AsyncOpenAI(api_key=api_key)
     return _client
 
 
@@ -40,6 +54,12 @@ class ListingRequest(BaseModel):
     tone: str = "professional"  # professional, casual, enthusiastic
     include_price: bool = True
     estimated_value: Optional[float] = None
+    mode: str = "ai"  # ai, template (deterministic, no API call)
+
+
+class MultiPlatformListingRequest(ListingRequest):
+    """Request for listings on several platforms from one generation"""
+    platforms: List[str] = ["ebay", "pwcc", "whatnot", "comc"]
 
 
 class ListingResponse(BaseModel):
@@ -51,9 +71,120 @@ class ListingResponse(BaseModel):
     character_counts: Dict[str, int]
 
 
+class ListingFieldStream:
+    """
+    Incremental scanner for the listing JSON object as the model streams it
+
+    Only top-level string fields are tracked: the title is reported once its
+    closing quote arrives, the description as decoded text deltas. Everything
+    else (keywords) is read from the complete JSON at the end.
+    """
+
+    STREAMED_FIELDS = ("title", "description")
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._is_key = False
+        self._expect_key = False
+        self._awaiting_value = False
+        self._escape = ""
+        self._key: List[str] = []
+        self._current_key: Optional[str] = None
+        self._field: Optional[str] = None
+        self._value: List[str] = []
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Consume a chunk of model output
+
+        Returns:
+            ("title", full_title) and ("description", delta) events in order
+        """
+        events: List[Tuple[str, str]] = []
+        delta: List[str] = []
+
+        for char in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape += char
+                    if self._escape_complete():
+                        self._append(json.loads(f'"{self._escape}"'), delta)
+                        self._escape = ""
+                elif char == "\\":
+                    self._escape = char
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(events, delta)
+                else:
+                    self._append(char, delta)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._is_key = True
+                    self._key = []
+                elif self._depth == 1 and self._awaiting_value and self._current_key in self.STREAMED_FIELDS:
+                    self._field = self._current_key
+                    self._value = []
+                self._awaiting_value = False
+            elif char in "{[":
+                self._depth += 1
+                self._expect_key = self._depth == 1 and char == "{"
+                self._awaiting_value = False
+            elif char in "}]":
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._expect_key = False
+                self._awaiting_value = True
+            elif char == "," and self._depth == 1:
+                self._expect_key = True
+            elif not char.isspace():
+                self._awaiting_value = False
+
+        if delta:
+            events.append(("description", "".join(delta)))
+        return events
+
+    def _escape_complete(self) -> bool:
+        if self._escape[1] != "u":
+            return True
+        if len(self._escape) == 6:
+            # A high surrogate needs its low half before it can be decoded
+            return not 0xD800 <= int(self._escape[2:6], 16) < 0xDC00
+        return len(self._escape) == 12
+
+    def _append(self, text: str, delta: List[str]) -> None:
+        if self._is_key:
+            self._key.append(text)
+        elif self._field == "title":
+            self._value.append(text)
+        elif self._field == "description":
+            delta.append(text)
+
+    def _end_string(self, events: List[Tuple[str, str]], delta: List[str]) -> None:
+        if self._is_key:
+            self._current_key = "".join(self._key)
+            self._is_key = False
+        elif self._field == "title":
+            if delta:
+                events.append(("description", "".join(delta)))
+                delta.clear()
+            events.append(("title", "".join(self._value)))
+        self._field = None
+
+
 class ListingGenerator:
     """Generates optimized marketplace listings using AI"""
 
+    MODEL = "gpt-4-turbo-preview"
+
+    def __init__(self, cache: Optional[ListingCache] = None, keyword_index: Optional[CompKeywordIndex] = None):
+        self.cache = cache or ListingCache()
+        self.templates = ListingTemplateEngine(self.PLATFORM_SPECS)
+        self.keyword_index = keyword_index or default_keyword_index
+
     PLATFORM_SPECS = {
         "ebay": {
             "title_max": 80,
@@ -83,18 +214,28 @@ class ListingGenerator:
         "enthusiastic": "exciting, passionate, emphasizes rarity and desirability",
     }
 
+    def _platform_requirements(self, platform: str) -> str:
+        """Requirements block for one platform"""
+        platform_spec = self.PLATFORM_SPECS.get(platform, self.PLATFORM_SPECS["ebay"])
+
+        return f"""Platform: {platform.upper()}
+Platform Requirements:
+- Title max length: {platform_spec['title_max']} characters
+- Description format: {platform_spec['description_format']}
+- Focus on: {platform_spec['emphasis']}"""
+
     def _build_system_prompt(self, platform: str, tone: str) -> str:
         """Build system prompt based on platform and tone"""
-        platform_spec = self.PLATFORM_SPECS.get(platform, self.PLATFORM_SPECS["ebay"])
+        return self._compose_system_prompt([platform], tone)
+
+    def _compose_system_prompt(self, platforms: List[str], tone: str) -> str:
+        """System prompt carrying the requirements of every target platform"""
         tone_style = self.TONE_STYLES.get(tone, self.TONE_STYLES["professional"])
+        requirements = "\n\n".join(self._platform_requirements(platform) for platform in platforms)
 
         return f"""You are an expert trading card marketplace listing writer with 10+ years of experience selling high-value sports cards and collectibles.
 
-Platform: {platform.upper()}
-Platform Requirements:
-- Title max length: {platform_spec['title_max']} characters
-- Description format: {platform_spec['description_format']}
-- Focus on: {platform_spec['emphasis']}
+{requirements}
 
 Writing Style: {tone_style}
 
@@ -113,8 +254,8 @@ IMPORTANT:
 - Create urgency without being pushy
 """
 
-    def _build_user_prompt(self, req: ListingRequest) -> str:
-        """Build user prompt with card details"""
+    def _card_details(self, req: ListingRequest) -> List[str]:
+        """Card detail lines shared by single and packed prompts"""
         card_details = [
             f"Player: {req.player}",
             f"Set: {req.set_name}",
@@ -132,8 +273,45 @@ IMPORTANT:
             card_details.append(f"Parallel: {req.parallel}")
         if req.estimated_value and req.include_price:
             card_details.append(f"Estimated Value: ${req.estimated_value:,.2f}")
+        return card_details
+
+    def _ranked_terms(self, req: ListingRequest) -> List[str]:
+        """Search terms mined from this card's sold-comp titles"""
+        return self.keyword_index.top_keywords(req.player, req.set_name, req.grade, req.year)
 
+    def _fill_keywords(self, req: ListingRequest, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Supply keywords from the comp index when the model was not asked for them"""
+        if not data.get("keywords"):
+            data["keywords"] = self.templates.select_keywords(req, self._ranked_terms(req))
+        return data
+
+    def _build_user_prompt(self, req: ListingRequest) -> str:
+        """Build user prompt with card details"""
+        card_details = self._card_details(req)
         platform_spec = self.PLATFORM_SPECS.get(req.platform, self.PLATFORM_SPECS["ebay"])
+        ranked_terms = self._ranked_terms(req)
+
+        if len(ranked_terms) >= INDEX_KEYWORDS_MIN:
+            # Keywords come from the index, so only the title and description are generated
+            return f"""Create an optimized {req.platform.upper()} listing for this card:
+
+{chr(10).join(card_details)}
+
+Search terms from recent sold listings of this card (work the relevant ones in naturally):
+{", ".join(ranked_terms)}
+
+Generate:
+1. TITLE: Compelling, keyword-rich title (max {platform_spec['title_max']} characters)
+2. DESCRIPTION: Detailed, persuasive description ({platform_spec['description_format']} format)
+
+Format your response as JSON:
+{{
+  "title": "...",
+  "description": "..."
+}}
+
+Make it compelling, accurate, and optimized for {req.platform}!
+"""
 
         prompt = f"""Create an optimized {req.platform.upper()} listing for this card:
 
@@ -155,6 +333,54 @@ Make it compelling, accurate, and optimized for {req.platform}!
 """
         return prompt
 
+    def _completion_kwargs(self, req: ListingRequest) -> Dict[str, Any]:
+        """Chat completion arguments shared by the blocking and streaming paths"""
+        return {
+            "model": self.MODEL,
+            "messages": [
+                {"role": "system", "content": self._build_system_prompt(req.platform, req.tone)},
+                {"role": "user", "content": self._build_user_prompt(req)},
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1500,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _truncate_title(self, title: str, platform: str) -> str:
+        """Clamp a title to the platform's maximum length"""
+        platform_spec = self.PLATFORM_SPECS.get(platform, self.PLATFORM_SPECS["ebay"])
+        title = title.strip()
+        if len(title) > platform_spec["title_max"]:
+            logger.warning(f"Title exceeds max length, truncating: {len(title)} > {platform_spec['title_max']}")
+            title = title[:platform_spec["title_max"] - 3] + "..."
+        return title
+
+    def _finalize_listing(self, platform: str, data: Dict[str, Any]) -> ListingResponse:
+        """Validate parsed model output into a ListingResponse"""
+        platform_spec = self.PLATFORM_SPECS.get(platform, self.PLATFORM_SPECS["ebay"])
+        title = self._truncate_title(data.get("title", ""), platform)
+        description = data.get("description", "").strip()
+        keywords = data.get("keywords", [])
+
+        return ListingResponse(
+            title=title,
+            description=description,
+            keywords=keywords,
+            platform=platform,
+            character_counts={
+                "title": len(title),
+                "description": len(description),
+                "title_max": platform_spec["title_max"],
+            }
+        )
+
+    def render_template_listing(self, req: ListingRequest) -> ListingResponse:
+        """Deterministic listing from the template engine (no API call)"""
+        platform = req.platform if req.platform in self.PLATFORM_SPECS else "ebay"
+        ranked_terms = self._ranked_terms(req)
+        title_terms = [term for term in ranked_terms if " " not in term][:3]
+        return self._finalize_listing(platform, self.templates.render(req, ranked_terms, title_terms))
+
     async def generate_listing(self, req: ListingRequest) -> ListingResponse:
         """
         Generate optimized listing using GPT-4
@@ -165,51 +391,30 @@ Make it compelling, accurate, and optimized for {req.platform}!
         Returns:
             Complete listing with title, description, keywords
         """
+        if req.mode == "template":
+            return self.render_template_listing(req)
+
+        cached = self.cache.get(req)
+        if cached is not None:
+            logger.info(f"Serving cached {req.platform} listing for {req.player}")
+            return cached
+
         logger.info(f"Generating {req.platform} listing for {req.player}")
 
         try:
-            system_prompt = self._build_system_prompt(req.platform, req.tone)
-            user_prompt = self._build_user_prompt(req)
-
             client = get_openai_client()
-            response = client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,
-                max_tokens=1500,
-                response_format={"type": "json_object"},
-            )
+            response = await client.chat.completions.create(**self._completion_kwargs(req))
 
             content = response.choices[0].message.content
-            import json
-            data = json.loads(content)
-
-            title = data.get("title", "").strip()
-            description = data.get("description", "").strip()
-            keywords = data.get("keywords", [])
-
-            # Validate title length
-            platform_spec = self.PLATFORM_SPECS.get(req.platform, self.PLATFORM_SPECS["ebay"])
-            if len(title) > platform_spec["title_max"]:
-                logger.warning(f"Title exceeds max length, truncating: {len(title)} > {platform_spec['title_max']}")
-                title = title[:platform_spec["title_max"] - 3] + "..."
-
-            response = ListingResponse(
-                title=title,
-                description=description,
-                keywords=keywords,
-                platform=req.platform,
-                character_counts={
-                    "title": len(title),
-                    "description": len(description),
-                    "title_max": platform_spec["title_max"],
-                }
-            )
+            data = self._fill_keywords(req, json.loads(content))
+
+            response = self._finalize_listing(req.platform, data)
+            self.cache.put(req, response)
 
-            logger.info(f"Successfully generated listing: {len(title)} chars title, {len(description)} chars description")
+            logger.info(
+                f"Successfully generated listing: {response.character_counts['title']} chars title, "
+                f"{response.character_counts['description']} chars description"
+            )
             return response
 
         except json.JSONDecodeError as e:
@@ -219,6 +424,172 @@ Make it compelling, accurate, and optimized for {req.platform}!
             logger.error(f"Listing generation failed: {e}")
             raise Exception(f"Failed to generate listing: {str(e)}")
 
+    async def stream_listing(self, req: ListingRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a listing, yielding partial results as tokens arrive
+
+        Args:
+            req: Listing request with card details
+
+        Yields:
+            {"event": "title", "data": {"title": ..., "title_max": ...}} once the title is complete,
+            {"event": "description", "data": {"delta": ...}} as description text
+            streams, then {"event": "done", "data": <ListingResponse fields>}
+        """
+        cached = self.render_template_listing(req) if req.mode == "template" else self.cache.get(req)
+        if cached is not None:
+            logger.info(f"Serving {req.platform} listing for {req.player} without a completion ({req.mode} mode)")
+            yield {"event": "title", "data": {"title": cached.title, "title_max": cached.character_counts["title_max"]}}
+            yield {"event": "description", "data": {"delta": cached.description}}
+            yield {"event": "done", "data": cached.model_dump()}
+            return
+
+        logger.info(f"Streaming {req.platform} listing for {req.player}")
+
+        client = get_openai_client()
+        stream = await client.chat.completions.create(**self._completion_kwargs(req), stream=True)
+
+        platform_spec = self.PLATFORM_SPECS.get(req.platform, self.PLATFORM_SPECS["ebay"])
+        parser = ListingFieldStream()
+        content: List[str] = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            content.append(text)
+
+            for field, value in parser.feed(text):
+                if field == "title":
+                    yield {"event": "title", "data": {
+                        "title": self._truncate_title(value, req.platform),
+                        "title_max": platform_spec["title_max"],
+                    }}
+                else:
+                    yield {"event": "description", "data": {"delta": value}}
+
+        try:
+            data = self._fill_keywords(req, json.loads("".join(content)))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse streamed AI response: {e}")
+            raise Exception("AI returned invalid format")
+
+        listing = self._finalize_listing(req.platform, data)
+        self.cache.put(req, listing)
+        yield {"event": "done", "data": listing.model_dump()}
+
+    def _build_multi_user_prompt(self, req: MultiPlatformListingRequest, platforms: List[str]) -> str:
+        """User prompt asking for one listing per platform in a single answer"""
+        targets = [
+            f"- {platform}: title max {self.PLATFORM_SPECS[platform]['title_max']} characters, "
+            f"{self.PLATFORM_SPECS[platform]['description_format']} description"
+            for platform in platforms
+        ]
+        skeleton = ",\n".join(
+            f'    "{platform}": {{"title": "...", "description": "...", "keywords": ["keyword1", ...]}}'
+            for platform in platforms
+        )
+
+        return f"""Create an optimized listing for this card on each of these platforms:
+
+{chr(10).join(self._card_details(req))}
+
+Platforms:
+{chr(10).join(targets)}
+
+For every platform generate:
+1. TITLE: Compelling, keyword-rich title within that platform's limit
+2. DESCRIPTION: Detailed, persuasive description in that platform's format
+3. KEYWORDS: 10-15 relevant search keywords
+
+Tailor each listing to its platform's focus. Format your response as JSON:
+{{
+  "listings": {{
+{skeleton}
+  }}
+}}
+"""
+
+    def _resolve_platforms(self, platforms: List[str]) -> List[str]:
+        """Normalize, de-duplicate and validate requested platforms"""
+        resolved = []
+        for platform in platforms:
+            platform = platform.strip().lower()
+            if platform not in self.PLATFORM_SPECS:
+                raise ValueError(f"Unsupported platform: {platform}")
+            if platform not in resolved:
+                resolved.append(platform)
+        if not resolved:
+            raise ValueError("No platforms requested")
+        return resolved
+
+    async def generate_multi_platform(self, req: MultiPlatformListingRequest) -> Dict[str, ListingResponse]:
+        """
+        Generate listings for several platforms with one GPT-4 call
+
+        Args:
+            req: Card details plus the target platforms
+
+        Returns:
+            Listing per platform, each title validated against its own limit
+
+        Raises:
+            ValueError: If a requested platform is unknown
+        """
+        platforms = self._resolve_platforms(req.platforms)
+        single_requests = {
+            platform: ListingRequest(**{**req.model_dump(exclude={"platforms"}), "platform": platform})
+            for platform in platforms
+        }
+
+        if req.mode == "template":
+            return {platform: self.render_template_listing(single) for platform, single in single_requests.items()}
+
+        listings = {}
+        for platform in platforms:
+            cached = self.cache.get(single_requests[platform])
+            if cached is not None:
+                listings[platform] = cached
+        platforms = [platform for platform in platforms if platform not in listings]
+        if not platforms:
+            logger.info(f"Serving cached listings for {req.player}")
+            return {platform: listings[platform] for platform in single_requests}
+
+        logger.info(f"Generating {', '.join(platforms)} listings for {req.player}")
+
+        try:
+            client = get_openai_client()
+            response = await client.chat.completions.create(
+                model=self.MODEL,
+                messages=[
+                    {"role": "system", "content": self._compose_system_prompt(platforms, req.tone)},
+                    {"role": "user", "content": self._build_multi_user_prompt(req, platforms)},
+                ],
+                temperature=0.7,
+                max_tokens=min(1000 * len(platforms), 4096),
+                response_format={"type": "json_object"},
+            )
+            data = json.loads(response.choices[0].message.content).get("listings", {})
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse AI response: {e}")
+            raise Exception("AI returned invalid format")
+        except Exception as e:
+            logger.error(f"Multi-platform listing generation failed: {e}")
+            raise Exception(f"Failed to generate listings: {str(e)}")
+
+        for platform in platforms:
+            entry = data.get(platform)
+            if isinstance(entry, dict) and entry.get("title"):
+                listings[platform] = self._finalize_listing(platform, entry)
+                self.cache.put(single_requests[platform], listings[platform])
+            else:
+                # Platform dropped from the combined answer: generate it alone
+                logger.warning(f"No {platform} listing in combined response, generating separately")
+                listings[platform] = await self.generate_listing(single_requests[platform])
+
+        return {platform: listings[platform] for platform in single_requests}
+
     def generate_quick_description(
         self,
         player: str,
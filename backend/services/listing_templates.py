@@ -0,0 +1,343 @@
+"""
+Template Listing Engine
+
+Deterministic, no-LLM listings for bulk uploads (ListingRequest.mode = "template"):
+- Per-platform description templates (html / markdown / text) compiled once
+- Titles built from ranked segments that are abbreviated, then dropped,
+  until they fit the platform's title limit
+- Grade phrasing ("PSA 10 Gem Mint", "BGS 9.5 Gem Mint"), parallel
+  abbreviations and serial numbering ("#23/99" -> "/99")
+- Keyword selection from card attributes plus optional externally ranked terms
+"""
+
+import re
+import html
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+GRADE_PATTERN = re.compile(r"^\s*([A-Za-z]+)\s*-?\s*(\d+(?:\.\d)?)\s*$")
+SERIAL_PATTERN = re.compile(r"^\s*#?\s*(\d+)?\s*/\s*(\d+)\s*$")
+
+# Grade number -> label used by the major graders
+GRADE_NAMES = {
+    "10": "Gem Mint",
+    "9.5": "Gem Mint",
+    "9": "Mint",
+    "8.5": "NM-MT+",
+    "8": "NM-MT",
+    "7.5": "NM+",
+    "7": "NM",
+    "6": "EX-MT",
+    "5": "EX",
+    "4": "VG-EX",
+    "3": "VG",
+    "2": "Good",
+    "1": "Poor",
+}
+GRADE_OVERRIDES = {("BGS", "10"): "Pristine"}
+
+# Word -> abbreviation applied when a title runs long
+ABBREVIATIONS = {
+    "rookie": "RC",
+    "autograph": "Auto",
+    "autographed": "Auto",
+    "refractor": "Ref",
+    "update": "Upd",
+    "edition": "Ed",
+    "limited": "Ltd",
+    "signature": "Sig",
+    "signatures": "Sigs",
+    "parallel": "Para",
+    "numbered": "#'d",
+    "basketball": "BK",
+    "baseball": "BB",
+    "football": "FB",
+}
+
+TONE_INTROS = {
+    "professional": "Offered here is an authentic {card_name}.",
+    "casual": "Up for grabs: a great {card_name}.",
+    "enthusiastic": "Don't miss this incredible {card_name}!",
+}
+
+PLATFORM_CLOSINGS = {
+    "ebay": "Ships fast in a penny sleeve, top loader and team bag with tracking. Buy with confidence.",
+    "pwcc": "A strong long-term hold with verified grading and clear provenance.",
+    "whatnot": "Grab it before it's gone!",
+    "comc": "Stored and shipped in protective holders. Condition as pictured and described.",
+}
+
+DESCRIPTION_TEMPLATES = {
+    "html": (
+        "<h2>{title}</h2>\n"
+        "<p>{intro}</p>\n"
+        "<ul>\n{rows}\n</ul>\n"
+        "<p>{grading}</p>\n"
+        "<p>{closing}</p>"
+    ),
+    "markdown": (
+        "## {title}\n\n"
+        "{intro}\n\n"
+        "### Card Details\n\n{rows}\n\n"
+        "### Grading\n\n{grading}\n\n"
+        "{closing}"
+    ),
+    "text": (
+        "{title}\n\n"
+        "{intro}\n\n"
+        "{rows}\n\n"
+        "{grading}\n\n"
+        "{closing}"
+    ),
+}
+
+ROW_TEMPLATES = {
+    "html": "<li><strong>{label}:</strong> {value}</li>",
+    "markdown": "- **{label}:** {value}",
+    "text": "{label}: {value}",
+}
+
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]#])")
+
+
+def _escape_markdown(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+ESCAPERS: Dict[str, Callable[[str], str]] = {
+    "html": lambda text: html.escape(text, quote=False),
+    "markdown": _escape_markdown,
+    "text": lambda text: text,
+}
+
+
+def grade_phrase(grade: Optional[str]) -> Tuple[str, str]:
+    """(long, short) phrasing of a grade, e.g. ("PSA 10 Gem Mint", "PSA 10")"""
+    if not grade:
+        return "", ""
+    match = GRADE_PATTERN.match(grade)
+    if not match:
+        return grade.strip(), grade.strip()
+    company, number = match.group(1).upper(), match.group(2)
+    number = number[:-2] if number.endswith(".0") else number
+    short = f"{company} {number}"
+    name = GRADE_OVERRIDES.get((company, number)) or GRADE_NAMES.get(number)
+    return (f"{short} {name}" if name else short), short
+
+
+def serial_phrase(serial_number: Optional[str]) -> Tuple[str, str]:
+    """(long, short) phrasing of a serial number, e.g. ("#23/99", "/99")"""
+    if not serial_number:
+        return "", ""
+    match = SERIAL_PATTERN.match(serial_number)
+    if not match:
+        text = serial_number.strip().lstrip("#")
+        return f"#{text}", f"#{text}"
+    number, print_run = match.groups()
+    return (f"#{number}/{print_run}" if number else f"/{print_run}"), f"/{print_run}"
+
+
+def abbreviate(text: str) -> str:
+    """Apply ABBREVIATIONS word by word"""
+    return " ".join(ABBREVIATIONS.get(word.lower(), word) for word in text.split())
+
+
+def fit_words(text: str, limit: int) -> str:
+    """Cut text to the limit on a word boundary"""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit + 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut[:limit].rstrip()
+
+
+class ListingTemplateEngine:
+    """Renders listings from precompiled per-platform templates"""
+
+    # Title segment order, then the order segments are shortened and dropped when too long
+    TITLE_ORDER = ("year", "set", "player", "parallel", "serial", "grade")
+    ABBREVIATE_ORDER = ("grade", "serial", "parallel", "set")
+    DROP_ORDER = ("parallel", "year", "serial", "set")
+
+    def __init__(self, platform_specs: Dict[str, Dict[str, Any]]):
+        """
+        Args:
+            platform_specs: ListingGenerator.PLATFORM_SPECS (title limits and formats)
+        """
+        self.platform_specs = platform_specs
+        self._templates = {
+            platform: self._compile(platform, spec)
+            for platform, spec in platform_specs.items()
+        }
+
+    def _compile(self, platform: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        fmt = spec["description_format"]
+        return {
+            "title_max": spec["title_max"],
+            "description": DESCRIPTION_TEMPLATES[fmt].format_map,
+            "row": ROW_TEMPLATES[fmt].format_map,
+            "row_separator": "\n",
+            "escape": ESCAPERS[fmt],
+            "closing": PLATFORM_CLOSINGS.get(platform, PLATFORM_CLOSINGS["ebay"]),
+        }
+
+    def build_title(self, card: Any, title_max: int, extra_terms: Optional[List[str]] = None) -> str:
+        """
+        Compose a title that fits title_max
+
+        Segments are written in full, then abbreviated one at a time in
+        ABBREVIATE_ORDER (grade label, serial number, parallel and set words),
+        then dropped in DROP_ORDER until the title fits; player and grade are
+        always kept. Remaining room is filled with extra_terms not already
+        present.
+        """
+        grade_long, grade_short = grade_phrase(card.grade)
+        serial_long, serial_short = serial_phrase(card.serial_number)
+        year = str(card.year) if card.year and str(card.year) not in card.set_name else ""
+        parallel = card.parallel or ""
+
+        full = {
+            "year": year,
+            "set": card.set_name,
+            "player": card.player,
+            "parallel": parallel,
+            "serial": serial_long,
+            "grade": grade_long,
+        }
+        short = {
+            "year": year,
+            "set": abbreviate(card.set_name),
+            "player": card.player,
+            "parallel": abbreviate(parallel),
+            "serial": serial_short,
+            "grade": grade_short,
+        }
+
+        def join(segments: Dict[str, str]) -> str:
+            return " ".join(segments[name] for name in self.TITLE_ORDER if segments[name])
+
+        segments = dict(full)
+        title = join(segments)
+        for name in self.ABBREVIATE_ORDER:
+            if len(title) <= title_max:
+                break
+            segments[name] = short[name]
+            title = join(segments)
+        for name in self.DROP_ORDER:
+            if len(title) <= title_max:
+                break
+            segments[name] = ""
+            title = join(segments)
+        title = fit_words(title, title_max)
+
+        present = title.lower()
+        for term in extra_terms or []:
+            if term.lower() in present or len(title) + 1 + len(term) > title_max:
+                continue
+            title = f"{title} {term}"
+            present = title.lower()
+        return title
+
+    def select_keywords(self, card: Any, ranked_terms: Optional[List[str]] = None, limit: int = 15) -> List[str]:
+        """Keywords from card attributes, then externally ranked terms, de-duplicated"""
+        grade_long, grade_short = grade_phrase(card.grade)
+        serial_long, serial_short = serial_phrase(card.serial_number)
+        last_name = card.player.split()[-1] if card.player.split() else ""
+        brand = next((word for word in card.set_name.split() if not word.isdigit()), "")
+
+        candidates = [
+            card.player,
+            card.set_name,
+            f"{card.year} {card.set_name}" if card.year and str(card.year) not in card.set_name else "",
+            f"{card.player} {brand}" if brand else "",
+            grade_short,
+            f"{card.player} {grade_short}" if grade_short else "",
+            f"{grade_short.split()[0]} graded" if grade_short else "",
+            card.parallel or "",
+            f"{card.parallel} parallel" if card.parallel else "",
+            f"serial numbered {serial_short}" if serial_short else "",
+            f"{last_name} card" if last_name else "",
+        ]
+        candidates.extend(ranked_terms or [])
+        candidates.extend(["sports card", "trading card", "collectible card"])
+
+        keywords: List[str] = []
+        seen = set()
+        for candidate in candidates:
+            key = candidate.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                keywords.append(candidate.strip())
+            if len(keywords) >= limit:
+                break
+        return keywords
+
+    def render(
+        self,
+        card: Any,
+        ranked_terms: Optional[List[str]] = None,
+        title_terms: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Render a listing for one card
+
+        Args:
+            card: ListingRequest (or any object with the same card fields)
+            ranked_terms: Externally ranked keywords to merge into the keyword list
+            title_terms: Terms to append to the title while room remains
+
+        Returns:
+            {"title", "description", "keywords"} ready for ListingGenerator._finalize_listing
+        """
+        platform = card.platform if card.platform in self._templates else "ebay"
+        template = self._templates[platform]
+        escape = template["escape"]
+
+        title = self.build_title(card, template["title_max"], title_terms)
+        grade_long, _ = grade_phrase(card.grade)
+        serial_long, _ = serial_phrase(card.serial_number)
+        card_name = " ".join(part for part in (
+            str(card.year) if card.year and str(card.year) not in card.set_name else "",
+            card.set_name,
+            card.player,
+            card.parallel or "",
+        ) if part)
+
+        rows = [("Player", card.player), ("Set", card.set_name)]
+        if card.year:
+            rows.append(("Year", str(card.year)))
+        if card.parallel:
+            rows.append(("Parallel", card.parallel))
+        if serial_long:
+            rows.append(("Serial Number", f"{serial_long} (serial numbered)"))
+        if grade_long:
+            rows.append(("Grade", grade_long))
+        if card.condition:
+            rows.append(("Condition", card.condition))
+        if card.estimated_value and card.include_price:
+            rows.append(("Estimated Value", f"${card.estimated_value:,.2f}"))
+
+        if grade_long:
+            grading = f"Professionally graded {grade_long}, encapsulated and sealed in its original slab."
+        else:
+            grading = f"Raw, ungraded card in {card.condition or 'excellent'} condition. Please review all photos."
+        if serial_long:
+            grading += f" Serial numbered {serial_long}."
+
+        intro = TONE_INTROS.get(card.tone, TONE_INTROS["professional"]).format(card_name=card_name)
+
+        description = template["description"]({
+            "title": escape(title),
+            "intro": escape(intro),
+            "rows": template["row_separator"].join(
+                template["row"]({"label": label, "value": escape(value)}) for label, value in rows
+            ),
+            "grading": escape(grading),
+            "closing": escape(template["closing"]),
+        })
+
+        return {
+            "title": title,
+            "description": description,
+            "keywords": self.select_keywords(card, ranked_terms),
+        }
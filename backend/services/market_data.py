@@ -8,16 +8,33 @@ Supports:
 """
 
 import os
+import json
+import time
+import asyncio
+import hashlib
 import logging
+from array import array
+from collections import OrderedDict
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 import httpx
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, PrivateAttr
+
+from services.circuit_breaker import CircuitBreaker
+from services.comp_batch import CompBatch
+from services.ebay_auth import EbayTokenManager, DEFAULT_CACHE_FILE
+from services.ebay_stream import FindingItemParser, iter_finding_items
+from services.keyword_index import keyword_index
 
 logger = logging.getLogger(__name__)
 
 
+class ProviderError(Exception):
+    """Raised when a provider cannot serve a request (HTTP/transport failure)"""
+
+
 class CompData(BaseModel):
     """Individual comparable sale"""
     title: str
@@ -40,11 +57,56 @@ class MarketSnapshot(BaseModel):
     comps: List[CompData] = []
     last_updated: datetime
     confidence: str = "medium"  # low, medium, high
+    # Content hash of the full comp set the snapshot was computed from
+    comps_digest: Optional[str] = None
+    # Every comp fetched (comps holds only the top ones); in memory only
+    _comp_batch: Optional[CompBatch] = PrivateAttr(default=None)
+
+    def fetched_comps(self) -> List[Tuple[str, Optional[str]]]:
+        """(title, url) of every comp the snapshot was computed from
+
+        The full batch is released on the first call, since the snapshot
+        may then sit in the snapshot cache.
+        """
+        batch, self._comp_batch = self._comp_batch, None
+        if batch is None:
+            return [(comp.title, comp.url) for comp in self.comps]
+        return [(batch.title(i), batch.urls[i]) for i in range(len(batch))]
+
+
+# Bump when snapshot pricing math changes so cached ETags are invalidated
+PRICING_VERSION = "1"
+
+
+def snapshot_etag(snapshot: MarketSnapshot, comps_limit: int = 10) -> str:
+    """
+    Weak ETag for a snapshot response: derived from the comp set plus the
+    pricing results and parameters, independent of last_updated.
+    """
+    comps_identity = snapshot.comps_digest or "\x1e".join(
+        f"{c.title}\x1f{c.price}\x1f{c.sold_date.isoformat()}\x1f{c.url}" for c in snapshot.comps
+    )
+    identity = json.dumps([
+        PRICING_VERSION,
+        comps_limit,
+        snapshot.source,
+        snapshot.currency,
+        snapshot.floor,
+        snapshot.average,
+        snapshot.ceiling,
+        snapshot.listings_count,
+        snapshot.confidence,
+        comps_identity,
+    ])
+    return f'W/"{hashlib.blake2b(identity.encode("utf-8"), digest_size=12).hexdigest()}"'
 
 
 class MarketDataProvider(ABC):
     """Abstract base class for market data providers"""
 
+    # Short identifier used for provider selection, breakers and metrics
+    name: str = "unknown"
+
     @abstractmethod
     async def fetch_comps(
         self,
@@ -68,6 +130,31 @@ class MarketDataProvider(ABC):
         """Get aggregated market snapshot"""
         pass
 
+    async def fetch_batch(
+        self,
+        player: str,
+        set_name: str,
+        year: Optional[int] = None,
+        grade: Optional[str] = None,
+        limit: int = 50
+    ) -> CompBatch:
+        """
+        Fetch comparable sales as a columnar batch
+
+        Providers that can fill a batch directly override this; the default
+        converts the result of fetch_comps.
+        """
+        return CompBatch.from_comps(await self.fetch_comps(player, set_name, year, grade, limit))
+
+    async def close(self) -> None:
+        """Release background tasks and connections (no-op by default)"""
+        return None
+
+
+def comps_from_batch(batch: CompBatch, limit: Optional[int] = None) -> List[CompData]:
+    """Build CompData models for the first `limit` comps (API boundary only)"""
+    return [CompData(**record) for record in batch.iter_records(limit)]
+
 
 class EbayMarketProvider(MarketDataProvider):
     """
@@ -79,6 +166,8 @@ class EbayMarketProvider(MarketDataProvider):
     - EBAY_DEV_ID (optional)
     """
 
+    name = "ebay"
+
     def __init__(self):
         self.app_id = os.getenv("EBAY_APP_ID")
         self.cert_id = os.getenv("EBAY_CERT_ID")
@@ -90,40 +179,42 @@ class EbayMarketProvider(MarketDataProvider):
         else:
             self.enabled = True
 
-        self.base_url = "https://svcs.ebay.com/services/search/FindingService/v1"
-        self.auth_url = "https://api.ebay.com/identity/v1/oauth2/token"
-        self.access_token = None
-        self.token_expires = None
+        # Overridable so benchmarks can point at benchmarks/ebay_stub_server.py
+        self.base_url = os.getenv("EBAY_FINDING_URL", "https://svcs.ebay.com/services/search/FindingService/v1")
+        self.auth_url = os.getenv("EBAY_AUTH_URL", "https://api.ebay.com/identity/v1/oauth2/token")
+        self.timeout = float(os.getenv("EBAY_TIMEOUT_SECONDS", "30"))
+        self.page_size = 100  # Finding API maximum entriesPerPage
 
-    async def _get_access_token(self) -> str:
-        """Get OAuth access token"""
-        if self.access_token and self.token_expires and datetime.now() < self.token_expires:
-            return self.access_token
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.auth_url,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                auth=(self.app_id, self.cert_id),
-                data={
-                    "grant_type": "client_credentials",
-                    "scope": "https://api.ebay.com/oauth/api_scope"
-                }
-            )
+        # Pooled client reused across calls (keep-alive to the Finding API)
+        self._client: Optional[httpx.AsyncClient] = None
 
-            if response.status_code != 200:
-                logger.error(f"eBay auth failed: {response.text}")
-                raise Exception("Failed to authenticate with eBay")
-
-            data = response.json()
-            self.access_token = data["access_token"]
-            # Token expires in seconds, subtract 5 min buffer
-            expires_in = data.get("expires_in", 7200) - 300
-            self.token_expires = datetime.now() + timedelta(seconds=expires_in)
+        # One token for every call from this worker, shared with other
+        # workers through the token cache file
+        self.token_manager = EbayTokenManager(
+            app_id=self.app_id,
+            cert_id=self.cert_id,
+            auth_url=self.auth_url,
+            cache_file=os.getenv("EBAY_TOKEN_CACHE_FILE", DEFAULT_CACHE_FILE) or None,
+        ) if self.enabled else None
 
-            return self.access_token
+    async def _get_access_token(self) -> str:
+        """Get OAuth access token (refreshed once, renewed in the background)"""
+        if not self.token_manager:
+            raise ProviderError("eBay provider not enabled")
+        return await self.token_manager.get_token()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def close(self) -> None:
+        """Stop background token renewal and close pooled connections"""
+        if self.token_manager:
+            await self.token_manager.close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def _build_search_query(
         self,
@@ -157,10 +248,33 @@ class EbayMarketProvider(MarketDataProvider):
         grade: Optional[str] = None,
         limit: int = 50
     ) -> List[CompData]:
-        """Fetch sold listings from eBay"""
+        """
+        Fetch sold listings from eBay
+
+        Raises:
+            ProviderError: If eBay is unreachable or returns an error status
+        """
+        batch = await self.fetch_batch(player, set_name, year, grade, limit)
+        return comps_from_batch(batch)
+
+    async def fetch_batch(
+        self,
+        player: str,
+        set_name: str,
+        year: Optional[int] = None,
+        grade: Optional[str] = None,
+        limit: int = 50
+    ) -> CompBatch:
+        """
+        Fetch sold listings from eBay straight into a columnar batch
+
+        Raises:
+            ProviderError: If eBay is unreachable or returns an error status
+        """
+        batch = CompBatch(utc=True)
         if not self.enabled:
             logger.warning("eBay provider not enabled")
-            return []
+            return batch
 
         query = self._build_search_query(player, set_name, year, grade)
 
@@ -176,64 +290,63 @@ class EbayMarketProvider(MarketDataProvider):
             "itemFilter(1).name": "ListingType",
             "itemFilter(1).value": "FixedPrice",
             "sortOrder": "EndTimeSoonest",
-            "paginationInput.entriesPerPage": min(limit, 100),
+            "paginationInput.entriesPerPage": min(limit, self.page_size),
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.base_url, params=params, timeout=30.0)
-
-                if response.status_code != 200:
-                    logger.error(f"eBay API error: {response.status_code}")
-                    return []
-
-                data = response.json()
-
-                # Parse eBay response
-                search_result = data.get("findCompletedItemsResponse", [{}])[0]
-                items = search_result.get("searchResult", [{}])[0].get("item", [])
-
-                comps = []
-                for item in items:
-                    try:
-                        # Extract price
-                        selling_status = item.get("sellingStatus", [{}])[0]
-                        converted_price = selling_status.get("convertedCurrentPrice", [{}])[0]
-                        price = float(converted_price.get("__value__", 0))
-
-                        # Extract date
-                        end_time = item.get("listingInfo", [{}])[0].get("endTime", [None])[0]
-                        sold_date = datetime.fromisoformat(end_time.replace("Z", "+00:00")) if end_time else datetime.now()
-
-                        # Extract title and URL
-                        title = item.get("title", [None])[0] or "Unknown"
-                        url = item.get("viewItemURL", [None])[0]
-
-                        # Extract condition
-                        condition_info = item.get("condition", [{}])[0]
-                        condition = condition_info.get("conditionDisplayName", [None])[0]
-
-                        comp = CompData(
-                            title=title,
-                            price=price,
-                            sold_date=sold_date,
-                            condition=condition,
-                            grade=grade,
-                            url=url,
-                            source="ebay"
-                        )
-                        comps.append(comp)
-
-                    except (KeyError, ValueError, IndexError) as e:
-                        logger.warning(f"Failed to parse eBay item: {e}")
-                        continue
-
-                logger.info(f"Fetched {len(comps)} comps from eBay")
-                return comps
-
+            client = self._get_client()
+            page = 1
+            # Follow pages until the limit is reached or eBay runs out of items
+            while len(batch) < limit:
+                params["paginationInput.pageNumber"] = page
+                page_items = await self._fetch_page(client, params, batch, grade, limit)
+                if page_items < params["paginationInput.entriesPerPage"]:
+                    break
+                page += 1
+
+            logger.info(f"Fetched {len(batch)} comps from eBay")
+            return batch
+
+        except ProviderError:
+            raise
         except Exception as e:
             logger.error(f"eBay API request failed: {e}")
-            return []
+            raise ProviderError(f"eBay API request failed: {e}") from e
+
+    async def _fetch_page(
+        self,
+        client: httpx.AsyncClient,
+        params: dict,
+        batch: CompBatch,
+        grade: Optional[str],
+        limit: int
+    ) -> int:
+        """Stream one findCompletedItems page into the batch, returning its item count
+
+        The count includes items that failed to parse, so a bad item on a
+        full page does not read as the last page.
+        """
+        parser = FindingItemParser()
+        async with client.stream("GET", self.base_url, params=params, timeout=self.timeout) as response:
+            if response.status_code != 200:
+                logger.error(f"eBay API error: {response.status_code}")
+                raise ProviderError(f"eBay API returned {response.status_code}")
+
+            # Items are parsed as they stream in rather than after
+            # loading the whole payload
+            async for item in iter_finding_items(response.aiter_bytes(), parser):
+                if len(batch) >= limit:
+                    continue
+                batch.append(
+                    title=item.title,
+                    price=item.price,
+                    sold_at=item.end_time if item.end_time is not None else time.time(),
+                    condition=item.condition,
+                    grade=grade,
+                    url=item.url,
+                    source="ebay"
+                )
+        return parser.items_seen
 
     async def get_snapshot(
         self,
@@ -243,9 +356,9 @@ class EbayMarketProvider(MarketDataProvider):
         grade: Optional[str] = None
     ) -> MarketSnapshot:
         """Get market snapshot from eBay sold listings"""
-        comps = await self.fetch_comps(player, set_name, year, grade, limit=50)
+        batch = await self.fetch_batch(player, set_name, year, grade, limit=50)
 
-        if not comps:
+        if not len(batch):
             # Return minimal snapshot if no data
             return MarketSnapshot(
                 source="ebay",
@@ -257,48 +370,143 @@ class EbayMarketProvider(MarketDataProvider):
                 confidence="low"
             )
 
-        prices = [comp.price for comp in comps if comp.price > 0]
+        stats = batch.price_stats()
 
-        if not prices:
+        if stats is None:
             return MarketSnapshot(
                 source="ebay",
                 floor=0.0,
                 average=0.0,
                 ceiling=0.0,
-                listings_count=len(comps),
-                comps=comps,
+                listings_count=len(batch),
+                comps=comps_from_batch(batch),
                 last_updated=datetime.now(),
-                confidence="low"
+                confidence="low",
+                comps_digest=batch.digest()
             )
 
-        # Calculate statistics
-        prices.sort()
-        floor = prices[int(len(prices) * 0.1)]  # 10th percentile
-        average = sum(prices) / len(prices)
-        ceiling = prices[int(len(prices) * 0.9)]  # 90th percentile
+        floor, average, ceiling, _ = stats
 
         # Determine confidence based on sample size
-        if len(comps) >= 30:
+        if len(batch) >= 30:
             confidence = "high"
-        elif len(comps) >= 10:
+        elif len(batch) >= 10:
             confidence = "medium"
         else:
             confidence = "low"
 
-        return MarketSnapshot(
+        snapshot = MarketSnapshot(
             source="ebay",
             floor=round(floor, 2),
             average=round(average, 2),
             ceiling=round(ceiling, 2),
-            listings_count=len(comps),
-            comps=comps[:20],  # Include top 20 comps
+            listings_count=len(batch),
+            comps=comps_from_batch(batch, limit=20),  # Include top 20 comps
             last_updated=datetime.now(),
-            confidence=confidence
+            confidence=confidence,
+            comps_digest=batch.digest()
         )
+        snapshot._comp_batch = batch
+        return snapshot
 
 
 class SimulatedMarketProvider(MarketDataProvider):
-    """Simulated market data for testing/fallback"""
+    """
+    Deterministic synthetic market for testing, fallback and load tests
+
+    Every card gets a stable seed derived from its normalized attributes, so
+    the same card always produces the same comps for a given reference day.
+    Comps are generated with NumPy in one vectorized pass:
+    - a per-card lognormal base price with a vintage premium
+    - grade premiums (PSA/BGS/SGC numeric grades)
+    - a per-card price trend over the 90-day sales window plus sale noise
+
+    Optional latency and error injection make it usable as a stand-in for a
+    degraded real provider.
+
+    Environment overrides:
+    - SIMULATED_COMP_COUNT: comps per card (default 20, tens of thousands ok)
+    - SIMULATED_SEED: global seed salt
+    - SIMULATED_LATENCY_MS: mean simulated call latency
+    - SIMULATED_ERROR_RATE: fraction of calls that raise ProviderError
+    """
+
+    name = "simulated"
+
+    # Price multiplier over a raw card for a numeric grade
+    GRADE_PREMIUMS = {
+        10.0: 6.0,
+        9.5: 3.5,
+        9.0: 2.2,
+        8.5: 1.7,
+        8.0: 1.45,
+        7.0: 1.2,
+        6.0: 1.05,
+    }
+    WINDOW_DAYS = 90
+
+    def __init__(
+        self,
+        comp_count: Optional[int] = None,
+        seed: Optional[int] = None,
+        latency_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        reference_time: Optional[datetime] = None
+    ):
+        """
+        Args:
+            comp_count: Comps generated per card
+            seed: Global seed salt (changes every card's market)
+            latency_ms: Mean simulated latency per call (0 = none)
+            error_rate: Probability a call raises ProviderError
+            reference_time: End of the sales window (defaults to today's midnight)
+        """
+        self.comp_count = comp_count if comp_count is not None else int(os.getenv("SIMULATED_COMP_COUNT", "20"))
+        self.seed = seed if seed is not None else int(os.getenv("SIMULATED_SEED", "0"))
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("SIMULATED_LATENCY_MS", "0"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("SIMULATED_ERROR_RATE", "0"))
+        self.reference_time = reference_time
+        # Latency/error draws are per call, not per card
+        self._call_rng = np.random.default_rng(self.seed)
+
+    def card_seed(
+        self,
+        player: str,
+        set_name: str,
+        year: Optional[int] = None,
+        grade: Optional[str] = None
+    ) -> int:
+        """Stable seed for a card's synthetic market"""
+        def norm(value: Optional[str]) -> str:
+            return " ".join((value or "").lower().split())
+
+        key = f"{self.seed}|{norm(player)}|{norm(set_name)}|{year or ''}|{norm(grade)}"
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+    @classmethod
+    def grade_premium(cls, grade: Optional[str]) -> float:
+        """Multiplier for a grade string such as "PSA 10" or "BGS 9.5" """
+        if not grade:
+            return 1.0
+        numbers = [token for token in grade.replace("-", " ").split() if token.replace(".", "", 1).isdigit()]
+        if not numbers:
+            return 1.0
+        value = float(numbers[-1])
+        eligible = [g for g in cls.GRADE_PREMIUMS if g <= value]
+        return cls.GRADE_PREMIUMS[max(eligible)] if eligible else 1.0
+
+    def _reference_datetime(self) -> datetime:
+        if self.reference_time is not None:
+            return self.reference_time
+        # Stable for the whole day so repeat requests see the same comps
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    async def _simulate_call(self) -> None:
+        if self.latency_ms > 0:
+            delay = self._call_rng.lognormal(np.log(self.latency_ms), 0.5) / 1000
+            await asyncio.sleep(delay)
+        if self.error_rate > 0 and self._call_rng.random() < self.error_rate:
+            raise ProviderError("Simulated provider error")
 
     async def fetch_comps(
         self,
@@ -309,30 +517,55 @@ class SimulatedMarketProvider(MarketDataProvider):
         limit: int = 50
     ) -> List[CompData]:
         """Generate simulated comps"""
-        import random
-
-        base_price = 100.0
-        if grade and "10" in grade:
-            base_price = 250.0
-        elif grade and "9" in grade:
-            base_price = 140.0
-
-        comps = []
-        for i in range(min(limit, 20)):
-            price = base_price * random.uniform(0.8, 1.2)
-            days_ago = random.randint(1, 90)
-
-            comp = CompData(
-                title=f"{player} {set_name} {year or 'Vintage'}",
-                price=round(price, 2),
-                sold_date=datetime.now() - timedelta(days=days_ago),
-                condition="Used",
-                grade=grade,
-                source="simulated"
-            )
-            comps.append(comp)
+        batch = await self.fetch_batch(player, set_name, year, grade, limit)
+        return comps_from_batch(batch)
+
+    async def fetch_batch(
+        self,
+        player: str,
+        set_name: str,
+        year: Optional[int] = None,
+        grade: Optional[str] = None,
+        limit: int = 50
+    ) -> CompBatch:
+        """Generate simulated comps as a columnar batch (most recent first)"""
+        await self._simulate_call()
 
-        return comps
+        count = min(limit, self.comp_count)
+        reference = self._reference_datetime()
+
+        # Card-level parameters are shared by every grade of the card
+        card_rng = np.random.default_rng(self.card_seed(player, set_name, year))
+        base_price = card_rng.lognormal(np.log(60.0), 0.7)
+        if year:
+            age = max(0, reference.year - year)
+            base_price *= 1 + min(age, 60) * 0.03  # vintage premium
+        base_price *= self.grade_premium(grade)
+        annual_trend = card_rng.normal(0.05, 0.25)
+
+        # Comp-level draws, one vectorized pass per card and grade
+        rng = np.random.default_rng(self.card_seed(player, set_name, year, grade))
+        days_ago = np.sort(rng.uniform(0, self.WINDOW_DAYS, count))
+        trend = np.exp(-annual_trend * days_ago / 365.0)
+        noise = rng.lognormal(0.0, 0.12, count)
+        prices = np.round(np.maximum(base_price * trend * noise, 0.99), 2)
+        timestamps = reference.timestamp() - days_ago * 86400.0
+
+        price_column = array("d")
+        price_column.frombytes(prices.astype(np.float64).tobytes())
+        time_column = array("d")
+        time_column.frombytes(timestamps.astype(np.float64).tobytes())
+
+        batch = CompBatch()
+        batch.extend_uniform(
+            title=f"{player} {set_name} {year or 'Vintage'}",
+            prices=price_column,
+            timestamps=time_column,
+            condition="Used",
+            grade=grade,
+            source="simulated"
+        )
+        return batch
 
     async def get_snapshot(
         self,
@@ -342,28 +575,71 @@ class SimulatedMarketProvider(MarketDataProvider):
         grade: Optional[str] = None
     ) -> MarketSnapshot:
         """Generate simulated snapshot"""
-        comps = await self.fetch_comps(player, set_name, year, grade)
-        prices = [comp.price for comp in comps]
+        batch = await self.fetch_batch(player, set_name, year, grade, limit=self.comp_count)
+        stats = batch.price_stats()
+
+        if stats is None:
+            # No comps configured (SIMULATED_COMP_COUNT=0)
+            return MarketSnapshot(
+                source="simulated",
+                floor=0.0,
+                average=0.0,
+                ceiling=0.0,
+                listings_count=len(batch),
+                last_updated=datetime.now(),
+                confidence="low"
+            )
+
+        floor, average, ceiling, _ = stats
 
         return MarketSnapshot(
             source="simulated",
-            floor=round(min(prices) * 0.9, 2),
-            average=round(sum(prices) / len(prices), 2),
-            ceiling=round(max(prices) * 1.1, 2),
-            listings_count=len(comps),
-            comps=comps,
+            floor=round(floor, 2),
+            average=round(average, 2),
+            ceiling=round(ceiling, 2),
+            listings_count=len(batch),
+            comps=comps_from_batch(batch, limit=20),
             last_updated=datetime.now(),
-            confidence="low"
+            confidence="low",
+            comps_digest=batch.digest()
         )
 
 
 class MarketDataService:
     """
     Main market data service - coordinates multiple providers
+
+    Each provider sits behind its own circuit breaker, so a degraded
+    provider is skipped instantly instead of holding every request until
+    its timeout before falling back.
+
+    Snapshots are kept for a short TTL so repeat requests for the same card
+    return the same versioned snapshot (and ETag) without refetching.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        snapshot_ttl: Optional[float] = None,
+        snapshot_cache_size: Optional[int] = None
+    ):
+        """
+        Args:
+            snapshot_ttl: Seconds to reuse a snapshot (MARKET_SNAPSHOT_TTL_SECONDS, 0 disables)
+            snapshot_cache_size: Max cached snapshots (MARKET_SNAPSHOT_CACHE_SIZE)
+        """
         self.providers: List[MarketDataProvider] = []
+        self.snapshot_ttl = (
+            snapshot_ttl if snapshot_ttl is not None
+            else float(os.getenv("MARKET_SNAPSHOT_TTL_SECONDS", "300"))
+        )
+        self.snapshot_cache_size = (
+            snapshot_cache_size if snapshot_cache_size is not None
+            else int(os.getenv("MARKET_SNAPSHOT_CACHE_SIZE", "1024"))
+        )
+        self._snapshot_cache: "OrderedDict[Tuple, Tuple[float, MarketSnapshot]]" = OrderedDict()
+
+        # Sold-comp titles are indexed for listing keywords
+        self.keyword_index = keyword_index
 
         # Initialize providers
         ebay_provider = EbayMarketProvider()
@@ -375,6 +651,22 @@ class MarketDataService:
         self.providers.append(SimulatedMarketProvider())
         logger.info(f"Market data service initialized with {len(self.providers)} providers")
 
+        self.breakers: Dict[str, CircuitBreaker] = {
+            p.name: self._build_breaker(p.name) for p in self.providers
+        }
+
+    @staticmethod
+    def _build_breaker(name: str) -> CircuitBreaker:
+        """Create a breaker using MARKET_BREAKER_* environment overrides"""
+        return CircuitBreaker(
+            name,
+            failure_rate_threshold=float(os.getenv("MARKET_BREAKER_FAILURE_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("MARKET_BREAKER_SLOW_CALL_SECONDS", "5")),
+            window_size=int(os.getenv("MARKET_BREAKER_WINDOW", "20")),
+            minimum_calls=int(os.getenv("MARKET_BREAKER_MIN_CALLS", "5")),
+            open_seconds=float(os.getenv("MARKET_BREAKER_OPEN_SECONDS", "30")),
+        )
+
     async def get_market_data(
         self,
         player: str,
@@ -386,6 +678,8 @@ class MarketDataService:
         """
         Get market data, trying providers in order until success
 
+        Providers whose circuit breaker is open are skipped without a call.
+
         Args:
             player: Player name
             set_name: Card set name
@@ -393,24 +687,48 @@ class MarketDataService:
             grade: Grade (e.g., "PSA 10")
             provider: Specific provider or "auto" for fallback
         """
+        cache_key = self._cache_key(player, set_name, year, grade, provider)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
         for p in self.providers:
-            try:
-                # Match provider by class name (e.g., "simulated" matches "SimulatedMarketProvider")
-                if provider != "auto":
-                    class_name = p.__class__.__name__.lower()
-                    if provider.lower() not in class_name:
-                        continue
+            # Match provider by class name (e.g., "simulated" matches "SimulatedMarketProvider")
+            if provider != "auto":
+                class_name = p.__class__.__name__.lower()
+                if provider.lower() not in class_name:
+                    continue
+
+            breaker = self.breakers[p.name]
+            if not breaker.allow_request():
+                logger.warning(f"Skipping {p.__class__.__name__}: circuit {breaker.state}")
+                continue
 
+            started = time.perf_counter()
+            try:
                 logger.info(f"Fetching market data from {p.__class__.__name__}")
                 snapshot = await p.get_snapshot(player, set_name, year, grade)
-
-                if snapshot.listings_count > 0:
-                    logger.info(f"Successfully fetched {snapshot.listings_count} comps")
-                    return snapshot
-
             except Exception as e:
+                breaker.record_failure(time.perf_counter() - started)
                 logger.error(f"Provider {p.__class__.__name__} failed: {e}")
                 continue
+            except BaseException:
+                # Cancelled (client disconnect, outer timeout, shutdown): no outcome,
+                # but a half-open trial slot must not stay taken
+                breaker.release()
+                raise
+
+            breaker.record_success(time.perf_counter() - started)
+
+            if snapshot.listings_count > 0:
+                logger.info(f"Successfully fetched {snapshot.listings_count} comps")
+                self._store_cached(cache_key, snapshot)
+                if p.name != "simulated":
+                    # Real sold titles feed listing keywords (every fetched comp, not just
+                    # the top ones returned); simulated ones carry no signal
+                    for title, url in snapshot.fetched_comps():
+                        self.keyword_index.add_title(player, set_name, grade, title, fingerprint=url)
+                return snapshot
 
         # Return empty snapshot if all fail
         logger.warning("All market data providers failed")
@@ -424,6 +742,47 @@ class MarketDataService:
             confidence="low"
         )
 
+    @staticmethod
+    def _cache_key(
+        player: str,
+        set_name: str,
+        year: Optional[int],
+        grade: Optional[str],
+        provider: str
+    ) -> Tuple:
+        def norm(value: Optional[str]) -> str:
+            return " ".join((value or "").lower().split())
+
+        return (norm(player), norm(set_name), year, norm(grade), norm(provider))
+
+    def _get_cached(self, key: Tuple) -> Optional[MarketSnapshot]:
+        entry = self._snapshot_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if time.monotonic() >= expires_at:
+            del self._snapshot_cache[key]
+            return None
+        self._snapshot_cache.move_to_end(key)
+        return snapshot
+
+    def _store_cached(self, key: Tuple, snapshot: MarketSnapshot) -> None:
+        if self.snapshot_ttl <= 0:
+            return
+        self._snapshot_cache[key] = (time.monotonic() + self.snapshot_ttl, snapshot)
+        self._snapshot_cache.move_to_end(key)
+        while len(self._snapshot_cache) > self.snapshot_cache_size:
+            self._snapshot_cache.popitem(last=False)
+
+    async def close(self) -> None:
+        """Shut down all providers"""
+        for p in self.providers:
+            await p.close()
+
+    def get_provider_health(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state and rolling latency for each provider"""
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
 
 # Global instance
 market_service = MarketDataService()
@@ -0,0 +1,151 @@
+"""
+Fast JSON response path
+
+Market and scan responses are built from models that are already validated,
+so they skip FastAPI's jsonable_encoder + response_model round trip:
+- payloads are encoded once with orjson (stdlib json fallback) to raw bytes
+- datetimes are encoded natively instead of isoformat() per comp
+- large bodies are compressed with brotli or gzip when the client accepts it
+- server-sent events are framed from the same encoder (sse_event)
+"""
+
+import os
+import gzip
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (roughly one TCP segment)
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1400"))
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def market_snapshot_payload(snapshot: Any, comps_limit: int = 10) -> Dict[str, Any]:
+    """Response body for a MarketSnapshot (top comps only)"""
+    return {
+        "source": snapshot.source,
+        "currency": snapshot.currency,
+        "floor": snapshot.floor,
+        "average": snapshot.average,
+        "ceiling": snapshot.ceiling,
+        "listings_count": snapshot.listings_count,
+        "confidence": snapshot.confidence,
+        "last_updated": snapshot.last_updated,
+        "comps": [
+            {
+                "title": comp.title,
+                "price": comp.price,
+                "sold_date": comp.sold_date,
+                "condition": comp.condition,
+                "grade": comp.grade,
+                "url": comp.url,
+                "source": comp.source
+            }
+            for comp in snapshot.comps[:comps_limit]
+        ]
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in {opaque(tag) for tag in if_none_match.split(",")}
+
+
+def _choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0  # unreadable weight: don't risk an unwanted coding
+        # q=0 (in any spelling: 0.0, 0.000, " q=0") means "not acceptable"
+        if q > 0:
+            accepted.add(coding.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def json_response(
+    body: bytes,
+    accept_encoding: Optional[str] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    min_compress_bytes: int = COMPRESSION_MIN_BYTES,
+) -> Response:
+    """
+    Wrap pre-encoded JSON bytes in a Response, compressing if worthwhile
+
+    Args:
+        body: Encoded JSON from dumps()
+        accept_encoding: The request's Accept-Encoding header
+        status_code: HTTP status
+        headers: Extra response headers
+        min_compress_bytes: Smallest body worth compressing
+    """
+    response_headers = dict(headers or {})
+    response_headers["Vary"] = "Accept-Encoding"
+
+    encoding = _choose_encoding(accept_encoding) if len(body) >= min_compress_bytes else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=response_headers,
+    )
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Frame one server-sent event with a JSON data line"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
@@ -0,0 +1,276 @@
+"""
+Tests for Bulk Listing Service
+
+Run with: pytest tests/test_bulk_listing.py
+"""
+
+import re
+import json
+import pytest
+from types import SimpleNamespace
+from pydantic import ValidationError
+from services import bulk_listing as bulk_module
+from services import listing_generator as listing_module
+from services.bulk_listing import BulkListingRequest, BulkListingService
+from services.listing_cache import ListingCache
+from services.listing_generator import ListingGenerator, ListingRequest
+
+
+def listing_json(player: str, card: int = None) -> dict:
+    entry = {
+        "title": f"{player} Rookie PSA 10",
+        "description": f"Great {player} card",
+        "keywords": [player, "rookie"],
+    }
+    if card is not None:
+        entry["card"] = card
+    return entry
+
+
+def completion(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeOpenAI:
+    """Async OpenAI stand-in covering chat completions, files and batches"""
+
+    def __init__(self, drop_cards=()):
+        self.drop_cards = set(drop_cards)
+        self.malformed_cards = set()
+        self.completion_calls = []
+        self.uploads = {}
+        self.files_content = {}
+        self.batch = SimpleNamespace(id="batch_1", status="validating", output_file_id=None, error_file_id=None)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    async def _create_completion(self, **kwargs):
+        self.completion_calls.append(kwargs)
+        prompt = kwargs["messages"][1]["content"]
+        packed = re.findall(r"^Card (\d+):\nPlayer: (.+)$", prompt, re.MULTILINE)
+        if not packed:
+            player = re.search(r"^Player: (.+)$", prompt, re.MULTILINE).group(1)
+            return completion(json.dumps(listing_json(player)))
+        listings = [
+            {**listing_json(player, int(number)), "keywords": "not a list"} if player in self.malformed_cards
+            else listing_json(player, int(number))
+            for number, player in packed
+            if player not in self.drop_cards
+        ]
+        return completion(json.dumps({"listings": listings}))
+
+    async def _create_file(self, file, purpose):
+        name, data = file
+        self.uploads[name] = data
+        return SimpleNamespace(id="file-input", purpose=purpose)
+
+    async def _create_batch(self, **kwargs):
+        self.batch_request = kwargs
+        return self.batch
+
+    async def _retrieve_batch(self, batch_id):
+        return self.batch
+
+    async def _file_content(self, file_id):
+        return SimpleNamespace(text=self.files_content[file_id])
+
+
+def make_cards(count: int, platform: str = "ebay"):
+    return [
+        ListingRequest(player=f"Player {i}", set_name="2011 Topps Update", year=2011, platform=platform)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    client = FakeOpenAI()
+    monkeypatch.setattr(bulk_module, "get_openai_client", lambda: client)
+    monkeypatch.setattr(listing_module, "get_openai_client", lambda: client)
+    return client
+
+
+class TestBulkListing:
+    """Test packed prompts and batch jobs"""
+
+    @pytest.mark.asyncio
+    async def test_packed_mode_splits_results(self, fake_openai, tmp_path):
+        """Test cards are packed per prompt and written back per card"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path), cards_per_prompt=5)
+        cards = make_cards(7) + make_cards(2, platform="whatnot")
+
+        job = await service.create_job(BulkListingRequest(cards=cards))
+
+        assert job.mode == "packed"
+        assert job.status == "completed"
+        # ebay: 5 + 2, whatnot: 2
+        assert len(fake_openai.completion_calls) == 3
+        assert [r.status for r in job.results] == ["ok"] * 9
+        for result, card in zip(job.results, cards):
+            assert result.listing.title.startswith(card.player)
+            assert result.listing.platform == card.platform
+        assert (await service.get_job(job.job_id)).summary() == {"ok": 9, "error": 0, "pending": 0}
+
+    @pytest.mark.asyncio
+    async def test_dropped_card_falls_back_to_single_call(self, fake_openai, tmp_path):
+        """Test a card missing from a packed answer is generated on its own"""
+        fake_openai.drop_cards = {"Player 2"}
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path), cards_per_prompt=5)
+
+        results = await service.generate_packed(make_cards(4))
+
+        assert len(fake_openai.completion_calls) == 2
+        assert all(result.status == "ok" for result in results)
+        assert results[2].listing.title == "Player 2 Rookie PSA 10"
+
+    @pytest.mark.asyncio
+    async def test_malformed_packed_entry_falls_back_to_single_call(self, fake_openai, tmp_path):
+        """Test a packed entry failing validation is regenerated without failing the set"""
+        fake_openai.malformed_cards = {"Player 1"}
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path), cards_per_prompt=5)
+
+        results = await service.generate_packed(make_cards(3))
+
+        assert len(fake_openai.completion_calls) == 2
+        assert all(result.status == "ok" for result in results)
+        assert results[1].listing.keywords == ["Player 1", "rookie"]
+
+    @pytest.mark.asyncio
+    async def test_repeated_cards_share_variants(self, fake_openai, tmp_path):
+        """Test copies of one card are generated once per cache variant"""
+        generator = ListingGenerator(cache=ListingCache(max_entries=10, ttl_seconds=60, variants=2))
+        service = BulkListingService(generator=generator, jobs_dir=str(tmp_path), cards_per_prompt=5)
+        cards = [ListingRequest(player="Base Card", set_name="2023 Topps") for _ in range(10)]
+
+        results = await service.generate_packed(cards)
+
+        assert len(fake_openai.completion_calls) == 1
+        prompt = fake_openai.completion_calls[0]["messages"][1]["content"]
+        assert prompt.count("Player: Base Card") == 2
+        assert all(result.status == "ok" for result in results)
+
+        # A second set is served entirely from the cache
+        await service.generate_packed(cards[:3])
+        assert len(fake_openai.completion_calls) == 1
+
+    def test_choose_mode(self, tmp_path):
+        """Test auto mode switches to batch above the inline limit"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path), sync_max_cards=25)
+
+        assert service.choose_mode(25) == "packed"
+        assert service.choose_mode(26) == "batch"
+        assert service.choose_mode(3, "batch") == "batch"
+
+    @pytest.mark.asyncio
+    async def test_packed_mode_is_capped_and_mode_validated(self, fake_openai, tmp_path):
+        """Test oversized packed requests are rejected and unknown modes fail validation"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path), sync_max_cards=5)
+
+        with pytest.raises(ValueError, match="at most 5 cards"):
+            await service.create_job(BulkListingRequest(cards=make_cards(6), mode="packed"))
+        with pytest.raises(ValidationError):
+            BulkListingRequest(cards=make_cards(1), mode="bacth")
+        assert fake_openai.completion_calls == []
+
+    @pytest.mark.asyncio
+    async def test_batch_job_lifecycle(self, fake_openai, tmp_path):
+        """Test batch submission, polling and per-card write-back"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path))
+        cards = make_cards(3)
+
+        job = await service.create_job(BulkListingRequest(cards=cards, mode="batch"))
+
+        assert job.status == "validating"
+        lines = [json.loads(line) for line in fake_openai.uploads[f"bulk_listing_{job.job_id}.jsonl"].splitlines()]
+        assert [line["custom_id"] for line in lines] == [f"{job.job_id}-{i}" for i in range(3)]
+        assert lines[0]["url"] == "/v1/chat/completions"
+        assert fake_openai.batch_request["completion_window"] == "24h"
+
+        fake_openai.batch.status = "in_progress"
+        assert (await service.get_job(job.job_id)).status == "in_progress"
+
+        fake_openai.batch.status = "completed"
+        fake_openai.batch.output_file_id = "file-output"
+        fake_openai.files_content["file-output"] = "\n".join([
+            json.dumps({
+                "custom_id": f"{job.job_id}-0",
+                "response": {"status_code": 200, "body": {"choices": [
+                    {"message": {"content": json.dumps(listing_json("Player 0"))}}
+                ]}},
+                "error": None,
+            }),
+            json.dumps({
+                "custom_id": f"{job.job_id}-1",
+                "response": {"status_code": 429, "body": {"error": {"message": "Rate limited"}}},
+                "error": None,
+            }),
+        ])
+
+        job = await service.get_job(job.job_id)
+
+        assert job.status == "completed"
+        assert job.results[0].status == "ok"
+        assert job.results[0].listing.title == "Player 0 Rookie PSA 10"
+        assert job.results[1].error == "Rate limited"
+        assert job.results[2].status == "error"  # no line in the output file
+        # Completed jobs are served from the state file
+        fake_openai.batch.status = "expired"
+        assert (await service.get_job(job.job_id)).status == "completed"
+
+    @pytest.mark.asyncio
+    async def test_malformed_batch_records_fail_only_their_card(self, fake_openai, tmp_path):
+        """Test invalid answers and unreadable lines never stop the job from completing"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path))
+        job = await service.create_job(BulkListingRequest(cards=make_cards(4), mode="batch"))
+
+        def output(index, answer):
+            return json.dumps({
+                "custom_id": f"{job.job_id}-{index}",
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": json.dumps(answer)}}]}},
+                "error": None,
+            })
+
+        fake_openai.batch.status = "completed"
+        fake_openai.batch.output_file_id = "file-output"
+        fake_openai.files_content["file-output"] = "\n".join([
+            output(0, listing_json("Player 0")),
+            output(1, {**listing_json("Player 1"), "keywords": [{"bad": 1}]}),
+            output(2, {**listing_json("Player 2"), "title": 42}),
+            json.dumps({"custom_id": f"{job.job_id}-x", "response": {}}),
+            "{not json",
+            output(3, listing_json("Player 3")),
+        ])
+
+        job = await service.get_job(job.job_id)
+
+        assert job.status == "completed"
+        assert [r.status for r in job.results] == ["ok", "error", "error", "ok"]
+        assert job.results[1].error.startswith("AI returned invalid format")
+        assert (await service.get_job(job.job_id)).summary() == {"ok": 2, "error": 2, "pending": 0}
+
+    @pytest.mark.asyncio
+    async def test_template_cards_skip_batch(self, fake_openai, tmp_path):
+        """Test template-mode cards are rendered inline and left out of the batch"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path))
+        cards = make_cards(3)
+        cards[1] = cards[1].model_copy(update={"mode": "template"})
+
+        job = await service.create_job(BulkListingRequest(cards=cards, mode="batch"))
+
+        upload = fake_openai.uploads[f"bulk_listing_{job.job_id}.jsonl"].splitlines()
+        assert [json.loads(line)["custom_id"] for line in upload] == [f"{job.job_id}-0", f"{job.job_id}-2"]
+        assert job.results[1].status == "ok"
+
+        all_template = [card.model_copy(update={"mode": "template"}) for card in cards]
+        job = await service.create_job(BulkListingRequest(cards=all_template, mode="batch"))
+        assert job.status == "completed"
+        assert job.batch_id is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, tmp_path):
+        """Test unknown or malformed job ids return None"""
+        service = BulkListingService(generator=ListingGenerator(), jobs_dir=str(tmp_path))
+
+        assert await service.get_job("0" * 32) is None
+        assert await service.get_job("../etc/passwd") is None
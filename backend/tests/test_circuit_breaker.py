@@ -0,0 +1,183 @@
+"""
+Tests for Circuit Breaker and provider failover
+
+Run with: pytest tests/test_circuit_breaker.py
+"""
+
+import asyncio
+import pytest
+from services.circuit_breaker import CircuitBreaker
+from services.market_data import (
+    MarketDataService,
+    MarketDataProvider,
+    ProviderError,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingProvider(MarketDataProvider):
+    """Provider that always fails, counting how often it is called"""
+
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_comps(self, player, set_name, year=None, grade=None, limit=50):
+        self.calls += 1
+        raise ProviderError("provider down")
+
+    async def get_snapshot(self, player, set_name, year=None, grade=None):
+        await self.fetch_comps(player, set_name, year, grade)
+
+
+class HangingProvider(MarketDataProvider):
+    """Provider whose calls never finish (until cancelled)"""
+
+    name = "hanging"
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def fetch_comps(self, player, set_name, year=None, grade=None, limit=50):
+        self.started.set()
+        await asyncio.Event().wait()
+
+    async def get_snapshot(self, player, set_name, year=None, grade=None):
+        await self.fetch_comps(player, set_name, year, grade)
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "test",
+            failure_rate_threshold=0.5,
+            slow_call_seconds=2.0,
+            window_size=10,
+            minimum_calls=4,
+            open_seconds=30.0,
+            clock=self.clock,
+        )
+
+    def test_opens_after_error_rate_exceeded(self):
+        """Test breaker trips once enough calls fail"""
+        for _ in range(3):
+            assert self.breaker.allow_request()
+            self.breaker.record_failure(0.1)
+        assert self.breaker.state == CircuitBreaker.CLOSED  # below minimum_calls
+
+        self.breaker.record_failure(0.1)
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert not self.breaker.allow_request()
+        assert self.breaker.stats()["short_circuited"] == 1
+        assert self.breaker.health_score() == 0.0
+
+    def test_slow_calls_count_as_bad(self):
+        """Test latency above threshold trips the breaker without errors"""
+        for _ in range(4):
+            self.breaker.record_success(5.0)
+
+        assert self.breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_recovery(self):
+        """Test a successful trial call closes the breaker"""
+        for _ in range(4):
+            self.breaker.record_failure(0.1)
+
+        self.clock.now += 31
+        assert self.breaker.allow_request()
+        assert self.breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one trial request at a time
+        assert not self.breaker.allow_request()
+
+        self.breaker.record_success(0.1)
+        assert self.breaker.state == CircuitBreaker.CLOSED
+        assert self.breaker.health_score() == 1.0
+
+    def test_half_open_failure_reopens(self):
+        """Test a failed trial call reopens the breaker"""
+        for _ in range(4):
+            self.breaker.record_failure(0.1)
+
+        self.clock.now += 31
+        assert self.breaker.allow_request()
+        self.breaker.record_failure(0.1)
+
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert self.breaker.times_opened == 2
+
+    def test_release_frees_trial_slot(self):
+        """Test an abandoned trial call gives its slot back without an outcome"""
+        for _ in range(4):
+            self.breaker.record_failure(0.1)
+
+        self.clock.now += 31
+        assert self.breaker.allow_request()
+        self.breaker.release()
+
+        assert self.breaker.state == CircuitBreaker.HALF_OPEN
+        assert self.breaker.allow_request()
+
+    def test_stats(self):
+        """Test rolling latency stats"""
+        self.breaker.record_success(0.1)
+        self.breaker.record_success(0.3)
+
+        stats = self.breaker.stats()
+        assert stats["state"] == "closed"
+        assert stats["window_calls"] == 2
+        assert stats["latency_ms"]["avg"] == 200.0
+        assert stats["error_rate"] == 0.0
+
+
+class TestServiceFailover:
+    """Test MarketDataService skips providers with open breakers"""
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_skips_provider(self):
+        """Test failing provider is skipped once its breaker opens"""
+        service = MarketDataService()
+        failing = FailingProvider()
+        service.providers.insert(0, failing)
+        service.breakers[failing.name] = CircuitBreaker("failing", minimum_calls=2)
+
+        for i in range(5):
+            snapshot = await service.get_market_data(f"Player {i}", "2011 Topps Update")
+            assert snapshot.source == "simulated"
+
+        assert failing.calls == 2
+        health = service.get_provider_health()
+        assert health["failing"]["state"] == "open"
+        assert health["simulated"]["state"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_trial_call_releases_breaker(self):
+        """Test cancelling a half-open trial call does not leave the provider short-circuited"""
+        service = MarketDataService()
+        hanging = HangingProvider()
+        service.providers.insert(0, hanging)
+        breaker = CircuitBreaker("hanging", minimum_calls=1, open_seconds=0.0)
+        service.breakers[hanging.name] = breaker
+        breaker.record_failure(0.1)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        task = asyncio.create_task(service.get_market_data("Mike Trout", "2011 Topps Update"))
+        await hanging.started.wait()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert breaker.allow_request()
@@ -0,0 +1,129 @@
+"""
+Tests for Columnar Card Identification Evaluator
+
+Run with: pytest tests/test_columnar_evaluator.py
+"""
+
+import numpy as np
+import pytest
+from ml.columnar_evaluator import (
+    ColumnarEvaluator,
+    bootstrap_delta,
+    normalize_card_number,
+    normalize_grade,
+    normalize_set_name,
+    normalize_year,
+)
+from ml.model_evaluator import ModelEvaluator
+from ml.record_sink import RecordSink
+
+
+class TestNormalizers:
+    """Test per-field normalization"""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("1986-87", "1986"), ("1986/87", "1986"), (1986, "1986"), ("'86", "86"), (None, ""),
+    ])
+    def test_year(self, value, expected):
+        """Test season ranges reduce to the start year"""
+        assert normalize_year(value) == expected
+
+    @pytest.mark.parametrize("value, expected", [
+        ("BGS 9.5", "9.5"), ("9.50", "9.5"), (10, "10"), ("10.0", "10"), ("Gem Mint", "10"),
+    ])
+    def test_grade(self, value, expected):
+        """Test grade formats reduce to the number"""
+        assert normalize_grade(value) == expected
+
+    def test_set_name_aliases(self):
+        """Test years, noise words and aliases are dropped from set names"""
+        assert normalize_set_name("2011 Topps Update Series") == normalize_set_name("Topps Update")
+        assert normalize_set_name("UD Exquisite") == "upper deck exquisite"
+
+    def test_card_number(self):
+        """Test hashes and leading zeros are ignored"""
+        assert normalize_card_number("#057") == normalize_card_number("57") == "57"
+        assert normalize_card_number("US-175") == "us175"
+
+
+class TestColumnarEvaluator:
+    """Test vectorized exact and fuzzy scoring"""
+
+    def test_normalized_and_fuzzy_matches(self):
+        """Test normalized equality and fuzzy credit for near misses"""
+        evaluator = ColumnarEvaluator(fields=("player", "year", "grade"))
+        predictions = [
+            {"player": "Michael Jordan", "year": "1986", "grade": "BGS 9.5"},
+            {"player": "Ken Griffey Jr.", "year": "1989", "grade": "10"},
+            {"player": "Lebron Jmes", "year": "2003", "grade": "9"},
+        ]
+        truth = [
+            {"player": "Michael Jordan", "year": "1986-87", "grade": "9.5"},
+            {"player": "Ken Griffey", "year": "1989", "grade": "10"},
+            {"player": "LeBron James", "year": "2003", "grade": "9"},
+        ]
+
+        metrics = evaluator.metrics(predictions, truth)
+
+        assert metrics["exact_match_accuracy"] == pytest.approx(2 / 3)
+        assert metrics["field_accuracy"]["year"] == 1.0
+        assert metrics["fuzzy_match_accuracy"] == 1.0
+        assert 0.85 <= metrics["mean_field_similarity"]["player"] < 1.0
+
+    def test_similarity_computed_per_distinct_pair(self):
+        """Test repeated mismatches share one similarity value"""
+        evaluator = ColumnarEvaluator(fields=("brand",))
+        predictions = [{"brand": "Topps"}, {"brand": "Fleer"}] * 5000
+        truth = [{"brand": "Tops"}, {"brand": "Fleer"}] * 5000
+
+        scores = evaluator.score(predictions, truth)
+
+        assert scores["exact"][:, 0].sum() == 5000
+        assert np.unique(scores["similarity"][::2, 0]).size == 1
+
+    def test_length_mismatch(self):
+        """Test predictions and ground truth must align"""
+        with pytest.raises(ValueError):
+            ColumnarEvaluator().score([{}], [])
+
+
+class TestBootstrap:
+    """Test bootstrap intervals and their use in A/B recommendations"""
+
+    def test_clear_improvement_excludes_zero(self):
+        """Test a large paired improvement gives an interval above zero"""
+        a = np.array([1] * 50 + [0] * 50)
+        b = np.array([1] * 90 + [0] * 10)
+
+        interval = bootstrap_delta(a, b)
+
+        assert interval["delta"] == pytest.approx(0.4)
+        assert 0 < interval["ci_low"] < 0.4 < interval["ci_high"]
+        assert interval["prob_improvement"] == 1.0
+
+    def test_small_sample_is_inconclusive(self):
+        """Test a one-sample difference does not exclude zero"""
+        interval = bootstrap_delta(np.array([1, 0, 1, 0, 1]), np.array([1, 1, 1, 0, 1]))
+
+        assert interval["ci_low"] <= 0 <= interval["ci_high"]
+
+    def test_deterministic_with_seed(self):
+        """Test reports are reproducible"""
+        a, b = np.random.default_rng(1).integers(0, 2, (2, 200))
+
+        assert bootstrap_delta(a, b) == bootstrap_delta(a, b)
+
+    def test_ab_test_recommendation_uses_interval(self, tmp_path):
+        """Test tiny A/B sets are reported as not significant"""
+        evaluator = ModelEvaluator(results_dir=str(tmp_path), sink=RecordSink())
+        truth = [{"player": "Mike Trout"}, {"player": "Aaron Judge"}]
+        base = [{"player": "Mike Trout"}, {"player": "Judge"}]
+        tuned = [{"player": "Mike Trout"}, {"player": "Aaron Judge"}]
+
+        small = evaluator.ab_test(base, tuned, truth)
+        large = evaluator.ab_test(base * 100, tuned * 100, truth * 100)
+
+        assert small["improvement"]["exact_match"] == pytest.approx(0.5)
+        assert "No statistically significant difference" in small["recommendation"]
+        assert large["confidence_intervals"]["exact_match"]["ci_low"] > 0
+        assert large["recommendation"].startswith("✅")
@@ -0,0 +1,82 @@
+"""
+Tests for CompBatch columnar comp storage
+
+Run with: pytest tests/test_comp_batch.py
+"""
+
+from datetime import datetime, timezone
+from services.comp_batch import CompBatch
+from services.market_data import CompData, comps_from_batch
+
+
+class TestCompBatch:
+    """Test the columnar comp batch"""
+
+    def test_append_and_records(self):
+        """Test rows round-trip through the parallel arrays"""
+        batch = CompBatch(utc=True)
+        sold = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        batch.append("Trout PSA 10", 250.0, sold.timestamp(), condition="Graded",
+                     grade="PSA 10", url="https://ebay.com/1", source="ebay")
+        batch.append("Trout PSA 9", 140.0, sold.timestamp(), grade="PSA 9", source="ebay")
+
+        assert len(batch) == 2
+        assert batch.title(0) == "Trout PSA 10"
+        assert batch.title(1) == "Trout PSA 9"
+
+        record = batch.record(0)
+        assert record["price"] == 250.0
+        assert record["sold_date"] == sold
+        assert record["grade"] == "PSA 10"
+        assert record["condition"] == "Graded"
+        assert record["url"] == "https://ebay.com/1"
+        assert batch.record(1)["condition"] is None
+
+        # Repeated strings are interned once
+        assert batch.sources.values == [None, "ebay"]
+
+    def test_many_distinct_sources(self):
+        """Test source codes do not overflow past 255 distinct sources"""
+        batch = CompBatch()
+        for i in range(300):
+            batch.append(f"Comp {i}", 10.0, 1.7e9, source=f"source-{i}")
+
+        assert batch.record(299)["source"] == "source-299"
+        assert len(batch.sources.values) == 301
+
+    def test_extend_uniform_shares_title(self):
+        """Test bulk-added comps share one stored title"""
+        batch = CompBatch()
+        batch.extend_uniform("Ohtani Chrome", [10.0, 20.0, 30.0], [0.0, 1.0, 2.0],
+                             grade="PSA 9", source="simulated")
+        batch.append("Other", 5.0, 3.0)
+
+        assert len(batch) == 4
+        assert [batch.title(i) for i in range(4)] == ["Ohtani Chrome"] * 3 + ["Other"]
+        assert len(set(batch.title_offsets[:3])) == 1
+
+    def test_price_stats(self):
+        """Test percentile pricing ignores non-positive prices"""
+        batch = CompBatch()
+        batch.extend_uniform("Card", [0.0] + [float(p) for p in range(1, 11)], [0.0] * 11)
+
+        floor, average, ceiling, count = batch.price_stats()
+        assert count == 10
+        assert floor == 2.0
+        assert average == 5.5
+        assert ceiling == 10.0
+        assert CompBatch().price_stats() is None
+
+    def test_comp_round_trip(self):
+        """Test conversion from and to CompData at the API boundary"""
+        comps = [
+            CompData(title=f"Card {i}", price=float(i), sold_date=datetime(2024, 1, i + 1),
+                     source="simulated")
+            for i in range(5)
+        ]
+
+        batch = CompBatch.from_comps(comps)
+        restored = comps_from_batch(batch, limit=3)
+
+        assert len(restored) == 3
+        assert restored == comps[:3]
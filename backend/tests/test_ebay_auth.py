@@ -0,0 +1,73 @@
+"""
+Tests for eBay OAuth Token Manager
+
+Run with: pytest tests/test_ebay_auth.py
+"""
+
+import asyncio
+import pytest
+from services.ebay_auth import EbayTokenManager
+
+
+def make_manager(cache_file=None, expires_in=7200, refresh_margin=300.0):
+    """Token manager whose token endpoint is replaced by a counting stub"""
+    manager = EbayTokenManager(
+        app_id="app",
+        cert_id="cert",
+        auth_url="http://localhost/token",
+        refresh_margin=refresh_margin,
+        min_validity=0.0,
+        cache_file=cache_file,
+    )
+    manager.requests = 0
+
+    async def fake_request_token():
+        manager.requests += 1
+        await asyncio.sleep(0.01)
+        return {"access_token": f"token-{manager.requests}", "expires_in": expires_in}
+
+    manager._request_token = fake_request_token
+    return manager
+
+
+class TestEbayTokenManager:
+    """Test token refresh coordination"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_refresh(self):
+        """Test concurrent callers trigger a single token request"""
+        manager = make_manager()
+
+        tokens = await asyncio.gather(*(manager.get_token() for _ in range(25)))
+
+        assert manager.requests == 1
+        assert set(tokens) == {"token-1"}
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_proactive_renewal(self):
+        """Test the token is renewed in the background before expiry"""
+        manager = make_manager(expires_in=0.2, refresh_margin=0.15)
+
+        assert await manager.get_token() == "token-1"
+        await asyncio.sleep(0.15)
+
+        assert manager.requests >= 2
+        assert await manager.get_token() != "token-1"
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_token_shared_across_workers(self, tmp_path):
+        """Test a second worker reuses the cached token instead of refreshing"""
+        cache_file = str(tmp_path / "token.json")
+        worker_a = make_manager(cache_file=cache_file)
+        worker_b = make_manager(cache_file=cache_file)
+
+        token_a = await worker_a.get_token()
+        token_b = await worker_b.get_token()
+
+        assert token_a == token_b
+        assert worker_a.requests == 1
+        assert worker_b.requests == 0
+        await worker_a.close()
+        await worker_b.close()
@@ -0,0 +1,94 @@
+"""
+Tests for EbayMarketProvider against the local eBay stub server
+
+Run with: pytest tests/test_ebay_provider.py
+"""
+
+import httpx
+import pytest
+from benchmarks.ebay_fixtures import make_finding_item
+from benchmarks.ebay_stub_server import FINDING_PATH, TOKEN_PATH, create_app
+from services.market_data import EbayMarketProvider, ProviderError
+
+
+def make_provider(monkeypatch, app) -> EbayMarketProvider:
+    monkeypatch.setenv("EBAY_APP_ID", "stub-app")
+    monkeypatch.setenv("EBAY_CERT_ID", "stub-cert")
+    monkeypatch.setenv("EBAY_TOKEN_CACHE_FILE", "")
+    monkeypatch.setenv("EBAY_FINDING_URL", f"http://ebay-stub{FINDING_PATH}")
+    monkeypatch.setenv("EBAY_AUTH_URL", f"http://ebay-stub{TOKEN_PATH}")
+
+    provider = EbayMarketProvider()
+    provider._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return provider
+
+
+class TestEbayProvider:
+    """Test the eBay provider end to end against the stub"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_from_stub(self, monkeypatch):
+        """Test a snapshot is priced from streamed stub items"""
+        app = create_app()
+        provider = make_provider(monkeypatch, app)
+
+        snapshot = await provider.get_snapshot("Mike Trout", "2011 Topps Update", 2011, "PSA 10")
+        await provider.close()
+
+        assert snapshot.source == "ebay"
+        assert snapshot.listings_count == 50
+        assert snapshot.confidence == "high"
+        assert 60 <= snapshot.floor <= snapshot.average <= snapshot.ceiling <= 400
+        assert all("Mike Trout" in comp.title for comp in snapshot.comps)
+        assert app.state.stats["finding_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_follows_pagination(self, monkeypatch):
+        """Test limits above one page are filled from following pages"""
+        app = create_app(total_entries=250)
+        provider = make_provider(monkeypatch, app)
+
+        batch = await provider.fetch_batch("Mike Trout", "2011 Topps Update", limit=150)
+        await provider.close()
+
+        assert len(batch) == 150
+        assert app.state.stats["finding_calls"] == 2
+        assert len({batch.record(i)["url"] for i in range(len(batch))}) == 150
+
+    @pytest.mark.asyncio
+    async def test_stops_at_last_page(self, monkeypatch):
+        """Test a short page ends pagination"""
+        app = create_app(total_entries=30)
+        provider = make_provider(monkeypatch, app)
+
+        batch = await provider.fetch_batch("Mike Trout", "2011 Topps Update", limit=200)
+        await provider.close()
+
+        assert len(batch) == 30
+        assert app.state.stats["finding_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_malformed_item_does_not_end_pagination(self, monkeypatch):
+        """Test a full page with an unparseable item still moves on to the next page"""
+        items = [make_finding_item(i) for i in range(250)]
+        items[3]["sellingStatus"] = [{"convertedCurrentPrice": [{"__value__": "not a price"}]}]
+        app = create_app(recorded_items=items)
+        provider = make_provider(monkeypatch, app)
+
+        batch = await provider.fetch_batch("Mike Trout", "2011 Topps Update", limit=150)
+        await provider.close()
+
+        assert len(batch) == 150
+        assert app.state.stats["finding_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stub_failure_raises(self, monkeypatch):
+        """Test injected server errors surface as ProviderError"""
+        app = create_app(failure_rate=1.0)
+        provider = make_provider(monkeypatch, app)
+
+        with pytest.raises(ProviderError):
+            await provider.fetch_batch("Mike Trout", "2011 Topps Update")
+        await provider.close()
+
+        assert app.state.stats["failures"] == 1
@@ -0,0 +1,95 @@
+"""
+Tests for the streaming findCompletedItems parser
+
+Run with: pytest tests/test_ebay_stream.py
+"""
+
+import json
+import pytest
+from benchmarks.ebay_fixtures import make_finding_item, make_finding_response
+from services.ebay_stream import FindingItemParser, iter_finding_items
+
+
+def make_body(count: int) -> bytes:
+    items = [make_finding_item(i) for i in range(count)]
+    return json.dumps(make_finding_response(items)).encode("utf-8")
+
+
+def chunked(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestFindingItemParser:
+    """Test incremental extraction of completed items"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 512, 1 << 20])
+    def test_matches_full_parse(self, chunk_size):
+        """Test any chunking yields the same records as a full json.loads"""
+        body = make_body(25)
+        expected = json.loads(body)["findCompletedItemsResponse"][0]["searchResult"][0]["item"]
+
+        parser = FindingItemParser()
+        records = []
+        for chunk in chunked(body, chunk_size):
+            records.extend(parser.feed(chunk))
+        records.extend(parser.close())
+
+        assert len(records) == 25
+        assert parser.done
+        for record, raw in zip(records, expected):
+            assert record.item_id == raw["itemId"][0]
+            assert record.title == raw["title"][0]
+            assert record.price == float(raw["sellingStatus"][0]["convertedCurrentPrice"][0]["__value__"])
+            assert record.url == raw["viewItemURL"][0]
+            assert record.condition == "Graded"
+            assert record.end_time is not None
+
+    def test_items_available_before_body_completes(self):
+        """Test completed items are returned before the rest of the body arrives"""
+        body = make_body(10)
+        parser = FindingItemParser()
+
+        records = parser.feed(body[: len(body) // 2])
+
+        assert 0 < len(records) < 10
+
+    def test_empty_search_result(self):
+        """Test responses without items yield nothing"""
+        body = json.dumps(make_finding_response([])).encode("utf-8")
+        parser = FindingItemParser()
+
+        assert parser.feed(body) == []
+        assert parser.close() == []
+
+    def test_multibyte_split(self):
+        """Test UTF-8 characters split across chunks decode correctly"""
+        item = make_finding_item(0)
+        item["title"] = ["Ronald Acuña Jr. 2018 Topps Chrome"]
+        body = json.dumps(make_finding_response([item]), ensure_ascii=False).encode("utf-8")
+
+        records = []
+        parser = FindingItemParser()
+        for chunk in chunked(body, 3):
+            records.extend(parser.feed(chunk))
+
+        assert records[0].title == "Ronald Acuña Jr. 2018 Topps Chrome"
+
+    def test_truncated_body_raises(self):
+        """Test a body cut off inside the item array is an error"""
+        body = make_body(3)
+        parser = FindingItemParser()
+        parser.feed(body[:-200])
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+    @pytest.mark.asyncio
+    async def test_iter_finding_items(self):
+        """Test the async iterator over a chunk stream"""
+        async def chunks():
+            for chunk in chunked(make_body(5), 64):
+                yield chunk
+
+        records = [record async for record in iter_finding_items(chunks())]
+
+        assert len(records) == 5
@@ -0,0 +1,160 @@
+"""
+Tests for Offline Evaluation Runner
+
+Run with: pytest tests/test_evaluation_runner.py
+"""
+
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from ml.evaluation_runner import EvaluationRunner, RateLimiter, inference_cost, load_eval_cases
+from ml.model_evaluator import ModelEvaluator
+from ml.record_sink import RecordSink
+
+TRUTH = [
+    {"player": "Mike Trout", "year": "2011"},
+    {"player": "Aaron Judge", "year": "2013"},
+    {"player": "Shohei Ohtani", "year": "2018"},
+]
+
+
+class FakeCompletions:
+    """Answers with the ground truth, except the base model gets years wrong"""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls.append(model)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        truth = dict(TRUTH[int(messages[-1]["content"])])
+        if not model.startswith("ft:"):
+            truth["year"] = "1999"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(truth)))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+def write_eval_file(path):
+    with open(path, "w") as f:
+        for i, truth in enumerate(TRUTH):
+            f.write(json.dumps({"messages": [
+                {"role": "system", "content": "Identify the card"},
+                {"role": "user", "content": str(i)},
+                {"role": "assistant", "content": json.dumps(truth)},
+            ]}) + "\n")
+
+
+@pytest.fixture
+def runner_parts(tmp_path):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    evaluator = ModelEvaluator(results_dir=str(tmp_path / "results"), sink=RecordSink())
+    write_eval_file(tmp_path / "eval.jsonl")
+    return completions, client, evaluator
+
+
+class TestEvaluationRunner:
+    """Test concurrent evaluation, caching and reporting"""
+
+    @pytest.mark.asyncio
+    async def test_reports_accuracy_latency_and_cost(self, tmp_path, runner_parts):
+        """Test per-model metrics and the A/B comparison"""
+        completions, client, evaluator = runner_parts
+        runner = EvaluationRunner(client=client, cache_dir=str(tmp_path / "cache"), max_concurrency=4,
+                                  requests_per_minute=6000, evaluator=evaluator)
+
+        report = await runner.run(load_eval_cases(str(tmp_path / "eval.jsonl")), ["gpt-4o-mini", "ft:gpt-4o-mini:org:x"])
+
+        base = report["models"]["gpt-4o-mini"]
+        tuned = report["models"]["ft:gpt-4o-mini:org:x"]
+        assert base["metrics"]["field_accuracy"]["year"] == 0
+        assert tuned["metrics"]["exact_match_accuracy"] == 1.0
+        assert tuned["prompt_tokens"] == 300 and tuned["completion_tokens"] == 60
+        assert tuned["estimated_cost_usd"] == pytest.approx(inference_cost("ft:gpt-4o-mini:org:x", 300, 60))
+        assert base["latency_ms"]["p50"] > 0
+        assert report["comparison"]["winner"] == "ft:gpt-4o-mini:org:x"
+        # Both models' requests run concurrently, within the limit
+        assert 1 < completions.max_in_flight <= 4
+
+    @pytest.mark.asyncio
+    async def test_replays_recorded_responses(self, tmp_path, runner_parts):
+        """Test a second run is served from the response cache"""
+        completions, client, evaluator = runner_parts
+        cases = load_eval_cases(str(tmp_path / "eval.jsonl"))
+        runner = EvaluationRunner(client=client, cache_dir=str(tmp_path / "cache"), requests_per_minute=6000,
+                                  evaluator=evaluator)
+
+        await runner.run(cases, ["ft:gpt-4o-mini:org:x"])
+        replay = await EvaluationRunner(client=None, cache_dir=str(tmp_path / "cache"), evaluator=evaluator).run(
+            cases, ["ft:gpt-4o-mini:org:x"], replay_only=True
+        )
+
+        assert len(completions.calls) == 3
+        model = replay["models"]["ft:gpt-4o-mini:org:x"]
+        assert model["cache_hits"] == 3
+        assert model["metrics"]["exact_match_accuracy"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_replay_only_marks_missing_answers(self, tmp_path, runner_parts):
+        """Test unrecorded answers are counted apart from model errors instead of calling the API"""
+        _, _, evaluator = runner_parts
+        runner = EvaluationRunner(client=None, cache_dir=str(tmp_path / "cache"), evaluator=evaluator)
+
+        report = await runner.run(load_eval_cases(str(tmp_path / "eval.jsonl")), ["gpt-4o-mini"], replay_only=True)
+
+        assert report["models"]["gpt-4o-mini"]["not_recorded"] == 3
+        assert report["models"]["gpt-4o-mini"]["errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_non_object_answers_are_errors(self, tmp_path, runner_parts):
+        """Test JSON answers that are not objects count as errors without aborting the run"""
+        completions, client, evaluator = runner_parts
+        answers = iter([json.dumps(["Mike Trout", "2011"]), json.dumps("Aaron Judge"), json.dumps(TRUTH[2])])
+
+        async def create(model, messages, **kwargs):
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=next(answers)))],
+                usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+            )
+
+        completions.create = create
+        runner = EvaluationRunner(client=client, cache_dir=str(tmp_path / "cache"), max_concurrency=1,
+                                  requests_per_minute=6000, evaluator=evaluator)
+
+        report = await runner.run(load_eval_cases(str(tmp_path / "eval.jsonl")), ["ft:gpt-4o-mini:org:x"])
+
+        model = report["models"]["ft:gpt-4o-mini:org:x"]
+        assert model["errors"] == 2
+        assert model["not_recorded"] == 0
+        assert model["metrics"]["exact_match_accuracy"] == pytest.approx(1 / 3)
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spaces_requests(self):
+        """Test the token bucket waits once the burst is spent"""
+        now = [0.0]
+        waits = []
+
+        async def fake_sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(120, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(4):
+            await limiter.acquire()
+
+        # 2 requests/second: a burst of 2, then 0.5s apart
+        assert waits == [pytest.approx(0.5), pytest.approx(0.5)]
+
+    def test_inference_cost(self):
+        """Test fine-tuned models use their own pricing"""
+        assert inference_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == pytest.approx(0.15)
+        assert inference_cost("ft:gpt-4o-mini-2024-07-18:org:x", 1_000_000, 0) == pytest.approx(0.30)
+        assert inference_cost("unknown-model", 1000, 1000) == 0.0
@@ -0,0 +1,105 @@
+"""
+Tests for Streaming Fine-Tuning Export
+
+Run with: pytest tests/test_finetuning_export.py
+"""
+
+import gzip
+import json
+import pytest
+from ml.finetuning_export import estimate_tokens, export_samples, message_hash, validation_path
+from ml.training_data_collector import TrainingDataCollector
+
+
+def sample(player: str, answer: str = None) -> dict:
+    return {
+        "messages": [
+            {"role": "user", "content": f"OCR Text:\n{player}"},
+            {"role": "assistant", "content": json.dumps({"player": answer or player})},
+        ],
+        "metadata": {"confidence_score": 1.0},
+    }
+
+
+def read_jsonl(path, compressed=False):
+    opener = gzip.open if compressed else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestFineTuningExport:
+    """Test dedupe, split, compression and token counts"""
+
+    def test_dedupes_by_message_content(self, tmp_path):
+        """Test repeated conversations are exported once"""
+        samples = [sample("Mike Trout"), sample("Mike Trout"), sample("Aaron Judge"), sample("Mike Trout")]
+
+        result = export_samples(iter(samples), tmp_path / "export.jsonl")
+
+        assert result["train"]["sample_count"] == 2
+        assert result["duplicates_skipped"] == 2
+        assert result["validation"] is None
+        lines = read_jsonl(tmp_path / "export.jsonl")
+        assert all(set(line) == {"messages"} for line in lines)
+
+    def test_dedupe_can_be_disabled(self, tmp_path):
+        """Test dedupe=False keeps every sample"""
+        result = export_samples([sample("Mike Trout")] * 3, tmp_path / "export.jsonl", dedupe=False)
+
+        assert result["train"]["sample_count"] == 3
+
+    def test_split_is_deterministic(self, tmp_path):
+        """Test a sample stays in the same split as the corpus grows"""
+        corpus = [sample(f"Player {i}") for i in range(400)]
+
+        first = export_samples(corpus[:200], tmp_path / "a.jsonl", validation_split=0.2)
+        second = export_samples(corpus, tmp_path / "b.jsonl", validation_split=0.2)
+
+        first_validation = read_jsonl(first["validation"]["file_path"])
+        second_validation = read_jsonl(second["validation"]["file_path"])
+        assert 20 <= len(first_validation) <= 60
+        assert first_validation == second_validation[:len(first_validation)]
+        assert first["train"]["sample_count"] + len(first_validation) == 200
+        assert second["validation"]["file_path"].endswith("b_validation.jsonl")
+
+    def test_gzip_output(self, tmp_path):
+        """Test compressed exports and their token counts"""
+        samples = [sample(f"Player {i}") for i in range(50)]
+
+        result = export_samples(samples, tmp_path / "export.jsonl", validation_split=0.5, compress=True)
+
+        assert result["train"]["file_path"].endswith("export.jsonl.gz")
+        assert result["validation"]["file_path"].endswith("export_validation.jsonl.gz")
+        train = read_jsonl(result["train"]["file_path"], compressed=True)
+        assert len(train) == result["train"]["sample_count"]
+        assert result["train"]["tokens"] == sum(estimate_tokens(line["messages"]) for line in train)
+
+    def test_invalid_split(self, tmp_path):
+        """Test validation_split must be below 1"""
+        with pytest.raises(ValueError):
+            export_samples([], tmp_path / "export.jsonl", validation_split=1.0)
+
+    def test_message_hash_ignores_key_order(self):
+        """Test equivalent messages hash the same"""
+        a = [{"role": "user", "content": "x"}]
+        b = [{"content": "x", "role": "user"}]
+
+        assert message_hash(a) == message_hash(b)
+        assert message_hash(a) != message_hash([{"role": "user", "content": "y"}])
+
+    def test_validation_path(self, tmp_path):
+        """Test validation file naming"""
+        assert validation_path(tmp_path / "x.jsonl").name == "x_validation.jsonl"
+        assert validation_path(tmp_path / "x.jsonl.gz").name == "x_validation.jsonl.gz"
+
+    def test_collector_export(self, tmp_path):
+        """Test the collector exports from the store with dedupe and split"""
+        collector = TrainingDataCollector(data_dir=str(tmp_path))
+        for i in range(30):
+            collector.collect_card_identification_sample(f"OCR {i % 10}", None, {"player": f"P{i % 10}"})
+
+        export = collector.export_dataset("card_identification", validation_split=0.3)
+
+        assert export["duplicates_skipped"] == 20
+        assert export["sample_count"] + (export["validation"] or {}).get("sample_count", 0) == 10
+        assert export["tokens"] > 0
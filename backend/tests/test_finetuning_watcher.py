@@ -0,0 +1,188 @@
+"""
+Tests for Fine-Tuning Job Watcher
+
+Run with: pytest tests/test_finetuning_watcher.py
+"""
+
+import pytest
+from ml.finetuning_watcher import FineTuningWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeManager:
+    """FineTuningManager stand-in with scripted job state"""
+
+    def __init__(self):
+        self.jobs = {
+            "ftjob-1": {"job_id": "ftjob-1", "status": "running", "model": "gpt-4o-mini", "created_at": 2},
+            "ftjob-0": {"job_id": "ftjob-0", "status": "succeeded", "model": "gpt-4o-mini", "created_at": 1},
+        }
+        self.events = {"ftjob-1": []}
+        self.calls = []
+
+    def list_jobs(self, limit=10):
+        self.calls.append("list_jobs")
+        return [dict(job) for job in self.jobs.values()]
+
+    def get_job_status(self, job_id):
+        self.calls.append(("get_job_status", job_id))
+        return dict(self.jobs[job_id])
+
+    def get_job_events(self, job_id, limit=10):
+        self.calls.append(("get_job_events", job_id))
+        return list(reversed(self.events.get(job_id, [])))[:limit]
+
+
+def make_watcher(manager, clock):
+    return FineTuningWatcher(
+        lambda: manager, min_interval=10, max_interval=80, list_refresh_interval=600, clock=clock
+    )
+
+
+class TestPolling:
+    """Test adaptive polling and caching"""
+
+    @pytest.mark.asyncio
+    async def test_lists_once_and_serves_cache(self):
+        """Test the job list is fetched once and served from the cache"""
+        manager, clock = FakeManager(), FakeClock()
+        watcher = make_watcher(manager, clock)
+
+        await watcher.poll_once()
+
+        assert [job["job_id"] for job in watcher.jobs()] == ["ftjob-1", "ftjob-0"]
+        assert manager.calls.count("list_jobs") == 1
+        # Finished jobs are never polled
+        assert ("get_job_status", "ftjob-0") not in manager.calls
+
+    @pytest.mark.asyncio
+    async def test_backs_off_while_unchanged(self):
+        """Test a quiet job is polled at doubling intervals up to the maximum"""
+        manager, clock = FakeManager(), FakeClock()
+        watcher = make_watcher(manager, clock)
+
+        delays = []
+        for _ in range(5):
+            delays.append(await watcher.poll_once())
+            clock.now += delays[-1]
+
+        assert delays == [20, 40, 80, 80, 80]
+
+    @pytest.mark.asyncio
+    async def test_change_resets_interval_and_stops_when_done(self):
+        """Test new events reset the interval and a finished job is released"""
+        manager, clock = FakeManager(), FakeClock()
+        watcher = make_watcher(manager, clock)
+        await watcher.poll_once()
+        clock.now += 10
+        await watcher.poll_once()  # Nothing new: interval now 20
+
+        manager.events["ftjob-1"].append({"id": "ev-1", "created_at": 3, "level": "info", "message": "Step 1/100"})
+        clock.now += 20
+        assert await watcher.poll_once() == 10
+        assert [event["message"] for event in watcher.events("ftjob-1")] == ["Step 1/100"]
+
+        manager.jobs["ftjob-1"]["status"] = "succeeded"
+        manager.jobs["ftjob-1"]["fine_tuned_model"] = "ft:gpt-4o-mini:slabstak"
+        clock.now += 10
+        delay = await watcher.poll_once()
+
+        assert watcher.job("ftjob-1")["fine_tuned_model"] == "ft:gpt-4o-mini:slabstak"
+        # Only the next list refresh is left to do
+        assert delay == pytest.approx(600 - 40)
+        assert await watcher.wait_for_completion("ftjob-1", timeout=1) == watcher.job("ftjob-1")
+
+    @pytest.mark.asyncio
+    async def test_events_are_not_repeated(self):
+        """Test events already seen are not cached or published again"""
+        manager, clock = FakeManager(), FakeClock()
+        watcher = make_watcher(manager, clock)
+        manager.events["ftjob-1"] = [
+            {"id": "ev-1", "created_at": 3, "level": "info", "message": "Step 1/100"},
+            {"id": "ev-2", "created_at": 4, "level": "info", "message": "Step 2/100"},
+        ]
+
+        await watcher.poll_once()
+        clock.now += 10
+        await watcher.poll_once()
+
+        assert [event["id"] for event in watcher.events("ftjob-1")] == ["ev-1", "ev-2"]
+
+
+class TestSubscribers:
+    """Test pushing changes to subscribers"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_then_updates(self):
+        """Test a subscriber gets a snapshot, then job and event updates"""
+        manager, clock = FakeManager(), FakeClock()
+        watcher = make_watcher(manager, clock)
+        await watcher.poll_once()
+
+        stream = watcher.subscribe(heartbeat=1)
+        event, data = await stream.__anext__()
+        assert event == "snapshot"
+        assert len(data["jobs"]) == 2
+
+        watcher.track({"job_id": "ftjob-2", "status": "validating_files", "created_at": 3})
+        manager.jobs["ftjob-2"] = {"job_id": "ftjob-2", "status": "running", "created_at": 3}
+        manager.events["ftjob-2"] = [{"id": "ev-9", "created_at": 5, "level": "info", "message": "Started"}]
+        await watcher.poll_once()
+
+        received = [await stream.__anext__() for _ in range(3)]
+        assert received[0] == ("job", {"job_id": "ftjob-2", "status": "validating_files", "created_at": 3})
+        assert received[1][0] == "job" and received[1][1]["status"] == "running"
+        assert received[2] == ("job_event", {"job_id": "ftjob-2", "id": "ev-9", "created_at": 5,
+                                             "level": "info", "message": "Started"})
+
+        assert await stream.__anext__() == ("heartbeat", {})
+        await stream.aclose()
+        assert watcher.stats()["subscribers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_background_task_polls_tracked_job(self):
+        """Test the running watcher picks up a tracked job without waiting for its interval"""
+        manager = FakeManager()
+        manager.jobs = {}
+        watcher = FineTuningWatcher(lambda: manager, min_interval=0.01, max_interval=0.05)
+        await watcher.start()
+        await watcher.wait_loaded(timeout=1)
+
+        manager.jobs["ftjob-3"] = {"job_id": "ftjob-3", "status": "succeeded", "created_at": 4}
+        watcher.track({"job_id": "ftjob-3", "status": "queued", "created_at": 4})
+        job = await watcher.wait_for_completion("ftjob-3", timeout=1)
+
+        assert job["status"] == "succeeded"
+        await watcher.stop()
+        assert not watcher.running
+
+    @pytest.mark.asyncio
+    async def test_failed_first_list_is_retried_soon(self):
+        """Test a failing first list call is retried after min_interval, not max_interval"""
+        manager, clock = FakeManager(), FakeClock()
+        list_jobs = manager.list_jobs
+
+        def unavailable(limit=10):
+            raise RuntimeError("503 Service Unavailable")
+
+        manager.list_jobs = unavailable
+        watcher = make_watcher(manager, clock)
+
+        assert await watcher.poll_once() == 10
+        assert await watcher.wait_loaded(timeout=1) is False
+        assert watcher.last_error == "503 Service Unavailable"
+
+        manager.list_jobs = list_jobs
+        clock.now += 10
+        await watcher.poll_once()
+
+        assert await watcher.wait_loaded(timeout=1) is True
+        assert watcher.last_error is None
+        assert len(watcher.jobs()) == 2
@@ -0,0 +1,190 @@
+"""
+Tests for Comp Keyword Index
+
+Run with: pytest tests/test_keyword_index.py
+"""
+
+import json
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from services import listing_generator as listing_module
+from services.keyword_index import CompKeywordIndex, tokenize_title
+from services.listing_cache import ListingCache
+from services.listing_generator import ListingGenerator, ListingRequest
+from services.circuit_breaker import CircuitBreaker
+from services.comp_batch import CompBatch
+from services.market_data import CompData, MarketDataService, MarketSnapshot, comps_from_batch
+
+SOLD_TITLES = [
+    "2011 Topps Update Mike Trout RC #US175 PSA 10 Rookie Angels",
+    "Mike Trout 2011 Topps Update Rookie RC US175 PSA 10 Gem Mint",
+    "2011 Topps Update #US175 Mike Trout Rookie Card PSA 10 Angels HOF",
+    "PSA 10 Mike Trout 2011 Topps Update RC US175 Angels",
+]
+
+
+def make_index(**kwargs) -> CompKeywordIndex:
+    index = CompKeywordIndex(max_scopes=100, **kwargs)
+    for i, title in enumerate(SOLD_TITLES):
+        index.add_title("Mike Trout", "2011 Topps Update", "PSA 10", title, fingerprint=f"comp-{i}")
+    return index
+
+
+class TestCompKeywordIndex:
+    """Test term ranking over sold-comp titles"""
+
+    def test_tokenize_title(self):
+        """Test stopwords and single characters are dropped"""
+        assert tokenize_title("L@@K Mike Trout RC #US175 - Free Shipping") == [
+            ("mike", "Mike"), ("trout", "Trout"), ("rc", "RC"), ("us175", "US175"),
+        ]
+
+    def test_top_keywords_skip_query_terms(self):
+        """Test ranked terms exclude the card's own player, set and grade words"""
+        keywords = make_index().top_keywords("Mike Trout", "2011 Topps Update", "PSA 10", 2011)
+
+        # US175 is in every title; ties are ordered alphabetically
+        assert keywords == ["US175", "Angels", "RC", "RC US175", "Rookie"]
+        assert not any("trout" in term.lower() or "psa" in term.lower() for term in keywords)
+        # Terms seen in a single title are noise
+        assert "HOF" not in keywords
+
+    def test_duplicate_comps_counted_once(self):
+        """Test refetched comps do not inflate counts"""
+        index = make_index()
+        before = index.top_keywords("Mike Trout", "2011 Topps Update", "PSA 10")
+
+        assert index.add_title("Mike Trout", "2011 Topps Update", "PSA 10", "Mike Trout HOF", fingerprint="comp-0") is False
+        assert index.top_keywords("Mike Trout", "2011 Topps Update", "PSA 10") == before
+        assert index.stats()["comps_indexed"] == len(SOLD_TITLES)
+
+    def test_comp_counted_once_per_scope_across_grades(self):
+        """Test a comp fetched with and without a grade is counted once in the shared scopes"""
+        index = make_index()
+        player_set = index._scopes[("player_set", "mike trout", "2011 topps update")]
+
+        for i, title in enumerate(SOLD_TITLES):
+            assert index.add_title("Mike Trout", "2011 Topps Update", None, title, fingerprint=f"comp-{i}") is False
+        assert index.add_title("Mike Trout", "2011 Topps Update", "PSA 9", SOLD_TITLES[0], fingerprint="comp-0")
+
+        assert player_set.titles == len(SOLD_TITLES)
+        assert index._scopes[("player", "mike trout")].titles == len(SOLD_TITLES)
+        assert index.top_keywords("Mike Trout", "2011 Topps Update", "PSA 9")
+
+    def test_display_forms_dropped_with_scopes(self):
+        """Test display forms are kept per scope and evicted with it"""
+        index = CompKeywordIndex(max_scopes=2)
+        for i in range(5):
+            index.add_title(f"Player {i}", None, None, f"Player {i} Rookie Refractor{i}")
+
+        assert index.stats()["scopes"] == 2
+        assert index.stats()["terms"] == sum(len(scope.display) for scope in index._scopes.values())
+        assert "refractor0" not in {term for scope in index._scopes.values() for term in scope.display}
+
+    def test_broader_scopes_back_off(self):
+        """Test another grade of the same card falls back to set and player terms"""
+        keywords = make_index().top_keywords("Mike Trout", "2011 Topps Update", "PSA 9")
+
+        assert "Rookie" in keywords
+
+    def test_rankings_refresh_after_updates(self):
+        """Test memoized rankings are invalidated when a scope changes"""
+        index = make_index()
+        assert "Refractor" not in index.top_keywords("Mike Trout", "2011 Topps Update", "PSA 10")
+
+        for i in range(6):
+            index.add_title("Mike Trout", "2011 Topps Update", "PSA 10", "Mike Trout Refractor", fingerprint=f"new-{i}")
+
+        assert index.top_keywords("Mike Trout", "2011 Topps Update", "PSA 10")[0] == "Refractor"
+
+    def test_related_terms(self):
+        """Test co-occurrence lookups"""
+        related = make_index().related_terms("angels", "Mike Trout", "2011 Topps Update", "PSA 10")
+
+        assert "Rookie" in related
+
+    def test_scopes_are_bounded(self):
+        """Test the least recently updated scopes are dropped"""
+        index = CompKeywordIndex(max_scopes=3)
+        for i in range(5):
+            index.add_title(f"Player {i}", None, None, f"Player {i} Rookie")
+
+        assert index.stats()["scopes"] == 3
+
+
+class TestIndexListingIntegration:
+    """Test listings use mined keywords"""
+
+    @pytest.mark.asyncio
+    async def test_service_indexes_every_fetched_comp(self):
+        """Test the market service indexes the whole fetched batch, not just the returned top comps"""
+        batch = CompBatch()
+        for i in range(50):
+            batch.append(title=f"Mike Trout Rookie Lot{i}", price=100.0 + i, sold_at=1.7e9, url=f"https://ebay.com/itm/{i}")
+        snapshot = MarketSnapshot(
+            source="ebay", floor=100.0, average=125.0, ceiling=149.0, listings_count=50,
+            comps=comps_from_batch(batch, limit=20), last_updated=datetime(2024, 1, 1),
+        )
+        snapshot._comp_batch = batch
+
+        async def get_snapshot(*args):
+            return snapshot
+
+        provider = SimpleNamespace(name="ebay", get_snapshot=get_snapshot)
+
+        service = MarketDataService()
+        service.providers = [provider]
+        service.breakers = {"ebay": CircuitBreaker("ebay")}
+        service.keyword_index = CompKeywordIndex(max_scopes=10)
+
+        await service.get_market_data("Mike Trout", "2011 Topps Update", provider="auto")
+
+        assert service.keyword_index.stats()["comps_indexed"] == 50
+        # Released once indexed; the cached snapshot keeps only its top comps
+        assert len(snapshot.fetched_comps()) == 20
+
+    def test_add_comps(self):
+        """Test CompData titles are indexed by URL"""
+        index = CompKeywordIndex(max_scopes=10)
+        comps = [
+            CompData(title=title, price=100.0, sold_date=datetime(2024, 1, 1), url=f"https://ebay.com/itm/{i}")
+            for i, title in enumerate(SOLD_TITLES)
+        ]
+
+        assert index.add_comps("Mike Trout", "2011 Topps Update", "PSA 10", comps) == 4
+        assert index.add_comps("Mike Trout", "2011 Topps Update", "PSA 10", comps) == 0
+
+    def test_template_listing_uses_index(self):
+        """Test template titles and keywords pick up mined terms"""
+        generator = ListingGenerator(keyword_index=make_index())
+        card = ListingRequest(player="Mike Trout", set_name="2011 Topps Update", year=2011, grade="PSA 10", mode="template")
+
+        listing = generator.render_template_listing(card)
+
+        assert listing.title == "2011 Topps Update Mike Trout PSA 10 Gem Mint US175 Angels RC"
+        assert "Rookie" in listing.keywords
+
+    @pytest.mark.asyncio
+    async def test_prompt_skips_keywords_when_index_is_rich(self, monkeypatch):
+        """Test the model is not asked for keywords once enough are mined"""
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            content = json.dumps({"title": "Mike Trout RC PSA 10", "description": "Gem"})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(listing_module, "get_openai_client", lambda: client)
+        monkeypatch.setattr(listing_module, "INDEX_KEYWORDS_MIN", 3)
+        generator = ListingGenerator(cache=ListingCache(max_entries=0), keyword_index=make_index())
+        card = ListingRequest(player="Mike Trout", set_name="2011 Topps Update", year=2011, grade="PSA 10")
+
+        listing = await generator.generate_listing(card)
+
+        prompt = calls[0]["messages"][1]["content"]
+        assert "Search terms from recent sold listings" in prompt
+        assert '"keywords"' not in prompt
+        assert listing.keywords[0] == "Mike Trout"
+        assert "Rookie" in listing.keywords
@@ -0,0 +1,115 @@
+"""
+Tests for Listing Cache
+
+Run with: pytest tests/test_listing_cache.py
+"""
+
+from services.listing_cache import ListingCache, listing_cache_key, normalize_grade
+from services.listing_generator import ListingRequest
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_request(**overrides) -> ListingRequest:
+    fields = dict(player="Mike Trout", set_name="2011 Topps Update", year=2011, grade="PSA 10", platform="ebay")
+    fields.update(overrides)
+    return ListingRequest(**fields)
+
+
+class TestListingCacheKey:
+    """Test request normalization"""
+
+    def test_equivalent_requests_share_key(self):
+        """Test case, spacing and grade formatting do not split entries"""
+        a = make_request()
+        b = make_request(player="  mike   TROUT ", set_name="2011 topps update.", grade="psa10")
+
+        assert listing_cache_key(a) == listing_cache_key(b)
+
+    def test_distinguishing_fields(self):
+        """Test platform, tone and included price change the key"""
+        base = listing_cache_key(make_request())
+
+        assert listing_cache_key(make_request(platform="pwcc")) != base
+        assert listing_cache_key(make_request(tone="casual")) != base
+        assert listing_cache_key(make_request(estimated_value=250.0)) != base
+        # An estimated value that is not shown in the listing does not matter
+        assert listing_cache_key(make_request(estimated_value=250.0, include_price=False)) == base
+
+    def test_normalize_grade(self):
+        """Test grade spellings normalize together"""
+        assert normalize_grade("PSA10") == normalize_grade("psa-10") == "psa 10"
+        assert normalize_grade("BGS 9.5") == "bgs 9.5"
+
+
+class TestListingCache:
+    """Test TTL, eviction and variant rotation"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+
+    def test_hit_after_put(self):
+        """Test a generated listing is served to the next identical request"""
+        cache = ListingCache(max_entries=10, ttl_seconds=60, variants=1, clock=self.clock)
+        req = make_request()
+
+        assert cache.get(req) is None
+        cache.put(req, "listing-a")
+
+        assert cache.get(make_request(grade="psa 10")) == "listing-a"
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_variant_rotation(self):
+        """Test requests rotate among variants once the pool is full"""
+        cache = ListingCache(max_entries=10, ttl_seconds=60, variants=3, clock=self.clock)
+        req = make_request()
+
+        for variant in ("a", "b"):
+            assert cache.get(req) is None  # pool still filling
+            cache.put(req, variant)
+        assert cache.get(req) is None
+        cache.put(req, "c")
+
+        assert [cache.get(req) for _ in range(4)] == ["a", "b", "c", "a"]
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = ListingCache(max_entries=10, ttl_seconds=60, variants=1, clock=self.clock)
+        req = make_request()
+        cache.put(req, "listing-a")
+
+        self.clock.now += 61
+
+        assert cache.get(req) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used key is evicted when full"""
+        cache = ListingCache(max_entries=2, ttl_seconds=60, variants=1, clock=self.clock)
+        first, second, third = (make_request(player=f"Player {i}") for i in range(3))
+        cache.put(first, "first")
+        cache.put(second, "second")
+        assert cache.get(first) == "first"  # first is now most recent
+
+        cache.put(third, "third")
+
+        assert cache.get(second) is None
+        assert cache.get(first) == "first"
+        assert cache.stats()["evictions"] == 1
+
+    def test_disabled(self):
+        """Test a zero TTL disables caching"""
+        cache = ListingCache(max_entries=10, ttl_seconds=0, variants=1, clock=self.clock)
+        req = make_request()
+        cache.put(req, "listing-a")
+
+        assert cache.get(req) is None
+        assert cache.stats()["entries"] == 0
@@ -4,13 +4,49 @@ Tests for Listing Generator Service
 Run with: pytest tests/test_listing_generator.py
 """
 
+import json
 import pytest
+from types import SimpleNamespace
+from services import listing_generator as listing_module
+from services.listing_cache import ListingCache
 from services.listing_generator import (
+    ListingFieldStream,
     ListingGenerator,
     ListingRequest,
-    ListingResponse
+    ListingResponse,
+    MultiPlatformListingRequest
 )
 
+LISTING_JSON = json.dumps({
+    "title": "2011 Topps Update Mike Trout #US175 PSA 10 Rookie RC \"Gem Mint\"",
+    "description": "<p>Gem Mint rookie of the \u00e9lite \U0001F525 centerfielder.</p>\n<ul><li>PSA 10</li></ul>",
+    "keywords": ["Mike Trout", "rookie", "PSA 10"],
+})
+
+
+class FakeCompletions:
+    """Async chat.completions stand-in replaying LISTING_JSON"""
+
+    def __init__(self, chunk_size: int = 7):
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    async def create(self, stream=False, **kwargs):
+        self.calls.append(dict(kwargs, stream=stream))
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=LISTING_JSON))])
+        return self._stream()
+
+    async def _stream(self):
+        yield SimpleNamespace(choices=[])  # usage-style chunk with no choices
+        for i in range(0, len(LISTING_JSON), self.chunk_size):
+            delta = SimpleNamespace(content=LISTING_JSON[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def fake_client(completions: FakeCompletions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
 
 class TestListingGenerator:
     """Test the AI listing generator"""
@@ -79,6 +115,131 @@ class TestListingGenerator:
         assert "PSA 9" in description
         assert len(description) > 50
 
+    def test_finalize_truncates_title(self):
+        """Test titles over the platform limit are truncated"""
+        listing = self.generator._finalize_listing("whatnot", {
+            "title": "x" * 90,
+            "description": "  desc  ",
+            "keywords": ["a"],
+        })
+
+        assert len(listing.title) == 60
+        assert listing.title.endswith("...")
+        assert listing.description == "desc"
+        assert listing.character_counts == {"title": 60, "description": 4, "title_max": 60}
+
+    @pytest.mark.asyncio
+    async def test_generate_listing_uses_async_client(self, monkeypatch):
+        """Test generation awaits the async client"""
+        completions = FakeCompletions()
+        monkeypatch.setattr(listing_module, "get_openai_client", lambda: fake_client(completions))
+        req = ListingRequest(player="Mike Trout", set_name="2011 Topps Update", platform="ebay")
+
+        listing = await self.generator.generate_listing(req)
+
+        assert listing.keywords == ["Mike Trout", "rookie", "PSA 10"]
+        assert len(listing.title) <= 80
+        assert completions.calls[0]["stream"] is False
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_served_from_cache(self, monkeypatch):
+        """Test identical requests reuse the generated listing"""
+        completions = FakeCompletions()
+        monkeypatch.setattr(listing_module, "get_openai_client", lambda: fake_client(completions))
+        generator = ListingGenerator(cache=ListingCache(max_entries=10, ttl_seconds=60, variants=1))
+
+        first = await generator.generate_listing(ListingRequest(player="Mike Trout", set_name="2011 Topps Update"))
+        second = await generator.generate_listing(ListingRequest(player="mike trout", set_name="2011 Topps Update "))
+        events = [e async for e in generator.stream_listing(ListingRequest(player="Mike Trout", set_name="2011 Topps Update"))]
+
+        assert len(completions.calls) == 1
+        assert second == first
+        assert events[-1]["data"] == first.model_dump()
+        assert generator.cache.stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_listing(self, monkeypatch):
+        """Test the title arrives before description deltas and matches the final listing"""
+        completions = FakeCompletions(chunk_size=5)
+        monkeypatch.setattr(listing_module, "get_openai_client", lambda: fake_client(completions))
+        req = ListingRequest(player="Mike Trout", set_name="2011 Topps Update", platform="ebay")
+
+        events = [event async for event in self.generator.stream_listing(req)]
+
+        names = [event["event"] for event in events]
+        assert names[0] == "title"
+        assert names[-1] == "done"
+        assert set(names[1:-1]) == {"description"}
+
+        done = events[-1]["data"]
+        expected = json.loads(LISTING_JSON)
+        assert events[0]["data"]["title"] == done["title"]
+        assert "".join(e["data"]["delta"] for e in events[1:-1]) == expected["description"]
+        assert done["keywords"] == expected["keywords"]
+        assert completions.calls[0]["stream"] is True
+
+    def test_single_platform_system_prompt_unchanged(self):
+        """Test the multi-platform prompt reduces to the single one"""
+        assert self.generator._compose_system_prompt(["ebay"], "casual") == \
+            self.generator._build_system_prompt("ebay", "casual")
+
+    @pytest.mark.asyncio
+    async def test_generate_multi_platform(self, monkeypatch):
+        """Test one call yields per-platform listings with independent title limits"""
+        long_title = "2011 Topps Update Mike Trout #US175 PSA 10 Gem Mint Rookie RC Angels Investment Grade"
+        answer = {"listings": {
+            platform: {"title": long_title, "description": f"{platform} copy", "keywords": [platform]}
+            for platform in ("ebay", "whatnot", "pwcc")
+        }}
+        calls = []
+
+        async def create(**kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(answer)))])
+
+        monkeypatch.setattr(listing_module, "get_openai_client",
+                            lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+        req = MultiPlatformListingRequest(
+            player="Mike Trout", set_name="2011 Topps Update", platforms=["eBay", "whatnot", "pwcc", "ebay"]
+        )
+
+        listings = await self.generator.generate_multi_platform(req)
+
+        assert len(calls) == 1
+        assert list(listings) == ["ebay", "whatnot", "pwcc"]
+        assert len(listings["ebay"].title) == 80
+        assert len(listings["whatnot"].title) == 60
+        assert listings["pwcc"].title == long_title  # within PWCC's 100
+        assert listings["whatnot"].character_counts["title_max"] == 60
+        system_prompt = calls[0]["messages"][0]["content"]
+        assert "Platform: WHATNOT" in system_prompt and "Platform: COMC" not in system_prompt
+
+    @pytest.mark.asyncio
+    async def test_multi_platform_fills_missing_platform(self, monkeypatch):
+        """Test a platform missing from the combined answer is generated alone"""
+        completions = FakeCompletions()
+        combined = {"listings": {"ebay": json.loads(LISTING_JSON)}}
+        single_create = completions.create
+
+        async def create(stream=False, **kwargs):
+            if "listings" in kwargs["messages"][1]["content"]:
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(combined)))])
+            return await single_create(stream=stream, **kwargs)
+
+        monkeypatch.setattr(listing_module, "get_openai_client",
+                            lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+        req = MultiPlatformListingRequest(player="Mike Trout", set_name="2011 Topps Update", platforms=["ebay", "comc"])
+
+        listings = await self.generator.generate_multi_platform(req)
+
+        assert listings["comc"].platform == "comc"
+        assert len(completions.calls) == 1
+
+    def test_multi_platform_rejects_unknown(self):
+        """Test unknown platforms are rejected before any AI call"""
+        with pytest.raises(ValueError):
+            self.generator._resolve_platforms(["ebay", "craigslist"])
+
     @pytest.mark.asyncio
     @pytest.mark.ai
     async def test_generate_listing_ebay(self):
@@ -123,3 +284,38 @@ class TestListingGenerator:
         assert len(listing.title) > 0
         assert len(listing.title) <= 100  # PWCC max
         assert listing.platform == "pwcc"
+
+
+class TestListingFieldStream:
+    """Test incremental extraction of streamed listing fields"""
+
+    def feed_all(self, text: str, chunk_size: int):
+        parser = ListingFieldStream()
+        events = []
+        for i in range(0, len(text), chunk_size):
+            events.extend(parser.feed(text[i:i + chunk_size]))
+        return events
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 16, 10_000])
+    def test_any_chunking(self, chunk_size):
+        """Test escapes and surrogate pairs split across chunks decode correctly"""
+        expected = json.loads(LISTING_JSON)
+
+        events = self.feed_all(LISTING_JSON, chunk_size)
+
+        assert events[0] == ("title", expected["title"])
+        assert all(name == "description" for name, _ in events[1:])
+        assert "".join(delta for _, delta in events[1:]) == expected["description"]
+
+    def test_nested_keys_ignored(self):
+        """Test only top-level title/description strings are streamed"""
+        text = json.dumps({
+            "meta": {"title": "nested", "description": "nested"},
+            "keywords": ["title", "description"],
+            "description": "real",
+        })
+
+        events = self.feed_all(text, 4)
+
+        assert all(name == "description" for name, _ in events)
+        assert "".join(delta for _, delta in events) == "real"
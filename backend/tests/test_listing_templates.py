@@ -0,0 +1,144 @@
+"""
+Tests for Template Listing Engine
+
+Run with: pytest tests/test_listing_templates.py
+"""
+
+import pytest
+from services.listing_generator import ListingGenerator, ListingRequest
+from services.listing_templates import ListingTemplateEngine, grade_phrase, serial_phrase
+
+
+def make_card(**overrides) -> ListingRequest:
+    fields = dict(
+        player="Mike Trout",
+        set_name="2011 Topps Update",
+        year=2011,
+        grade="PSA 10",
+        platform="ebay",
+        mode="template",
+    )
+    fields.update(overrides)
+    return ListingRequest(**fields)
+
+
+class TestPhrasing:
+    """Test grade and serial phrasing"""
+
+    @pytest.mark.parametrize("grade, expected", [
+        ("PSA 10", ("PSA 10 Gem Mint", "PSA 10")),
+        ("psa10", ("PSA 10 Gem Mint", "PSA 10")),
+        ("BGS 9.5", ("BGS 9.5 Gem Mint", "BGS 9.5")),
+        ("BGS 10", ("BGS 10 Pristine", "BGS 10")),
+        ("SGC 8", ("SGC 8 NM-MT", "SGC 8")),
+        ("Raw", ("Raw", "Raw")),
+        (None, ("", "")),
+    ])
+    def test_grade_phrase(self, grade, expected):
+        """Test grade long/short forms"""
+        assert grade_phrase(grade) == expected
+
+    @pytest.mark.parametrize("serial, expected", [
+        ("23/99", ("#23/99", "/99")),
+        ("#23 / 99", ("#23/99", "/99")),
+        ("/25", ("/25", "/25")),
+        ("1 of 1", ("#1 of 1", "#1 of 1")),
+    ])
+    def test_serial_phrase(self, serial, expected):
+        """Test serial number long/short forms"""
+        assert serial_phrase(serial) == expected
+
+
+class TestListingTemplateEngine:
+    """Test deterministic template listings"""
+
+    def setup_method(self):
+        self.generator = ListingGenerator()
+        self.engine = ListingTemplateEngine(ListingGenerator.PLATFORM_SPECS)
+
+    def test_full_title_when_it_fits(self):
+        """Test the title keeps every segment when under the limit"""
+        title = self.engine.build_title(make_card(parallel="Gold", serial_number="23/2011"), 80)
+
+        assert title == "2011 Topps Update Mike Trout Gold #23/2011 PSA 10 Gem Mint"
+
+    def test_title_shortening_rules(self):
+        """Test titles are abbreviated before segments are dropped"""
+        card = make_card(parallel="Gold Refractor", serial_number="23/2011")
+
+        assert self.engine.build_title(card, 60) == "2011 Topps Update Mike Trout Gold Refractor #23/2011 PSA 10"
+        assert self.engine.build_title(card, 50) == "2011 Topps Update Mike Trout Gold Ref /2011 PSA 10"
+        assert self.engine.build_title(card, 47) == "2011 Topps Upd Mike Trout Gold Ref /2011 PSA 10"
+        assert self.engine.build_title(card, 30) == "Mike Trout PSA 10"
+
+    @pytest.mark.parametrize("platform", ["ebay", "pwcc", "whatnot", "comc"])
+    def test_titles_respect_platform_limits(self, platform):
+        """Test long cards fit every platform's title limit"""
+        card = make_card(
+            player="Giannis Antetokounmpo",
+            set_name="2013-14 Panini National Treasures Basketball",
+            year=None,
+            grade="BGS 9.5",
+            parallel="Rookie Patch Autograph Gold",
+            serial_number="3/25",
+            platform=platform,
+        )
+
+        listing = self.generator.render_template_listing(card)
+
+        assert len(listing.title) <= ListingGenerator.PLATFORM_SPECS[platform]["title_max"]
+        assert "Giannis Antetokounmpo" in listing.title
+        assert "BGS 9.5" in listing.title
+        assert not listing.title.endswith("...")
+
+    def test_description_formats(self):
+        """Test html, markdown and text output per platform"""
+        card = make_card(player="Mike <Trout>", parallel="Gold_Refractor")
+
+        ebay = self.engine.render(card)["description"]
+        pwcc = self.engine.render(card.model_copy(update={"platform": "pwcc"}))["description"]
+        comc = self.engine.render(card.model_copy(update={"platform": "comc"}))["description"]
+
+        assert ebay.startswith("<h2>") and "<li><strong>Player:</strong> Mike &lt;Trout&gt;</li>" in ebay
+        assert pwcc.startswith("## ") and "- **Parallel:** Gold\\_Refractor" in pwcc
+        assert "<" not in comc.replace("<Trout>", "") and "Player: Mike <Trout>" in comc
+
+    def test_keywords(self):
+        """Test keywords are de-duplicated, capped and merge ranked terms"""
+        keywords = self.engine.select_keywords(
+            make_card(parallel="Gold", serial_number="23/2011"),
+            ranked_terms=["rookie card", "Mike Trout", "angels"],
+        )
+
+        assert keywords[0] == "Mike Trout"
+        assert "rookie card" in keywords and "angels" in keywords
+        assert len(keywords) == len({k.lower() for k in keywords}) <= 15
+        assert "serial numbered /2011" in keywords
+
+    def test_title_terms_fill_remaining_room(self):
+        """Test extra title terms are appended only while they fit"""
+        title = self.engine.build_title(make_card(), 60, extra_terms=["Rookie", "RC", "Angels Investment Piece"])
+
+        assert title == "2011 Topps Update Mike Trout PSA 10 Gem Mint Rookie RC"
+
+    @pytest.mark.asyncio
+    async def test_template_mode_skips_ai(self, monkeypatch):
+        """Test mode="template" never creates an OpenAI client"""
+        from services import listing_generator as listing_module
+
+        def no_client():
+            raise AssertionError("template mode must not call the API")
+
+        monkeypatch.setattr(listing_module, "get_openai_client", no_client)
+
+        listing = await self.generator.generate_listing(make_card(platform="whatnot"))
+
+        assert listing.platform == "whatnot"
+        assert listing.character_counts["title_max"] == 60
+        assert listing.description
+
+    def test_deterministic(self):
+        """Test identical cards render identical listings"""
+        card = make_card(tone="casual", platform="pwcc", estimated_value=250.0)
+
+        assert self.engine.render(card) == self.engine.render(card.model_copy())
@@ -0,0 +1,199 @@
+"""
+Tests for Log Rotation, Compaction and Columnar Archives
+
+Run with: pytest tests/test_log_compaction.py
+"""
+
+import os
+import json
+import fcntl
+import calendar
+import ml.log_compaction
+from datetime import datetime
+from ml.columnar_archive import ColumnarArchive, iter_segment, write_archive
+from ml.log_compaction import LogCompactor, iter_production_log, production_log_segments
+from ml.model_evaluator import ModelEvaluator
+from ml.record_sink import JsonlFile, RecordSink
+from ml.training_data_collector import TrainingDataCollector
+
+NOW = calendar.timegm(datetime(2024, 3, 20, 12, 0).timetuple())
+
+
+def log_entry(timestamp: str, model_id: str = "ft:a", corrected_fields=()) -> dict:
+    return {
+        "timestamp": timestamp,
+        "model_id": model_id,
+        "prediction": {"player": "Mike Trout", "year": 2011},
+        "user_correction": {"year": 2012} if corrected_fields else None,
+        "user_rating": 4 if corrected_fields else None,
+        "was_corrected": bool(corrected_fields),
+        "corrected_fields": list(corrected_fields),
+    }
+
+
+def write_log(path, entries, mtime=NOW - 3600):
+    JsonlFile(path).write_batch(entries)
+    os.utime(path, (mtime, mtime))
+
+
+class TestColumnarArchive:
+    """Test the archive format and transparent segment reads"""
+
+    def test_round_trip_preserves_types_and_missing_values(self, tmp_path):
+        """Test typed columns, nested values and missing keys read back unchanged"""
+        records = [
+            {"id": 1, "score": 0.5, "ok": True, "name": "Trout", "tags": ["rc"], "big": 2**70},
+            {"id": 2, "score": 1, "ok": False, "name": None, "extra": {"grade": 10}},
+            {"id": None, "score": None, "name": "Ohtani ⚾", "tags": []},
+        ]
+        path = tmp_path / "segment.cols.npz"
+
+        assert write_archive(records, path) == 3
+
+        expected = [{**{key: None for key in ("id", "score", "ok", "name", "tags", "big", "extra")}, **r} for r in records]
+        expected[1]["score"] = 1.0
+        assert list(iter_segment(path)) == expected
+        with ColumnarArchive(path) as archive:
+            assert archive.numeric("score").tolist()[:2] == [0.5, 1.0]
+            assert list(archive.records(["name"])) == [{"name": "Trout"}, {"name": None}, {"name": "Ohtani ⚾"}]
+
+    def test_jsonl_and_archive_read_the_same(self, tmp_path):
+        """Test iter_segment gives identical records for a segment before and after archiving"""
+        entries = [log_entry(f"2024-03-0{i}T00:00:00", corrected_fields=["year"] * (i % 2)) for i in range(1, 6)]
+        jsonl = tmp_path / "segment.jsonl"
+        write_log(jsonl, entries)
+        write_archive(list(iter_segment(jsonl)), tmp_path / "segment.cols.npz")
+
+        assert list(iter_segment(jsonl)) == entries
+        assert list(iter_segment(tmp_path / "segment.cols.npz")) == entries
+        assert list(iter_segment(tmp_path / "segment.cols.npz", ["model_id"]))[0] == {"model_id": "ft:a"}
+
+
+class TestLogCompactor:
+    """Test rotation, archiving and pruning"""
+
+    def make_compactor(self, tmp_path, **kwargs):
+        settings = {"max_bytes": 10_000, "max_age_hours": 24, "grace_seconds": 60, "keep_exports": 2, "clock": lambda: NOW}
+        settings.update(kwargs)
+        return LogCompactor(str(tmp_path / "results"), str(tmp_path / "training"), **settings)
+
+    def test_rotates_closed_large_and_old_logs(self, tmp_path):
+        """Test the active log rotates on month end, size and age, and stays otherwise"""
+        results = tmp_path / "results"
+        results.mkdir()
+        write_log(results / "production_log_202402.jsonl", [log_entry("2024-02-28T10:00:00")])
+        write_log(results / "production_log_202403.jsonl", [log_entry("2024-03-20T09:00:00")])
+        compactor = self.make_compactor(tmp_path)
+
+        assert compactor.rotate_production_logs() == ["production_log_202402.001.jsonl"]
+
+        # Too large
+        write_log(results / "production_log_202403.jsonl", [log_entry("2024-03-20T09:00:00")] * 50)
+        assert compactor.rotate_production_logs() == ["production_log_202403.001.jsonl"]
+
+        # First entry older than max_age_hours
+        write_log(results / "production_log_202403.jsonl", [log_entry("2024-03-19T11:00:00")])
+        assert compactor.rotate_production_logs() == ["production_log_202403.002.jsonl"]
+
+    def test_archives_idle_segments_and_keeps_readers_working(self, tmp_path):
+        """Test rotated segments become archives that backfill and iteration read like JSONL"""
+        results = tmp_path / "results"
+        results.mkdir()
+        write_log(results / "production_log_202402.jsonl", [log_entry("2024-02-10T00:00:00", corrected_fields=["year"])] * 30)
+        write_log(results / "production_log_202403.jsonl", [log_entry("2024-03-20T11:00:00")] * 5)
+        write_log(results / "production_log_202403.001.jsonl", [log_entry("2024-03-19T00:00:00")] * 5, mtime=NOW)
+
+        report = self.make_compactor(tmp_path).run()
+
+        # The February log rotated and archived; the fresh March segment waits for the grace period
+        assert [entry["archive"] for entry in report["archived"]] == ["production_log_202402.001.cols.npz"]
+        assert report["bytes_saved"] > 0
+        assert not (results / "production_log_202402.001.jsonl").exists()
+        assert [path.name for path in production_log_segments(results)] == [
+            "production_log_202402.001.cols.npz", "production_log_202403.001.jsonl", "production_log_202403.jsonl"
+        ]
+        assert sum(1 for _ in iter_production_log(results, "202402")) == 30
+
+        evaluator = ModelEvaluator(results_dir=str(results), sink=RecordSink())
+        february = evaluator.analyze_production_logs(month="202402")
+        assert february["total_predictions"] == 30
+        assert february["field_corrections"] == {"year": 30}
+        assert evaluator.analyze_production_logs(month="202403")["total_predictions"] == 10
+
+    def test_mismatched_archive_keeps_source(self, tmp_path, monkeypatch):
+        """Test a segment is only deleted when its archive reads back identical"""
+        results = tmp_path / "results"
+        results.mkdir()
+        entries = [log_entry("2024-02-10T00:00:00", corrected_fields=["year"])] * 3
+        write_log(results / "production_log_202402.001.jsonl", entries)
+
+        def lossy_write(records, path):
+            return write_archive([{**records[0], "model_id": None}] + records[1:], path)
+
+        monkeypatch.setattr(ml.log_compaction, "write_archive", lossy_write)
+        assert self.make_compactor(tmp_path).archive_production_logs() == []
+
+        assert (results / "production_log_202402.001.jsonl").exists()
+        assert not (results / "archive" / "production_log_202402.001.cols.npz").exists()
+
+    def test_legacy_training_files_archived_once_imported(self, tmp_path):
+        """Test imported legacy files move to archives that a fresh store still imports"""
+        training = tmp_path / "training"
+        training.mkdir()
+        sample = {"messages": [], "metadata": {"collected_at": "2024-01-01T00:00:00", "source": "validated_scan"}}
+        write_log(training / "card_identification.jsonl", [sample] * 3)
+        (training / "listing_generation.jsonl").write_text(json.dumps(sample) + "\n")
+
+        collector = TrainingDataCollector(data_dir=str(training), sink=RecordSink())
+        # Appended after the import: not archived until imported
+        write_log(training / "listing_generation.jsonl", [sample])
+
+        report = self.make_compactor(tmp_path, training_store=collector.store).run()
+
+        assert [entry["rows"] for entry in report["training_archived"]] == [3]
+        assert not (training / "card_identification.jsonl").exists()
+        assert TrainingDataCollector(data_dir=str(training), sink=RecordSink()).get_dataset_stats()["card_identification"] == 3
+
+        collector.store.close()
+        os.remove(training / "training_data.db")
+        fresh = TrainingDataCollector(data_dir=str(training), sink=RecordSink())
+        assert fresh.get_dataset_stats()["card_identification"] == 3
+        assert fresh.get_dataset_stats()["listing_generation"] == 2
+
+    def test_prunes_old_exports_with_their_validation_files(self, tmp_path):
+        """Test only the newest exports per model type are kept"""
+        training = tmp_path / "training"
+        training.mkdir()
+        for stamp in ("20240101_000000", "20240102_000000", "20240103_000000"):
+            (training / f"card_identification_export_{stamp}.jsonl").write_text("")
+            (training / f"card_identification_export_{stamp}_validation.jsonl").write_text("")
+        (training / "listing_generation_export_20240101_000000.jsonl.gz").write_bytes(b"")
+
+        removed = self.make_compactor(tmp_path).prune_exports()
+
+        assert removed == [
+            "card_identification_export_20240101_000000.jsonl",
+            "card_identification_export_20240101_000000_validation.jsonl",
+        ]
+        assert (training / "listing_generation_export_20240101_000000.jsonl.gz").exists()
+
+    def test_expires_archives_past_retention(self, tmp_path):
+        """Test archives of months past the retention period are deleted"""
+        archive_dir = tmp_path / "results" / "archive"
+        for month in ("202312", "202402"):
+            write_archive([log_entry(f"{month[:4]}-{month[4:]}-01T00:00:00")], archive_dir / f"production_log_{month}.001.cols.npz")
+
+        assert self.make_compactor(tmp_path, retention_days=60).expire_archives() == ["production_log_202312.001.cols.npz"]
+        assert self.make_compactor(tmp_path, retention_days=0).expire_archives() == []
+
+    def test_one_compactor_at_a_time(self, tmp_path):
+        """Test a run is skipped while another worker holds the compaction lock"""
+        compactor = self.make_compactor(tmp_path)
+        (tmp_path / "results").mkdir()
+        fd = os.open(tmp_path / "results" / ".compaction.lock", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            assert compactor.run() == {"skipped": True}
+        finally:
+            os.close(fd)
+        assert "rotated" in compactor.run()
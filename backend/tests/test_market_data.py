@@ -10,7 +10,9 @@ from services.market_data import (
     SimulatedMarketProvider,
     MarketDataService,
     CompData,
-    MarketSnapshot
+    MarketSnapshot,
+    ProviderError,
+    snapshot_etag
 )
 
 
@@ -54,6 +56,82 @@ class TestSimulatedMarketProvider:
         assert len(snapshot.comps) > 0
 
 
+    @pytest.mark.asyncio
+    async def test_deterministic_per_card(self):
+        """Test the same card always yields the same comps"""
+        reference = datetime(2024, 6, 1)
+        a = SimulatedMarketProvider(reference_time=reference)
+        b = SimulatedMarketProvider(reference_time=reference)
+
+        comps_a = await a.fetch_comps("Mike Trout", "2011 Topps Update", 2011, "PSA 10")
+        comps_b = await b.fetch_comps("Mike Trout", "2011 Topps Update", 2011, "PSA 10")
+        other = await a.fetch_comps("Mike Trout", "2011 Topps Update", 2011, "PSA 9")
+
+        assert comps_a == comps_b
+        assert [c.price for c in comps_a] != [c.price for c in other]
+        assert all(c.sold_date <= reference for c in comps_a)
+
+    @pytest.mark.asyncio
+    async def test_vintage_premium_uses_reference_date(self):
+        """Test prices depend on the pinned reference date, not the current year"""
+        reference = datetime(2024, 6, 1)
+        pinned = SimulatedMarketProvider(reference_time=reference)
+        next_year = SimulatedMarketProvider(reference_time=datetime(2025, 6, 1))
+
+        snapshot = await pinned.get_snapshot("Ken Griffey Jr.", "1989 Upper Deck", 1989)
+        again = await SimulatedMarketProvider(reference_time=reference).get_snapshot("Ken Griffey Jr.", "1989 Upper Deck", 1989)
+        later = await next_year.get_snapshot("Ken Griffey Jr.", "1989 Upper Deck", 1989)
+
+        assert snapshot.average == again.average
+        assert later.average != snapshot.average
+
+    @pytest.mark.asyncio
+    async def test_zero_comp_count_snapshot(self):
+        """Test an empty simulated market returns an empty snapshot instead of raising"""
+        provider = SimulatedMarketProvider(comp_count=0)
+
+        snapshot = await provider.get_snapshot("Mike Trout", "2011 Topps Update")
+
+        assert snapshot.listings_count == 0
+        assert snapshot.average == 0.0
+        assert snapshot.confidence == "low"
+
+    @pytest.mark.asyncio
+    async def test_large_comp_counts(self):
+        """Test tens of thousands of comps are generated in one batch"""
+        provider = SimulatedMarketProvider(comp_count=20000)
+
+        batch = await provider.fetch_batch("Mike Trout", "2011 Topps Update", limit=20000)
+        snapshot = await provider.get_snapshot("Mike Trout", "2011 Topps Update")
+
+        assert len(batch) == 20000
+        assert min(batch.prices) > 0
+        # Most recent sales first
+        assert batch.timestamps[0] >= batch.timestamps[-1]
+        assert snapshot.listings_count == 20000
+        assert len(snapshot.comps) == 20
+
+    @pytest.mark.asyncio
+    async def test_grade_premiums(self):
+        """Test higher grades price above lower grades for the same card"""
+        provider = SimulatedMarketProvider(comp_count=500)
+
+        psa10 = await provider.get_snapshot("Mike Trout", "2011 Topps Update", grade="PSA 10")
+        raw = await provider.get_snapshot("Mike Trout", "2011 Topps Update")
+
+        assert SimulatedMarketProvider.grade_premium("BGS 9.5") == 3.5
+        assert SimulatedMarketProvider.grade_premium("Raw") == 1.0
+        assert psa10.average > raw.average * 4
+
+    @pytest.mark.asyncio
+    async def test_error_injection(self):
+        """Test simulated failures raise ProviderError"""
+        provider = SimulatedMarketProvider(error_rate=1.0)
+
+        with pytest.raises(ProviderError):
+            await provider.fetch_comps("Mike Trout", "2011 Topps Update")
+
+
 class TestMarketDataService:
     """Test the market data service coordinator"""
 
@@ -88,3 +166,30 @@ class TestMarketDataService:
         assert isinstance(snapshot, MarketSnapshot)
         # Should return some data even for unknown cards
         assert snapshot.source in ["ebay", "simulated"]
+
+    @pytest.mark.asyncio
+    async def test_snapshot_cache(self):
+        """Test repeat requests reuse the cached snapshot and ETag"""
+        service = MarketDataService(snapshot_ttl=60)
+
+        first = await service.get_market_data("Mike Trout", "2011 Topps Update", provider="simulated")
+        second = await service.get_market_data(" mike  trout", "2011 topps update", provider="simulated")
+
+        assert second is first
+        assert snapshot_etag(second) == snapshot_etag(first)
+
+    @pytest.mark.asyncio
+    async def test_snapshot_etag_tracks_comp_set(self):
+        """Test ETags change with the comps and the response shape"""
+        service = MarketDataService(snapshot_ttl=0)
+
+        a = await service.get_market_data("Mike Trout", "2011 Topps Update", provider="simulated")
+        again = await service.get_market_data("Mike Trout", "2011 Topps Update", provider="simulated")
+        other = await service.get_market_data("Mike Trout", "2011 Topps Chrome", provider="simulated")
+
+        assert a.comps_digest is not None
+        assert snapshot_etag(a).startswith('W/"')
+        # Simulated markets are deterministic per card, so a refetch keeps its ETag
+        assert snapshot_etag(again) == snapshot_etag(a)
+        assert snapshot_etag(a, comps_limit=5) != snapshot_etag(a, comps_limit=10)
+        assert snapshot_etag(other) != snapshot_etag(a)
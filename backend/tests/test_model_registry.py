@@ -0,0 +1,153 @@
+"""
+Tests for Runtime Model Registry
+
+Run with: pytest tests/test_model_registry.py
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from ml.model_manager import ModelManager
+from ml.model_registry import ModelRegistry, VersionConflict
+from ml.model_routing import ModelRouter, RoutingMetricsStore
+from ml.record_sink import RecordSink
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("FINETUNED_CARD_ID_MODEL", "ft:card:v1")
+    monkeypatch.setenv("USE_FINETUNED_CARD_ID", "true")
+    monkeypatch.delenv("FINETUNED_LISTING_MODEL", raising=False)
+    monkeypatch.delenv("USE_FINETUNED_LISTING", raising=False)
+    return str(tmp_path / "model_registry.json")
+
+
+class TestModelRegistry:
+    """Test versioned updates, propagation and rollback"""
+
+    def test_environment_seeds_version_zero(self, config_path):
+        """Test the env configuration is served until the first update"""
+        registry = ModelRegistry(config_path)
+
+        assert registry.current()["version"] == 0
+        assert registry.active_model("card_identification") == "ft:card:v1"
+        assert registry.active_model("listing_generation") == "gpt-4o-mini-2024-07-18"
+
+    def test_update_swaps_version_atomically(self, config_path):
+        """Test an update publishes a new version without changing the old one"""
+        registry = ModelRegistry(config_path)
+        in_flight = registry.current()
+
+        version = registry.update({"card_identification": {"finetuned": "ft:card:v2"}})
+
+        assert version["version"] == 1
+        assert registry.active_model("card_identification") == "ft:card:v2"
+        # A request holding the previous version is unaffected
+        assert registry.active_model("card_identification", in_flight) == "ft:card:v1"
+        with open(config_path) as f:
+            assert json.load(f)["current"]["version"] == 1
+
+    def test_other_workers_pick_up_changes(self, config_path):
+        """Test another registry on the same file reloads after its check interval"""
+        clock = FakeClock()
+        worker = ModelRegistry(config_path, check_interval=2, clock=clock)
+        worker.current()
+
+        ModelRegistry(config_path).update({"listing_generation": {"finetuned": "ft:listing:v1", "active": True}})
+
+        assert worker.active_model("listing_generation") == "gpt-4o-mini-2024-07-18"
+        clock.now += 2
+        assert worker.active_model("listing_generation") == "ft:listing:v1"
+        assert worker.reloads == 1
+
+    def test_updates_from_workers_are_not_lost(self, config_path):
+        """Test updates build on the latest file even if this worker has not reloaded"""
+        first, second = ModelRegistry(config_path, check_interval=60), ModelRegistry(config_path, check_interval=60)
+
+        first.update({"card_identification": {"finetuned": "ft:card:v2"}})
+        version = second.update({"listing_generation": {"finetuned": "ft:listing:v1", "active": True}})
+
+        assert version["version"] == 2
+        assert version["models"]["card_identification"]["finetuned"] == "ft:card:v2"
+
+    def test_stale_expected_version_is_rejected(self, config_path):
+        """Test optimistic concurrency on expected_version"""
+        registry = ModelRegistry(config_path)
+        registry.update({"card_identification": {"active": False}})
+
+        with pytest.raises(VersionConflict):
+            registry.update({"card_identification": {"active": True}}, expected_version=0)
+        with pytest.raises(ValueError):
+            registry.update({"pricing": {"active": True}})
+
+    def test_rollback(self, config_path):
+        """Test rolling back publishes the earlier models as a new version"""
+        registry = ModelRegistry(config_path)
+        registry.update({"card_identification": {"finetuned": "ft:card:v2"}})
+        registry.update({"card_identification": {"finetuned": "ft:card:v3"}})
+
+        version = registry.rollback(1)
+
+        assert version["version"] == 3
+        assert registry.active_model("card_identification") == "ft:card:v2"
+        assert [previous["version"] for previous in registry.history()] == [2, 1, 0]
+        with pytest.raises(ValueError):
+            registry.rollback(99)
+
+    def test_corrupt_file_keeps_last_good_version(self, config_path):
+        """Test a broken config file does not interrupt serving"""
+        clock = FakeClock()
+        registry = ModelRegistry(config_path, check_interval=1, clock=clock)
+        registry.update({"card_identification": {"finetuned": "ft:card:v2"}})
+
+        with open(config_path, "w") as f:
+            f.write("{not json")
+        clock.now += 1
+
+        assert registry.active_model("card_identification") == "ft:card:v2"
+
+
+class TestModelManagerRegistry:
+    """Test ModelManager reads models from the registry"""
+
+    def make_manager(self, config_path):
+        registry = ModelRegistry(config_path)
+        router = ModelRouter(registry=registry, store=RoutingMetricsStore(config_path + ".db"), sink=RecordSink())
+        manager = ModelManager(api_key="test-key", registry=registry, router=router)
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs["model"])
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"player": "Tom Brady"}'))])
+
+        manager.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return manager, calls
+
+    def test_switch_applies_to_next_request(self, config_path):
+        """Test a registry update changes the model without a new manager"""
+        manager, calls = self.make_manager(config_path)
+
+        first = manager.identify_card_finetuned("TOM BRADY 2000 PLAYOFF CONTENDERS")
+        manager.set_active_model("card_identification", "ft:card:v2")
+        second = manager.identify_card_finetuned("TOM BRADY 2000 PLAYOFF CONTENDERS")
+
+        assert calls == ["ft:card:v1", "ft:card:v2"]
+        assert first["_metadata"]["config_version"] == 0
+        assert second["_metadata"]["config_version"] == 1
+
+    def test_compare_models_leaves_config_alone(self, config_path):
+        """Test comparisons pass models explicitly instead of toggling the shared config"""
+        manager, calls = self.make_manager(config_path)
+
+        manager.compare_models("card_identification", {"ocr_text": "..."}, num_runs=1)
+
+        assert calls == ["gpt-4o-mini-2024-07-18", "ft:card:v1"]
+        assert manager.registry.current()["version"] == 0
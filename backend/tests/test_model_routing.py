@@ -0,0 +1,228 @@
+"""
+Tests for Canary and Shadow Model Routing
+
+Run with: pytest tests/test_model_routing.py
+"""
+
+import json
+import threading
+import pytest
+from types import SimpleNamespace
+from ml.model_manager import ModelManager, card_scan_fields
+from ml.model_registry import ModelRegistry
+from ml.model_routing import ModelRouter, RoutingMetricsStore, routing_bucket
+from ml.record_sink import RecordSink
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setenv("FINETUNED_CARD_ID_MODEL", "ft:card:v1")
+    monkeypatch.setenv("USE_FINETUNED_CARD_ID", "true")
+    return ModelRegistry(str(tmp_path / "model_registry.json"))
+
+
+@pytest.fixture
+def router(registry, tmp_path):
+    router = ModelRouter(
+        registry=registry,
+        store=RoutingMetricsStore(str(tmp_path / "routing.db")),
+        sink=RecordSink(),
+        shadow_workers=1,
+        max_pending_shadows=1
+    )
+    yield router
+    router.shutdown()
+
+
+def set_rollout(registry, canary_percent=0.0, shadow_percent=0.0, candidate="ft:card:v2"):
+    registry.update({"card_identification": {"rollout": {
+        "candidate": candidate, "canary_percent": canary_percent, "shadow_percent": shadow_percent
+    }}})
+
+
+class FakeCompletions:
+    """chat.completions stand-in answering per model"""
+
+    def __init__(self, answers, failing=(), gate=None):
+        self.answers = answers
+        self.failing = set(failing)
+        self.gate = gate
+        self.calls = []
+
+    def create(self, model, **kwargs):
+        self.calls.append(model)
+        if self.gate is not None and model == "ft:card:v2":
+            self.gate.wait(1)
+        if model in self.failing:
+            raise RuntimeError(f"{model} unavailable")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(self.answers[model])))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=40)
+        )
+
+
+def make_manager(registry, router, completions):
+    manager = ModelManager(api_key="test-key", registry=registry, router=router)
+    manager.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return manager
+
+
+ANSWERS = {
+    "ft:card:v1": {"player": "Tom Brady", "year": "2000", "set_name": "Playoff Contenders", "card_number": "144"},
+    "ft:card:v2": {"player": "tom brady", "year": 2000, "set_name": "Playoff Contenders", "card_number": "#145"},
+}
+
+
+class TestChoose:
+    """Test canary assignment and shadow sampling"""
+
+    def test_no_rollout_serves_primary(self, router):
+        """Test requests go to the registry's active model without a rollout"""
+        route = router.choose("card_identification", routing_key="user-1")
+
+        assert route == {"model": "ft:card:v1", "arm": "primary", "primary": "ft:card:v1", "shadow_model": None}
+
+    def test_canary_share_is_stable_per_key(self, registry, router):
+        """Test about canary_percent of keys go to the candidate, consistently"""
+        set_rollout(registry, canary_percent=25)
+
+        arms = [router.choose("card_identification", routing_key=f"user-{i}")["arm"] for i in range(2000)]
+        repeat = [router.choose("card_identification", routing_key=f"user-{i}")["arm"] for i in range(2000)]
+
+        assert arms == repeat
+        assert 0.2 < arms.count("canary") / len(arms) < 0.3
+
+    def test_shadow_only_on_primary_requests(self, registry, router):
+        """Test shadow_percent samples primary-served requests"""
+        set_rollout(registry, canary_percent=0, shadow_percent=100)
+
+        route = router.choose("card_identification", routing_key="user-1")
+
+        assert route["model"] == "ft:card:v1"
+        assert route["shadow_model"] == "ft:card:v2"
+
+    def test_routing_bucket_range(self):
+        """Test buckets fall in [0, 100)"""
+        buckets = [routing_bucket(f"key-{i}") for i in range(1000)]
+        assert min(buckets) >= 0 and max(buckets) < 100
+
+
+class TestRoutedCalls:
+    """Test recording, canary fallback and shadow comparison"""
+
+    def test_canary_failure_falls_back_to_primary(self, registry, router):
+        """Test a failing candidate is recorded but the user gets the primary's answer"""
+        set_rollout(registry, canary_percent=100)
+        completions = FakeCompletions(ANSWERS, failing={"ft:card:v2"})
+        manager = make_manager(registry, router, completions)
+
+        result = manager.identify_card_finetuned("TOM BRADY 2000 PLAYOFF CONTENDERS #144", routing_key="user-1")
+
+        assert result["_metadata"]["model_used"] == "ft:card:v1"
+        stats = {(row["model_id"], row["arm"]): row for row in router.store.query()}
+        assert stats[("ft:card:v2", "canary")]["error_rate"] == 1.0
+        assert stats[("ft:card:v1", "primary")]["avg_prompt_tokens"] == 120
+
+    def test_caller_routed_canary_failure_is_raised(self, registry, router):
+        """Test a canary chosen by the caller (e.g. /scan) raises so the caller serves its own primary"""
+        set_rollout(registry, canary_percent=100)
+        completions = FakeCompletions(ANSWERS, failing={"ft:card:v2"})
+        manager = make_manager(registry, router, completions)
+        route = router.choose("card_identification", routing_key="scan-1")
+
+        with pytest.raises(RuntimeError):
+            manager.identify_card_finetuned("TOM BRADY", routing_key="scan-1", route=route)
+
+        assert completions.calls == ["ft:card:v2"]
+        stats = {(row["model_id"], row["arm"]): row for row in router.store.query()}
+        assert stats[("ft:card:v2", "canary")]["error_rate"] == 1.0
+
+    def test_canary_scan_uses_scan_schema(self, registry, router):
+        """Test a canary /scan answer is asked for and mapped onto the scan response fields"""
+        set_rollout(registry, canary_percent=100)
+        answers = dict(ANSWERS, **{"ft:card:v2": {
+            "player": "Tom Brady", "year": "2000", "set_name": "Playoff Contenders", "grade_estimate": "PSA 9",
+            "estimated_low": 1200, "estimated_high": "1500", "recommendation": "grade"
+        }})
+        completions = FakeCompletions(answers)
+        manager = make_manager(registry, router, completions)
+        route = router.choose("card_identification", routing_key="scan-1")
+
+        result = manager.identify_card_finetuned(
+            "TOM BRADY", route=route, instructions="Return the scan schema.", validate=card_scan_fields
+        )
+
+        assert card_scan_fields(result) == {
+            "player": "Tom Brady", "set_name": "Playoff Contenders", "year": 2000, "grade_estimate": "PSA 9",
+            "estimated_low": 1200.0, "estimated_high": 1500.0, "recommendation": "grade",
+        }
+
+    def test_canary_scan_without_price_is_an_error(self, registry, router):
+        """Test a canary answer missing the price range or recommendation is recorded and raised"""
+        set_rollout(registry, canary_percent=100)
+        answers = dict(ANSWERS, **{"ft:card:v2": {"player": "Tom Brady", "estimated_value": "$1,200"}})
+        manager = make_manager(registry, router, FakeCompletions(answers))
+        route = router.choose("card_identification", routing_key="scan-1")
+
+        with pytest.raises(ValueError, match="price range"):
+            manager.identify_card_finetuned("TOM BRADY", route=route, validate=card_scan_fields)
+
+        stats = {(row["model_id"], row["arm"]): row for row in router.store.query()}
+        assert stats[("ft:card:v2", "canary")]["error_rate"] == 1.0
+        with pytest.raises(ValueError, match="recommendation"):
+            card_scan_fields({"estimated_low": 10, "estimated_high": 20, "recommendation": "sell"})
+
+    def test_shadow_records_agreement_off_response_path(self, registry, router):
+        """Test the shadow call runs after the response and records field agreement"""
+        set_rollout(registry, shadow_percent=100)
+        gate = threading.Event()
+        completions = FakeCompletions(ANSWERS, gate=gate)
+        manager = make_manager(registry, router, completions)
+
+        result = manager.identify_card_finetuned("TOM BRADY 2000 PLAYOFF CONTENDERS #144")
+        # The response is ready while the shadow call is still blocked
+        assert result["player"] == "Tom Brady"
+        assert ("ft:card:v2", "shadow") not in {(r["model_id"], r["arm"]) for r in router.store.query()}
+
+        gate.set()
+        router.shutdown()
+        shadow = [row for row in router.store.query() if row["arm"] == "shadow"][0]
+        assert shadow["compared"] == 1
+        assert shadow["agreement_rate"] == 0.0  # Card number differs
+        assert shadow["field_agreement"] == pytest.approx(0.75)
+
+    def test_busy_shadow_pool_drops_calls(self, registry, router):
+        """Test shadow calls beyond max_pending_shadows are dropped, never queued"""
+        set_rollout(registry, shadow_percent=100)
+        gate = threading.Event()
+        manager = make_manager(registry, router, FakeCompletions(ANSWERS, gate=gate))
+
+        manager.identify_card_finetuned("first")
+        manager.identify_card_finetuned("second")
+        gate.set()
+
+        assert router.stats()["shadows_started"] == 1
+        assert router.stats()["shadows_dropped"] == 1
+
+    def test_missing_candidate_fields_count_as_disagreement(self, router):
+        """Test agreement is scored over the primary's fields, penalizing fields the candidate dropped"""
+        reference = {"player": "Tom Brady", "year": 2000, "set_name": "Playoff Contenders", "card_number": "144"}
+
+        sparse = router.agreement({"player": "Tom Brady", "year": None, "set_name": ""}, reference)
+        assert sparse == {"agreed": False, "field_agreement": 0.25}
+        assert router.agreement(dict(reference, grade="PSA 9"), reference) == {"agreed": True, "field_agreement": 1.0}
+
+    def test_shadow_scan_reference(self, registry, router):
+        """Test a scan answered elsewhere is shadowed against its own fields"""
+        set_rollout(registry, shadow_percent=100)
+        manager = make_manager(registry, router, FakeCompletions(ANSWERS))
+
+        candidate = manager.shadow_card_identification(
+            "TOM BRADY 2000 PLAYOFF CONTENDERS",
+            {"player": "Tom Brady", "set_name": "Playoff Contenders", "year": 2000, "grade": None}
+        )
+        router.shutdown()
+
+        assert candidate == "ft:card:v2"
+        shadow = [row for row in router.store.query() if row["arm"] == "shadow"][0]
+        assert shadow["agreement_rate"] == 1.0
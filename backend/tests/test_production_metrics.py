@@ -0,0 +1,102 @@
+"""
+Tests for Production Metrics Rollups
+
+Run with: pytest tests/test_production_metrics.py
+"""
+
+import json
+from datetime import date
+from ml.model_evaluator import ModelEvaluator
+from ml.production_metrics import ProductionMetricsStore, month_range
+from ml.record_sink import RecordSink
+
+
+def log_entry(day: str, model_id: str = "ft:a", corrected_fields=(), rating=None) -> dict:
+    return {
+        "timestamp": f"{day}T12:00:00",
+        "model_id": model_id,
+        "prediction": {},
+        "user_correction": {} if corrected_fields else None,
+        "user_rating": rating,
+        "was_corrected": bool(corrected_fields),
+        "corrected_fields": list(corrected_fields),
+    }
+
+
+class TestProductionMetricsStore:
+    """Test daily rollups and range queries"""
+
+    def test_rollups_by_day_model_and_field(self, tmp_path):
+        """Test counts, corrections, ratings and field counters"""
+        store = ProductionMetricsStore(str(tmp_path / "metrics.db"))
+        store.add_entries([
+            log_entry("2024-03-01", corrected_fields=["year"], rating=4),
+            log_entry("2024-03-01", rating=2),
+            log_entry("2024-03-02", corrected_fields=["year", "grade"]),
+            log_entry("2024-03-02", model_id="ft:b", corrected_fields=["player"]),
+        ])
+        store.add_entries([log_entry("2024-04-01")])
+
+        march = store.query(date(2024, 3, 1), date(2024, 3, 31), "ft:a")
+
+        assert march["total_predictions"] == 3
+        assert march["corrections"] == 2
+        assert (march["rating_sum"], march["total_ratings"]) == (6, 2)
+        assert march["field_corrections"] == {"grade": 1, "year": 2}
+        assert [d["day"] for d in march["daily"]] == ["2024-03-01", "2024-03-02"]
+
+        everything = store.query()
+        assert everything["total_predictions"] == 5
+        assert everything["field_corrections"]["player"] == 1
+
+    def test_backfill_runs_once(self, tmp_path):
+        """Test existing logs are rolled up only when the rollups are created"""
+        log = tmp_path / "production_log_202403.jsonl"
+        log.write_text("".join(json.dumps(log_entry("2024-03-05")) + "\n" for _ in range(4)))
+        store = ProductionMetricsStore(str(tmp_path / "metrics.db"))
+
+        assert store.backfill([log]) == 4
+        assert store.backfill([log]) == 0
+        assert store.query()["total_predictions"] == 4
+
+    def test_month_range(self):
+        """Test month boundaries, including December"""
+        assert month_range("202402") == (date(2024, 2, 1), date(2024, 2, 29))
+        assert month_range("202412") == (date(2024, 12, 1), date(2024, 12, 31))
+
+
+class TestEvaluatorRollups:
+    """Test ModelEvaluator analysis on top of the rollups"""
+
+    def test_analyze_month_and_range(self, tmp_path):
+        """Test monthly and date-range analysis from legacy and new logs"""
+        (tmp_path / "production_log_202401.jsonl").write_text(
+            json.dumps(log_entry("2024-01-31", corrected_fields=["year"], rating=5)) + "\n"
+        )
+        evaluator = ModelEvaluator(results_dir=str(tmp_path), sink=RecordSink())
+        evaluator.metrics.add_entries([log_entry("2024-02-01"), log_entry("2024-02-02", model_id="ft:b")])
+
+        january = evaluator.analyze_production_logs(month="202401")
+        assert january["total_predictions"] == 1
+        assert january["correction_rate"] == 1.0
+        assert january["average_user_rating"] == 5
+
+        span = evaluator.analyze_production_logs(
+            model_id="ft:a", start_date=date(2024, 1, 15), end_date=date(2024, 2, 15)
+        )
+        assert span["total_predictions"] == 2
+        assert span["accuracy_rate"] == 0.5
+
+        assert "error" in evaluator.analyze_production_logs(month="202312")
+
+    def test_tracking_updates_rollups(self, tmp_path):
+        """Test tracked predictions are rolled up as they are logged"""
+        evaluator = ModelEvaluator(results_dir=str(tmp_path), sink=RecordSink())
+
+        evaluator.track_production_performance({"year": "2011"}, {"year": "2012"}, user_rating=3, model_id="ft:a")
+
+        analysis = evaluator.analyze_production_logs(model_id="ft:a")
+        assert analysis["total_predictions"] == 1
+        assert analysis["field_corrections"] == {"year": 1}
+        # Restarting does not backfill the same log again
+        assert ModelEvaluator(results_dir=str(tmp_path)).analyze_production_logs()["total_predictions"] == 1
@@ -0,0 +1,169 @@
+"""
+Tests for Write-Behind Record Sink
+
+Run with: pytest tests/test_record_sink.py
+"""
+
+import json
+import asyncio
+import threading
+import pytest
+from ml.model_evaluator import ModelEvaluator
+from ml.record_sink import _STOP, JsonlFile, RecordSink
+from ml.training_data_collector import TrainingDataCollector
+
+
+class RecordingTarget:
+    """Target that remembers each flushed batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def write_batch(self, records):
+        self.batches.append(list(records))
+
+
+class TestRecordSink:
+    """Test batching, flushing and atomic JSONL appends"""
+
+    @pytest.mark.asyncio
+    async def test_flushes_full_batches(self):
+        """Test records are written in batches of max_batch"""
+        sink = RecordSink(max_batch=4, flush_interval=10)
+        target = RecordingTarget()
+        await sink.start()
+
+        for i in range(8):
+            sink.submit(target, i)
+        await asyncio.sleep(0.05)
+
+        assert target.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+        await sink.stop()
+
+    @pytest.mark.asyncio
+    async def test_flushes_partial_batch_after_interval(self):
+        """Test a partial batch waits at most flush_interval"""
+        sink = RecordSink(max_batch=100, flush_interval=0.05)
+        target = RecordingTarget()
+        await sink.start()
+
+        sink.submit(target, "a")
+        sink.submit(target, "b")
+        await asyncio.sleep(0.01)
+        assert target.batches == []
+
+        await asyncio.sleep(0.1)
+        assert target.batches == [["a", "b"]]
+        await sink.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self):
+        """Test shutdown flushes everything still queued"""
+        sink = RecordSink(max_batch=100, flush_interval=60)
+        first, second = RecordingTarget(), RecordingTarget()
+        await sink.start()
+
+        for i in range(5):
+            sink.submit(first if i % 2 else second, i)
+        await sink.stop()
+
+        assert first.batches == [[1, 3]]
+        assert second.batches == [[0, 2, 4]]
+        assert sink.stats()["flushed"] == 5
+        assert not sink.running
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_records_queued_behind_stop_marker(self):
+        """Test records that arrive after the stop marker are written, not dropped"""
+        sink = RecordSink(max_batch=100, flush_interval=60)
+        target = RecordingTarget()
+        await sink.start()
+
+        sink.submit(target, "before")
+        sink._queue.put_nowait((_STOP, None))
+        sink.submit(target, "behind stop")
+        await sink.stop()
+        sink._enqueue(target, "handed over late")
+
+        assert [record for batch in target.batches for record in batch] == ["before", "behind stop", "handed over late"]
+        assert sink.stats()["flushed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_submit_from_worker_thread(self):
+        """Test records submitted off the event loop are still batched"""
+        sink = RecordSink(max_batch=100, flush_interval=0.01)
+        target = RecordingTarget()
+        await sink.start()
+
+        await asyncio.to_thread(sink.submit, target, "threaded")
+        await sink.stop()
+
+        assert target.batches == [["threaded"]]
+        assert sink.stats()["direct_writes"] == 0
+
+    def test_writes_directly_when_not_running(self):
+        """Test scripts without an event loop still persist records"""
+        sink = RecordSink()
+        target = RecordingTarget()
+
+        assert sink.submit(target, {"a": 1}) is True
+        assert target.batches == [[{"a": 1}]]
+
+    @pytest.mark.asyncio
+    async def test_queue_overflow_writes_directly(self):
+        """Test a full queue applies back-pressure instead of dropping records"""
+        sink = RecordSink(max_batch=100, flush_interval=60, max_queue=2)
+        target = RecordingTarget()
+        await sink.start()
+
+        for i in range(4):
+            sink.submit(target, i)
+
+        assert sink.stats()["direct_writes"] == 2
+        await sink.stop()
+        assert sorted(r for batch in target.batches for r in batch) == [0, 1, 2, 3]
+
+    def test_concurrent_jsonl_writers_never_interleave(self, tmp_path):
+        """Test separate writers appending large lines keep every line whole"""
+        path = tmp_path / "log.jsonl"
+        payload = "x" * 100_000
+
+        def writer(name):
+            target = JsonlFile(path)
+            for i in range(20):
+                target.write_batch([{"writer": name, "i": i, "payload": payload}])
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 80
+        assert all(json.loads(line)["payload"] == payload for line in lines)
+
+
+class TestSinkIntegration:
+    """Test collectors writing through the sink"""
+
+    @pytest.mark.asyncio
+    async def test_training_samples_and_production_logs(self, tmp_path):
+        """Test samples and logs land after the sink flushes"""
+        sink = RecordSink(max_batch=50, flush_interval=60)
+        collector = TrainingDataCollector(data_dir=str(tmp_path / "training"), sink=sink)
+        evaluator = ModelEvaluator(results_dir=str(tmp_path / "results"), sink=sink)
+        await sink.start()
+
+        for i in range(3):
+            collector.collect_card_identification_sample(f"OCR {i}", None, {"player": f"P{i}"})
+            evaluator.track_production_performance({"player": f"P{i}"}, model_id="ft:test")
+        assert collector.get_dataset_stats()["card_identification"] == 0
+
+        await sink.stop()
+
+        assert collector.get_dataset_stats()["card_identification"] == 3
+        analysis = evaluator.analyze_production_logs(model_id="ft:test")
+        assert analysis["total_predictions"] == 3
+        # Training store, production log file and daily rollups
+        assert sink.stats()["batches"] == 3
@@ -0,0 +1,143 @@
+"""
+Tests for the fast JSON response path
+
+Run with: pytest tests/test_serialization.py
+"""
+
+import gzip
+import json
+import pytest
+from datetime import datetime, timezone
+from services import serialization
+from services.serialization import dumps, etag_matches, json_response, market_snapshot_payload, sse_event
+from services.market_data import CompData, MarketSnapshot
+
+
+def make_snapshot(num_comps: int = 15) -> MarketSnapshot:
+    return MarketSnapshot(
+        source="ebay",
+        floor=90.0,
+        average=120.5,
+        ceiling=180.0,
+        listings_count=num_comps,
+        comps=[
+            CompData(
+                title=f"Mike Trout 2011 Topps Update PSA 10 #{i}",
+                price=100.0 + i,
+                sold_date=datetime(2024, 5, 1, 12, i, 30, 123456, tzinfo=timezone.utc),
+                condition="Graded",
+                grade="PSA 10",
+                url=f"https://www.ebay.com/itm/{i}",
+                source="ebay",
+            )
+            for i in range(num_comps)
+        ],
+        last_updated=datetime(2024, 5, 2, 8, 0, 0),
+        confidence="high",
+    )
+
+
+def legacy_payload(snapshot: MarketSnapshot) -> dict:
+    """Response dict as /market built it before the fast path"""
+    return {
+        "source": snapshot.source,
+        "currency": snapshot.currency,
+        "floor": snapshot.floor,
+        "average": snapshot.average,
+        "ceiling": snapshot.ceiling,
+        "listings_count": snapshot.listings_count,
+        "confidence": snapshot.confidence,
+        "last_updated": snapshot.last_updated.isoformat(),
+        "comps": [
+            {
+                "title": c.title,
+                "price": c.price,
+                "sold_date": c.sold_date.isoformat(),
+                "condition": c.condition,
+                "grade": c.grade,
+                "url": c.url,
+                "source": c.source,
+            }
+            for c in snapshot.comps[:10]
+        ],
+    }
+
+
+class TestSerialization:
+    """Test encoding and compression of API responses"""
+
+    def test_market_payload_matches_legacy_format(self):
+        """Test the fast path produces the same JSON document as before"""
+        snapshot = make_snapshot()
+
+        decoded = json.loads(dumps(market_snapshot_payload(snapshot, comps_limit=10)))
+
+        assert decoded == legacy_payload(snapshot)
+
+    def test_stdlib_fallback(self, monkeypatch):
+        """Test encoding without orjson installed"""
+        snapshot = make_snapshot()
+        monkeypatch.setattr(serialization, "orjson", None)
+
+        decoded = json.loads(dumps(market_snapshot_payload(snapshot)))
+
+        assert decoded == legacy_payload(snapshot)
+
+    def test_gzip_when_accepted(self):
+        """Test large bodies are gzipped for clients that accept it"""
+        body = dumps(market_snapshot_payload(make_snapshot()))
+
+        response = json_response(body, accept_encoding="gzip, deflate", min_compress_bytes=100)
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert gzip.decompress(response.body) == body
+
+    def test_weighted_gzip_accepted(self):
+        """Test a non-zero q weight still accepts the coding"""
+        body = dumps(market_snapshot_payload(make_snapshot()))
+
+        response = json_response(body, accept_encoding="br;q=0, gzip; q=0.5", min_compress_bytes=100)
+
+        assert response.headers["content-encoding"] == "gzip"
+
+    @pytest.mark.parametrize("accept_encoding", [
+        None, "identity", "gzip;q=0", "gzip;q=0.0", "gzip; q=0", "gzip;Q=0.000", "gzip;q=abc", "br;q=0, gzip ; q = 0",
+    ])
+    def test_uncompressed(self, accept_encoding):
+        """Test bodies are sent as-is when compression is not accepted"""
+        body = dumps({"ok": True})
+
+        response = json_response(body, accept_encoding=accept_encoding, min_compress_bytes=0)
+
+        assert "content-encoding" not in response.headers
+        assert response.body == body
+
+    def test_small_bodies_not_compressed(self):
+        """Test bodies under the threshold skip compression"""
+        body = dumps({"ok": True})
+
+        response = json_response(body, accept_encoding="gzip")
+
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.parametrize("header, expected", [
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('W/"xyz", W/"abc"', True),
+        ("*", True),
+        ('W/"xyz"', False),
+        (None, False),
+    ])
+    def test_etag_matches(self, header, expected):
+        """Test weak If-None-Match comparison"""
+        assert etag_matches(header, 'W/"abc"') is expected
+
+    def test_sse_event(self):
+        """Test server-sent event framing"""
+        frame = sse_event("title", {"title": "Trout \"RC\"\nPSA 10"})
+
+        assert frame.startswith(b"event: title\ndata: ")
+        assert frame.endswith(b"\n\n")
+        assert frame.count(b"\n") == 3  # newlines in data stay JSON-escaped
+        assert json.loads(frame.split(b"data: ", 1)[1]) == {"title": "Trout \"RC\"\nPSA 10"}
@@ -0,0 +1,159 @@
+"""
+Tests for Fine-Tuning Token Counting
+
+Run with: pytest tests/test_token_counter.py
+"""
+
+import gzip
+import json
+import pytest
+from ml.finetuning_export import export_samples
+from ml.finetuning_manager import FineTuningManager
+from ml.token_counter import TokenCounter, count_messages, encoding_for_model, get_token_counter
+
+
+def sample(content: str, name=None) -> dict:
+    user = {"role": "user", "content": content}
+    if name:
+        user["name"] = name
+    return {"messages": [
+        {"role": "system", "content": "You identify sports cards."},
+        user,
+        {"role": "assistant", "content": json.dumps({"player": content})},
+    ]}
+
+
+def write_file(path, samples, compress=False):
+    lines = "".join(json.dumps(s) + "\n" for s in samples)
+    if compress:
+        with gzip.open(path, "wt") as f:
+            f.write(lines)
+    else:
+        path.write_text(lines)
+    return path
+
+
+class TestTokenCounter:
+    """Test per-sample counts, caching, parallel chunks and reports"""
+
+    def test_counts_chat_format(self):
+        """Test content, role and name tokens plus message and reply overhead"""
+        messages = sample("MIKE TROUT 2011 TOPPS UPDATE", name="scanner")["messages"]
+        count = count_messages(messages, "approximate")
+
+        text = sum(len(value) // 4 for message in messages for value in message.values())
+        assert count == 3 + 3 * len(messages) + text + 1
+        assert encoding_for_model("ft:gpt-4o-mini-2024-07-18:org:card-id:x") == "o200k_base"
+        assert encoding_for_model("gpt-3.5-turbo") == "cl100k_base"
+
+    def test_exact_counts_match_tiktoken(self):
+        """Test message content is tokenized with the model's encoding"""
+        tiktoken = pytest.importorskip("tiktoken")
+        try:
+            encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            pytest.skip("o200k_base encoding files not available")
+        messages = [{"role": "user", "content": "2011 Topps Update #US175 Mike Trout RC"}]
+
+        expected = 3 + 3 + len(encoding.encode("user")) + len(encoding.encode(messages[0]["content"]))
+        assert count_messages(messages, "o200k_base") == expected
+
+    def test_file_report_distribution_and_context_limit(self, tmp_path):
+        """Test totals, percentiles, over-limit samples and malformed lines"""
+        counter = TokenCounter(workers=1)
+        counter.context_limit = 200
+        path = tmp_path / "train.jsonl"
+        write_file(path, [sample("TROUT"), sample("OHTANI " * 200), sample("JUDGE")])
+        with open(path, "a") as f:
+            f.write("\n{not json\n")
+
+        report = counter.count_file(str(path))
+
+        assert report["samples"] == 3
+        assert report["total_tokens"] == sum(
+            count_messages(s["messages"], counter.encoding_name) for s in [sample("TROUT"), sample("OHTANI " * 200), sample("JUDGE")]
+        )
+        assert report["over_context_limit"] == 1
+        assert report["over_context_limit_samples"] == [2]
+        assert report["invalid_samples"] == [4]
+        assert report["distribution"]["max"] > 200 > report["distribution"]["p50"]
+
+    def test_malformed_messages_are_invalid_samples(self, tmp_path):
+        """Test non-object messages mark their line invalid instead of aborting the count"""
+        path = write_file(tmp_path / "train.jsonl", [
+            sample("TROUT"),
+            {"messages": ["not a message"]},
+            {"messages": "not a list"},
+            sample("JUDGE"),
+        ])
+
+        inline = TokenCounter(workers=1).count_file(str(path))
+        parallel = TokenCounter(workers=2, chunk_lines=1, parallel_min_bytes=0).count_file(str(path))
+
+        assert inline["samples"] == parallel["samples"] == 2
+        assert inline["invalid_samples"] == parallel["invalid_samples"] == [2, 3]
+
+    def test_parallel_chunks_match_inline_count(self, tmp_path):
+        """Test a file split across worker processes counts the same as inline"""
+        samples = [sample(f"PLAYER {i} " * (i % 7 + 1)) for i in range(300)]
+        path = write_file(tmp_path / "train.jsonl.gz", samples, compress=True)
+
+        inline = TokenCounter(workers=1).count_file(str(path))
+        parallel = TokenCounter(workers=2, chunk_lines=40, parallel_min_bytes=0).count_file(str(path))
+
+        assert parallel["parallel"] and not inline["parallel"]
+        assert parallel["total_tokens"] == inline["total_tokens"]
+        assert parallel["distribution"] == inline["distribution"]
+
+    def test_cache_skips_already_counted_samples(self, tmp_path):
+        """Test re-counting a grown file only tokenizes the new samples"""
+        counter = TokenCounter(workers=1)
+        path = write_file(tmp_path / "train.jsonl", [sample(f"PLAYER {i}") for i in range(50)])
+        first = counter.count_file(str(path))
+
+        write_file(path, [sample(f"PLAYER {i}") for i in range(60)])
+        second = counter.count_file(str(path))
+
+        assert counter.stats()["cache_hits"] == 50
+        assert counter.stats()["cache_misses"] == 60
+        assert second["total_tokens"] > first["total_tokens"]
+
+
+class TestEstimateCost:
+    """Test FineTuningManager.estimate_cost on top of the counter"""
+
+    def test_estimate_needs_no_api_key(self, tmp_path, monkeypatch):
+        """Test estimates are counted locally without constructing an OpenAI client"""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        path = write_file(tmp_path / "train.jsonl", [sample("TROUT"), sample("JUDGE")])
+
+        estimate = FineTuningManager.estimate_cost(str(path), epochs=2)
+
+        assert estimate["samples"] == 2
+        assert estimate["estimated_tokens"] == estimate["tokens_per_epoch"] * 2
+
+    def test_estimate_reports_tokens_and_distribution(self, tmp_path):
+        """Test cost is based on counted tokens times epochs"""
+        manager = FineTuningManager(api_key="test-key")
+        path = write_file(tmp_path / "train.jsonl", [sample("TROUT"), sample("JUDGE")])
+
+        estimate = manager.estimate_cost(str(path), epochs=4)
+
+        assert estimate["samples"] == 2
+        assert estimate["estimated_tokens"] == estimate["tokens_per_epoch"] * 4
+        assert estimate["over_context_limit"] == 0
+        assert set(estimate["token_distribution"]) == {"min", "max", "mean", "p50", "p90", "p99"}
+
+    def test_estimate_after_export_is_served_from_cache(self, tmp_path):
+        """Test estimating a just-exported file reuses the export's token counts"""
+        manager = FineTuningManager(api_key="test-key")
+        samples = [sample(f"EXPORTED PLAYER {i}", name="scanner" if i % 2 else None) for i in range(25)]
+        export = export_samples(iter(samples), tmp_path / "export.jsonl.gz", compress=True)
+        counter = get_token_counter()
+        before = counter.stats()
+
+        estimate = manager.estimate_cost(export["train"]["file_path"])
+
+        assert counter.stats()["cache_hits"] - before["cache_hits"] == 25
+        assert counter.stats()["cache_misses"] == before["cache_misses"]
+        assert estimate["tokens_per_epoch"] == export["train"]["tokens"]
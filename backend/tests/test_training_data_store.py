@@ -0,0 +1,164 @@
+"""
+Tests for Training Data Store
+
+Run with: pytest tests/test_training_data_store.py
+"""
+
+import json
+import multiprocessing
+from ml.columnar_archive import write_archive
+from ml.training_data_collector import TrainingDataCollector
+from ml.training_data_store import TrainingDataStore, confidence_bucket
+
+
+def identification_sample(player: str, confidence: float = 1.0, source: str = "validated_scan") -> dict:
+    return {
+        "messages": [
+            {"role": "user", "content": f"OCR Text:\n{player}"},
+            {"role": "assistant", "content": json.dumps({"player": player})},
+        ],
+        "metadata": {
+            "collected_at": "2024-01-01T00:00:00",
+            "confidence_score": confidence,
+            "source": source,
+        },
+    }
+
+
+def import_in_process(db_path: str, path: str, archive: bool) -> int:
+    """Worker process importing one file, like a uvicorn worker on startup"""
+    store = TrainingDataStore(db_path)
+    if archive:
+        return store.import_archive("card_identification", path, batch_size=50)
+    return store.import_jsonl("card_identification", path, batch_size=50)
+
+
+def import_concurrently(db_path, path, archive=False, workers=4):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers) as pool:
+        return pool.starmap(import_in_process, [(str(db_path), str(path), archive)] * workers)
+
+
+class TestTrainingDataStore:
+    """Test indexed sample storage"""
+
+    def test_counters_track_inserts(self, tmp_path):
+        """Test stats come from counters maintained on insert"""
+        store = TrainingDataStore(str(tmp_path / "samples.db"))
+        store.add_many("card_identification", [
+            identification_sample("Mike Trout", 1.0),
+            identification_sample("Shohei Ohtani", 0.9, source="user_correction"),
+            identification_sample("Aaron Judge", 0.5),
+        ])
+
+        stats = store.stats()["card_identification"]
+
+        assert stats["count"] == 3
+        assert stats["by_source"] == {"validated_scan": 2, "user_correction": 1}
+        assert stats["by_confidence"] == {"1.0": 1, "0.9": 1, "0.5": 1}
+        assert store.count("card_identification") == 3
+        assert store.count("card_identification", min_confidence=0.8) == 2
+        assert store.count("card_identification", source="user_correction") == 1
+        assert store.count("listing_generation") == 0
+
+    def test_iter_samples_filters_and_batches(self, tmp_path):
+        """Test filtered iteration keeps insertion order across batches"""
+        store = TrainingDataStore(str(tmp_path / "samples.db"))
+        store.add_many("card_identification", [
+            identification_sample(f"Player {i}", 0.9 if i % 2 else 0.6) for i in range(7)
+        ])
+
+        players = [
+            json.loads(sample["messages"][1]["content"])["player"]
+            for sample in store.iter_samples("card_identification", min_confidence=0.8, batch_size=2)
+        ]
+
+        assert players == ["Player 1", "Player 3", "Player 5"]
+
+    def test_legacy_import_is_incremental(self, tmp_path):
+        """Test JSONL lines are imported once, including lines appended later"""
+        legacy = tmp_path / "card_identification.jsonl"
+        legacy.write_text("".join(json.dumps(identification_sample(f"P{i}")) + "\n" for i in range(3)))
+        store = TrainingDataStore(str(tmp_path / "samples.db"))
+
+        assert store.import_jsonl("card_identification", legacy) == 3
+        assert store.import_jsonl("card_identification", legacy) == 0
+
+        with open(legacy, "a") as f:
+            f.write(json.dumps(identification_sample("P3")) + "\n")
+            f.write('{"partial": ')
+
+        assert store.import_jsonl("card_identification", legacy) == 1
+        assert store.count("card_identification") == 4
+
+    def test_concurrent_jsonl_imports_import_each_line_once(self, tmp_path):
+        """Test workers importing the same legacy file at startup never duplicate samples"""
+        legacy = tmp_path / "card_identification.jsonl"
+        legacy.write_text("".join(json.dumps(identification_sample(f"P{i}")) + "\n" for i in range(2000)))
+
+        imported = import_concurrently(tmp_path / "samples.db", legacy)
+
+        store = TrainingDataStore(str(tmp_path / "samples.db"))
+        assert sum(imported) == 2000
+        assert store.count("card_identification") == 2000
+        assert store.stats()["card_identification"]["count"] == 2000
+
+    def test_concurrent_archive_imports_import_each_row_once(self, tmp_path):
+        """Test workers importing the same archive into a fresh store never duplicate samples"""
+        archive = tmp_path / "card_identification.20240101_000000.cols.npz"
+        write_archive([identification_sample(f"P{i}") for i in range(2000)], archive)
+
+        imported = import_concurrently(tmp_path / "samples.db", archive, archive=True)
+
+        store = TrainingDataStore(str(tmp_path / "samples.db"))
+        assert sum(imported) == 2000
+        assert store.count("card_identification") == 2000
+        assert store.import_offset(archive) == 2000
+
+    def test_confidence_bucket(self):
+        """Test histogram buckets are tenths, clamped to 0-10"""
+        assert [confidence_bucket(c) for c in (0.0, 0.29, 0.3, 0.95, 1.0, 1.2)] == [0, 2, 3, 9, 10, 10]
+
+
+class TestTrainingDataCollector:
+    """Test the collector on top of the store"""
+
+    def test_collect_stats_and_export(self, tmp_path):
+        """Test collected samples show up in stats and confidence-filtered exports"""
+        collector = TrainingDataCollector(data_dir=str(tmp_path))
+        collector.collect_card_identification_sample("TROUT 2011", None, {"player": "Mike Trout"}, confidence_score=1.0)
+        collector.collect_card_identification_sample("OHTANI", None, {"player": "Shohei Ohtani"}, confidence_score=0.5)
+        collector.collect_user_correction(
+            original_scan_data={"ocr_text": "JUDGE"},
+            corrected_data={"player": "Aaron Judge"},
+            user_id="user1",
+            correction_fields=["player"],
+        )
+
+        stats = collector.get_dataset_stats()
+
+        assert stats["card_identification"] == 3
+        assert stats["user_corrections"] == 1
+        assert stats["total_samples"] == 3
+        assert stats["breakdown"]["card_identification"]["by_confidence"] == {"1.0": 1, "0.9": 1, "0.5": 1}
+
+        export = collector.export_dataset("card_identification", min_confidence=0.8)
+
+        assert export["sample_count"] == 2
+        with open(export["file_path"]) as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 2 and set(lines[0]) == {"messages"}
+
+    def test_legacy_files_imported_on_startup(self, tmp_path):
+        """Test existing JSONL corpora carry over into the store"""
+        (tmp_path / "listing_generation.jsonl").write_text(json.dumps({
+            "messages": [],
+            "metadata": {"collected_at": "2024-02-01T00:00:00", "source": "generated_listing", "platform": "ebay"},
+        }) + "\n")
+
+        collector = TrainingDataCollector(data_dir=str(tmp_path))
+        assert collector.get_dataset_stats()["listing_generation"] == 1
+
+        # A restart does not import the same lines again
+        collector = TrainingDataCollector(data_dir=str(tmp_path))
+        assert collector.get_dataset_stats()["listing_generation"] == 1
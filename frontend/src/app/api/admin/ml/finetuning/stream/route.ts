@@ -0,0 +1,37 @@
+import { NextResponse } from "next/server";
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_SCAN_URL?.replace("/scan", "") || "http://localhost:8000";
+
+export const dynamic = "force-dynamic";
+
+export async function GET(request: Request) {
+  try {
+    const response = await fetch(`${BACKEND_URL}/ml/finetuning/stream`, {
+      headers: { Accept: "text/event-stream" },
+      signal: request.signal,
+      cache: "no-store",
+    });
+
+    if (!response.ok || !response.body) {
+      return NextResponse.json(
+        { error: "Failed to open job stream" },
+        { status: response.status }
+      );
+    }
+
+    // Pass the event stream through unbuffered
+    return new Response(response.body, {
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+      },
+    });
+  } catch (error) {
+    console.error("Fine-tuning stream error:", error);
+    return NextResponse.json(
+      { error: "Server error" },
+      { status: 500 }
+    );
+  }
+}
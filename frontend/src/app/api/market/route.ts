@@ -32,3 +32,45 @@ export async function POST(req: NextRequest) {
   const data = await res.json();
   return NextResponse.json(data, { status: 200 });
 }
+
+export async function GET(req: NextRequest) {
+  const user = await getCurrentUserServer();
+  if (!user) {
+    return NextResponse.json(
+      { error: "Not authenticated" },
+      { status: 401 }
+    );
+  }
+
+  // Forward the query and the browser's validator so unchanged cards come back as 304
+  const headers: Record<string, string> = {};
+  const ifNoneMatch = req.headers.get("if-none-match");
+  if (ifNoneMatch) headers["If-None-Match"] = ifNoneMatch;
+
+  const res = await fetch(`${BACKEND_MARKET_URL}?${req.nextUrl.searchParams.toString()}`, {
+    headers,
+    cache: "no-store",
+  });
+
+  const cacheHeaders: Record<string, string> = {};
+  const etag = res.headers.get("etag");
+  const cacheControl = res.headers.get("cache-control");
+  if (etag) cacheHeaders["ETag"] = etag;
+  if (cacheControl) cacheHeaders["Cache-Control"] = cacheControl;
+
+  if (res.status === 304) {
+    return new NextResponse(null, { status: 304, headers: cacheHeaders });
+  }
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    console.error("Backend market error:", res.status, text);
+    return NextResponse.json(
+      { error: "Failed to fetch market data" },
+      { status: 500 }
+    );
+  }
+
+  const data = await res.json();
+  return NextResponse.json(data, { status: 200, headers: cacheHeaders });
+}
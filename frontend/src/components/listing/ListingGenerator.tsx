@@ -35,11 +35,11 @@ export default function ListingGenerator({ card }: Props) {
       setError(null);
       setListing(null);
 
-      const url = process.env.NEXT_PUBLIC_BACKEND_SCAN_URL?.replace("/scan", "/generate-listing") || "/api/generate-listing";
+      const url = process.env.NEXT_PUBLIC_BACKEND_SCAN_URL?.replace("/scan", "/generate-listing/stream") || "/api/generate-listing/stream";
 
       const res = await fetch(url, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
         body: JSON.stringify({
           player: card.player,
           set_name: card.set_name,
@@ -52,12 +52,63 @@ export default function ListingGenerator({ card }: Props) {
         }),
       });
 
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         throw new Error("Failed to generate listing");
       }
 
-      const data = await res.json();
-      setListing(data);
+      // Server-sent events: title once complete, description deltas, then the final listing
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let finished = false;
+
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          const frame = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "title") {
+            setListing({
+              title: payload.title,
+              description: "",
+              keywords: [],
+              platform,
+              character_counts: { title: payload.title.length, description: 0, title_max: payload.title_max },
+            });
+          } else if (event === "description") {
+            setListing((prev) =>
+              prev && {
+                ...prev,
+                description: prev.description + payload.delta,
+                character_counts: {
+                  ...prev.character_counts,
+                  description: prev.description.length + payload.delta.length,
+                },
+              }
+            );
+          } else if (event === "done") {
+            setListing(payload);
+            finished = true;
+          } else if (event === "error") {
+            throw new Error(payload.detail);
+          }
+        }
+      }
+
+      if (!finished) {
+        throw new Error("Listing stream ended early");
+      }
     } catch (err) {
       console.error(err);
       setError("Failed to generate listing. Please try again.");
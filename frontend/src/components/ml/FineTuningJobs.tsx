@@ -12,8 +12,17 @@ interface Job {
   trained_tokens: number | null;
 }
 
+interface JobEvent {
+  job_id: string;
+  id: string;
+  created_at: number;
+  level: string;
+  message: string;
+}
+
 export default function FineTuningJobs() {
   const [jobs, setJobs] = useState<Job[]>([]);
+  const [latestEvents, setLatestEvents] = useState<Record<string, JobEvent>>({});
   const [isLoading, setIsLoading] = useState(true);
   const [isCreating, setIsCreating] = useState(false);
   const [showCreateForm, setShowCreateForm] = useState(false);
@@ -25,9 +34,39 @@ export default function FineTuningJobs() {
   const [suffix, setSuffix] = useState("slabstak");
 
   useEffect(() => {
-    fetchJobs();
-    const interval = setInterval(fetchJobs, 30000); // Refresh every 30 seconds
-    return () => clearInterval(interval);
+    // The backend watches jobs and pushes changes; no polling from the browser
+    const source = new EventSource("/api/admin/ml/finetuning/stream");
+
+    source.addEventListener("snapshot", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setJobs(data.jobs || []);
+      setIsLoading(false);
+    });
+
+    source.addEventListener("job", (event) => {
+      const job: Job = JSON.parse((event as MessageEvent).data);
+      setJobs((current) => {
+        const index = current.findIndex((existing) => existing.job_id === job.job_id);
+        if (index === -1) {
+          return [job, ...current];
+        }
+        const next = [...current];
+        next[index] = { ...next[index], ...job };
+        return next;
+      });
+    });
+
+    source.addEventListener("job_event", (event) => {
+      const data: JobEvent = JSON.parse((event as MessageEvent).data);
+      setLatestEvents((current) => ({ ...current, [data.job_id]: data }));
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects on its own; show the last known jobs meanwhile
+      setIsLoading(false);
+    };
+
+    return () => source.close();
   }, []);
 
   const fetchJobs = async () => {
@@ -68,7 +107,6 @@ export default function FineTuningJobs() {
         alert(`Fine-tuning job created: ${data.job_id}`);
         setShowCreateForm(false);
         setTrainingFileId("");
-        fetchJobs();
       } else {
         const error = await response.json();
         alert(`Failed to create job: ${error.error}`);
@@ -311,8 +349,13 @@ export default function FineTuningJobs() {
                     <td className="px-6 py-4 whitespace-nowrap text-sm font-mono text-gray-900">
                       {job.job_id.substring(0, 20)}...
                     </td>
-                    <td className="px-6 py-4 whitespace-nowrap">
+                    <td className="px-6 py-4">
                       {getStatusBadge(job.status)}
+                      {latestEvents[job.job_id] && (
+                        <p className="mt-1 text-xs text-gray-500">
+                          {latestEvents[job.job_id].message}
+                        </p>
+                      )}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                       {job.model}
@@ -347,7 +390,7 @@ export default function FineTuningJobs() {
           <li>• Jobs typically take 10-30 minutes to complete</li>
           <li>• Cost: ~$3 per 1M tokens for GPT-4o-mini training</li>
           <li>• When a job succeeds, copy the model ID to the Models tab</li>
-          <li>• Check job status in OpenAI dashboard for detailed logs</li>
+          <li>• Job status and training progress update live</li>
         </ul>
       </div>
     </div>
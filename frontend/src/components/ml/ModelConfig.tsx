@@ -15,6 +15,8 @@ interface ModelConfig {
     using_finetuned: boolean;
     active_model: string;
   };
+  version: number;
+  updated_at: string | null;
 }
 
 export default function ModelConfig() {
@@ -66,12 +68,15 @@ export default function ModelConfig() {
           listing_generation: {
             model_id: listingModel || null,
             enabled: listingEnabled
-          }
+          },
+          // Rejected if someone else changed the configuration since it was loaded
+          expected_version: config?.version
         })
       });
 
       if (response.ok) {
-        alert("Model configuration saved!\nRestart the backend to apply changes.");
+        const data = await response.json();
+        alert(`Model configuration applied (version ${data.version}).`);
         fetchConfig();
       } else {
         const error = await response.json();
@@ -100,6 +105,10 @@ export default function ModelConfig() {
         <h3 className="text-lg font-semibold text-gray-900 mb-4">
           Currently Active Models
         </h3>
+        <p className="text-xs text-gray-500 mb-4 -mt-2">
+          Configuration version {config.version}
+          {config.updated_at && ` · updated ${new Date(config.updated_at + "Z").toLocaleString()}`}
+        </p>
 
         <div className="space-y-4">
           <div className="p-4 bg-gray-50 rounded-lg">
@@ -265,8 +274,8 @@ export default function ModelConfig() {
         </h4>
         <ol className="text-sm text-orange-800 space-y-2 list-decimal list-inside">
           <li>Save the configuration above</li>
-          <li>The configuration will be written to <code className="bg-orange-100 px-1 py-0.5 rounded">backend/.env</code></li>
-          <li>Restart the backend service to apply changes</li>
+          <li>New models are warmed up first; an unknown model ID is rejected</li>
+          <li>All backend workers switch within a few seconds, no restart needed</li>
           <li>Test the models in production with A/B testing (gradual rollout recommended)</li>
           <li>Monitor the Production Metrics tab for performance</li>
         </ol>
@@ -282,8 +291,7 @@ export default function ModelConfig() {
         </p>
         <ol className="text-sm text-blue-800 space-y-1 list-decimal list-inside">
           <li>Uncheck the "Enable fine-tuned model" checkbox</li>
-          <li>Save configuration</li>
-          <li>Restart backend - it will automatically fall back to base model</li>
+          <li>Save configuration - new requests fall back to the base model immediately</li>
           <li>Review training data and retrain with better samples</li>
         </ol>
       </div>
@@ -15,11 +15,15 @@ export async function fetchMarketSnapshot(params: {
   year: number | null;
   grade_estimate: string | null;
 }): Promise<MarketSnapshot> {
-  const res = await fetch("/api/market", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(params),
+  // GET so the browser can cache the snapshot and revalidate it with its ETag
+  const query = new URLSearchParams({
+    player: params.player,
+    set_name: params.set_name,
   });
+  if (params.year !== null) query.set("year", String(params.year));
+  if (params.grade_estimate) query.set("grade_estimate", params.grade_estimate);
+
+  const res = await fetch(`/api/market?${query.toString()}`);
 
   if (!res.ok) {
     const body = await res.json().catch(() => ({}));